@@ -5,5 +5,8 @@ class AuditoriaConfig(AppConfig):
     name = 'auditoria'
     
     def ready(self):
-        # Importar signals para registrarlos
-        import auditoria.signals
+        # Compilar el registro de modelos auditados y conectar sus signals
+        from auditoria.registry import AuditRegistry
+        from auditoria.signals import conectar_signals
+        AuditRegistry.compilar()
+        conectar_signals()
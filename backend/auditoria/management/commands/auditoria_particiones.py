@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from auditoria.services.particiones import ParticionService
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantiene las particiones mensuales de auditoria_auditlog: crea las de los "
+        "próximos meses y desacopla/archiva las que superan la retención."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--adelante', type=int, default=None,
+                            help="Meses a crear por adelantado (default: AUDIT_PARTICIONES_ADELANTE)")
+        parser.add_argument('--retener', type=int, default=None,
+                            help="Meses a conservar en línea; 0 = no retirar (default: AUDIT_RETENCION_MESES)")
+        parser.add_argument('--sin-archivar', action='store_true',
+                            help="Solo desacoplar las particiones viejas (quedan como tablas sueltas)")
+        parser.add_argument('--listar', action='store_true', help="Mostrar las particiones y salir")
+
+    def handle(self, *args, **options):
+        if not ParticionService.disponible():
+            raise CommandError("auditoria_auditlog no está particionada (se requiere PostgreSQL y la migración 0003).")
+
+        if options['listar']:
+            for mes, nombre in sorted(ParticionService.particiones().items()):
+                self.stdout.write(f"{mes:%Y-%m}  {nombre}")
+            return
+
+        resultado = ParticionService.mantener(
+            meses_adelante=options['adelante'],
+            retencion_meses=options['retener'],
+            archivar=not options['sin_archivar'],
+        )
+        for nombre in resultado['creadas']:
+            self.stdout.write(self.style.SUCCESS(f"✅ Creada: {nombre}"))
+        for nombre in resultado['desacopladas']:
+            self.stdout.write(self.style.WARNING(f"📦 Desacoplada: {nombre}"))
+        for ruta in resultado['archivos']:
+            self.stdout.write(self.style.SUCCESS(f"🗄️  Archivada en: {ruta}"))
+        if not any(resultado.values()):
+            self.stdout.write("Sin cambios: particiones al día.")
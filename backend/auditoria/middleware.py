@@ -46,6 +46,7 @@ class AuditMiddleware:
     """
     Middleware para capturar el contexto de la petición (usuario, IP, user-agent)
     y almacenarlo en thread-local storage para que esté disponible en signals.
+    Los AuditLog de la petición se escriben juntos al final (AuditService.lote).
     """
     
     def __init__(self, get_response):
@@ -56,8 +57,11 @@ class AuditMiddleware:
         _thread_locals.request = request
         _thread_locals.user = getattr(request, 'user', None)
         
+        from auditoria.services.audit_service import AuditService
+
         try:
-            response = self.get_response(request)
+            with AuditService.lote():
+                response = self.get_response(request)
         finally:
             # Limpiar el thread-local después de procesar la petición
             if hasattr(_thread_locals, 'request'):
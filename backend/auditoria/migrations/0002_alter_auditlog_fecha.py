@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-17 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='fecha',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, help_text='Fecha y hora de la acción'),
+        ),
+    ]
@@ -0,0 +1,137 @@
+"""
+Particiona auditoria_auditlog por mes (RANGE sobre fecha) en PostgreSQL.
+
+La PK física pasa a ser (id, fecha) porque toda PK de una tabla particionada
+debe incluir la llave de partición; para Django `id` sigue siendo la PK
+(la identidad garantiza que es única). En otros motores el RunPython no
+hace nada.
+"""
+from datetime import date
+
+import django.contrib.postgres.indexes
+import django.utils.timezone
+from django.db import migrations, models
+
+TABLA = 'auditoria_auditlog'
+LEGADO = f'{TABLA}_legacy'
+MESES_ADELANTE = 3
+
+
+def _sumar_meses(fecha, meses):
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _definiciones(cursor, tabla):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [tabla],
+    )
+    llaves = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+        [tabla, tabla],
+    )
+    return llaves, cursor.fetchall()
+
+
+def particionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        llaves, indices = _definiciones(cursor, TABLA)
+        cursor.execute(f'ALTER TABLE "{TABLA}" RENAME TO "{LEGADO}"')
+        cursor.execute(f'ALTER TABLE "{LEGADO}" RENAME CONSTRAINT "{TABLA}_pkey" TO "{LEGADO}_pkey"')
+        for nombre, _ in indices:
+            cursor.execute(f'DROP INDEX "{nombre}"')
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLA}" (LIKE "{LEGADO}" INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE (fecha)'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{TABLA}_pkey" PRIMARY KEY (id, fecha)')
+        cursor.execute(f'CREATE TABLE "{TABLA}_default" PARTITION OF "{TABLA}" DEFAULT')
+
+        cursor.execute(f'SELECT MIN(fecha) FROM "{LEGADO}"')
+        minima = cursor.fetchone()[0]
+        hoy = date.today().replace(day=1)
+        mes = min(minima.date().replace(day=1), hoy) if minima else hoy
+        while mes <= _sumar_meses(hoy, MESES_ADELANTE):
+            siguiente = _sumar_meses(mes, 1)
+            cursor.execute(
+                f'CREATE TABLE "{TABLA}_p{mes.year:04d}_{mes.month:02d}" PARTITION OF "{TABLA}" '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [mes.isoformat(), siguiente.isoformat()],
+            )
+            mes = siguiente
+
+        cursor.execute(f'INSERT INTO "{TABLA}" SELECT * FROM "{LEGADO}"')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLA}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM \"{TABLA}\"), 0) + 1, false)"
+        )
+        cursor.execute(f'DROP TABLE "{LEGADO}"')
+
+        for nombre, definicion in llaves:
+            cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{nombre}" {definicion}')
+        for _, definicion in indices:
+            cursor.execute(definicion)
+
+
+def desparticionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        llaves, indices = _definiciones(cursor, TABLA)
+        cursor.execute(f'ALTER TABLE "{TABLA}" RENAME TO "{LEGADO}"')
+        cursor.execute(f'ALTER TABLE "{LEGADO}" RENAME CONSTRAINT "{TABLA}_pkey" TO "{LEGADO}_pkey"')
+        for nombre, _ in llaves:
+            cursor.execute(f'ALTER TABLE "{LEGADO}" DROP CONSTRAINT "{nombre}"')
+        for nombre, _ in indices:
+            cursor.execute(f'DROP INDEX "{nombre}"')
+
+        cursor.execute(f'CREATE TABLE "{TABLA}" (LIKE "{LEGADO}" INCLUDING DEFAULTS INCLUDING IDENTITY)')
+        cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{TABLA}_pkey" PRIMARY KEY (id)')
+        cursor.execute(f'INSERT INTO "{TABLA}" SELECT * FROM "{LEGADO}"')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLA}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM \"{TABLA}\"), 0) + 1, false)"
+        )
+        cursor.execute(f'DROP TABLE "{LEGADO}" CASCADE')
+
+        for nombre, definicion in llaves:
+            cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{nombre}" {definicion}')
+        for _, definicion in indices:
+            cursor.execute(definicion.replace(' ON ONLY ', ' ON '))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0002_alter_auditlog_fecha'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+        # fecha: BRIN (barato para rangos en tablas enormes) en lugar del btree duplicado
+        migrations.AlterField(
+            model_name='auditlog',
+            name='fecha',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Fecha y hora de la acción'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['fecha'], name='auditoria_fecha_brin'),
+        ),
+        # Historial de un objeto (AuditService.get_logs_for_object): filtro + orden en el índice
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='auditoria_a_content_2f8c97_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['content_type', 'object_id', '-fecha'], name='auditoria_objeto_fecha_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.conf import settings
+from django.utils import timezone
 
 class AuditLog(models.Model):
     """
@@ -86,9 +88,12 @@ class AuditLog(models.Model):
     )
     
     # Timestamp
+    # default (no auto_now_add): conserva la hora de la acción aunque el
+    # registro llegue después desde un sink diferido (auditoria.sinks).
+    # Es la llave de partición mensual (ver auditoria.services.particiones).
     fecha = models.DateTimeField(
-        auto_now_add=True,
-        db_index=True,
+        default=timezone.now,
+        editable=False,
         help_text="Fecha y hora de la acción"
     )
     
@@ -98,10 +103,11 @@ class AuditLog(models.Model):
         ordering = ['-fecha']
         indexes = [
             models.Index(fields=['-fecha']),
+            BrinIndex(fields=['fecha'], name='auditoria_fecha_brin'),
             models.Index(fields=['usuario', '-fecha']),
             models.Index(fields=['content_type', '-fecha']),
             models.Index(fields=['accion', '-fecha']),
-            models.Index(fields=['content_type', 'object_id']),
+            models.Index(fields=['content_type', 'object_id', '-fecha'], name='auditoria_objeto_fecha_idx'),
         ]
         permissions = [
             ("view_audit_logs", "Ver registros de auditoría"),
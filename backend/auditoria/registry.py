@@ -0,0 +1,53 @@
+import logging
+
+from django.apps import apps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuditRegistry:
+    """
+    Registro de modelos auditados, compilado una sola vez al arrancar
+    (AuditoriaConfig.ready) a partir de settings.AUDITED_MODELS y de los
+    modelos registrados con core.models.register_audit.
+    """
+
+    _modelos = frozenset()
+    _registrados = set()
+
+    @classmethod
+    def registrar(cls, model_class):
+        """
+        Agrega un modelo (register_audit). Se llama al importar los modelos,
+        antes de ready(); si llega después, se conecta de inmediato.
+        """
+        cls._registrados.add(model_class)
+        if cls._modelos and model_class not in cls._modelos:
+            cls._modelos = cls._modelos | {model_class}
+            from auditoria.signals import conectar_signals
+            conectar_signals([model_class])
+
+    @classmethod
+    def compilar(cls):
+        """
+        Resuelve settings.AUDITED_MODELS ('app.Model') a clases de modelo.
+        Los modelos inexistentes se registran en el log y se ignoran.
+        """
+        modelos = set(cls._registrados)
+        for model_str in getattr(settings, 'AUDITED_MODELS', []):
+            try:
+                app_label, model_name = model_str.split('.')
+                modelos.add(apps.get_model(app_label, model_name))
+            except (ValueError, LookupError) as e:
+                logger.warning(f"No se pudo cargar el modelo para auditoría: {model_str} - {e}")
+        cls._modelos = frozenset(modelos)
+        return cls._modelos
+
+    @classmethod
+    def modelos(cls):
+        return cls._modelos
+
+    @classmethod
+    def contiene(cls, model_class) -> bool:
+        return model_class in cls._modelos
@@ -1,6 +1,25 @@
+from contextlib import contextmanager
+from functools import partial
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from auditoria.models import AuditLog
+from auditoria.sinks import DatabaseSink, obtener_sink
+import copy
 import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Lote de AuditLog abierto en el hilo actual (ver AuditService.lote)
+_local = threading.local()
+
+
+class _Lote:
+    def __init__(self):
+        self.entradas = []
+        self.activo = True
+
 
 class AuditService:
     """
@@ -13,6 +32,9 @@ class AuditService:
         'password', 'last_login', 'created_at', 'updated_at', 
         'modified_at', 'deleted_at', 'is_deleted'
     ]
+
+    # {modelo: ((name, attname, model_name relacionado o None), ...)}
+    _campos_por_modelo = {}
     
     @staticmethod
     def log_action(
@@ -39,6 +61,23 @@ class AuditService:
         Returns:
             AuditLog: Registro de auditoría creado
         """
+        audit_log = AuditService.preparar(
+            usuario, obj, accion, cambios, ip_address, user_agent, descripcion
+        )
+        audit_log.save()
+        return audit_log
+
+    @staticmethod
+    def preparar(
+        usuario,
+        obj,
+        accion,
+        cambios=None,
+        ip_address=None,
+        user_agent=None,
+        descripcion=""
+    ):
+        """Construye el AuditLog (sin guardar) con los mismos argumentos que log_action."""
         content_type = None
         object_id = None
         object_repr = ""
@@ -51,7 +90,7 @@ class AuditService:
         if user_agent is None:
             user_agent = "System"
             
-        audit_log = AuditLog.objects.create(
+        return AuditLog(
             usuario=usuario,
             accion=accion,
             content_type=content_type,
@@ -62,8 +101,92 @@ class AuditService:
             user_agent=user_agent,
             descripcion=descripcion
         )
-        
-        return audit_log
+
+    @classmethod
+    def log_diferido(cls, **kwargs):
+        """
+        Igual que log_action, pero el registro se escribe al confirmar la
+        transacción (si se revierte, se descarta). Dentro de `lote()` los
+        registros confirmados se acumulan y se entregan juntos al sink al
+        cerrar el lote; fuera de él se entregan al confirmar.
+        """
+        audit_log = cls.preparar(**kwargs)
+        transaction.on_commit(partial(cls._confirmar, audit_log, getattr(_local, 'lote', None)))
+
+    @staticmethod
+    def _confirmar(audit_log, lote):
+        if lote is not None and lote.activo:
+            lote.entradas.append(audit_log)
+        else:
+            AuditService.escribir([audit_log])
+
+    @staticmethod
+    def escribir(entradas):
+        """
+        Entrega AuditLog ya confirmados al sink configurado (settings.AUDIT_SINK).
+        Si el sink falla, se escriben en la tabla para no perder la auditoría.
+        """
+        try:
+            obtener_sink().escribir(entradas)
+        except Exception as e:
+            logger.error(f"Error escribiendo auditoría en el sink, usando la BD: {e}")
+            DatabaseSink().escribir(entradas)
+
+    @staticmethod
+    @contextmanager
+    def lote():
+        """
+        Acumula los AuditLog del bloque (request, tarea) y los escribe juntos.
+
+        Uso:
+            with AuditService.lote():
+                ...  # saves de modelos auditados
+        """
+        anterior = getattr(_local, 'lote', None)
+        actual = _local.lote = _Lote()
+        try:
+            yield actual
+        finally:
+            actual.activo = False
+            _local.lote = anterior
+            if actual.entradas:
+                AuditService.escribir(actual.entradas)
+
+    @classmethod
+    def _campos(cls, model):
+        campos = cls._campos_por_modelo.get(model)
+        if campos is None:
+            campos = tuple(
+                (
+                    field.name,
+                    field.attname,
+                    field.related_model._meta.model_name if field.is_relation else None,
+                )
+                for field in model._meta.concrete_fields
+                if field.name not in cls.EXCLUDED_FIELDS
+            )
+            cls._campos_por_modelo[model] = campos
+        return campos
+
+    @classmethod
+    def snapshot(cls, instance):
+        """
+        Valores crudos de los campos auditables ({name: valor}); las FK se
+        toman por su id (attname) para no cargar el objeto relacionado.
+        Los campos diferidos (only/defer) no se incluyen.
+        """
+        datos = instance.__dict__
+        valores = {}
+        for name, attname, relacionado in cls._campos(type(instance)):
+            if attname not in datos:
+                continue
+            valor = datos[attname]
+            if relacionado and valor is not None:
+                valor = f"{relacionado}:{valor}"
+            elif isinstance(valor, (dict, list)):
+                valor = copy.deepcopy(valor)
+            valores[name] = valor
+        return valores
     
     @staticmethod
     def calculate_diff(old_instance, new_instance):
@@ -71,7 +194,8 @@ class AuditService:
         Calcula las diferencias entre dos instancias del mismo modelo.
         
         Args:
-            old_instance: Instancia anterior (puede ser None para CREATE)
+            old_instance: Instancia anterior o snapshot de sus valores
+                (AuditService.snapshot); None para CREATE
             new_instance: Instancia nueva
         
         Returns:
@@ -82,28 +206,24 @@ class AuditService:
             # Es una creación, no hay diff
             return None
         
-        if type(old_instance) != type(new_instance):
-            raise ValueError("Las instancias deben ser del mismo modelo")
+        if isinstance(old_instance, dict):
+            # Snapshot tomado al cargar la instancia (ver auditoria.signals)
+            antes = old_instance
+        else:
+            if type(old_instance) != type(new_instance):
+                raise ValueError("Las instancias deben ser del mismo modelo")
+            antes = AuditService.snapshot(old_instance)
+        despues = AuditService.snapshot(new_instance)
         
         cambios = {}
         
-        # Obtener todos los campos del modelo
-        for field in new_instance._meta.fields:
-            field_name = field.name
-            
-            # Saltar campos excluidos
-            if field_name in AuditService.EXCLUDED_FIELDS:
+        for field_name, new_value in despues.items():
+            # Campos diferidos al cargar: no hay valor anterior confiable
+            if field_name not in antes:
                 continue
             
-            # Saltar campos de relación inversa
-            if field.many_to_many or field.one_to_many:
-                continue
-            
-            old_value = getattr(old_instance, field_name, None)
-            new_value = getattr(new_instance, field_name, None)
-            
             # Convertir a formato serializable
-            old_value = AuditService._serialize_value(old_value)
+            old_value = AuditService._serialize_value(antes[field_name])
             new_value = AuditService._serialize_value(new_value)
             
             # Solo registrar si hay cambio
@@ -0,0 +1,162 @@
+"""
+Particionado mensual de auditoria_auditlog (PostgreSQL).
+
+La tabla está particionada por RANGE (fecha) desde la migración 0003, con
+una partición por mes (auditoria_auditlog_pAAAA_MM) y una DEFAULT para lo
+que caiga fuera de rango. ParticionService crea las particiones de los
+meses siguientes y desacopla/archiva las que superan la retención:
+COPY a CSV comprimido en el storage por defecto y DROP de la tabla.
+
+En otros motores (o si la tabla no está particionada) todo es no-op.
+"""
+import gzip
+import logging
+import re
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLA = 'auditoria_auditlog'
+DEFAULT = f'{TABLA}_default'
+_NOMBRE_RE = re.compile(rf'^{TABLA}_p(\d{{4}})_(\d{{2}})$')
+
+
+def _sumar_meses(fecha: date, meses: int) -> date:
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+class ParticionService:
+    # Meses que se crean por adelantado y meses que se conservan en línea
+    MESES_ADELANTE = 3
+    RETENCION_MESES = 24
+    CARPETA_ARCHIVO = 'auditoria/archivo'
+
+    @staticmethod
+    def nombre(mes: date) -> str:
+        return f"{TABLA}_p{mes.year:04d}_{mes.month:02d}"
+
+    @staticmethod
+    def disponible() -> bool:
+        """True si la BD es PostgreSQL y auditoria_auditlog está particionada."""
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = %s",
+                [TABLA],
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def particiones() -> dict:
+        """{primer día del mes: nombre} de las particiones mensuales acopladas."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = %s",
+                [TABLA],
+            )
+            nombres = [fila[0] for fila in cursor.fetchall()]
+        resultado = {}
+        for nombre in nombres:
+            coincidencia = _NOMBRE_RE.match(nombre)
+            if coincidencia:
+                resultado[date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1)] = nombre
+        return resultado
+
+    @classmethod
+    def crear(cls, mes: date) -> str:
+        """
+        Crea la partición de `mes`. Las filas de ese rango que hubieran caído
+        en la DEFAULT se mueven antes de acoplarla (si no, ATTACH falla).
+        """
+        mes = mes.replace(day=1)
+        nombre = cls.nombre(mes)
+        desde, hasta = mes.isoformat(), _sumar_meses(mes, 1).isoformat()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE "{nombre}" (LIKE "{TABLA}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f'WITH movidas AS (DELETE FROM "{DEFAULT}" WHERE fecha >= %s AND fecha < %s RETURNING *) '
+                f'INSERT INTO "{nombre}" SELECT * FROM movidas',
+                [desde, hasta],
+            )
+            cursor.execute(
+                f'ALTER TABLE "{TABLA}" ATTACH PARTITION "{nombre}" FOR VALUES FROM (%s) TO (%s)',
+                [desde, hasta],
+            )
+        logger.info(f"Partición de auditoría creada: {nombre}")
+        return nombre
+
+    @staticmethod
+    def desacoplar(nombre: str):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{TABLA}" DETACH PARTITION "{nombre}"')
+        logger.info(f"Partición de auditoría desacoplada: {nombre}")
+
+    @classmethod
+    def archivar(cls, nombre: str) -> str:
+        """
+        Copia una partición (ya desacoplada) a CSV gzip en el storage y la
+        elimina. Se puede restaurar con COPY ... FROM sobre una tabla LIKE.
+
+        Returns:
+            Ruta del archivo en el storage
+        """
+        with tempfile.TemporaryFile() as temporal:
+            with gzip.GzipFile(fileobj=temporal, mode='wb') as comprimido:
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(f'COPY "{nombre}" TO STDOUT WITH (FORMAT csv, HEADER true)', comprimido)
+            temporal.seek(0)
+            ruta = default_storage.save(f"{cls.CARPETA_ARCHIVO}/{nombre}.csv.gz", File(temporal))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE "{nombre}"')
+        logger.info(f"Partición de auditoría archivada en {ruta}")
+        return ruta
+
+    @classmethod
+    def mantener(cls, meses_adelante=None, retencion_meses=None, archivar=True, hoy=None) -> dict:
+        """
+        Crea las particiones de los próximos meses y retira las que superan la
+        retención (desacoplar + archivar).
+
+        Returns:
+            {'creadas': [...], 'desacopladas': [...], 'archivos': [...]}
+        """
+        resultado = {'creadas': [], 'desacopladas': [], 'archivos': []}
+        if not cls.disponible():
+            return resultado
+
+        if meses_adelante is None:
+            meses_adelante = getattr(settings, 'AUDIT_PARTICIONES_ADELANTE', cls.MESES_ADELANTE)
+        if retencion_meses is None:
+            retencion_meses = getattr(settings, 'AUDIT_RETENCION_MESES', cls.RETENCION_MESES)
+        mes_actual = (hoy or timezone.localdate()).replace(day=1)
+        existentes = cls.particiones()
+
+        for n in range(meses_adelante + 1):
+            mes = _sumar_meses(mes_actual, n)
+            if mes not in existentes:
+                resultado['creadas'].append(cls.crear(mes))
+
+        if retencion_meses:
+            limite = _sumar_meses(mes_actual, -retencion_meses)
+            for mes, nombre in sorted(existentes.items()):
+                if mes >= limite:
+                    break
+                cls.desacoplar(nombre)
+                resultado['desacopladas'].append(nombre)
+                if archivar:
+                    resultado['archivos'].append(cls.archivar(nombre))
+        return resultado
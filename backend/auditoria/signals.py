@@ -1,138 +1,97 @@
-from django.db.models.signals import pre_save, post_save, post_delete
-from django.dispatch import receiver
-from django.conf import settings
+from django.db.models.signals import post_init, post_save, post_delete
+from auditoria.registry import AuditRegistry
 from auditoria.services.audit_service import AuditService
 from auditoria.middleware import get_current_user, get_client_ip, get_user_agent
 
-# Almacenamiento temporal para instancias anteriores
-_pre_save_instances = {}
+# Atributo de la instancia con los valores originales (ver audit_post_init)
+SNAPSHOT_ATTR = '_audit_snapshot'
 
 
 def get_audited_models():
     """
     Obtiene la lista de modelos que deben ser auditados.
-    Se define en settings.AUDITED_MODELS como lista de strings 'app.Model'.
+    Se define en settings.AUDITED_MODELS como lista de strings 'app.Model'
+    y se compila una sola vez al arrancar (AuditRegistry).
     """
-    audited = getattr(settings, 'AUDITED_MODELS', [])
-    
-    # Si no está configurado, retornar lista vacía (no auditar nada por defecto)
-    if not audited:
-        return []
-    
-    models = []
-    from django.apps import apps
-    
-    for model_str in audited:
-        try:
-            app_label, model_name = model_str.split('.')
-            model = apps.get_model(app_label, model_name)
-            models.append(model)
-        except (ValueError, LookupError) as e:
-            # Log error pero no romper la aplicación
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"No se pudo cargar el modelo para auditoría: {model_str} - {e}")
-    
-    return models
+    return list(AuditRegistry.modelos())
 
 
 def should_audit_model(instance):
     """Verifica si un modelo debe ser auditado."""
-    audited_models = get_audited_models()
-    
-    # Si la lista está vacía, no auditar nada
-    if not audited_models:
-        return False
-    
-    return type(instance) in audited_models
+    return AuditRegistry.contiene(type(instance))
 
 
-@receiver(pre_save)
-def audit_pre_save(sender, instance, **kwargs):
+def conectar_signals(modelos=None):
     """
-    Captura el estado anterior del objeto antes de guardar.
-    Se ejecuta antes de cada save().
+    Conecta los receivers solo para los modelos auditados: el resto de los
+    modelos no paga ningún costo por instancia.
     """
-    if not should_audit_model(instance):
-        return
-    
-    # Si el objeto ya existe (tiene pk), obtener la versión anterior de la BD
-    if instance.pk:
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            # Almacenar en diccionario temporal usando id del objeto en memoria
-            _pre_save_instances[id(instance)] = old_instance
-        except sender.DoesNotExist:
-            # El objeto fue eliminado entre medio, ignorar
-            pass
-
-
-@receiver(post_save)
+    for signal, receiver in (
+        (post_init, audit_post_init),
+        (post_save, audit_post_save),
+        (post_delete, audit_post_delete),
+    ):
+        for model in modelos or AuditRegistry.modelos():
+            signal.connect(receiver, sender=model, dispatch_uid=f"auditoria:{receiver.__name__}:{model._meta.label}")
+
+
+def desconectar_signals():
+    for signal, receiver in (
+        (post_init, audit_post_init),
+        (post_save, audit_post_save),
+        (post_delete, audit_post_delete),
+    ):
+        for model in AuditRegistry.modelos():
+            signal.disconnect(sender=model, dispatch_uid=f"auditoria:{receiver.__name__}:{model._meta.label}")
+
+
+def _contexto():
+    usuario = get_current_user()
+    if usuario and not usuario.is_authenticated:
+        usuario = None
+    return {
+        'usuario': usuario,
+        'ip_address': get_client_ip(),
+        'user_agent': get_user_agent(),
+    }
+
+
+def audit_post_init(sender, instance, **kwargs):
+    """
+    Guarda los valores originales al cargar la instancia, para calcular el
+    diff en post_save sin volver a consultar la fila en la BD.
+    """
+    setattr(instance, SNAPSHOT_ATTR, AuditService.snapshot(instance))
+
+
 def audit_post_save(sender, instance, created, **kwargs):
     """
     Registra la creación o actualización del objeto.
     Se ejecuta después de cada save().
     """
-    if not should_audit_model(instance):
-        return
-    
-    # Obtener contexto de la petición
-    usuario = get_current_user()
-    if usuario and not usuario.is_authenticated:
-        usuario = None
-    
-    ip_address = get_client_ip()
-    user_agent = get_user_agent()
-    
     # Determinar acción
     if created:
         accion = 'CREATE'
         cambios = None
     else:
         accion = 'UPDATE'
-        # Recuperar instancia anterior
-        old_instance = _pre_save_instances.pop(id(instance), None)
-        # Calcular diff
-        cambios = AuditService.calculate_diff(old_instance, instance)
-        
-        # Si no hay cambios, no registrar
-        if not cambios:
-            return
-    
-    # Registrar en auditoría
-    AuditService.log_action(
-        usuario=usuario,
-        obj=instance,
-        accion=accion,
-        cambios=cambios,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-
-
-@receiver(post_delete)
+        # Calcular diff contra los valores originales
+        cambios = AuditService.calculate_diff(getattr(instance, SNAPSHOT_ATTR, None), instance)
+
+    # Los próximos save() de esta instancia se comparan contra lo ya guardado
+    setattr(instance, SNAPSHOT_ATTR, AuditService.snapshot(instance))
+
+    # Si no hay cambios, no registrar
+    if accion == 'UPDATE' and not cambios:
+        return
+
+    # Registrar en auditoría (se escribe en lote al confirmar la transacción)
+    AuditService.log_diferido(obj=instance, accion=accion, cambios=cambios, **_contexto())
+
+
 def audit_post_delete(sender, instance, **kwargs):
     """
     Registra la eliminación del objeto.
     Se ejecuta después de cada delete().
     """
-    if not should_audit_model(instance):
-        return
-    
-    # Obtener contexto de la petición
-    usuario = get_current_user()
-    if usuario and not usuario.is_authenticated:
-        usuario = None
-        
-    ip_address = get_client_ip()
-    user_agent = get_user_agent()
-    
-    # Registrar eliminación
-    AuditService.log_action(
-        usuario=usuario,
-        obj=instance,
-        accion='DELETE',
-        cambios=None,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
+    AuditService.log_diferido(obj=instance, accion='DELETE', cambios=None, **_contexto())
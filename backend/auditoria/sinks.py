@@ -0,0 +1,137 @@
+"""
+Destinos (sinks) de los registros de auditoría.
+
+settings.AUDIT_SINK elige a dónde van los AuditLog confirmados:
+- 'db' (default): bulk_create directo a auditoria_auditlog.
+- 'jsonl': se agregan como líneas JSON a settings.AUDIT_JSONL_PATH.
+- 'redis': XADD al stream settings.AUDIT_REDIS_STREAM (CACHE_REDIS_URL).
+
+Con 'jsonl' y 'redis' la escritura en el request es un append; la tarea
+`auditoria.volcar_auditoria` (Celery beat) los pasa a la tabla en lotes.
+"""
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Campos de AuditLog que viajan en los sinks diferidos
+CAMPOS = (
+    'usuario_id', 'accion', 'content_type_id', 'object_id', 'object_repr',
+    'cambios', 'ip_address', 'user_agent', 'descripcion',
+)
+
+
+def serializar(audit_log) -> str:
+    datos = {campo: getattr(audit_log, campo) for campo in CAMPOS}
+    datos['fecha'] = (audit_log.fecha or timezone.now()).isoformat()
+    return json.dumps(datos, default=str, ensure_ascii=False)
+
+
+def deserializar(linea):
+    from auditoria.models import AuditLog
+
+    datos = json.loads(linea)
+    datos['fecha'] = parse_datetime(datos['fecha'])
+    return AuditLog(**datos)
+
+
+class DatabaseSink:
+    def escribir(self, entradas):
+        from auditoria.models import AuditLog
+        AuditLog.objects.bulk_create(entradas)
+
+    def volcar(self, lote=1000) -> int:
+        return 0
+
+
+class JsonlSink:
+    def __init__(self, ruta=None):
+        self.ruta = ruta or getattr(settings, 'AUDIT_JSONL_PATH', 'logs/audit.jsonl')
+
+    def escribir(self, entradas):
+        contenido = ''.join(serializar(e) + '\n' for e in entradas).encode('utf-8')
+        os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+        # O_APPEND: un solo write por lote, sin intercalar líneas entre procesos
+        fd = os.open(self.ruta, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o640)
+        try:
+            os.write(fd, contenido)
+        finally:
+            os.close(fd)
+
+    def volcar(self, lote=1000) -> int:
+        """
+        Rota el archivo (rename atómico) y carga sus líneas a la tabla.
+        Los procesos que sigan escribiendo crean un archivo nuevo.
+        """
+        from auditoria.models import AuditLog
+
+        if not os.path.exists(self.ruta):
+            return 0
+        procesando = f"{self.ruta}.{os.getpid()}.{time.time_ns()}"
+        os.replace(self.ruta, procesando)
+        total = 0
+        pendientes = []
+        with open(procesando, encoding='utf-8') as archivo:
+            for linea in archivo:
+                if linea.strip():
+                    pendientes.append(deserializar(linea))
+                if len(pendientes) >= lote:
+                    AuditLog.objects.bulk_create(pendientes)
+                    total += len(pendientes)
+                    pendientes = []
+        if pendientes:
+            AuditLog.objects.bulk_create(pendientes)
+            total += len(pendientes)
+        os.remove(procesando)
+        return total
+
+
+class RedisStreamSink:
+    def __init__(self, stream=None):
+        self.stream = stream or getattr(settings, 'AUDIT_REDIS_STREAM', 'auditoria:stream')
+
+    @staticmethod
+    def _cliente():
+        import redis
+        return redis.Redis.from_url(settings.CACHE_REDIS_URL)
+
+    def escribir(self, entradas):
+        pipe = self._cliente().pipeline(transaction=False)
+        for entrada in entradas:
+            pipe.xadd(self.stream, {'data': serializar(entrada)})
+        pipe.execute()
+
+    def volcar(self, lote=1000) -> int:
+        from auditoria.models import AuditLog
+
+        cliente = self._cliente()
+        total = 0
+        while True:
+            mensajes = cliente.xrange(self.stream, count=lote)
+            if not mensajes:
+                return total
+            AuditLog.objects.bulk_create([deserializar(campos[b'data']) for _, campos in mensajes])
+            cliente.xdel(self.stream, *[msg_id for msg_id, _ in mensajes])
+            total += len(mensajes)
+
+
+SINKS = {
+    'db': DatabaseSink,
+    'jsonl': JsonlSink,
+    'redis': RedisStreamSink,
+}
+
+
+def obtener_sink():
+    nombre = getattr(settings, 'AUDIT_SINK', 'db')
+    try:
+        return SINKS[nombre]()
+    except KeyError:
+        logger.error(f"AUDIT_SINK desconocido: {nombre}; usando 'db'")
+        return DatabaseSink()
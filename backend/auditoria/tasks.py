@@ -0,0 +1,36 @@
+from celery import shared_task
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='auditoria.volcar_auditoria')
+def volcar_auditoria():
+    """
+    Pasa a auditoria_auditlog los registros acumulados por el sink diferido
+    (AUDIT_SINK = 'jsonl' | 'redis'). Con 'db' no hay nada que hacer.
+    """
+    from auditoria.sinks import obtener_sink
+
+    # Un solo volcado a la vez: dos workers leerían los mismos mensajes del stream
+    if not cache.add('auditoria:volcado', 1, 600):
+        return 0
+    try:
+        total = obtener_sink().volcar()
+    finally:
+        cache.delete('auditoria:volcado')
+    if total:
+        logger.info(f"Auditoría: {total} registros volcados a la BD")
+    return total
+
+
+@shared_task(name='auditoria.mantener_particiones')
+def mantener_particiones():
+    """Crea las particiones de los próximos meses y archiva las vencidas."""
+    from auditoria.services.particiones import ParticionService
+
+    resultado = ParticionService.mantener()
+    if any(resultado.values()):
+        logger.info(f"Particiones de auditoría: {resultado}")
+    return resultado
@@ -0,0 +1,99 @@
+import json
+import time
+import pytest
+from django.db import connection
+from django.db.models.signals import post_save, pre_save
+from django.test.utils import CaptureQueriesContext
+from auditoria.models import AuditLog
+from auditoria.registry import AuditRegistry
+from auditoria.services.audit_service import AuditService
+from auditoria.sinks import JsonlSink
+from auditoria.signals import desconectar_signals, conectar_signals
+from core.models import Empresa
+
+
+def _empresa(n):
+    return Empresa.objects.create(
+        codigo=f"PIP{n:03d}", razon_social=f"Pipeline {n} S.A. de C.V.", nombre_comercial=f"Pipeline {n}",
+        rfc=f"PIP2101{n:02d}AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+        numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+    )
+
+
+@pytest.mark.django_db
+class TestAuditPipeline:
+    def test_register_audit_y_audited_models_un_solo_registro(self, django_capture_on_commit_callbacks):
+        # Empresa está en AUDITED_MODELS y además usa register_audit
+        assert AuditRegistry.contiene(Empresa)
+        empresa = _empresa(1)
+        empresa.nombre_comercial = "Pipeline editada"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            empresa.save()
+
+        assert AuditLog.objects.filter(accion='UPDATE', object_id=str(empresa.pk)).count() == 1
+
+    def test_sink_jsonl_y_volcado(self, settings, tmp_path, django_capture_on_commit_callbacks):
+        settings.AUDIT_SINK = 'jsonl'
+        settings.AUDIT_JSONL_PATH = str(tmp_path / 'audit.jsonl')
+        empresa = _empresa(2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            empresa.nombre_comercial = "Pipeline JSONL"
+            empresa.save()
+
+        lineas = (tmp_path / 'audit.jsonl').read_text(encoding='utf-8').splitlines()
+        assert json.loads(lineas[-1])['accion'] == 'UPDATE'
+        assert not AuditLog.objects.filter(accion='UPDATE').exists()
+
+        assert JsonlSink().volcar() == len(lineas)
+        log = AuditLog.objects.get(accion='UPDATE')
+        assert log.cambios['nombre_comercial']['new'] == "Pipeline JSONL"
+        assert not (tmp_path / 'audit.jsonl').exists()
+
+    @pytest.mark.slow
+    def test_benchmark_latencia_de_save(self, django_capture_on_commit_callbacks):
+        """Antes: SELECT previo + dos inserts inmediatos (auditoria + auditlog). Después: pipeline único."""
+        empresas = [_empresa(n) for n in range(10, 60)]
+        veces = 20
+
+        def legado_pre_save(sender, instance, **kwargs):
+            if instance.pk:
+                instance._legado = sender.objects.get(pk=instance.pk)
+
+        def legado_post_save(sender, instance, created, **kwargs):
+            cambios = AuditService.calculate_diff(getattr(instance, '_legado', None), instance)
+            for _ in range(2):
+                AuditService.log_action(usuario=None, obj=instance, accion='UPDATE', cambios=cambios)
+
+        def medir():
+            with CaptureQueriesContext(connection) as queries:
+                inicio = time.perf_counter()
+                with AuditService.lote():
+                    with django_capture_on_commit_callbacks(execute=True):
+                        for i in range(veces):
+                            for empresa in empresas:
+                                empresa.nombre_comercial = f"{empresa.codigo} {i} {time.perf_counter_ns()}"
+                                empresa.save()
+                duracion = time.perf_counter() - inicio
+            return duracion, len(queries)
+
+        desconectar_signals()
+        pre_save.connect(legado_pre_save, sender=Empresa)
+        post_save.connect(legado_post_save, sender=Empresa)
+        try:
+            antes, queries_antes = medir()
+        finally:
+            pre_save.disconnect(legado_pre_save, sender=Empresa)
+            post_save.disconnect(legado_post_save, sender=Empresa)
+            conectar_signals()
+
+        despues, queries_despues = medir()
+
+        saves = veces * len(empresas)
+        print(
+            f"\nAuditoría por save: antes {antes / saves * 1000:.3f} ms ({queries_antes} queries), "
+            f"después {despues / saves * 1000:.3f} ms ({queries_despues} queries)"
+        )
+        assert queries_despues < queries_antes / 3
+        assert despues < antes
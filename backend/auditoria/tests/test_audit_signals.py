@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from auditoria.models import AuditLog
+from auditoria.services.audit_service import AuditService
+from core.models import Empresa
+
+
+@pytest.mark.django_db
+class TestAuditSignals:
+    @pytest.fixture
+    def empresa(self):
+        return Empresa.objects.create(
+            codigo="AUD01", razon_social="Auditoría S.A. de C.V.", nombre_comercial="Auditoría",
+            rfc="AUD210101AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+            numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+        )
+
+    def test_diff_sin_consulta_extra(self, empresa, django_capture_on_commit_callbacks):
+        empresa = Empresa.objects.get(pk=empresa.pk)
+        empresa.nombre_comercial = "Auditoría 2"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                empresa.save()
+        selects = [q for q in queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        assert not any('core_empresa' in q['sql'] for q in selects)
+
+        log = AuditLog.objects.get(accion='UPDATE', object_id=str(empresa.pk))
+        assert log.cambios == {'nombre_comercial': {'old': 'Auditoría', 'new': 'Auditoría 2'}}
+
+    def test_save_sin_cambios_no_registra(self, empresa, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            Empresa.objects.get(pk=empresa.pk).save()
+        assert not AuditLog.objects.filter(accion='UPDATE').exists()
+
+    def test_lote_un_solo_insert(self, empresa, django_capture_on_commit_callbacks):
+        with CaptureQueriesContext(connection) as queries:
+            with AuditService.lote():
+                with django_capture_on_commit_callbacks(execute=True):
+                    for n in range(3):
+                        empresa.nombre_comercial = f"Auditoría {n}"
+                        empresa.save()
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "auditoria_auditlog"')]
+        assert len(inserts) == 1
+        assert AuditLog.objects.filter(accion='UPDATE', object_id=str(empresa.pk)).count() == 3
+
+    def test_rollback_descarta_registros(self, empresa):
+        with AuditService.lote():
+            try:
+                with transaction.atomic():
+                    empresa.nombre_comercial = "Revertido"
+                    empresa.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        assert not AuditLog.objects.filter(accion='UPDATE').exists()
@@ -0,0 +1,69 @@
+import gzip
+from datetime import date, datetime, timezone as dt_timezone
+from importlib import import_module
+import pytest
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import connection
+from auditoria.models import AuditLog
+from auditoria.services.particiones import ParticionService
+
+particionar = import_module('auditoria.migrations.0003_particionar_auditlog').particionar
+
+
+def _en_tabla(tabla):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM "{tabla}"')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestParticiones:
+    @pytest.fixture(autouse=True)
+    def storage_local(self, settings, tmp_path):
+        if connection.vendor != 'postgresql':
+            pytest.skip("Requiere PostgreSQL")
+        if not ParticionService.disponible():
+            # Con --nomigrations la tabla se crea sin particionar: se aplica el
+            # DDL de la migración 0003 dentro de la transacción de la prueba.
+            with connection.schema_editor() as schema_editor:
+                particionar(apps, schema_editor)
+        settings.MEDIA_ROOT = tmp_path
+        settings.STORAGES = {
+            **settings.STORAGES,
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        }
+
+    def test_crea_meses_siguientes_una_sola_vez(self):
+        hoy = date(2031, 5, 20)
+        resultado = ParticionService.mantener(meses_adelante=2, retencion_meses=0, hoy=hoy)
+
+        assert resultado['creadas'] == [
+            'auditoria_auditlog_p2031_05', 'auditoria_auditlog_p2031_06', 'auditoria_auditlog_p2031_07',
+        ]
+        assert ParticionService.mantener(meses_adelante=2, retencion_meses=0, hoy=hoy)['creadas'] == []
+
+    def test_crear_mueve_filas_de_la_default(self):
+        log = AuditLog.objects.create(accion='LOGIN', fecha=datetime(2090, 3, 15, tzinfo=dt_timezone.utc))
+        assert _en_tabla('auditoria_auditlog_default') == 1
+
+        ParticionService.crear(date(2090, 3, 1))
+
+        assert _en_tabla('auditoria_auditlog_default') == 0
+        assert _en_tabla('auditoria_auditlog_p2090_03') == 1
+        assert AuditLog.objects.get(pk=log.pk).accion == 'LOGIN'
+
+    def test_archiva_particiones_vencidas(self):
+        ParticionService.crear(date(2001, 1, 1))
+        AuditLog.objects.create(
+            accion='EXPORT', object_repr='Balanza 2000', fecha=datetime(2001, 1, 10, tzinfo=dt_timezone.utc)
+        )
+
+        resultado = ParticionService.mantener(meses_adelante=0, retencion_meses=24, hoy=date(2026, 10, 1))
+
+        assert 'auditoria_auditlog_p2001_01' in resultado['desacopladas']
+        ruta = next(r for r in resultado['archivos'] if 'p2001_01' in r)
+        with default_storage.open(ruta, 'rb') as archivo:
+            contenido = gzip.decompress(archivo.read()).decode('utf-8')
+        assert 'Balanza 2000' in contenido
+        assert not AuditLog.objects.filter(object_repr='Balanza 2000').exists()
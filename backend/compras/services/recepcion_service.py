@@ -6,6 +6,7 @@ from ..models import OrdenCompra, RecepcionCompra, DetalleRecepcion, DetalleOrde
 
 from inventarios.models import Almacen # Traer Almacen de inventarios
 from inventarios.services.kardex_service import KardexService
+from auditoria.services.audit_service import AuditService
 # Intentar importar ObrasService, manejando posible error circular o falta de modulo
 try:
     from obras.services import ObrasService
@@ -56,7 +57,14 @@ class RecepcionService:
             notas=notas
         )
 
-        todo_completado_global = True
+        # Renglones de la OC por insumo (una consulta para toda la recepción)
+        detalles_oc = {d.insumo_id: d for d in orden.detalles.select_related('insumo')}
+        antes = {insumo_id: AuditService.snapshot(d) for insumo_id, d in detalles_oc.items()}
+        almacen_default_id = None
+        detalles_recepcion = []
+        entradas = []
+        monto_devengado = Decimal(0)
+        referencia = f"Recepción OC: {orden.folio} (REM: {folio_remision or 'S/R'})"
         
         for item in items_recibidos:
             prod_id = item.get('producto_id')
@@ -66,9 +74,8 @@ class RecepcionService:
                 continue
             
             # Buscar detalle OC correspondiente al producto
-            try:
-                detalle_oc = orden.detalles.get(insumo_id=prod_id)
-            except DetalleOrdenCompra.DoesNotExist:
+            detalle_oc = detalles_oc.get(prod_id)
+            if detalle_oc is None:
                 raise ValidationError(f"El producto ID {prod_id} no está incluido en esta Orden de Compra.")
 
             pendiente = detalle_oc.cantidad - detalle_oc.cantidad_recibida
@@ -77,53 +84,65 @@ class RecepcionService:
             if cant_recibir > pendiente:
                  raise ValidationError(f"Exceso de recepción para {detalle_oc.insumo.descripcion}. Solicitado: {detalle_oc.cantidad}, Recibido Previo: {detalle_oc.cantidad_recibida}, Intento Actual: {cant_recibir}")
 
-            # 1. Actualizar Detalle OC
+            # 1. Actualizar Detalle OC (se guardan todos juntos al final)
             detalle_oc.cantidad_recibida += cant_recibir
-            detalle_oc.save()
 
             # 2. Crear Detalle Recepcion
             almacen_destino_id = item.get('almacen_id') or almacen_id_global
             if not almacen_destino_id:
                  # Si no se especifica, tomar el primer almacen disponible o error
-                 first_almacen = Almacen.objects.first()
-                 if first_almacen:
-                     almacen_destino_id = first_almacen.id
-                 else:
-                     raise ValidationError("Se requiere especificar un almacén de destino.")
+                 if almacen_default_id is None:
+                     first_almacen = Almacen.objects.first()
+                     if not first_almacen:
+                         raise ValidationError("Se requiere especificar un almacén de destino.")
+                     almacen_default_id = first_almacen.id
+                 almacen_destino_id = almacen_default_id
 
-            DetalleRecepcion.objects.create(
+            detalles_recepcion.append(DetalleRecepcion(
                 recepcion=recepcion,
-                producto_id=prod_id,
+                producto=detalle_oc.insumo,
                 cantidad_recibida=cant_recibir,
                 almacen_destino_id=almacen_destino_id
-            )
+            ))
 
             # 3. Impacto Kardex (Stock)
-            KardexService.registrar_movimiento(
-                insumo_id=prod_id,
-                almacen_id=almacen_destino_id,
-                cantidad=cant_recibir,
-                tipo_movimiento='ENTRADA',
-                costo_unitario=detalle_oc.precio_unitario,
-                referencia=f"Recepción OC: {orden.folio} (REM: {folio_remision or 'S/R'})",
-                usuario=usuario
+            entradas.append({
+                'insumo_id': prod_id,
+                'almacen_id': almacen_destino_id,
+                'cantidad': cant_recibir,
+                'tipo_movimiento': 'ENTRADA',
+                'costo_unitario': detalle_oc.precio_unitario,
+            })
+            monto_devengado += cant_recibir * detalle_oc.precio_unitario
+
+        recibidos = [d for insumo_id, d in detalles_oc.items() if d.cantidad_recibida != antes[insumo_id]['cantidad_recibida']]
+        DetalleOrdenCompra.objects.bulk_update(recibidos, ['cantidad_recibida'])
+        DetalleRecepcion.objects.bulk_create(detalles_recepcion)
+        # bulk_update/bulk_create no disparan las señales de auditoría
+        for detalle_oc in recibidos:
+            AuditService.log_diferido(
+                obj=detalle_oc, accion='UPDATE', usuario=usuario,
+                cambios=AuditService.calculate_diff(antes[detalle_oc.insumo_id], detalle_oc)
+            )
+        for detalle in detalles_recepcion:
+            AuditService.log_diferido(obj=detalle, accion='CREATE', cambios=None, usuario=usuario)
+
+        # Un solo bloqueo de insumos y un recálculo de costo promedio por insumo
+        KardexService.registrar_movimientos_bulk(entradas, referencia=referencia, usuario=usuario)
+        
+        # 4. Impacto Obras (Devengado): toda la OC va a la misma partida
+        if ObrasService and monto_devengado and orden.requisicion and orden.requisicion.centro_costo:
+            ObrasService.devengar_presupuesto(
+                orden.requisicion.centro_costo_id,
+                'MATERIALES',
+                monto_devengado
             )
-            
-            # 4. Impacto Obras (Devengado)
-            if ObrasService and orden.requisicion and orden.requisicion.centro_costo:
-                monto_recibido = cant_recibir * detalle_oc.precio_unitario
-                ObrasService.devengar_presupuesto(
-                    orden.requisicion.centro_costo_id,
-                    'MATERIALES',
-                    monto_recibido
-                )
 
         # 5. Evaluar estado final de OC
         all_completed = True
         has_reception = False
         
-        # Refrescamos detalles
-        for d in orden.detalles.all():
+        for d in detalles_oc.values():
             if d.cantidad_recibida > 0:
                 has_reception = True
             if d.cantidad_recibida < d.cantidad:
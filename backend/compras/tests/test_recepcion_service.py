@@ -1,6 +1,8 @@
 import pytest
 from decimal import Decimal
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from compras.models import Insumo, OrdenCompra, DetalleOrdenCompra, Proveedor
 from inventarios.models import Almacen, MovimientoInventario, Existencia
 from compras.services.recepcion_service import RecepcionService
@@ -75,3 +77,23 @@ class TestRecepcionOrden:
         with pytest.raises(ValueError):
             items = [{'producto_id': self.insumo.id, 'cantidad': 10}]
             RecepcionService.recibir_orden(self.orden.id, items, self.user, almacen_id_global=self.almacen.id)
+
+    def test_recepcion_grande_en_pocas_consultas(self):
+        insumos = Insumo.objects.bulk_create([
+            Insumo(codigo=f"MAT-{i}", descripcion=f"Material {i}", tipo="PRODUCTO") for i in range(500)
+        ])
+        DetalleOrdenCompra.objects.bulk_create([
+            DetalleOrdenCompra(orden=self.orden, insumo=insumo, cantidad=10, precio_unitario=i + 1, importe=10 * (i + 1))
+            for i, insumo in enumerate(insumos)
+        ])
+        items = [{'producto_id': insumo.id, 'cantidad': 4} for insumo in insumos]
+
+        with CaptureQueriesContext(connection) as consultas:
+            RecepcionService.recibir_orden(self.orden.id, items, self.user, almacen_id_global=self.almacen.id)
+
+        assert len(consultas.captured_queries) < 25
+        assert Existencia.objects.filter(insumo__in=insumos, almacen=self.almacen, cantidad=4).count() == 500
+        assert MovimientoInventario.objects.filter(tipo_movimiento='ENTRADA').count() == 500
+        assert Insumo.objects.get(pk=insumos[9].pk).costo_promedio == Decimal('10.0000')
+        self.orden.refresh_from_db()
+        assert self.orden.estado == 'PARCIALMENTE_SURTIDA'
@@ -3,6 +3,7 @@
 from dotenv import load_dotenv
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 import os
 import dj_database_url
 
@@ -73,9 +74,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "auditoria.middleware.AuditMiddleware",  # Auditoría de cambios
+    "auditoria.middleware.AuditMiddleware",  # Auditoría de cambios (pipeline único)
     "core.middleware.EmpresaMiddleware",  # Multi-empresa
-    "auditlog.middleware.AuditlogMiddleware",
     "core.middleware.ThreadLocalMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -366,9 +366,11 @@ CONTENT_SECURITY_POLICY = {
 
 # --- Authentication Backends ---
 AUTHENTICATION_BACKENDS = [
-    "axes.backends.AxesBackend", # Debe ser el primero
-    "users.auth_backends.RolePermissionBackend",  # RBAC personalizado
-    "django.contrib.auth.backends.ModelBackend",
+    # Debe ser el primero; la variante standalone no hereda ModelBackend (sin consultas en has_perm)
+    "axes.backends.AxesStandaloneBackend",
+    # RBAC personalizado: hereda ModelBackend (authenticate) y resuelve permisos
+    # directos, de grupos y de roles desde un set precompilado
+    "users.auth_backends.RolePermissionBackend",
 ]
 
 # --- Password Validation ---
@@ -450,6 +452,29 @@ SIMPLE_JWT = {
 # ============================================================================
 # CELERY & REDIS
 # ============================================================================
+# Cache compartido: Redis si se configura CACHE_REDIS_URL; en memoria local si no.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "KEY_PREFIX": "luximia",
+        }
+    }
+# Janitor opcional de claves huérfanas (generaciones viejas de CacheService, vía SCAN)
+CACHE_JANITOR_ENABLED = os.getenv('CACHE_JANITOR_ENABLED', 'False') == 'True'
+# ConfigService: L1 en memoria por proceso (segundos) + invalidación pub/sub vía CACHE_REDIS_URL
+CONFIG_L1_TIMEOUT = int(os.getenv('CONFIG_L1_TIMEOUT', '5'))
+CONFIG_PUBSUB_ENABLED = os.getenv('CONFIG_PUBSUB_ENABLED', 'True') == 'True'
+# EmpresaMiddleware: segundos mínimos entre escrituras de ultima_empresa_activa por usuario
+TENANT_ULTIMA_EMPRESA_DEBOUNCE = int(os.getenv('TENANT_ULTIMA_EMPRESA_DEBOUNCE', '300'))
+# POS offline: filas por página del feed de catálogo y segundos recientes que aún no se publican
+POS_CATALOGO_LOTE = int(os.getenv('POS_CATALOGO_LOTE', '2000'))
+POS_CATALOGO_MARGEN = int(os.getenv('POS_CATALOGO_MARGEN', '5'))
+# POS offline: ventas por transacción al sincronizar lotes de ventas capturadas sin conexión
+POS_SYNC_LOTE = int(os.getenv('POS_SYNC_LOTE', '200'))
+
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
@@ -459,6 +484,77 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_BROKER_CONNECTION_RETRY_ON_START = True
 
+CELERY_BEAT_SCHEDULE = {
+    # Red de seguridad: drena cambios que no alcanzaron a programar su worker
+    'ia-drain-index-queue': {
+        'task': 'ia.drain_index_queue',
+        'schedule': 60.0,
+    },
+    'core-limpiar-exportaciones': {
+        'task': 'core.limpiar_exportaciones',
+        'schedule': 3600.0,
+    },
+}
+
+# Auditoría: destino de los registros ('db' | 'jsonl' | 'redis'); los diferidos se vuelcan en lote
+AUDIT_SINK = os.getenv('AUDIT_SINK', 'db')
+AUDIT_JSONL_PATH = os.getenv('AUDIT_JSONL_PATH', str(BASE_DIR / 'logs' / 'audit.jsonl'))
+AUDIT_REDIS_STREAM = os.getenv('AUDIT_REDIS_STREAM', 'auditoria:stream')
+# Particiones mensuales de auditoria_auditlog (PostgreSQL): creación anticipada y retención en línea
+AUDIT_PARTICIONES_ADELANTE = int(os.getenv('AUDIT_PARTICIONES_ADELANTE', '3'))
+AUDIT_RETENCION_MESES = int(os.getenv('AUDIT_RETENCION_MESES', '24'))  # 0 = no archivar
+CELERY_BEAT_SCHEDULE['auditoria-particiones'] = {
+    'task': 'auditoria.mantener_particiones',
+    'schedule': 86400.0,
+}
+if AUDIT_SINK != 'db':
+    CELERY_BEAT_SCHEDULE['auditoria-volcar'] = {
+        'task': 'auditoria.volcar_auditoria',
+        'schedule': float(os.getenv('AUDIT_FLUSH_INTERVAL', '30')),
+    }
+
+if CACHE_JANITOR_ENABLED:
+    CELERY_BEAT_SCHEDULE['core-cache-janitor'] = {
+        'task': 'core.cache_janitor',
+        'schedule': 900.0,
+    }
+
+# Exportaciones en segundo plano: vigencia del artefacto para reutilizarlo
+EXPORT_JOB_TTL = int(os.getenv('EXPORT_JOB_TTL', '3600'))
+
+# ============================================================================
+# IA / RAG
+# ============================================================================
+EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'openai')  # 'openai' | 'fake'
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '256'))
+INDEX_QUEUE_BATCH_SIZE = int(os.getenv('INDEX_QUEUE_BATCH_SIZE', '500'))
+# Auditor Nocturno: hora de la corrida y briefings simultáneos/reintentos contra el proveedor de IA
+IA_AUDITOR_HORA = int(os.getenv('IA_AUDITOR_HORA', '2'))
+IA_BRIEFING_CONCURRENCIA = int(os.getenv('IA_BRIEFING_CONCURRENCIA', '3'))
+IA_BRIEFING_REINTENTOS = int(os.getenv('IA_BRIEFING_REINTENTOS', '3'))
+IA_BRIEFING_ESPERA = int(os.getenv('IA_BRIEFING_ESPERA', '15'))
+# Segundos que dura un turno de briefing tomado; debe exceder la llamada más lenta al proveedor.
+# Los turnos viven en el cache: sin CACHE_REDIS_URL el límite de concurrencia es por proceso.
+IA_BRIEFING_TIMEOUT = int(os.getenv('IA_BRIEFING_TIMEOUT', '300'))
+CELERY_BEAT_SCHEDULE['ia-auditoria-nocturna'] = {
+    'task': 'ia.auditoria_nocturna',
+    'schedule': crontab(hour=IA_AUDITOR_HORA, minute=0),
+}
+
+# ============================================================================
+# TIMBRADO (PAC)
+# ============================================================================
+PAC_MAX_WORKERS = int(os.getenv('PAC_MAX_WORKERS', '8'))        # Solicitudes concurrentes al PAC
+PAC_XML_PROCESOS = int(os.getenv('PAC_XML_PROCESOS', '2'))      # 0 = generar XML en el proceso actual
+PAC_MAX_RETRIES = int(os.getenv('PAC_MAX_RETRIES', '3'))
+PAC_RETRY_BACKOFF = float(os.getenv('PAC_RETRY_BACKOFF', '0.5'))  # Segundos, se duplica por intento
+PAC_RATE_LIMITS = {  # Solicitudes por segundo por proveedor
+    'MOCK': float(os.getenv('PAC_RATE_LIMIT_MOCK', '50')),
+    'finkok': float(os.getenv('PAC_RATE_LIMIT_FINKOK', '10')),
+}
+PAC_MOCK_LATENCY = float(os.getenv('PAC_MOCK_LATENCY', '0.5'))
+CSD_CACHE_TTL = int(os.getenv('CSD_CACHE_TTL', '900'))  # Segundos que se conserva la llave CSD cargada
+
 # --- Logging ---
 LOGGING = {
     "version": 1,
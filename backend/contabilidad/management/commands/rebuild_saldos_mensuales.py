@@ -0,0 +1,26 @@
+"""Comando para reconstruir la tabla de saldos mensuales por cuenta."""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from contabilidad.services.saldos import SaldoMensualService
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye SaldoMensualCuenta a partir de las partidas de pólizas "
+        "vigentes. Útil tras cargas masivas o actualizaciones con queryset.update()."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Tamaño de lote para la inserción masiva.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        total = SaldoMensualService.reconstruir(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Saldos mensuales reconstruidos: {total} registros."))
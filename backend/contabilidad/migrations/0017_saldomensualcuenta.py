@@ -0,0 +1,30 @@
+# Generated by Django
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0016_add_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoMensualCuenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(help_text='Primer día del mes')),
+                ('debe', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('haber', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('saldo', models.DecimalField(decimal_places=2, default=0, help_text='Movimiento neto deudor del mes (debe - haber)', max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_mensuales', to='contabilidad.cuentacontable')),
+            ],
+            options={
+                'unique_together': {('cuenta', 'periodo')},
+                'indexes': [models.Index(fields=['periodo', 'cuenta'], name='saldo_mes_per_cta_idx')],
+            },
+        ),
+    ]
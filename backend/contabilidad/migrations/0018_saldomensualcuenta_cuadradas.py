@@ -0,0 +1,58 @@
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def reconstruir(apps, schema_editor):
+    """Mismo criterio que SaldoMensualService.reconstruir: todas las pólizas activas."""
+    DetallePoliza = apps.get_model('contabilidad', 'DetallePoliza')
+    SaldoMensualCuenta = apps.get_model('contabilidad', 'SaldoMensualCuenta')
+
+    SaldoMensualCuenta.objects.all().delete()
+    cuadrada = Q(poliza__cuadrada=True)
+    agregados = (
+        DetallePoliza.objects.filter(activo=True, poliza__activo=True)
+        .annotate(periodo=TruncMonth('poliza__fecha'))
+        .values('cuenta_id', 'periodo')
+        .annotate(
+            total_debe=Sum('debe'), total_haber=Sum('haber'),
+            debe_cuadradas=Sum('debe', filter=cuadrada), haber_cuadradas=Sum('haber', filter=cuadrada),
+        )
+        .order_by()
+    )
+    SaldoMensualCuenta.objects.bulk_create(
+        [
+            SaldoMensualCuenta(
+                cuenta_id=row['cuenta_id'],
+                periodo=row['periodo'],
+                debe=row['total_debe'] or 0,
+                haber=row['total_haber'] or 0,
+                saldo=(row['total_debe'] or 0) - (row['total_haber'] or 0),
+                debe_cuadradas=row['debe_cuadradas'] or 0,
+                haber_cuadradas=row['haber_cuadradas'] or 0,
+            )
+            for row in agregados.iterator()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0017_saldomensualcuenta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saldomensualcuenta',
+            name='debe_cuadradas',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='saldomensualcuenta',
+            name='haber_cuadradas',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16),
+        ),
+        migrations.RunPython(reconstruir, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 from .catalogos import Moneda, Banco, MetodoPago, Cliente, TipoCambio, Vendedor, FormaPago, EsquemaComision
 from .proyectos import Proyecto, UPE
 from .ventas import PlanPago, Presupuesto, Contrato, Pago
-from .contabilidad import CuentaContable, CentroCostos, Poliza, DetallePoliza
+from .contabilidad import CuentaContable, CentroCostos, Poliza, DetallePoliza, SaldoMensualCuenta
 from .fiscal import BuzonMensaje, OpinionCumplimiento, EmpresaFiscal
 from .sat_catalogs import SATRegimenFiscal, SATUsoCFDI, SATFormaPago, SATMetodoPago
 from .cfdi_catalogs import CFDIClaveProdServ, CFDIUnidad, CFDIFormaPago, CFDIMetodoPago, CFDIUsoCFDI
@@ -74,6 +74,32 @@ class DetallePoliza(SoftDeleteModel):
     def __str__(self):
         return f"{self.cuenta} | D:{self.debe} H:{self.haber}"
 
+class SaldoMensualCuenta(models.Model):
+    """
+    Acumulado mensual de movimientos por cuenta (rollup de DetallePoliza).
+    Se mantiene incrementalmente vía signals (ver contabilidad/signals.py) y
+    puede reconstruirse con `manage.py rebuild_saldos_mensuales`.
+    Considera las pólizas activas; debe_cuadradas/haber_cuadradas acumulan
+    solo las cuadradas (Estado de Resultados y Balance General).
+    """
+    cuenta = models.ForeignKey(CuentaContable, on_delete=models.CASCADE, related_name='saldos_mensuales')
+    periodo = models.DateField(help_text="Primer día del mes")
+    debe = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    haber = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    saldo = models.DecimalField(max_digits=16, decimal_places=2, default=0, help_text="Movimiento neto deudor del mes (debe - haber)")
+    debe_cuadradas = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    haber_cuadradas = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('cuenta', 'periodo')
+        indexes = [
+            models.Index(fields=['periodo', 'cuenta'], name='saldo_mes_per_cta_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cuenta_id} {self.periodo:%Y-%m} | D:{self.debe} H:{self.haber}"
+
 register_audit(CentroCostos)
 register_audit(Poliza)
 register_audit(DetallePoliza)
@@ -8,6 +8,7 @@ from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding
 from django.conf import settings
 from contabilidad.models import CertificadoDigital
+from contabilidad.services.csd_cache import ContextoFirma, ContextoFirmaCache
 
 
 class CFDISignerService:
@@ -37,21 +38,29 @@ class CFDISignerService:
         if not certificado.activo:
             raise ValueError("El certificado no está activo")
         
-        # Leer llave privada
-        private_key = cls._leer_llave_privada(certificado)
+        # Llave privada y certificado público cacheados (ver ContextoFirmaCache)
+        contexto = cls.contexto_firma(certificado)
         
         # Generar sello (firma digital)
-        sello = cls._generar_sello(cadena_original, private_key)
-        
-        # Leer certificado público
-        cert_data = cls._leer_certificado(certificado)
+        sello = contexto.firmar(cadena_original)
         
         return {
             'sello': sello,
             'numero_certificado': certificado.numero_certificado,
-            'certificado': cert_data['certificado_base64'],
+            'certificado': contexto.certificado_base64,
         }
     
+    @classmethod
+    def contexto_firma(cls, certificado: CertificadoDigital) -> ContextoFirma:
+        """
+        Obtiene el contexto de firma del certificado desde el cache de proceso.
+        La llave y el .cer solo se leen cuando no hay entrada vigente.
+        """
+        def cargar(cert):
+            return cls._leer_llave_privada(cert), cls._leer_certificado(cert)['certificado_base64']
+        
+        return ContextoFirmaCache.obtener(certificado, cargar, origen='cfdi_signer')
+    
     @classmethod
     def _leer_llave_privada(cls, certificado: CertificadoDigital):
         """
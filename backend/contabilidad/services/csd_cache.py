@@ -0,0 +1,111 @@
+"""
+Material criptográfico cacheado para el sellado de CFDI.
+
+- La hoja XSLT de la cadena original se compila una sola vez (por hilo: lxml
+  no garantiza que un objeto XSLT pueda usarse desde varios hilos a la vez).
+- ContextoFirmaCache guarda, por certificado, la llave privada ya descifrada y
+  cargada junto con el .cer en base64. La entrada se invalida si cambia
+  `updated_at` del certificado, al vencer el TTL (settings.CSD_CACHE_TTL) o
+  explícitamente con `evict()` (ver contabilidad/signals.py).
+"""
+import base64
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from django.conf import settings
+from lxml import etree
+
+_xslt_local = threading.local()
+
+
+def get_xslt_cadena_original(path=None) -> etree.XSLT:
+    """XSLT compilado de la cadena original CFDI 4.0."""
+    path = Path(path or Path(settings.BASE_DIR) / 'contabilidad' / 'sat_resources' / 'cadenaoriginal_4_0.xslt')
+    compilados = getattr(_xslt_local, 'compilados', None)
+    if compilados is None:
+        compilados = _xslt_local.compilados = {}
+    transform = compilados.get(path)
+    if transform is None:
+        if not path.exists():
+            raise FileNotFoundError(f"XSLT no encontrado en: {path}")
+        transform = compilados[path] = etree.XSLT(etree.parse(str(path)))
+    return transform
+
+
+@dataclass(frozen=True)
+class ContextoFirma:
+    """Llave privada cargada y certificado listo para inyectar en el XML."""
+    certificado_id: int
+    numero_certificado: str
+    private_key: Any
+    certificado_base64: str
+
+    def firmar(self, cadena_original: str) -> str:
+        """Sello digital (RSA PKCS#1 v1.5 + SHA-256) en base64."""
+        signature = self.private_key.sign(
+            cadena_original.encode('utf-8'),
+            padding.PKCS1v15(),
+            hashes.SHA256()
+        )
+        return base64.b64encode(signature).decode('utf-8')
+
+
+class ContextoFirmaCache:
+    """
+    Cache de proceso de ContextoFirma por (origen, certificado_id).
+
+    `origen` separa cargadores distintos del mismo certificado (XMLSigner y
+    CFDISignerService leen la llave de forma diferente).
+    """
+
+    _lock = threading.Lock()
+    _entradas = {}  # (origen, certificado_id) -> (updated_at, expira, ContextoFirma)
+
+    @classmethod
+    def ttl(cls) -> int:
+        return getattr(settings, 'CSD_CACHE_TTL', 900)
+
+    @classmethod
+    def obtener(cls, certificado, cargar: Callable[[Any], Tuple[Any, str]], origen: str = 'default') -> ContextoFirma:
+        """
+        Args:
+            certificado: Instancia de CertificadoDigital.
+            cargar: Callable(certificado) -> (private_key, certificado_base64);
+                solo se invoca cuando no hay una entrada vigente.
+        """
+        clave = (origen, certificado.pk)
+        version = getattr(certificado, 'updated_at', None)
+        ahora = time.monotonic()
+
+        entrada = cls._entradas.get(clave)
+        if entrada and entrada[0] == version and entrada[1] > ahora:
+            return entrada[2]
+
+        with cls._lock:
+            entrada = cls._entradas.get(clave)
+            if entrada and entrada[0] == version and entrada[1] > ahora:
+                return entrada[2]
+            private_key, certificado_base64 = cargar(certificado)
+            contexto = ContextoFirma(
+                certificado_id=certificado.pk,
+                numero_certificado=certificado.numero_certificado,
+                private_key=private_key,
+                certificado_base64=certificado_base64,
+            )
+            cls._entradas[clave] = (version, ahora + cls.ttl(), contexto)
+            return contexto
+
+    @classmethod
+    def evict(cls, certificado_id=None):
+        """Descarta las entradas de un certificado, o todas si no se indica."""
+        with cls._lock:
+            if certificado_id is None:
+                cls._entradas.clear()
+                return
+            for clave in [c for c in cls._entradas if c[1] == certificado_id]:
+                del cls._entradas[clave]
@@ -1,5 +1,14 @@
 from abc import ABC, abstractmethod
 
+
+class PACTransientError(Exception):
+    """
+    Falla temporal del PAC (timeout, saturación, error de red).
+    El pipeline de timbrado reintenta la solicitud con backoff.
+    """
+    pass
+
+
 class PACProvider(ABC):
     """
     Clase abstracta que define el contrato para los proveedores de certificación (PAC).
@@ -1,15 +1,33 @@
+import random
 import time
-from .base_provider import PACProvider
+from uuid import uuid4
+from django.conf import settings
+from .base_provider import PACProvider, PACTransientError
 
 class MockPACProvider(PACProvider):
     """
     Simulador de PAC para entornos de desarrollo y testing.
     No realiza conexiones externas.
+
+    Args:
+        latencia: Segundos por solicitud (default settings.PAC_MOCK_LATENCY).
+        tasa_fallo: Proporción de solicitudes que fallan con PACTransientError.
     """
 
+    def __init__(self, latencia: float = None, tasa_fallo: float = 0.0):
+        if latencia is None:
+            latencia = getattr(settings, 'PAC_MOCK_LATENCY', 0.5)
+        self.latencia = latencia
+        self.tasa_fallo = tasa_fallo
+
     def timbrar(self, xml_content: str, sello_digital: str = None) -> dict:
         # Simulación de latencia de red
-        time.sleep(0.5)
+        time.sleep(self.latencia)
+
+        if self.tasa_fallo and random.random() < self.tasa_fallo:
+            raise PACTransientError("PAC simulado no disponible")
+
+        folio = f"MOCK-UUID-{uuid4().hex[:26]}"
         
         # Inyectar nodo simulado de TimbreFiscalDigital si no existe
         xml_timbrado = xml_content
@@ -19,7 +37,7 @@ class MockPACProvider(PACProvider):
                  '<cfdi:Complemento>'
                  '<tfd:TimbreFiscalDigital '
                  'xmlns:tfd="http://www.sat.gob.mx/TimbreFiscalDigital" '
-                 'UUID="12345-MOCK-UUID-67890" '
+                 f'UUID="{folio}" '
                  'FechaTimbrado="2025-01-01T12:00:00" '
                  'SelloSAT="MOCK_SELLO_SAT" '
                  'Version="1.1" />'
@@ -29,13 +47,13 @@ class MockPACProvider(PACProvider):
 
         return {
             'success': True,
-            'uuid': '12345-MOCK-UUID-67890',
+            'uuid': folio,
             'xml_timbrado': xml_timbrado,
             'error': None
         }
 
     def cancelar(self, uuid: str, motivo: str, folio_sustitucion: str = None, rfc_receptor: str = None, total: float = 0) -> dict:
-        time.sleep(0.5)
+        time.sleep(self.latencia)
         return {
             'success': True,
             'acuse': f'<AcuseCancelacion UUID="{uuid}" Estatus="Cancelado sin aceptación" />',
@@ -0,0 +1,237 @@
+"""
+Pipeline de timbrado masivo (nómina y facturas).
+
+Etapas:
+1. Preparación del XML (y sello) en un pool de procesos: es trabajo de CPU.
+2. Solicitudes al PAC en un pool de hilos acotado, con límite de solicitudes
+   por segundo por proveedor, reintentos y backoff exponencial con jitter.
+3. Persistencia de cada comprobante en su propia transacción corta, desde el
+   hilo principal (los hilos del pool nunca tocan la base de datos).
+
+Uso:
+    pipeline = TimbradoPipeline(PACFactory.get_provider, proveedor='MOCK')
+    stats = pipeline.ejecutar(items, preparar=generar_xml, guardar=guardar)
+"""
+import logging
+import multiprocessing
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import transaction
+
+from .base_provider import PACTransientError
+
+logger = logging.getLogger(__name__)
+
+ERRORES_TRANSITORIOS = (PACTransientError, ConnectionError, TimeoutError)
+
+
+def _inicializar_worker():
+    """
+    Los workers se crean con spawn (ver TimbradoPipeline.ejecutar) y necesitan
+    cargar Django. No heredan las conexiones del padre: con fork, cerrar el
+    socket heredado terminaría también la sesión de Postgres del padre.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+class LimitadorTasa:
+    """
+    Limitador de solicitudes por segundo compartido por todos los hilos que
+    usan el mismo proveedor. Cada llamada reserva el siguiente turno libre.
+    """
+
+    _registro = {}
+    _registro_lock = threading.Lock()
+
+    def __init__(self, por_segundo: float):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0.0
+        self._siguiente = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def para(cls, proveedor: str) -> 'LimitadorTasa':
+        por_segundo = getattr(settings, 'PAC_RATE_LIMITS', {}).get(proveedor)
+        with cls._registro_lock:
+            limitador = cls._registro.get((proveedor, por_segundo))
+            if limitador is None:
+                limitador = cls._registro[(proveedor, por_segundo)] = cls(por_segundo)
+            return limitador
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+class TimbradoPipeline:
+    """
+    Args:
+        proveedor_factory: Callable sin argumentos que devuelve un proveedor PAC
+            (con método timbrar(xml) -> dict). Se crea uno por hilo.
+        proveedor: Nombre del proveedor, para el límite de settings.PAC_RATE_LIMITS.
+        max_workers: Solicitudes concurrentes al PAC.
+        procesos: Procesos para preparar XML; 0 los prepara en el proceso actual
+            (necesario si la preparación consulta la base de datos).
+        max_reintentos / backoff: Reintentos ante ERRORES_TRANSITORIOS.
+        on_progress: Callable(procesados, total, stats) tras cada comprobante.
+    """
+
+    def __init__(self, proveedor_factory, proveedor: str = 'MOCK', max_workers: int = None,
+                 procesos: int = None, max_reintentos: int = None, backoff: float = None,
+                 on_progress=None):
+        self.proveedor_factory = proveedor_factory
+        self.proveedor = proveedor
+        self.max_workers = max_workers or getattr(settings, 'PAC_MAX_WORKERS', 8)
+        self.procesos = getattr(settings, 'PAC_XML_PROCESOS', 0) if procesos is None else procesos
+        self.max_reintentos = getattr(settings, 'PAC_MAX_RETRIES', 3) if max_reintentos is None else max_reintentos
+        self.backoff = getattr(settings, 'PAC_RETRY_BACKOFF', 0.5) if backoff is None else backoff
+        self.on_progress = on_progress
+        self.limitador = LimitadorTasa.para(proveedor)
+        self._local = threading.local()
+        self._reintentos = 0
+        self._reintentos_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Hilos de PAC
+    # ------------------------------------------------------------------
+
+    def _provider(self):
+        provider = getattr(self._local, 'provider', None)
+        if provider is None:
+            provider = self._local.provider = self.proveedor_factory()
+        return provider
+
+    def _timbrar(self, xml: str) -> dict:
+        provider = self._provider()
+        intento = 0
+        while True:
+            self.limitador.esperar()
+            try:
+                return provider.timbrar(xml)
+            except ERRORES_TRANSITORIOS:
+                if intento >= self.max_reintentos:
+                    raise
+                with self._reintentos_lock:
+                    self._reintentos += 1
+                time.sleep(self.backoff * (2 ** intento) * random.uniform(0.5, 1.5))
+                intento += 1
+
+    # ------------------------------------------------------------------
+    # Hilo principal
+    # ------------------------------------------------------------------
+
+    def _registrar_fallo(self, stats, clave, error):
+        if isinstance(error, Exception):
+            motivo = type(error).__name__
+            detalle = str(error)
+        else:
+            motivo = detalle = error or 'Error PAC sin detalle'
+        stats['errores'][motivo] += 1
+        stats['fallidos'].append({'clave': clave, 'error': detalle})
+        logger.warning(f"Timbrado fallido ({clave}): {detalle}")
+
+    def _persistir(self, stats, clave, resultado, guardar):
+        if not resultado.get('success'):
+            self._registrar_fallo(stats, clave, resultado.get('error'))
+            return
+        try:
+            with transaction.atomic():
+                guardar(clave, resultado)
+            stats['timbrados'] += 1
+        except Exception as e:
+            # El CFDI ya existe ante el SAT: dejar el UUID en el log para conciliarlo
+            logger.error(f"Timbrado {resultado.get('uuid')} de {clave} no se pudo guardar: {e}")
+            self._registrar_fallo(stats, clave, e)
+
+    def ejecutar(self, items, preparar, guardar) -> dict:
+        """
+        Args:
+            items: Iterable de (clave, payload). Con procesos > 0, payload y
+                preparar deben poder serializarse con pickle (preparar, una
+                función importable: los workers arrancan con spawn).
+            preparar: Función payload -> XML listo para enviar al PAC.
+            guardar: Callable(clave, resultado) que persiste un timbrado exitoso.
+
+        Returns:
+            dict con total, timbrados, reintentos, duración, comprobantes por
+            segundo y el desglose de fallos por motivo.
+        """
+        items = list(items)
+        total = len(items)
+        stats = {'total': total, 'timbrados': 0, 'errores': Counter(), 'fallidos': []}
+        procesados = 0
+        self._reintentos = 0
+        inicio = time.perf_counter()
+
+        pool_xml = None
+        if self.procesos and total:
+            pool_xml = ProcessPoolExecutor(
+                max_workers=min(self.procesos, total),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_worker,
+            )
+        pool_pac = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pac')
+        try:
+            pendientes = {}
+            if pool_xml:
+                for clave, payload in items:
+                    pendientes[pool_xml.submit(preparar, payload)] = ('xml', clave)
+            else:
+                # Preparación en línea; los hilos van timbrando mientras tanto
+                for clave, payload in items:
+                    try:
+                        xml = preparar(payload)
+                    except Exception as e:
+                        self._registrar_fallo(stats, clave, e)
+                        procesados += 1
+                        continue
+                    pendientes[pool_pac.submit(self._timbrar, xml)] = ('pac', clave)
+
+            while pendientes:
+                hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    etapa, clave = pendientes.pop(futuro)
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        self._registrar_fallo(stats, clave, e)
+                    else:
+                        if etapa == 'xml':
+                            pendientes[pool_pac.submit(self._timbrar, resultado)] = ('pac', clave)
+                            continue
+                        self._persistir(stats, clave, resultado, guardar)
+
+                    procesados += 1
+                    if self.on_progress:
+                        self.on_progress(procesados, total, stats)
+                    if procesados % 100 == 0:
+                        logger.info(f"Timbrado: {procesados}/{total} ({stats['timbrados']} ok)")
+        finally:
+            pool_pac.shutdown(wait=True, cancel_futures=True)
+            if pool_xml:
+                pool_xml.shutdown(wait=True, cancel_futures=True)
+
+        duracion = time.perf_counter() - inicio
+        stats['errores'] = dict(stats['errores'])
+        stats['reintentos'] = self._reintentos
+        stats['duracion'] = round(duracion, 3)
+        stats['por_segundo'] = round(total / duracion, 2) if duracion else 0.0
+        logger.info(
+            f"Timbrado terminado: {stats['timbrados']}/{total} en {duracion:.2f}s, "
+            f"{len(stats['fallidos'])} fallidos, {stats['reintentos']} reintentos"
+        )
+        return stats
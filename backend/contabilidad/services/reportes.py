@@ -1,7 +1,7 @@
 from decimal import Decimal
-from django.db.models import Sum, Q
-from contabilidad.models import CuentaContable, Poliza, DetallePoliza
-from datetime import date
+from contabilidad.models import CuentaContable
+from contabilidad.services.saldos import SaldoMensualService
+from datetime import timedelta
 
 class ReporteFinancieroService:
     """
@@ -15,20 +15,17 @@ class ReporteFinancieroService:
     def obtener_balanza_comprobacion(fecha_inicio, fecha_fin):
         """
         Retorna una lista de cuentas con sus movimientos y saldos en el rango.
+        Lee de SaldoMensualCuenta: número constante de consultas.
         """
         cuentas = CuentaContable.objects.filter(afectable=True).order_by('codigo')
+        previos = SaldoMensualService.movimientos_por_cuenta(None, fecha_inicio - timedelta(days=1))
+        periodo = SaldoMensualService.movimientos_por_cuenta(fecha_inicio, fecha_fin)
+        cero = {'debe': Decimal(0), 'haber': Decimal(0)}
         data = []
 
         for cuenta in cuentas:
-            # Calcular saldos iniciales (antes del rango)
-            movs_previos = DetallePoliza.objects.filter(
-                cuenta=cuenta,
-                poliza__fecha__lt=fecha_inicio,
-                poliza__deleted_at__isnull=True
-            ).aggregate(
-                debe=Sum('debe', default=Decimal(0)),
-                haber=Sum('haber', default=Decimal(0))
-            )
+            movs_previos = previos.get(cuenta.id, cero)
+            movs_periodo = periodo.get(cuenta.id, cero)
 
             # Naturaleza: Deudora (Saldo = Debe - Haber), Acreedora (Saldo = Haber - Debe)
             saldo_inicial = 0
@@ -37,18 +34,8 @@ class ReporteFinancieroService:
             else:
                 saldo_inicial = movs_previos['haber'] - movs_previos['debe']
 
-            # Movimientos del periodo
-            movs_periodo = DetallePoliza.objects.filter(
-                cuenta=cuenta,
-                poliza__fecha__range=(fecha_inicio, fecha_fin),
-                poliza__deleted_at__isnull=True
-            ).aggregate(
-                debe=Sum('debe', default=Decimal(0)),
-                haber=Sum('haber', default=Decimal(0))
-            )
-            
-            debe_periodo = movs_periodo['debe'] or Decimal(0)
-            haber_periodo = movs_periodo['haber'] or Decimal(0)
+            debe_periodo = movs_periodo['debe']
+            haber_periodo = movs_periodo['haber']
 
             # Saldo Final
             saldo_final = 0
@@ -75,9 +62,11 @@ class ReporteFinancieroService:
         """
         Ingresos vs Costos/Gastos.
         """
-        cuentas_ingresos = ReporteFinancieroService._get_saldo_cuentas_tipo('INGRESOS', fecha_inicio, fecha_fin)
-        cuentas_costos = ReporteFinancieroService._get_saldo_cuentas_tipo('COSTOS', fecha_inicio, fecha_fin)
-        cuentas_gastos = ReporteFinancieroService._get_saldo_cuentas_tipo('GASTOS', fecha_inicio, fecha_fin)
+        movimientos = SaldoMensualService.movimientos_por_cuenta(fecha_inicio, fecha_fin, solo_cuadradas=True)
+
+        cuentas_ingresos = ReporteFinancieroService._get_saldo_cuentas_tipo('INGRESOS', fecha_inicio, fecha_fin, movimientos)
+        cuentas_costos = ReporteFinancieroService._get_saldo_cuentas_tipo('COSTOS', fecha_inicio, fecha_fin, movimientos)
+        cuentas_gastos = ReporteFinancieroService._get_saldo_cuentas_tipo('GASTOS', fecha_inicio, fecha_fin, movimientos)
 
         total_ingresos = sum(c['saldo'] for c in cuentas_ingresos)
         total_costos = sum(c['saldo'] for c in cuentas_costos)
@@ -105,11 +94,11 @@ class ReporteFinancieroService:
         Activo, Pasivo y Capital a una fecha de corte.
         """
         # Para Balance General tomamos movimientos desde el inicio de los tiempos hasta fecha_corte
-        fecha_inicio_historia = date(2000, 1, 1)
+        movimientos = SaldoMensualService.movimientos_por_cuenta(None, fecha_corte, solo_cuadradas=True)
 
-        cuentas_activo = ReporteFinancieroService._get_saldo_cuentas_tipo('ACTIVO', fecha_inicio_historia, fecha_corte)
-        cuentas_pasivo = ReporteFinancieroService._get_saldo_cuentas_tipo('PASIVO', fecha_inicio_historia, fecha_corte)
-        cuentas_capital = ReporteFinancieroService._get_saldo_cuentas_tipo('CAPITAL', fecha_inicio_historia, fecha_corte)
+        cuentas_activo = ReporteFinancieroService._get_saldo_cuentas_tipo('ACTIVO', None, fecha_corte, movimientos)
+        cuentas_pasivo = ReporteFinancieroService._get_saldo_cuentas_tipo('PASIVO', None, fecha_corte, movimientos)
+        cuentas_capital = ReporteFinancieroService._get_saldo_cuentas_tipo('CAPITAL', None, fecha_corte, movimientos)
 
         total_activo = sum(c['saldo'] for c in cuentas_activo)
         total_pasivo = sum(c['saldo'] for c in cuentas_pasivo)
@@ -131,23 +120,22 @@ class ReporteFinancieroService:
         }
 
     @staticmethod
-    def _get_saldo_cuentas_tipo(tipo_cuenta, fecha_inicio, fecha_fin):
+    def _get_saldo_cuentas_tipo(tipo_cuenta, fecha_inicio, fecha_fin, movimientos=None):
         """
         Helper para obtener saldos de todas las cuentas de un tipo (ej. ACTIVO) en un rango.
+        `movimientos` permite reutilizar el resultado de SaldoMensualService.movimientos_por_cuenta
+        entre varios tipos de cuenta.
         """
+        if movimientos is None:
+            movimientos = SaldoMensualService.movimientos_por_cuenta(fecha_inicio, fecha_fin, solo_cuadradas=True)
+
         cuentas = CuentaContable.objects.filter(tipo=tipo_cuenta, afectable=True)
         resultado = []
         
         for cuenta in cuentas:
-            movs = DetallePoliza.objects.filter(
-                cuenta=cuenta,
-                poliza__fecha__range=(fecha_inicio, fecha_fin),
-                poliza__deleted_at__isnull=True,
-                poliza__cuadrada=True # Solo considerar polizas cuadradas/validas?
-            ).aggregate(
-                debe=Sum('debe', default=Decimal(0)),
-                haber=Sum('haber', default=Decimal(0))
-            )
+            movs = movimientos.get(cuenta.id)
+            if not movs:
+                continue
             
             saldo = 0
             if cuenta.naturaleza == 'DEUDORA':
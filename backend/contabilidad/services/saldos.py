@@ -0,0 +1,189 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, Q
+from django.db.models.functions import TruncMonth
+
+from contabilidad.models import DetallePoliza, SaldoMensualCuenta
+
+
+def inicio_mes(fecha):
+    """Primer día del mes de `fecha` (acepta date o 'YYYY-MM-DD')."""
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha[:10])
+    return fecha.replace(day=1)
+
+
+def siguiente_mes(periodo):
+    if periodo.month == 12:
+        return date(periodo.year + 1, 1, 1)
+    return date(periodo.year, periodo.month + 1, 1)
+
+
+class SaldoMensualService:
+    """
+    Mantiene y consulta la tabla SaldoMensualCuenta (rollup por cuenta/mes).
+
+    Los reportes leen los meses completos desde el rollup y solo agregan
+    DetallePoliza para los días sueltos en los extremos del rango, de modo que
+    el número de consultas es constante sin importar la historia.
+    """
+
+    @staticmethod
+    def _detalles_vigentes():
+        # DetallePoliza.objects ya filtra activo=True
+        return DetallePoliza.objects.filter(poliza__activo=True)
+
+    @staticmethod
+    def _sumas():
+        """Totales de todas las pólizas activas y, aparte, solo de las cuadradas."""
+        cuadrada = Q(poliza__cuadrada=True)
+        return {
+            'total_debe': Sum('debe'),
+            'total_haber': Sum('haber'),
+            'debe_cuadradas': Sum('debe', filter=cuadrada),
+            'haber_cuadradas': Sum('haber', filter=cuadrada),
+        }
+
+    @staticmethod
+    def recalcular(celdas):
+        """
+        Recalcula las celdas (cuenta_id, periodo) indicadas en una sola consulta
+        agregada y las persiste con un upsert masivo.
+        """
+        cuentas_por_periodo = defaultdict(set)
+        for cuenta_id, periodo in celdas:
+            if cuenta_id and periodo:
+                cuentas_por_periodo[inicio_mes(periodo)].add(cuenta_id)
+
+        if not cuentas_por_periodo:
+            return 0
+
+        filtro = Q()
+        for periodo, cuentas in cuentas_por_periodo.items():
+            filtro |= Q(
+                cuenta_id__in=cuentas,
+                poliza__fecha__gte=periodo,
+                poliza__fecha__lt=siguiente_mes(periodo),
+            )
+
+        agregados = (
+            SaldoMensualService._detalles_vigentes()
+            .filter(filtro)
+            .annotate(periodo=TruncMonth('poliza__fecha'))
+            .values('cuenta_id', 'periodo')
+            .annotate(**SaldoMensualService._sumas())
+        )
+        totales = {(row['cuenta_id'], row['periodo']): row for row in agregados}
+
+        registros = []
+        for periodo, cuentas in cuentas_por_periodo.items():
+            for cuenta_id in cuentas:
+                registros.append(SaldoMensualService._registro(
+                    cuenta_id, periodo, totales.get((cuenta_id, periodo), {})
+                ))
+
+        SaldoMensualCuenta.objects.bulk_create(
+            registros,
+            update_conflicts=True,
+            unique_fields=['cuenta', 'periodo'],
+            update_fields=['debe', 'haber', 'saldo', 'debe_cuadradas', 'haber_cuadradas', 'updated_at'],
+        )
+        return len(registros)
+
+    @staticmethod
+    def _registro(cuenta_id, periodo, row):
+        debe = row.get('total_debe') or Decimal(0)
+        haber = row.get('total_haber') or Decimal(0)
+        return SaldoMensualCuenta(
+            cuenta_id=cuenta_id,
+            periodo=periodo,
+            debe=debe,
+            haber=haber,
+            saldo=debe - haber,
+            debe_cuadradas=row.get('debe_cuadradas') or Decimal(0),
+            haber_cuadradas=row.get('haber_cuadradas') or Decimal(0),
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def reconstruir(batch_size=2000):
+        """Reconstruye la tabla completa a partir de DetallePoliza."""
+        SaldoMensualCuenta.objects.all().delete()
+
+        agregados = (
+            SaldoMensualService._detalles_vigentes()
+            .annotate(periodo=TruncMonth('poliza__fecha'))
+            .values('cuenta_id', 'periodo')
+            .annotate(**SaldoMensualService._sumas())
+            .order_by()
+        )
+        registros = [
+            SaldoMensualService._registro(row['cuenta_id'], row['periodo'], row)
+            for row in agregados.iterator()
+        ]
+        SaldoMensualCuenta.objects.bulk_create(registros, batch_size=batch_size)
+        return len(registros)
+
+    @staticmethod
+    def movimientos_por_cuenta(fecha_inicio, fecha_fin, solo_cuadradas=False):
+        """
+        Suma de debe/haber por cuenta para el rango inclusivo [fecha_inicio, fecha_fin].
+        `fecha_inicio=None` significa desde el inicio de la historia.
+        `solo_cuadradas` limita a pólizas cuadradas (Estado de Resultados y
+        Balance General); la Balanza y el XML del SAT incluyen todas las activas.
+
+        Returns:
+            dict {cuenta_id: {'debe': Decimal, 'haber': Decimal}}
+        """
+        resultado = defaultdict(lambda: {'debe': Decimal(0), 'haber': Decimal(0)})
+
+        def acumular(rows):
+            for row in rows:
+                resultado[row['cuenta_id']]['debe'] += row['total_debe'] or Decimal(0)
+                resultado[row['cuenta_id']]['haber'] += row['total_haber'] or Decimal(0)
+
+        def detalles(desde, hasta):
+            qs = SaldoMensualService._detalles_vigentes().filter(poliza__fecha__lte=hasta)
+            if solo_cuadradas:
+                qs = qs.filter(poliza__cuadrada=True)
+            if desde is not None:
+                qs = qs.filter(poliza__fecha__gte=desde)
+            acumular(
+                qs.values('cuenta_id')
+                .annotate(total_debe=Sum('debe'), total_haber=Sum('haber'))
+                .order_by()
+            )
+
+        # Meses completamente cubiertos por el rango: [mes_desde, mes_hasta)
+        if fecha_inicio is None:
+            mes_desde = None
+        elif fecha_inicio.day == 1:
+            mes_desde = fecha_inicio
+        else:
+            mes_desde = siguiente_mes(fecha_inicio)
+        mes_hasta = inicio_mes(fecha_fin + timedelta(days=1))
+
+        if mes_desde is not None and mes_desde >= mes_hasta:
+            detalles(fecha_inicio, fecha_fin)
+            return dict(resultado)
+
+        saldos = SaldoMensualCuenta.objects.filter(periodo__lt=mes_hasta)
+        if mes_desde is not None:
+            saldos = saldos.filter(periodo__gte=mes_desde)
+        campo_debe, campo_haber = ('debe_cuadradas', 'haber_cuadradas') if solo_cuadradas else ('debe', 'haber')
+        acumular(
+            saldos.values('cuenta_id')
+            .annotate(total_debe=Sum(campo_debe), total_haber=Sum(campo_haber))
+            .order_by()
+        )
+
+        # Días sueltos al inicio y al final del rango
+        if mes_desde is not None and fecha_inicio < mes_desde:
+            detalles(fecha_inicio, mes_desde - timedelta(days=1))
+        if mes_hasta <= fecha_fin:
+            detalles(mes_hasta, fecha_fin)
+
+        return dict(resultado)
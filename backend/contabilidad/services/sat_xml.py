@@ -2,9 +2,9 @@ import logging
 import defusedxml.ElementTree as ET
 from xml.etree.ElementTree import Element, SubElement, tostring
 from decimal import Decimal
-from django.db.models import Sum, Q, Case, When, Value, DecimalField
-from datetime import date
-from ..models import CuentaContable, Poliza, DetallePoliza
+from datetime import date, timedelta
+from ..models import CuentaContable
+from .saldos import SaldoMensualService
 
 logger = logging.getLogger(__name__)
 
@@ -60,34 +60,28 @@ def generate_balanza_xml(anio: int, mes: int, rfc: str = "XAXX010101000", tipo_e
     root.set("xmlns:xsi", XSI)
     root.set("xsi:schemaLocation", f"{NS_BALANZA} http://www.sat.gob.mx/esquemas/ContabilidadE/1_3/BalanzaComprobacion/BalanzaComprobacion_1_3.xsd")
 
-    # Obtener movimientos del mes
-    # Esto es complejo: Necesitamos Saldo Inicial (acumulado hasta mes anterior) y movimientos del mes.
-    # Por ahora, haremos un cálculo "al vuelo" simplificado (Pesado en performance si hay muchos datos).
-    # Idealmente, deberíamos tener una tabla "SaldoMensualCuenta".
-    
+    # Saldo Inicial (acumulado hasta mes anterior) y movimientos del mes,
+    # leídos del rollup SaldoMensualCuenta (número constante de consultas).
     start_date = date(anio, mes, 1)
     if mes == 12:
          end_date = date(anio + 1, 1, 1)
     else:
          end_date = date(anio, mes + 1, 1)
-         
-    cuentas = CuentaContable.objects.filter(activo=True, afectable=True)
+
+    previos = SaldoMensualService.movimientos_por_cuenta(None, start_date - timedelta(days=1))
+    del_mes = SaldoMensualService.movimientos_por_cuenta(start_date, end_date - timedelta(days=1))
+    cero = {'debe': Decimal(0), 'haber': Decimal(0)}
+
+    cuentas = CuentaContable.objects.filter(activo=True, afectable=True).order_by('codigo')
     
     for c in cuentas:
-        # Calcular Saldo Inicial (Todo lo anterior al 1 del mes)
-        # Debe - Haber
-        si_debe = DetallePoliza.objects.filter(cuenta=c, poliza__fecha__lt=start_date).aggregate(s=Sum('debe'))['s'] or 0
-        si_haber = DetallePoliza.objects.filter(cuenta=c, poliza__fecha__lt=start_date).aggregate(s=Sum('haber'))['s'] or 0
-        saldo_inicial = si_debe - si_haber # Deudora positive
-        
-        # Movimientos del mes
-        movs = DetallePoliza.objects.filter(cuenta=c, poliza__fecha__range=[start_date, end_date])
-        # Rango es inclusivo/inclusivo en Django date range? No, usually. But let's verify logic.
-        # Use gte/lt for safety.
-        movs = DetallePoliza.objects.filter(cuenta=c, poliza__fecha__gte=start_date, poliza__fecha__lt=end_date)
+        # Saldo Inicial: Debe - Haber (Deudora positive)
+        si = previos.get(c.id, cero)
+        saldo_inicial = si['debe'] - si['haber']
         
-        debe = movs.aggregate(s=Sum('debe'))['s'] or 0
-        haber = movs.aggregate(s=Sum('haber'))['s'] or 0
+        movs = del_mes.get(c.id, cero)
+        debe = movs['debe']
+        haber = movs['haber']
         
         saldo_final = saldo_inicial + debe - haber
         
@@ -1,44 +1,36 @@
 import base64
 from pathlib import Path
 from lxml import etree
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_der_private_key
 from django.conf import settings
 from core.encryption import decrypt_data, decrypt_text
+from .csd_cache import ContextoFirmaCache, get_xslt_cadena_original
 
 class XMLSigner:
     def __init__(self, empresa_fiscal):
         self.empresa_fiscal = empresa_fiscal
         self.xslt_path = Path(settings.BASE_DIR) / 'contabilidad' / 'sat_resources' / 'cadenaoriginal_4_0.xslt'
-        
-    def generar_cadena_original(self, xml_str):
-        if not self.xslt_path.exists():
-            raise FileNotFoundError(f"XSLT no encontrado en: {self.xslt_path}")
-        
-        # Parse XML
+
+    @staticmethod
+    def _parse(xml_str):
         # Remove encoding declaration to avoid lxml issues if passed as string
         if isinstance(xml_str, str):
             xml_bytes = xml_str.encode('utf-8')
         else:
             xml_bytes = xml_str
-            
-        xml_root = etree.fromstring(xml_bytes)
-        xslt_root = etree.parse(str(self.xslt_path))
-        transform = etree.XSLT(xslt_root)
-        
-        cadena_original = str(transform(xml_root))
-        return cadena_original
+        return etree.fromstring(xml_bytes)
 
-    def firmar_xml(self, xml_str):
-        cert = self.empresa_fiscal.certificado_sello
-        if not cert:
-            raise ValueError("La empresa no tiene certificado configurado")
-            
-        # 1. Generar Cadena Original
-        cadena = self.generar_cadena_original(xml_str)
-        # Ensure it's not empty? XSLT output is sometimes tricky.
-        
+    def _cadena_original(self, xml_root):
+        # XSLT compilado una sola vez (ver csd_cache)
+        transform = get_xslt_cadena_original(self.xslt_path)
+        return str(transform(xml_root))
+
+    def generar_cadena_original(self, xml_str):
+        return self._cadena_original(self._parse(xml_str))
+
+    @staticmethod
+    def _cargar_material(cert):
+        """Descifra y carga la llave privada y lee el .cer (solo en cache miss)."""
         # 2. Desencriptar Key
         if not cert.archivo_key:
              raise ValueError("Archivo .key no presente en certificado.")
@@ -60,14 +52,6 @@ class XMLSigner:
              # Try PEM
             private_key = load_pem_private_key(key_bytes, password=password)
 
-        # 3. Firmar (SHA256)
-        signature = private_key.sign(
-            cadena.encode('utf-8'),
-            padding.PKCS1v15(),
-            hashes.SHA256()
-        )
-        sello_b64 = base64.b64encode(signature).decode('utf-8')
-        
         # 4. Obtener Certificado (.cer)
         cer_file = cert.archivo_cer
         if not cer_file:
@@ -91,17 +75,27 @@ class XMLSigner:
              # DER
              cert_b64 = base64.b64encode(cer_content).decode('utf-8')
 
+        return private_key, cert_b64
+
+    def firmar_xml(self, xml_str):
+        cert = self.empresa_fiscal.certificado_sello
+        if not cert:
+            raise ValueError("La empresa no tiene certificado configurado")
+
+        # Llave y .cer cacheados por certificado (se recargan si cambia updated_at)
+        contexto = ContextoFirmaCache.obtener(cert, self._cargar_material, origen='xml_signer')
+
+        # 1. Generar Cadena Original (el mismo árbol se reutiliza para inyectar el sello)
+        root = self._parse(xml_str)
+        cadena = self._cadena_original(root)
+        # Ensure it's not empty? XSLT output is sometimes tricky.
+
+        # 3. Firmar (SHA256)
+        sello_b64 = contexto.firmar(cadena)
+
         # 5. Inyectar en XML
-        if isinstance(xml_str, str):
-            xml_bytes = xml_str.encode('utf-8')
-        else:
-            xml_bytes = xml_str
-            
-        root = etree.fromstring(xml_bytes)
-        
-        # Attributes
         root.set("Sello", sello_b64)
-        root.set("Certificado", cert_b64)
+        root.set("Certificado", contexto.certificado_base64)
         # root.set("NoCertificado", "...") # Optional for now, user didn't strict ask for logic to extract NoCertificado
         
         final_xml = etree.tostring(root, encoding='UTF-8').decode('UTF-8')
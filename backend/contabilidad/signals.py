@@ -0,0 +1,111 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from contabilidad.models import Poliza, DetallePoliza, CertificadoDigital
+from contabilidad.services.csd_cache import ContextoFirmaCache
+from contabilidad.services.saldos import SaldoMensualService, inicio_mes
+
+# Celdas (cuenta_id, periodo) pendientes de recalcular en la transacción actual.
+# Se acumulan para que una póliza con N partidas dispare un solo recálculo.
+_local = threading.local()
+
+
+def _celdas_pendientes():
+    if not hasattr(_local, 'celdas'):
+        _local.celdas = set()
+    return _local.celdas
+
+
+def _programar_recalculo(celdas):
+    pendientes = _celdas_pendientes()
+    pendientes.update(celdas)
+    transaction.on_commit(_aplicar_recalculo)
+
+
+def _aplicar_recalculo():
+    pendientes = _celdas_pendientes()
+    if not pendientes:
+        return
+    lote = set(pendientes)
+    pendientes.clear()
+    SaldoMensualService.recalcular(lote)
+
+
+def _estado_poliza(instance):
+    # Leemos de __dict__ para no disparar consultas con campos diferidos
+    return (
+        instance.__dict__.get('fecha'),
+        instance.__dict__.get('activo'),
+        instance.__dict__.get('cuadrada'),
+    )
+
+
+@receiver(post_init, sender=Poliza)
+def snapshot_poliza(sender, instance, **kwargs):
+    instance._saldo_estado_original = _estado_poliza(instance)
+
+
+@receiver(post_init, sender=DetallePoliza)
+def snapshot_detalle(sender, instance, **kwargs):
+    instance._saldo_cuenta_original = instance.__dict__.get('cuenta_id')
+
+
+@receiver(post_save, sender=Poliza)
+def actualizar_saldos_poliza(sender, instance, created, **kwargs):
+    """Fecha, cancelación o cuadre de la póliza afectan a todas sus partidas."""
+    original = getattr(instance, '_saldo_estado_original', (None, None, None))
+    actual = _estado_poliza(instance)
+    instance._saldo_estado_original = actual
+
+    if created or original == actual:
+        return
+
+    periodos = {inicio_mes(fecha) for fecha in (original[0], actual[0]) if fecha}
+    cuentas = set(
+        DetallePoliza.all_objects.filter(poliza_id=instance.pk)
+        .values_list('cuenta_id', flat=True)
+        .distinct()
+    )
+    _programar_recalculo((cuenta_id, periodo) for cuenta_id in cuentas for periodo in periodos)
+
+
+@receiver(pre_delete, sender=Poliza)
+def actualizar_saldos_poliza_eliminada(sender, instance, **kwargs):
+    if not instance.fecha:
+        return
+    periodo = inicio_mes(instance.fecha)
+    cuentas = DetallePoliza.all_objects.filter(poliza_id=instance.pk).values_list('cuenta_id', flat=True).distinct()
+    _programar_recalculo((cuenta_id, periodo) for cuenta_id in cuentas)
+
+
+def _programar_detalle(instance):
+    if not DetallePoliza.poliza.is_cached(instance):
+        poliza = Poliza.all_objects.filter(pk=instance.poliza_id).only('fecha').first()
+    else:
+        poliza = instance.poliza
+    if poliza is None or not poliza.fecha:
+        return
+    periodo = inicio_mes(poliza.fecha)
+    cuentas = {instance.cuenta_id, getattr(instance, '_saldo_cuenta_original', None)}
+    _programar_recalculo((cuenta_id, periodo) for cuenta_id in cuentas if cuenta_id)
+
+
+@receiver(post_save, sender=DetallePoliza)
+def actualizar_saldos_detalle(sender, instance, **kwargs):
+    _programar_detalle(instance)
+    instance._saldo_cuenta_original = instance.cuenta_id
+
+
+@receiver(post_delete, sender=DetallePoliza)
+def actualizar_saldos_detalle_eliminado(sender, instance, **kwargs):
+    _programar_detalle(instance)
+
+
+@receiver(post_save, sender=CertificadoDigital)
+@receiver(post_delete, sender=CertificadoDigital)
+def certificado_cambiado(sender, instance, **kwargs):
+    # updated_at ya invalida la entrada; esto libera la llave de inmediato
+    ContextoFirmaCache.evict(instance.pk)
@@ -0,0 +1,88 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from contabilidad.services.csd_cache import ContextoFirmaCache, get_xslt_cadena_original
+from contabilidad.services.xml_signer import XMLSigner
+
+CFDI_MINIMO = (
+    '<cfdi:Comprobante xmlns:cfdi="http://www.sat.gob.mx/cfd/4" Version="4.0" Fecha="2025-01-01T12:00:00" '
+    'SubTotal="100.00" Moneda="MXN" Total="116.00" TipoDeComprobante="I" Exportacion="01" LugarExpedicion="20000">'
+    '<cfdi:Emisor Rfc="AAA010101AAA" Nombre="EMPRESA" RegimenFiscal="601"/>'
+    '</cfdi:Comprobante>'
+)
+
+
+@pytest.fixture
+def llave():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def cache_limpio():
+    ContextoFirmaCache.evict()
+    yield
+    ContextoFirmaCache.evict()
+
+
+def _certificado(pk=1, updated_at=datetime(2025, 1, 1)):
+    return SimpleNamespace(pk=pk, numero_certificado='30001000000500003416', updated_at=updated_at)
+
+
+class TestContextoFirmaCache:
+    def test_lote_carga_la_llave_una_vez(self, llave, cache_limpio):
+        cargas = []
+
+        def cargar(cert):
+            cargas.append(cert.pk)
+            return llave, 'MIICERT'
+
+        cert = _certificado()
+        sellos = [ContextoFirmaCache.obtener(cert, cargar).firmar(f'||4.0|{i}||') for i in range(500)]
+
+        assert cargas == [1]
+        assert len(set(sellos)) == 500
+        contexto = ContextoFirmaCache.obtener(cert, cargar)
+        assert contexto.certificado_base64 == 'MIICERT'
+
+    def test_sello_verificable(self, llave, cache_limpio):
+        import base64
+        contexto = ContextoFirmaCache.obtener(_certificado(), lambda c: (llave, 'MIICERT'))
+        sello = contexto.firmar('||4.0|A||')
+
+        llave.public_key().verify(
+            base64.b64decode(sello), '||4.0|A||'.encode('utf-8'), padding.PKCS1v15(), hashes.SHA256()
+        )
+
+    def test_invalidacion_por_updated_at_evict_y_ttl(self, llave, cache_limpio, settings):
+        cargas = []
+
+        def cargar(cert):
+            cargas.append(cert.updated_at)
+            return llave, 'MIICERT'
+
+        ContextoFirmaCache.obtener(_certificado(), cargar)
+        ContextoFirmaCache.obtener(_certificado(updated_at=datetime(2025, 6, 1)), cargar)
+        assert len(cargas) == 2
+
+        ContextoFirmaCache.evict(1)
+        ContextoFirmaCache.obtener(_certificado(updated_at=datetime(2025, 6, 1)), cargar)
+        assert len(cargas) == 3
+
+        settings.CSD_CACHE_TTL = 0
+        ContextoFirmaCache.obtener(_certificado(updated_at=datetime(2025, 6, 1)), cargar)
+        assert len(cargas) == 4
+
+
+class TestXSLTCompilado:
+    def test_xslt_se_compila_una_vez(self):
+        assert get_xslt_cadena_original() is get_xslt_cadena_original()
+
+    def test_cadena_original(self):
+        signer = XMLSigner(empresa_fiscal=None)
+        cadena = signer.generar_cadena_original(CFDI_MINIMO)
+
+        assert cadena.startswith('||4.0|')
+        assert 'AAA010101AAA' in cadena
+        assert signer.generar_cadena_original(CFDI_MINIMO) == cadena
@@ -0,0 +1,124 @@
+import time
+import pytest
+from contabilidad.services.pac.base_provider import PACTransientError
+from contabilidad.services.pac.mock_provider import MockPACProvider
+from contabilidad.services.pac.pipeline import LimitadorTasa, TimbradoPipeline
+
+
+def _preparar(payload):
+    return f'<cfdi:Comprobante Folio="{payload}"></cfdi:Comprobante>'
+
+
+class PACInestable(MockPACProvider):
+    """Falla las primeras `fallos` solicitudes de cada folio."""
+
+    def __init__(self, fallos, rechazados=()):
+        super().__init__(latencia=0)
+        self.fallos = fallos
+        self.rechazados = rechazados
+        self.intentos = {}
+
+    def timbrar(self, xml_content, sello_digital=None):
+        self.intentos[xml_content] = self.intentos.get(xml_content, 0) + 1
+        if any(f'Folio="{r}"' in xml_content for r in self.rechazados):
+            return {'success': False, 'uuid': None, 'xml_timbrado': None, 'error': 'CFDI40108 RFC inválido'}
+        if self.intentos[xml_content] <= self.fallos:
+            raise PACTransientError("timeout")
+        return super().timbrar(xml_content)
+
+
+@pytest.fixture
+def sin_limite(settings):
+    settings.PAC_RATE_LIMITS = {}
+
+
+@pytest.mark.django_db
+class TestTimbradoPipeline:
+    def test_reintenta_fallas_transitorias(self, sin_limite):
+        provider = PACInestable(fallos=2)
+        guardados = {}
+
+        stats = TimbradoPipeline(
+            lambda: provider, max_workers=1, procesos=0, max_reintentos=3, backoff=0
+        ).ejecutar([(i, i) for i in range(3)], _preparar, guardados.__setitem__)
+
+        assert stats['timbrados'] == 3
+        assert stats['reintentos'] == 6
+        assert sorted(guardados) == [0, 1, 2]
+        assert all('MOCK-UUID' in r['uuid'] for r in guardados.values())
+
+    def test_desglose_de_fallos(self, sin_limite):
+        provider = PACInestable(fallos=10, rechazados=(1,))
+
+        def preparar(payload):
+            if payload == 2:
+                raise ValueError("Receptor sin RFC")
+            return _preparar(payload)
+
+        stats = TimbradoPipeline(
+            lambda: provider, max_workers=2, procesos=0, max_reintentos=1, backoff=0
+        ).ejecutar([(i, i) for i in range(3)], preparar, lambda clave, resultado: None)
+
+        assert stats['timbrados'] == 0
+        assert stats['errores'] == {
+            'PACTransientError': 1,
+            'CFDI40108 RFC inválido': 1,
+            'ValueError': 1,
+        }
+        assert sorted(f['clave'] for f in stats['fallidos']) == [0, 1, 2]
+
+    def test_error_al_guardar_no_detiene_el_lote(self, sin_limite):
+        def guardar(clave, resultado):
+            if clave == 0:
+                raise RuntimeError("deadlock")
+
+        progreso = []
+        stats = TimbradoPipeline(
+            lambda: MockPACProvider(latencia=0), procesos=0,
+            on_progress=lambda hechos, total, _: progreso.append((hechos, total)),
+        ).ejecutar([(i, i) for i in range(3)], _preparar, guardar)
+
+        assert stats['timbrados'] == 2
+        assert stats['errores'] == {'RuntimeError': 1}
+        assert progreso[-1] == (3, 3)
+
+    def test_xml_en_pool_de_procesos(self, sin_limite):
+        guardados = {}
+        stats = TimbradoPipeline(
+            lambda: MockPACProvider(latencia=0), procesos=2
+        ).ejecutar([(i, i) for i in range(5)], _preparar, guardados.__setitem__)
+
+        assert stats['timbrados'] == 5
+        assert 'Folio="3"' in guardados[3]['xml_timbrado']
+
+    def test_limite_por_proveedor(self, settings):
+        settings.PAC_RATE_LIMITS = {'LENTO': 20}
+        limitador = LimitadorTasa.para('LENTO')
+        limitador._siguiente = 0.0
+
+        inicio = time.perf_counter()
+        TimbradoPipeline(
+            lambda: MockPACProvider(latencia=0), proveedor='LENTO', max_workers=8, procesos=0
+        ).ejecutar([(i, i) for i in range(11)], _preparar, lambda clave, resultado: None)
+
+        # 11 solicitudes a 20/s: al menos 10 intervalos de 50 ms
+        assert time.perf_counter() - inicio >= 0.45
+
+    @pytest.mark.slow
+    def test_benchmark_throughput_vs_serial(self, sin_limite):
+        latencia = 0.05
+        items = [(i, i) for i in range(200)]
+
+        provider = MockPACProvider(latencia=latencia)
+        inicio = time.perf_counter()
+        for _, payload in items:
+            provider.timbrar(_preparar(payload))
+        serial = time.perf_counter() - inicio
+
+        stats = TimbradoPipeline(
+            lambda: MockPACProvider(latencia=latencia), max_workers=16, procesos=2
+        ).ejecutar(items, _preparar, lambda clave, resultado: None)
+
+        print(f"\nTimbrado serial: {len(items) / serial:.1f}/s, pipeline: {stats['por_segundo']}/s")
+        assert stats['timbrados'] == len(items)
+        assert stats['duracion'] * 4 < serial
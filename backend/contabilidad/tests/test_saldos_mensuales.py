@@ -0,0 +1,141 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from contabilidad.models import CuentaContable, SaldoMensualCuenta
+from contabilidad.repositories.poliza_repository import PolizaRepository
+from contabilidad.services.reportes import ReporteFinancieroService
+from contabilidad.services.saldos import SaldoMensualService
+from contabilidad.services.sat_xml import generate_balanza_xml
+
+
+def _crear_poliza(fecha, numero, cargo, abono, monto):
+    return PolizaRepository.create({
+        'fecha': fecha,
+        'tipo': 'DIARIO',
+        'numero': numero,
+        'concepto': f'Poliza {numero}',
+        'detalles': [
+            {'cuenta_id': cargo.id, 'debe': monto, 'haber': Decimal('0.00')},
+            {'cuenta_id': abono.id, 'debe': Decimal('0.00'), 'haber': monto},
+        ]
+    })
+
+
+@pytest.mark.django_db
+class TestSaldoMensualCuenta:
+    @pytest.fixture
+    def cuentas(self):
+        caja = CuentaContable.objects.create(codigo='100-01', nombre='Caja', tipo='ACTIVO', naturaleza='DEUDORA')
+        ventas = CuentaContable.objects.create(codigo='400-01', nombre='Ventas', tipo='INGRESOS', naturaleza='ACREEDORA')
+        return caja, ventas
+
+    def test_rollup_se_actualiza_al_guardar_y_cancelar(self, cuentas, django_capture_on_commit_callbacks):
+        caja, ventas = cuentas
+
+        with django_capture_on_commit_callbacks(execute=True):
+            _crear_poliza(date(2025, 1, 10), 1, caja, ventas, Decimal('100.00'))
+            poliza = _crear_poliza(date(2025, 1, 20), 2, caja, ventas, Decimal('50.00'))
+
+        saldo = SaldoMensualCuenta.objects.get(cuenta=caja, periodo=date(2025, 1, 1))
+        assert saldo.debe == Decimal('150.00')
+        assert saldo.haber == Decimal('0.00')
+        assert saldo.saldo == Decimal('150.00')
+
+        # Cancelar (soft delete) la póliza descuenta sus movimientos
+        with django_capture_on_commit_callbacks(execute=True):
+            PolizaRepository.delete(poliza.id)
+
+        saldo.refresh_from_db()
+        assert saldo.debe == Decimal('100.00')
+
+    def test_cambio_de_fecha_mueve_el_saldo_de_mes(self, cuentas, django_capture_on_commit_callbacks):
+        caja, ventas = cuentas
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poliza = _crear_poliza(date(2025, 1, 10), 1, caja, ventas, Decimal('100.00'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            poliza.fecha = date(2025, 2, 3)
+            poliza.save()
+
+        enero = SaldoMensualCuenta.objects.get(cuenta=ventas, periodo=date(2025, 1, 1))
+        febrero = SaldoMensualCuenta.objects.get(cuenta=ventas, periodo=date(2025, 2, 1))
+        assert enero.haber == Decimal('0.00')
+        assert febrero.haber == Decimal('100.00')
+
+    def test_reconstruir(self, cuentas, django_capture_on_commit_callbacks):
+        caja, ventas = cuentas
+        with django_capture_on_commit_callbacks(execute=True):
+            _crear_poliza(date(2025, 1, 10), 1, caja, ventas, Decimal('100.00'))
+            _crear_poliza(date(2025, 3, 10), 2, caja, ventas, Decimal('25.00'))
+
+        SaldoMensualCuenta.objects.all().delete()
+        total = SaldoMensualService.reconstruir()
+
+        assert total == 4
+        assert SaldoMensualCuenta.objects.get(cuenta=caja, periodo=date(2025, 3, 1)).debe == Decimal('25.00')
+
+    def test_balanza_usa_rollup_y_dias_sueltos(self, cuentas, django_capture_on_commit_callbacks):
+        caja, ventas = cuentas
+        with django_capture_on_commit_callbacks(execute=True):
+            _crear_poliza(date(2024, 12, 15), 1, caja, ventas, Decimal('10.00'))
+            _crear_poliza(date(2025, 1, 5), 2, caja, ventas, Decimal('20.00'))
+            _crear_poliza(date(2025, 2, 10), 3, caja, ventas, Decimal('30.00'))
+            _crear_poliza(date(2025, 2, 20), 4, caja, ventas, Decimal('40.00'))
+
+        data = ReporteFinancieroService.obtener_balanza_comprobacion(date(2025, 1, 1), date(2025, 2, 15))
+        fila_caja = next(r for r in data if r['codigo'] == '100-01')
+
+        assert fila_caja['saldo_inicial'] == Decimal('10.00')
+        assert fila_caja['debe'] == Decimal('50.00')
+        assert fila_caja['saldo_final'] == Decimal('60.00')
+
+        resultados = ReporteFinancieroService.obtener_estado_resultados(date(2025, 1, 1), date(2025, 2, 28))
+        assert resultados['resumen']['total_ingresos'] == Decimal('90.00')
+
+        balance = ReporteFinancieroService.obtener_balance_general(date(2025, 2, 28))
+        assert balance['resumen']['total_activo'] == Decimal('100.00')
+
+    def test_reportes_con_consultas_constantes(self, cuentas, django_capture_on_commit_callbacks, django_assert_max_num_queries):
+        caja, ventas = cuentas
+        with django_capture_on_commit_callbacks(execute=True):
+            for i in range(1, 13):
+                otra = CuentaContable.objects.create(
+                    codigo=f'600-{i:02d}', nombre=f'Gasto {i}', tipo='GASTOS', naturaleza='DEUDORA'
+                )
+                _crear_poliza(date(2025, i, 5), i, otra, caja, Decimal('5.00'))
+
+        with django_assert_max_num_queries(4):
+            ReporteFinancieroService.obtener_balanza_comprobacion(date(2025, 3, 10), date(2025, 9, 20))
+        with django_assert_max_num_queries(6):
+            ReporteFinancieroService.obtener_estado_resultados(date(2025, 1, 1), date(2025, 12, 31))
+        with django_assert_max_num_queries(3):
+            xml = generate_balanza_xml(2025, 6)
+
+        assert b'NumCta="600-06"' in xml
+
+    def test_poliza_descuadrada_solo_en_balanza(self, cuentas, django_capture_on_commit_callbacks):
+        caja, ventas = cuentas
+        with django_capture_on_commit_callbacks(execute=True):
+            _crear_poliza(date(2025, 1, 10), 1, caja, ventas, Decimal('100.00'))
+            descuadrada = PolizaRepository.create({
+                'fecha': date(2025, 1, 15),
+                'tipo': 'DIARIO',
+                'numero': 2,
+                'concepto': 'Poliza descuadrada',
+                'detalles': [
+                    {'cuenta_id': caja.id, 'debe': Decimal('30.00'), 'haber': Decimal('0.00')},
+                    {'cuenta_id': ventas.id, 'debe': Decimal('0.00'), 'haber': Decimal('20.00')},
+                ]
+            })
+        assert descuadrada.cuadrada is False
+
+        # Balanza y XML SAT incluyen todas las pólizas activas
+        data = ReporteFinancieroService.obtener_balanza_comprobacion(date(2025, 1, 1), date(2025, 1, 31))
+        fila_caja = next(r for r in data if r['codigo'] == '100-01')
+        assert fila_caja['debe'] == Decimal('130.00')
+        assert b'Debe="130.00"' in generate_balanza_xml(2025, 1)
+
+        # Estado de resultados solo considera las cuadradas
+        resultados = ReporteFinancieroService.obtener_estado_resultados(date(2025, 1, 1), date(2025, 1, 31))
+        assert resultados['resumen']['total_ingresos'] == Decimal('100.00')
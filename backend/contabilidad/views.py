@@ -37,6 +37,7 @@ import openpyxl
 
 
 from core.permissions import HasPermissionForAction
+from core.services.export_jobs import exportacion_asincrona
 from .utils import sincronizar_tipo_cambio_banxico, validate_private_key, parse_certificate
 from core.encryption import encrypt_data, encrypt_text
 from django.core.files.base import ContentFile
@@ -393,6 +394,7 @@ class FacturaViewSet(ContabilidadBaseViewSet):
             return Response({"detalle": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'], url_path='download-diot')
+    @exportacion_asincrona
     def download_diot(self, request):
         """
         Genera y descarga el TXT de la DIOT.
@@ -428,6 +430,7 @@ class FacturaViewSet(ContabilidadBaseViewSet):
         return response
 
     @action(detail=False, methods=['get'], url_path='download-catalogo')
+    @exportacion_asincrona
     def download_catalogo(self, request):
         from .services.sat_xml import generate_catalogo_xml
         from django.http import HttpResponse
@@ -444,6 +447,7 @@ class FacturaViewSet(ContabilidadBaseViewSet):
              return Response({"detalle": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'], url_path='download-balanza')
+    @exportacion_asincrona
     def download_balanza(self, request):
         from .services.sat_xml import generate_balanza_xml
         from django.http import HttpResponse
@@ -62,20 +62,21 @@ def cancelar_factura(self, request, pk=None):
             factura.uuid_sustitucion = uuid_sustitucion
             factura.save()
             
-            # Log de auditoría
-            from auditlog.models import LogEntry
-            from django.contrib.contenttypes.models import ContentType
+            # Log de auditoría (pipeline único de auditoria)
+            from auditoria.services.audit_service import AuditService
+            from auditoria.middleware import get_client_ip, get_user_agent
             
-            LogEntry.objects.create(
-                content_type=ContentType.objects.get_for_model(factura),
-                object_pk=factura.pk,
-                object_repr=str(factura),
-                action=2,  # UPDATE
-                changes={
-                    'estado': ['TIMBRADA', 'CANCELADA'],
-                    'motivo_cancelacion': motivo,
-                    'cancelado_por': request.user.username
-                }
+            AuditService.log_diferido(
+                usuario=request.user,
+                obj=factura,
+                accion='CANCEL',
+                cambios={
+                    'estado': {'old': 'TIMBRADA', 'new': 'CANCELADA'},
+                    'motivo_cancelacion': {'old': None, 'new': motivo},
+                },
+                ip_address=get_client_ip(request),
+                user_agent=get_user_agent(request),
+                descripcion=f"Cancelación CFDI por {request.user.username}"
             )
             
             return Response({
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Empresa, SystemSetting, FeatureFlag
+from .models import Empresa, SystemSetting, FeatureFlag, ExportJob
 
 
 @admin.register(Empresa)
@@ -83,3 +83,11 @@ class FeatureFlagAdmin(admin.ModelAdmin):
         if not change:  # Solo en creación
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'accion', 'usuario', 'empresa', 'estado', 'progreso', 'created_at', 'expira_en']
+    list_filter = ['estado', 'accion']
+    search_fields = ['accion', 'vista', 'parametros_hash']
+    readonly_fields = ['parametros', 'parametros_hash', 'iniciado_en', 'terminado_en', 'created_at', 'updated_at']
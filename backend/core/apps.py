@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Registra las dependencias de los reportes cacheados (post_save/post_delete)
+        import core.services.reportes_service  # noqa: F401
+        # Invalida los accesos cacheados del EmpresaMiddleware (membresías y Empresa)
+        from core.services.tenant_service import TenantService
+        TenantService.conectar_senales()
@@ -74,49 +74,21 @@ class EmpresaMiddleware:
         set_current_company_id(None)
         
         if request.user.is_authenticated:
+            # Accesos cacheados por usuario/token_version (ver TenantService):
+            # en estado estable no hay consultas a la BD para resolver la empresa.
+            from core.services.tenant_service import TenantService
+
             # Prioridad 0: Header explícito X-Company-ID (Usado por el Frontend)
-            header_company_id = request.headers.get('X-Company-ID')
-            
-            # Prioridad 1: Empresa guardada en BD (Persistencia real del usuario)
-            db_company_id = request.user.ultima_empresa_activa_id
-            
-            # Decidir qué ID usar
-            target_company_id = header_company_id or db_company_id
-            
-            # Si no hay ID, intentar empresa principal
-            if not target_company_id:
-                target_company_id = request.user.empresa_principal_id
-            
-            # Si sigue sin haber ID, usar la primera disponible
-            if not target_company_id:
-                first_emp = request.user.empresas_acceso.first()
-                if first_emp:
-                    target_company_id = first_emp.id
+            # Prioridad 1: Empresa guardada en BD, luego principal y primera disponible
+            # Validación de seguridad: solo empresas a las que el usuario tiene acceso
+            empresa = TenantService.resolver_empresa(request.user, request.headers.get('X-Company-ID'))
 
-            if target_company_id:
-                # Validación de seguridad: ¿Tiene el usuario acceso a esta empresa?
-                # Cacheamos el objeto Empresa en el request
-                try:
-                    # Si es superusuario, saltar validación de ManyToMany
-                    if request.user.is_superuser:
-                        from core.models import Empresa
-                        empresa = Empresa.objects.get(id=target_company_id)
-                        has_access = True
-                    else:
-                        empresa = request.user.empresas.get(id=target_company_id)
-                        has_access = True
-                except:
-                    empresa = None
-                    has_access = False
+            if empresa:
+                request.empresa = empresa
+                set_current_company_id(empresa.id)
 
-                if has_access and empresa:
-                    request.empresa = empresa
-                    set_current_company_id(empresa.id)
-                    
-                    # Sincronizar persistencia del usuario si cambió
-                    if request.user.ultima_empresa_activa_id != empresa.id:
-                        request.user.ultima_empresa_activa = empresa
-                        request.user.save(update_fields=['ultima_empresa_activa'])
+                # Sincronizar persistencia del usuario si cambió (con debounce)
+                TenantService.registrar_ultima_empresa(request.user, empresa.id)
         
         response = self.get_response(request)
         return response
@@ -1,4 +1,3 @@
-from auditlog.registry import auditlog
 from .base import (
     BaseModel, 
     SoftDeleteModel, 
@@ -8,15 +7,19 @@ from .base import (
 )
 from .config import SystemSetting, FeatureFlag
 from .empresa import Empresa
+from .exportacion import ExportJob
 
-# Helper para registrar modelos en auditlog fácilmente
+# Helper para registrar modelos en la auditoría fácilmente
 def register_audit(model_class):
     """
-    Registra un modelo en el sistema de auditoría (django-auditlog).
+    Registra un modelo en el sistema de auditoría (auditoria.AuditRegistry).
     Uso: register_audit(MiModelo)
+
+    Es el mismo pipeline que settings.AUDITED_MODELS: un solo diff y un solo
+    registro por cambio, escritos en lote al sink configurado (AUDIT_SINK).
     """
-    if not auditlog.contains(model_class):
-        auditlog.register(model_class)
+    from auditoria.registry import AuditRegistry
+    AuditRegistry.registrar(model_class)
 
 # Registrar modelos automáticamente aquí para centralizar
 register_audit(Empresa)
@@ -32,5 +35,6 @@ __all__ = [
     'SystemSetting',
     'FeatureFlag',
     'Empresa',
+    'ExportJob',
     'register_audit',
 ]
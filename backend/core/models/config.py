@@ -69,20 +69,16 @@ class SystemSetting(SoftDeleteModel):
         return f"{self.key} = {self.value}"
     
     def save(self, *args, **kwargs):
-        """Invalidar cache al guardar"""
+        """Invalidar cache (Redis y L1 de todos los workers) al guardar"""
         super().save(*args, **kwargs)
-        # Invalidar cache de esta configuración
-        cache_key = f"system_setting:{self.key}"
-        cache.delete(cache_key)
-        # Invalidar cache de configuraciones públicas
-        cache.delete("system_settings:public")
+        from core.services.config_service import ConfigService
+        ConfigService.notificar_cambio(self.key)
     
     def delete(self, *args, **kwargs):
         """Invalidar cache al eliminar"""
-        cache_key = f"system_setting:{self.key}"
-        cache.delete(cache_key)
-        cache.delete("system_settings:public")
         super().delete(*args, **kwargs)
+        from core.services.config_service import ConfigService
+        ConfigService.notificar_cambio(self.key)
 
 
 class FeatureFlag(SoftDeleteModel):
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import models
+from .base import BaseModel
+
+
+class ExportJob(BaseModel):
+    """
+    Exportación ejecutada en segundo plano (Celery).
+
+    Guarda la vista/acción original y sus parámetros para re-ejecutarla en el
+    worker; el archivo resultante queda en el storage por defecto
+    (config.storage_backends en producción). `parametros_hash` permite
+    reutilizar un artefacto reciente en lugar de regenerarlo.
+    """
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+
+    vista = models.CharField(max_length=255, help_text="Ruta del ViewSet (modulo.Clase)")
+    accion = models.CharField(max_length=100, help_text="Nombre de la acción exportadora")
+    parametros = models.JSONField(default=dict, help_text="Método, query params, body y kwargs de la petición")
+    parametros_hash = models.CharField(max_length=64, db_index=True)
+
+    empresa = models.ForeignKey(
+        'core.Empresa', on_delete=models.CASCADE, null=True, blank=True, related_name='exportaciones'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='exportaciones'
+    )
+
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='PENDIENTE', db_index=True)
+    progreso = models.PositiveSmallIntegerField(default=0, help_text="Porcentaje aproximado (0-100)")
+    filas_procesadas = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    archivo = models.FileField(upload_to='exports/%Y/%m/', null=True, blank=True)
+    nombre_archivo = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=150, blank=True)
+
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+    expira_en = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Exportación"
+        verbose_name_plural = "Exportaciones"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['parametros_hash', 'estado'], name='core_export_hash_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.accion} ({self.get_estado_display()})"
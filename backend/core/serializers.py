@@ -1,6 +1,6 @@
 # core/serializers.py
 from rest_framework import serializers
-from .models import Empresa
+from .models import Empresa, ExportJob
 
 
 class EmpresaSerializer(serializers.ModelSerializer):
@@ -39,3 +39,28 @@ class EmpresaSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
         read_only_fields = ['created_at', 'updated_at', 'direccion_completa']
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Estado de una exportación en segundo plano (para polling).
+    """
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id',
+            'accion',
+            'estado',
+            'estado_display',
+            'progreso',
+            'filas_procesadas',
+            'error',
+            'nombre_archivo',
+            'iniciado_en',
+            'terminado_en',
+            'expira_en',
+            'created_at',
+        ]
+        read_only_fields = fields
@@ -1,69 +1,238 @@
 """
 Servicio centralizado de caching con Redis
+
+Invalidación por generaciones: cada prefijo (y cada prefijo + empresa) tiene
+un contador de generación que forma parte de la clave. Invalidar es un solo
+INCR; las claves de generaciones anteriores dejan de leerse y caducan por TTL
+(o las retira antes el janitor con SCAN, ver `limpiar_huerfanas`).
+
+Dependencias: una función cacheada puede declarar los modelos de los que
+depende (`depende_de`). Cada modelo lleva su propia generación por empresa y
+los post_save/post_delete la incrementan solo para la empresa afectada, así
+que un reporte cacheado por horas no sirve datos viejos después de escribir.
 """
 from django.core.cache import cache
 from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from collections import Counter
 from functools import wraps
 import hashlib
-import json
-from typing import Any, Callable, Optional
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
 
 
 class CacheService:
     """
     Servicio centralizado para manejo de cache con Redis
     """
-    
+
     # TTL por defecto en segundos
     DEFAULT_TIMEOUT = 300  # 5 minutos
-    
+
     # Prefijos para diferentes tipos de cache
     PREFIX_REPORTS = 'reports:'
     PREFIX_KPIS = 'kpis:'
     PREFIX_CATALOGS = 'catalogs:'
     PREFIX_QUERIES = 'queries:'
-    
+    PREFIXES = (PREFIX_REPORTS, PREFIX_KPIS, PREFIX_CATALOGS, PREFIX_QUERIES)
+
+    # Contadores de generación y métricas (sin TTL)
+    GEN_PREFIX = 'gen:'
+    DEP_PREFIX = 'gen:dep:'
+    STATS_PREFIX = 'cache_stats:'
+    METRICS_FLUSH_EVERY = 100  # Eventos locales antes de acumularlos en el cache compartido
+
+    _metricas_lock = threading.Lock()
+    _metricas_locales = Counter()
+    _prefijos_vistos = set(PREFIXES)
+
+    # 'app_label.Modelo' -> ruta de atributos hacia el empresa_id (None = catálogo global)
+    _dependencias: Dict[str, Optional[str]] = {}
+
+    # ------------------------------------------------------------------
+    # Generaciones
+    # ------------------------------------------------------------------
+    @classmethod
+    def _gen_key(cls, prefix: str, empresa_id=None) -> str:
+        alcance = '*' if empresa_id is None else f"e{empresa_id}"
+        return f"{cls.GEN_PREFIX}{prefix}{alcance}"
+
     @staticmethod
-    def _make_key(prefix: str, *args, **kwargs) -> str:
+    def _inicializar_generacion(clave: str) -> int:
+        """
+        La generación inicial se toma del reloj (µs), no de 1: si Redis expulsa
+        el contador, la nueva generación no coincide con claves viejas vivas.
+        """
+        semilla = time.time_ns() // 1000
+        cache.add(clave, semilla, None)
+        return cache.get(clave, semilla)
+
+    @classmethod
+    def _leer_generaciones(cls, claves: Sequence[str]) -> list:
+        valores = cache.get_many(claves)
+        return [
+            valores[clave] if valores.get(clave) is not None else cls._inicializar_generacion(clave)
+            for clave in claves
+        ]
+
+    @classmethod
+    def _incr_generacion(cls, clave: str) -> int:
+        try:
+            return cache.incr(clave)
+        except ValueError:
+            cls._inicializar_generacion(clave)
+            return cache.incr(clave)
+
+    @classmethod
+    def generaciones(cls, prefix: str, empresa_id=None) -> tuple:
+        """Generación del prefijo (y de la empresa, si se indica) en un solo get_many."""
+        claves = [cls._gen_key(prefix)]
+        if empresa_id is not None:
+            claves.append(cls._gen_key(prefix, empresa_id))
+        return tuple(cls._leer_generaciones(claves))
+
+    @classmethod
+    def namespace(cls, prefix: str, empresa_id=None, depende_de: Sequence[str] = ()) -> str:
+        """
+        Prefijo versionado para construir claves.
+
+        'reports:1712345678901234:' o, por empresa, 'reports:1712345678901234.e3.1712345679000321:'.
+        Con dependencias se agrega '.d<digest>' de sus generaciones para esa empresa.
+        Todo se lee con un solo get_many.
+        """
+        claves = [cls._gen_key(prefix)]
+        if empresa_id is not None:
+            claves.append(cls._gen_key(prefix, empresa_id))
+        claves_dep = cls._dep_keys(depende_de, empresa_id)
+        gens = cls._leer_generaciones(claves + claves_dep)
+
+        ns = f"{prefix}{gens[0]}"
+        if empresa_id is not None:
+            ns += f".e{empresa_id}.{gens[1]}"
+        if claves_dep:
+            firma = '.'.join(str(g) for g in gens[len(claves):])
+            ns += '.d' + hashlib.md5(firma.encode()).hexdigest()[:12]
+        return ns + ':'
+
+    @classmethod
+    def invalidate_namespace(cls, prefix: str, empresa_id=None) -> int:
+        """
+        Invalida un prefijo completo (o solo lo de una empresa) con un INCR.
+
+        Returns:
+            int: Nueva generación
+        """
+        return cls._incr_generacion(cls._gen_key(prefix, empresa_id))
+
+    # ------------------------------------------------------------------
+    # Dependencias por modelo
+    # ------------------------------------------------------------------
+    @classmethod
+    def _dep_keys(cls, modelos: Sequence[str], empresa_id=None) -> list:
+        """
+        Por modelo: 'todas' (escrituras sin empresa conocida, afectan a todos)
+        más la generación de la empresa, o 'global' para claves sin empresa
+        (se incrementa con cualquier escritura).
+        """
+        alcance = 'global' if empresa_id is None else f"e{empresa_id}"
+        claves = []
+        for modelo in modelos:
+            claves.append(f"{cls.DEP_PREFIX}{modelo.lower()}:todas")
+            claves.append(f"{cls.DEP_PREFIX}{modelo.lower()}:{alcance}")
+        return claves
+
+    @classmethod
+    def registrar_dependencia(cls, modelo: str, empresa: Optional[str] = 'empresa_id'):
+        """
+        Conecta post_save/post_delete de `modelo` ('app_label.Modelo') para
+        invalidar las claves que dependen de él.
+
+        Args:
+            empresa: Ruta de atributos (con puntos) al empresa_id de la instancia,
+                p. ej. 'cuenta_bancaria.empresa_id'. None para catálogos globales:
+                sus escrituras invalidan a todas las empresas.
+        """
+        nuevo = modelo not in cls._dependencias
+        cls._dependencias[modelo] = empresa
+        if nuevo:
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    _invalidar_por_escritura, sender=modelo, weak=False,
+                    dispatch_uid=f"cache_dep:{id(signal)}:{modelo}",
+                )
+
+    @classmethod
+    def _empresa_de(cls, modelo: str, instance):
+        ruta = cls._dependencias.get(modelo)
+        if not ruta:
+            return None
+        valor = instance
+        try:
+            for parte in ruta.split('.'):
+                valor = getattr(valor, parte)
+        except Exception:
+            return None
+        return valor
+
+    @classmethod
+    def invalidar_dependencia(cls, modelo: str, empresa_id=None):
+        """Invalida las claves que dependen de `modelo` para una empresa (o todas)."""
+        modelo = modelo.lower()
+        if empresa_id is None:
+            cls._incr_generacion(f"{cls.DEP_PREFIX}{modelo}:todas")
+        else:
+            cls._incr_generacion(f"{cls.DEP_PREFIX}{modelo}:e{empresa_id}")
+            cls._incr_generacion(f"{cls.DEP_PREFIX}{modelo}:global")
+
+    @classmethod
+    def _make_key(cls, prefix: str, *args, **kwargs) -> str:
         """
         Genera una clave única para el cache
-        
+
         Args:
             prefix: Prefijo del tipo de cache
             *args: Argumentos posicionales
             **kwargs: Argumentos con nombre
-            
+
         Returns:
-            str: Clave única para el cache
+            str: Clave única (incluye la generación vigente del prefijo)
         """
         # Crear string único con argumentos
         key_data = f"{args}:{sorted(kwargs.items())}"
         key_hash = hashlib.md5(key_data.encode()).hexdigest()
-        return f"{prefix}{key_hash}"
-    
-    @staticmethod
-    def get(key: str) -> Optional[Any]:
+        return f"{cls.namespace(prefix)}{key_hash}"
+
+    # ------------------------------------------------------------------
+    # Operaciones básicas
+    # ------------------------------------------------------------------
+    @classmethod
+    def get(cls, key: str) -> Optional[Any]:
         """
         Obtener valor del cache
-        
+
         Args:
             key: Clave del cache
-            
+
         Returns:
             Valor almacenado o None si no existe
         """
-        return cache.get(key)
-    
+        value = cache.get(key)
+        cls._registrar(cls._prefijo_de(key), value is not None)
+        return value
+
     @staticmethod
     def set(key: str, value: Any, timeout: int = DEFAULT_TIMEOUT) -> bool:
         """
         Guardar valor en cache
-        
+
         Args:
             key: Clave del cache
             value: Valor a almacenar
             timeout: Tiempo de vida en segundos
-            
+
         Returns:
             bool: True si se guardó exitosamente
         """
@@ -73,15 +242,15 @@ class CacheService:
         except Exception as e:
             print(f"Error setting cache: {e}")
             return False
-    
+
     @staticmethod
     def delete(key: str) -> bool:
         """
         Eliminar valor del cache
-        
+
         Args:
             key: Clave del cache
-            
+
         Returns:
             bool: True si se eliminó exitosamente
         """
@@ -91,31 +260,35 @@ class CacheService:
         except Exception as e:
             print(f"Error deleting cache: {e}")
             return False
-    
-    @staticmethod
-    def invalidate_pattern(pattern: str) -> int:
+
+    @classmethod
+    def invalidate_pattern(cls, pattern: str) -> int:
         """
         Invalidar todas las claves que coincidan con un patrón
-        
+
+        Un patrón de prefijo completo (ej: 'reports:*') se resuelve con
+        `invalidate_namespace` (un INCR). Cualquier otro patrón se borra con
+        SCAN incremental en Redis; nunca se usa KEYS.
+
         Args:
             pattern: Patrón de búsqueda (ej: 'reports:*')
-            
+
         Returns:
-            int: Número de claves eliminadas
+            int: Claves eliminadas (1 si se invalidó un namespace)
         """
         try:
-            # Obtener todas las claves que coincidan
-            keys = cache.keys(pattern)
-            if keys:
-                cache.delete_many(keys)
-                return len(keys)
-            return 0
+            prefix = pattern[:-1] if pattern.endswith('*') else None
+            if prefix and '*' not in prefix and prefix.endswith(':'):
+                cls.invalidate_namespace(prefix)
+                return 1
+            return cls.scan_delete(pattern)
         except Exception as e:
             print(f"Error invalidating pattern: {e}")
             return 0
-    
-    @staticmethod
+
+    @classmethod
     def get_or_set(
+        cls,
         key: str,
         callback: Callable,
         timeout: int = DEFAULT_TIMEOUT,
@@ -124,93 +297,280 @@ class CacheService:
     ) -> Any:
         """
         Obtener del cache o ejecutar callback y cachear resultado
-        
+
         Args:
             key: Clave del cache
             callback: Función a ejecutar si no hay cache
             timeout: Tiempo de vida en segundos
             *args: Argumentos para callback
             **kwargs: Argumentos con nombre para callback
-            
+
         Returns:
             Valor del cache o resultado del callback
         """
         # Intentar obtener del cache
-        value = CacheService.get(key)
-        
+        value = cls.get(key)
+
         if value is not None:
             return value
-        
+
         # Ejecutar callback
         value = callback(*args, **kwargs)
-        
+
         # Guardar en cache
-        CacheService.set(key, value, timeout)
-        
+        cls.set(key, value, timeout)
+
         return value
-    
+
     @staticmethod
     def cached(
         prefix: str = '',
         timeout: int = DEFAULT_TIMEOUT,
-        key_func: Optional[Callable] = None
+        key_func: Optional[Callable] = None,
+        depende_de: Sequence[str] = (),
+        por_empresa: bool = False
     ):
         """
         Decorador para cachear resultados de funciones
-        
+
         Args:
             prefix: Prefijo para la clave del cache
             timeout: Tiempo de vida en segundos
             key_func: Función personalizada para generar la clave
-            
+            depende_de: Modelos ('app_label.Modelo') cuyas escrituras invalidan el resultado
+            por_empresa: Separa la clave por empresa: el argumento `empresa_id` de la
+                función o, si no viene, la empresa activa (core.middleware)
+
         Example:
-            @CacheService.cached(prefix='reports:', timeout=600)
+            @CacheService.cached(prefix='reports:', timeout=600, depende_de=['contabilidad.Factura'])
             def get_financial_summary(fecha_inicio, fecha_fin):
                 # ...expensive operation...
                 return result
         """
+        for modelo in depende_de:
+            if modelo not in CacheService._dependencias:
+                CacheService.registrar_dependencia(modelo)
+
         def decorator(func):
+            firma = inspect.signature(func)
+
             @wraps(func)
             def wrapper(*args, **kwargs):
                 # Generar clave
                 if key_func:
                     cache_key = key_func(*args, **kwargs)
+                elif por_empresa or depende_de:
+                    cache_key = CacheService._make_scoped_key(
+                        prefix, firma, args, kwargs, depende_de, por_empresa
+                    )
                 else:
                     cache_key = CacheService._make_key(prefix, *args, **kwargs)
-                
+
                 # Intentar obtener del cache
                 result = CacheService.get(cache_key)
-                
+
                 if result is not None:
                     return result
-                
+
                 # Ejecutar función
                 result = func(*args, **kwargs)
-                
+
                 # Guardar en cache
                 CacheService.set(cache_key, result, timeout)
-                
+
                 return result
-            
+
             return wrapper
         return decorator
 
+    @classmethod
+    def _make_scoped_key(cls, prefix, firma, args, kwargs, depende_de, por_empresa) -> str:
+        from core.middleware import get_current_company_id
+
+        empresa_actual = get_current_company_id()
+        empresa_id = None
+        if por_empresa:
+            empresa_id = firma.bind_partial(*args, **kwargs).arguments.get('empresa_id') or empresa_actual
+            empresa_id = int(empresa_id) if empresa_id is not None else None
+
+        # La empresa activa también filtra vía MultiTenantManager: forma parte de la clave
+        key_data = f"{args}:{sorted(kwargs.items())}:{empresa_actual}"
+        key_hash = hashlib.md5(key_data.encode()).hexdigest()
+        return f"{cls.namespace(prefix, empresa_id, depende_de)}{key_hash}"
+
+    # ------------------------------------------------------------------
+    # Janitor (SCAN)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _redis():
+        """Cliente redis-py del backend de Django, o None si el cache no es Redis."""
+        cliente = getattr(cache, '_cache', None)
+        get_client = getattr(cliente, 'get_client', None)
+        if get_client is None:
+            return None
+        return get_client(None, write=True)
+
+    @classmethod
+    def _scan(cls, pattern: str, count: int = 500) -> Iterable[tuple]:
+        """(clave_redis, clave_django) de las claves que coinciden, vía SCAN."""
+        redis = cls._redis()
+        if redis is None:
+            return
+        for clave in redis.scan_iter(match=cache.make_key(pattern), count=count):
+            texto = clave.decode() if isinstance(clave, bytes) else clave
+            # key_func por defecto de Django: "<KEY_PREFIX>:<version>:<clave>"
+            yield clave, texto.split(':', 2)[2]
+
+    @classmethod
+    def _unlink(cls, claves: list) -> int:
+        if not claves:
+            return 0
+        redis = cls._redis()
+        return redis.unlink(*claves)
+
+    @classmethod
+    def scan_delete(cls, pattern: str, batch: int = 500) -> int:
+        """Borra las claves que coinciden usando SCAN + UNLINK por lotes."""
+        borradas, lote = 0, []
+        for clave, _ in cls._scan(pattern, count=batch):
+            lote.append(clave)
+            if len(lote) >= batch:
+                borradas += cls._unlink(lote)
+                lote = []
+        return borradas + cls._unlink(lote)
+
+    @classmethod
+    def limpiar_huerfanas(cls, prefixes: Optional[Iterable[str]] = None, batch: int = 500) -> Dict[str, int]:
+        """
+        Elimina claves de generaciones anteriores (huérfanas) antes de que
+        caduquen por TTL. Opcional: las huérfanas nunca se leen.
+
+        Returns:
+            dict: {prefijo: claves eliminadas}
+        """
+        resultado = {}
+        for prefix in prefixes or cls.PREFIXES:
+            vigentes = {}  # alcance ('*' o 'eN') -> generación actual (None si no existe)
+
+            def generacion(alcance):
+                if alcance not in vigentes:
+                    clave = f"{cls.GEN_PREFIX}{prefix}{alcance}"
+                    vigentes[alcance] = cache.get(clave)
+                return vigentes[alcance]
+
+            borradas, lote = 0, []
+            for clave_redis, clave in cls._scan(f"{prefix}*", count=batch):
+                ns = clave[len(prefix):].split(':', 1)[0]
+                partes = ns.split('.')
+                if not partes[0].isdigit():
+                    continue  # Clave explícita (get_or_set), no versionada
+                huerfana = str(generacion('*')) != partes[0]
+                if not huerfana and len(partes) >= 3 and partes[1].startswith('e'):
+                    huerfana = str(generacion(partes[1])) != partes[2]
+                if huerfana:
+                    lote.append(clave_redis)
+                    if len(lote) >= batch:
+                        borradas += cls._unlink(lote)
+                        lote = []
+            resultado[prefix] = borradas + cls._unlink(lote)
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+    @classmethod
+    def _prefijo_de(cls, key: str) -> str:
+        for prefix in cls.PREFIXES:
+            if key.startswith(prefix):
+                return prefix
+        return key.split(':', 1)[0] + ':' if ':' in key else 'otros:'
+
+    @classmethod
+    def _registrar(cls, prefix: str, acierto: bool):
+        """Acumula hits/misses en memoria y los vuelca al cache cada N eventos."""
+        with cls._metricas_lock:
+            cls._metricas_locales[(prefix, 'hits' if acierto else 'misses')] += 1
+            cls._prefijos_vistos.add(prefix)
+            pendientes = sum(cls._metricas_locales.values())
+        if pendientes >= cls.METRICS_FLUSH_EVERY:
+            cls.flush_metricas()
+
+    @classmethod
+    def flush_metricas(cls):
+        with cls._metricas_lock:
+            locales = dict(cls._metricas_locales)
+            cls._metricas_locales.clear()
+        for (prefix, campo), n in locales.items():
+            clave = f"{cls.STATS_PREFIX}{prefix}{campo}"
+            try:
+                cache.incr(clave, n)
+            except ValueError:
+                if not cache.add(clave, n, None):
+                    cache.incr(clave, n)
+
+    @classmethod
+    def metricas(cls) -> Dict[str, dict]:
+        """
+        Hits, misses y tasa de acierto por prefijo (todos los procesos).
+
+        Returns:
+            dict: {prefijo: {'hits', 'misses', 'hit_rate'}}
+        """
+        cls.flush_metricas()
+        prefijos = sorted(cls._prefijos_vistos)
+        claves = {
+            (p, campo): f"{cls.STATS_PREFIX}{p}{campo}" for p in prefijos for campo in ('hits', 'misses')
+        }
+        valores = cache.get_many(list(claves.values()))
+        resultado = {}
+        for prefix in prefijos:
+            hits = valores.get(claves[(prefix, 'hits')], 0)
+            misses = valores.get(claves[(prefix, 'misses')], 0)
+            total = hits + misses
+            resultado[prefix] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / total, 4) if total else None,
+            }
+        return resultado
+
+    @classmethod
+    def reset_metricas(cls):
+        with cls._metricas_lock:
+            cls._metricas_locales.clear()
+            prefijos = list(cls._prefijos_vistos)
+        cache.delete_many([
+            f"{cls.STATS_PREFIX}{p}{campo}" for p in prefijos for campo in ('hits', 'misses')
+        ])
+
+
+def _invalidar_por_escritura(sender, instance, **kwargs):
+    """post_save/post_delete de un modelo del que dependen claves cacheadas."""
+    modelo = sender._meta.label
+    empresa_id = CacheService._empresa_de(modelo, instance)
+    # Al confirmar: invalidar antes permitiría recachear datos aún no visibles
+    transaction.on_commit(lambda: CacheService.invalidar_dependencia(modelo, empresa_id))
+
 
 # Funciones de utilidad para tipos específicos de cache
 
-def cache_report(timeout: int = 900):  # 15 minutos
-    """Decorador para cachear reportes"""
+def cache_report(timeout: int = 900, depende_de: Sequence[str] = ()):  # 15 minutos
+    """Decorador para cachear reportes (por empresa)"""
     return CacheService.cached(
         prefix=CacheService.PREFIX_REPORTS,
-        timeout=timeout
+        timeout=timeout,
+        depende_de=depende_de,
+        por_empresa=True
     )
 
 
-def cache_kpis(timeout: int = 300):  # 5 minutos
-    """Decorador para cachear KPIs"""
+def cache_kpis(timeout: int = 300, depende_de: Sequence[str] = ()):  # 5 minutos
+    """Decorador para cachear KPIs (por empresa)"""
     return CacheService.cached(
         prefix=CacheService.PREFIX_KPIS,
-        timeout=timeout
+        timeout=timeout,
+        depende_de=depende_de,
+        por_empresa=True
     )
 
 
@@ -222,14 +582,14 @@ def cache_catalog(timeout: int = 3600):  # 1 hora
     )
 
 
-def invalidate_reports():
-    """Invalidar todos los reportes cacheados"""
-    return CacheService.invalidate_pattern(f"{CacheService.PREFIX_REPORTS}*")
+def invalidate_reports(empresa_id=None):
+    """Invalidar todos los reportes cacheados (o solo los de una empresa)"""
+    return CacheService.invalidate_namespace(CacheService.PREFIX_REPORTS, empresa_id)
 
 
-def invalidate_kpis():
-    """Invalidar todos los KPIs cacheados"""
-    return CacheService.invalidate_pattern(f"{CacheService.PREFIX_KPIS}*")
+def invalidate_kpis(empresa_id=None):
+    """Invalidar todos los KPIs cacheados (o solo los de una empresa)"""
+    return CacheService.invalidate_namespace(CacheService.PREFIX_KPIS, empresa_id)
 
 
 # Ejemplo de uso
@@ -250,7 +610,7 @@ def get_financial_summary(fecha_inicio, fecha_fin):
     # ...expensive operation...
     return result
 
-# Invalidar cache
+# Invalidar cache (un INCR de la generación, sin KEYS)
 from core.services.cache_service import invalidate_reports
 invalidate_reports()  # Invalida todos los reportes
 """
@@ -1,19 +1,66 @@
+from django.conf import settings
 from django.core.cache import cache
 from django.db import transaction
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+import copy
 import logging
+import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Marca en Redis/L1 para claves que no existen en BD (cache negativo)
+AUSENTE = '__system_setting_ausente__'
+_MISS = object()
+
+
+class _L1Cache:
+    """LRU en memoria del proceso con TTL corto, delante de Redis."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._datos.get(key)
+            if item is None:
+                return _MISS
+            expira, valor = item
+            if expira < time.monotonic():
+                del self._datos[key]
+                return _MISS
+            self._datos.move_to_end(key)
+            return valor
+
+    def set(self, key: str, valor: Any, ttl: float):
+        with self._lock:
+            self._datos[key] = (time.monotonic() + ttl, valor)
+            self._datos.move_to_end(key)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._datos.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
 
 class ConfigService:
     """
     Servicio centralizado para gestionar configuraciones del sistema.
     
     Características:
-    - Cache de 15 minutos para reducir consultas a BD
-    - Soporte para valores por defecto
-    - Invalidación automática de cache al modificar
+    - Cache en dos niveles: L1 LRU por proceso (TTL de segundos) y Redis (15 minutos)
+    - Cache negativo: las claves inexistentes también se cachean (AUSENTE)
+    - Invalidación en todos los workers vía pub/sub de Redis al modificar
+    - Soporte para valores por defecto y lectura en bloque (get_many)
     - Thread-safe
     
     Inspirado en: Contpaqi, Enkontrol, SICAR
@@ -21,17 +68,40 @@ class ConfigService:
     
     # Tiempo de cache en segundos (15 minutos)
     CACHE_TIMEOUT = 900
-    
+    # L1: TTL corto por si se pierde un mensaje de pub/sub
+    L1_TIMEOUT = 5
+    PUBSUB_CHANNEL = 'config:invalidate'
+
+    _l1 = _L1Cache()
+    _suscriptor_lock = threading.Lock()
+    _suscriptor_pid = None
+
     @staticmethod
-    def get_value(key: str, default: Any = None) -> Any:
+    def _cache_key(key: str) -> str:
+        return f"system_setting:{key}"
+
+    @classmethod
+    def _l1_timeout(cls) -> float:
+        return getattr(settings, 'CONFIG_L1_TIMEOUT', cls.L1_TIMEOUT)
+
+    @staticmethod
+    def _resolver(valor: Any, default: Any) -> Any:
+        if valor == AUSENTE:
+            return default
+        # Los JSON mutables se copian para no contaminar el L1 compartido
+        return copy.deepcopy(valor) if isinstance(valor, (dict, list)) else valor
+    
+    @classmethod
+    def get_value(cls, key: str, default: Any = None) -> Any:
         """
         Obtiene el valor de una configuración del sistema.
         
         Flujo:
-        1. Busca en Redis (cache)
-        2. Si no está, busca en DB
-        3. Si no está, retorna default
-        4. Cachea el resultado
+        1. Busca en L1 (memoria del proceso)
+        2. Busca en Redis (cache)
+        3. Si no está, busca en DB
+        4. Cachea el resultado en ambos niveles; si no existe cachea AUSENTE
+           y retorna default
         
         Args:
             key: Clave de la configuración (ej: 'POS_ALLOW_NEGATIVE_STOCK')
@@ -44,36 +114,76 @@ class ConfigService:
             >>> ConfigService.get_value('POS_ALLOW_NEGATIVE_STOCK', False)
             True
         """
-        cache_key = f"system_setting:{key}"
-        
-        # 1. Intentar obtener de cache
-        cached_value = cache.get(cache_key)
-        if cached_value is not None:
-            logger.debug(f"Config '{key}' obtenida de cache")
-            return cached_value
-        
-        # 2. Buscar en base de datos
-        try:
-            from ..models import SystemSetting
-            setting = SystemSetting.objects.get(key=key)
-            value = setting.value
-            
-            # 3. Cachear el resultado
-            cache.set(cache_key, value, ConfigService.CACHE_TIMEOUT)
-            logger.debug(f"Config '{key}' cacheada desde DB")
-            
-            return value
-            
-        except SystemSetting.DoesNotExist:
-            logger.warning(f"Config '{key}' no encontrada, usando default: {default}")
-            # Cachear el default para evitar consultas repetidas
-            if default is not None:
-                cache.set(cache_key, default, ConfigService.CACHE_TIMEOUT)
-            return default
-        
-        except Exception as e:
-            logger.error(f"Error obteniendo config '{key}': {e}")
-            return default
+        return cls.get_many([key], {key: default})[key]
+
+    @classmethod
+    def get_many(cls, keys: Iterable[str], defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Obtiene varias configuraciones con a lo más un get_many a Redis y una
+        consulta a BD.
+
+        Args:
+            keys: Claves de configuración
+            defaults: {clave: default} para las que no existan (None si no se indica)
+
+        Returns:
+            Dict con {key: valor o default}
+
+        Example:
+            >>> ConfigService.get_many(['POS_FAST_MODE', 'POS_ALLOW_NEGATIVE_STOCK'])
+            {'POS_FAST_MODE': False, 'POS_ALLOW_NEGATIVE_STOCK': True}
+        """
+        cls._asegurar_suscriptor()
+        defaults = defaults or {}
+        keys = list(dict.fromkeys(keys))
+        encontrados = {}
+
+        # 1. L1
+        pendientes = []
+        for key in keys:
+            valor = cls._l1.get(key)
+            if valor is _MISS:
+                pendientes.append(key)
+            else:
+                encontrados[key] = valor
+
+        # 2. Redis
+        if pendientes:
+            try:
+                en_redis = cache.get_many([cls._cache_key(k) for k in pendientes])
+            except Exception as e:
+                logger.error(f"Error leyendo configs de cache: {e}")
+                en_redis = {}
+            faltantes = []
+            for key in pendientes:
+                cache_key = cls._cache_key(key)
+                if cache_key in en_redis:
+                    encontrados[key] = en_redis[cache_key]
+                    cls._l1.set(key, en_redis[cache_key], cls._l1_timeout())
+                else:
+                    faltantes.append(key)
+
+            # 3. Base de datos
+            if faltantes:
+                try:
+                    from ..models import SystemSetting
+                    en_db = dict(
+                        SystemSetting.objects.filter(key__in=faltantes).values_list('key', 'value')
+                    )
+                    por_cachear = {}
+                    for key in faltantes:
+                        valor = en_db.get(key, AUSENTE)
+                        if valor == AUSENTE:
+                            logger.warning(f"Config '{key}' no encontrada, usando default: {defaults.get(key)}")
+                        encontrados[key] = valor
+                        por_cachear[cls._cache_key(key)] = valor
+                        cls._l1.set(key, valor, cls._l1_timeout())
+                    cache.set_many(por_cachear, cls.CACHE_TIMEOUT)
+                    logger.debug(f"Configs {faltantes} cacheadas desde DB")
+                except Exception as e:
+                    logger.error(f"Error obteniendo configs {faltantes}: {e}")
+
+        return {key: cls._resolver(encontrados.get(key, AUSENTE), defaults.get(key)) for key in keys}
     
     @staticmethod
     @transaction.atomic
@@ -246,22 +356,88 @@ class ConfigService:
             logger.error(f"Error obteniendo features: {e}")
             return {}
     
-    @staticmethod
-    def invalidate_cache(key: Optional[str] = None):
+    @classmethod
+    def invalidate_cache(cls, key: Optional[str] = None):
         """
-        Invalida el cache de configuraciones.
+        Invalida el cache de configuraciones (Redis y L1 de todos los workers).
         
         Args:
             key: Clave específica a invalidar. Si es None, invalida todo.
         """
         if key:
-            cache.delete(f"system_setting:{key}")
-            cache.delete(f"feature_flag:{key}")
+            cache.delete_many([cls._cache_key(key), f"feature_flag:{key}", "system_settings:public"])
+            cls._l1.delete(key)
         else:
-            # Invalidar todos los caches de configuración
-            cache.delete_pattern("system_setting:*")
-            cache.delete_pattern("feature_flag:*")
-            cache.delete("system_settings:public")
-            cache.delete("feature_flags:all")
-        
+            # Invalidar todos los caches de configuración (sin patrones: claves desde BD)
+            from ..models import SystemSetting, FeatureFlag
+            claves = [cls._cache_key(k) for k in SystemSetting.all_objects.values_list('key', flat=True)]
+            claves += [f"feature_flag:{c}" for c in FeatureFlag.all_objects.values_list('code', flat=True)]
+            cache.delete_many(claves + ["system_settings:public", "feature_flags:all"])
+            cls._l1.clear()
+
+        cls._publicar(key or '*')
         logger.info(f"Cache invalidado: {key or 'ALL'}")
+
+    @classmethod
+    def notificar_cambio(cls, key: str):
+        """
+        Llamado por SystemSetting.save()/delete(): invalida ya en este proceso
+        y, al confirmar la transacción, otra vez en Redis y en los demás workers.
+        """
+        cls._l1.delete(key)
+        cache.delete_many([cls._cache_key(key), "system_settings:public"])
+        transaction.on_commit(lambda: cls.invalidate_cache(key))
+
+    # ------------------------------------------------------------------
+    # Pub/sub
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _redis():
+        url = getattr(settings, 'CACHE_REDIS_URL', None)
+        if not url or not getattr(settings, 'CONFIG_PUBSUB_ENABLED', True):
+            return None
+        import redis
+        return redis.Redis.from_url(url)
+
+    @classmethod
+    def _publicar(cls, mensaje: str):
+        try:
+            cliente = cls._redis()
+            if cliente is not None:
+                cliente.publish(cls.PUBSUB_CHANNEL, mensaje)
+        except Exception as e:
+            logger.error(f"Error publicando invalidación de config '{mensaje}': {e}")
+
+    @classmethod
+    def _asegurar_suscriptor(cls):
+        """Arranca (una vez por proceso, también tras un fork) el hilo suscriptor."""
+        pid = os.getpid()
+        if cls._suscriptor_pid == pid:
+            return
+        with cls._suscriptor_lock:
+            if cls._suscriptor_pid == pid:
+                return
+            cls._suscriptor_pid = pid
+            if cls._redis() is None:
+                return
+            cls._l1.clear()  # Lo heredado del proceso padre no recibe mensajes
+            threading.Thread(target=cls._escuchar, name='config-pubsub', daemon=True).start()
+
+    @classmethod
+    def _escuchar(cls):
+        while True:
+            try:
+                pubsub = cls._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.PUBSUB_CHANNEL)
+                for mensaje in pubsub.listen():
+                    key = mensaje['data']
+                    key = key.decode() if isinstance(key, bytes) else key
+                    if key == '*':
+                        cls._l1.clear()
+                    else:
+                        cls._l1.delete(key)
+            except Exception as e:
+                logger.warning(f"Suscripción a {cls.PUBSUB_CHANNEL} interrumpida: {e}")
+                # Pudimos perder mensajes mientras no había conexión
+                cls._l1.clear()
+                time.sleep(5)
@@ -2,7 +2,7 @@ from django.db.models import Sum, Q
 from decimal import Decimal
 from obras.models import Obra, Estimacion
 from tesoreria.models.cxp import ContraRecibo
-from compras.models.compras import OrdenCompra
+from obras.services.finanzas_service import ObraFinanzasService
 
 class DashboardService:
     @staticmethod
@@ -31,18 +31,14 @@ class DashboardService:
         # Banco (Mock)
         saldo_banco = Decimal('1500000.00') 
 
-        # 2. Rentabilidad por Obra
+        # 2. Rentabilidad por Obra (consultas agrupadas, no una por obra)
         obras_stats = []
-        obras = Obra.objects.all()
+        obras = list(Obra.objects.all())
+        finanzas = ObraFinanzasService.calcular([obra.id for obra in obras])
         for obra in obras:
-            # Ingresos (Estimaciones)
-            ingresos = Estimacion.objects.filter(obra=obra).aggregate(t=Sum('subtotal'))['t'] or 0
-            
-            # Egresos (ODCs Autorizadas)
-            egresos = OrdenCompra.objects.filter(
-                proyecto=obra, 
-                estado__in=['AUTORIZADA', 'COMPRADA', 'RECIBIDA']
-            ).aggregate(t=Sum('subtotal'))['t'] or 0
+            # Ingresos (Estimaciones) y Egresos (ODCs Autorizadas)
+            ingresos = finanzas[obra.id]['ingresos_estimado']
+            egresos = finanzas[obra.id]['compras']
             
             margen = ingresos - egresos
             pct = (margen / ingresos * 100) if ingresos > 0 else 0
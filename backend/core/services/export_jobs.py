@@ -0,0 +1,285 @@
+"""
+Exportaciones en segundo plano.
+
+Cualquier acción exportadora (la que regresa un HttpResponse/FileResponse con
+el archivo) puede optar por ejecutarse en Celery decorándola con
+`exportacion_asincrona`:
+
+    @action(detail=False, methods=['get'], url_path='download-balanza')
+    @exportacion_asincrona
+    def download_balanza(self, request): ...
+
+Con `?async=1` (o `"async": true` en el body) la acción no genera el archivo:
+registra un ExportJob, lo encola y responde 202 con el job para hacer polling
+en core/exportaciones/<id>/ y descargar en .../<id>/descargar/. Con
+`exportacion_asincrona(siempre=True)` la acción siempre va a segundo plano.
+
+El worker reconstruye la petición (usuario, empresa, query params y body) y
+ejecuta la misma acción sin decorar; así el archivo es idéntico al síncrono.
+Una petición con el mismo hash de parámetros reutiliza el job en curso o el
+artefacto vigente (settings.EXPORT_JOB_TTL).
+"""
+import functools
+import hashlib
+import json
+import logging
+import re
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.middleware import get_current_company_id, set_current_company_id
+from core.models import ExportJob
+from core.services.export_service import ExportService
+
+logger = logging.getLogger(__name__)
+
+_FILENAME_RE = re.compile(r'filename="?([^";]+)"?')
+_VALORES_ASYNC = {'1', 'true', 'si', 'sí', 'yes'}
+
+
+def _pide_async(request) -> bool:
+    valor = request.query_params.get('async')
+    if valor is None and isinstance(request.data, dict):
+        valor = request.data.get('async')
+    return str(valor).lower() in _VALORES_ASYNC
+
+
+def exportacion_asincrona(funcion=None, *, siempre=False):
+    """Decorador para que una acción exportadora pueda ejecutarse como ExportJob."""
+    def decorador(accion):
+        @functools.wraps(accion)
+        def envoltura(self, request, *args, **kwargs):
+            if not (siempre or _pide_async(request)):
+                return accion(self, request, *args, **kwargs)
+            job, reutilizado = ExportJobService.solicitar(self, request, accion.__name__, kwargs)
+            return Response(
+                ExportJobService.resumen(job, reutilizado),
+                status=status.HTTP_200_OK if job.estado == 'COMPLETADO' else status.HTTP_202_ACCEPTED,
+            )
+        return envoltura
+
+    if funcion is not None:
+        return decorador(funcion)
+    return decorador
+
+
+class ExportJobService:
+    ACTUALIZAR_PROGRESO_CADA = 2000  # Filas entre escrituras de progreso
+
+    @staticmethod
+    def ttl() -> int:
+        return getattr(settings, 'EXPORT_JOB_TTL', 3600)
+
+    # ------------------------------------------------------------------
+    # Solicitud (request web)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _parametros(request, kwargs) -> dict:
+        data = request.data if isinstance(request.data, dict) else {}
+        query = {k: v for k, v in request.query_params.lists() if k != 'async'}
+        return {
+            'metodo': request.method,
+            'query': query,
+            'data': {k: v for k, v in data.items() if k != 'async'},
+            'kwargs': {k: str(v) for k, v in kwargs.items()},
+        }
+
+    @staticmethod
+    def calcular_hash(vista, accion, parametros, empresa_id, usuario_id) -> str:
+        contenido = json.dumps(
+            [vista, accion, parametros, empresa_id, usuario_id], sort_keys=True, default=str
+        )
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def solicitar(cls, view, request, accion, kwargs=None):
+        """
+        Crea (o reutiliza) el ExportJob de una acción y lo encola.
+
+        Returns:
+            (job, reutilizado)
+        """
+        vista = f"{type(view).__module__}.{type(view).__qualname__}"
+        parametros = cls._parametros(request, kwargs or {})
+        empresa_id = get_current_company_id()
+        usuario = request.user if request.user.is_authenticated else None
+        parametros_hash = cls.calcular_hash(vista, accion, parametros, empresa_id, getattr(usuario, 'pk', None))
+
+        vigente = cls.buscar_vigente(parametros_hash)
+        if vigente:
+            return vigente, True
+
+        job = ExportJob.objects.create(
+            vista=vista,
+            accion=accion,
+            parametros=parametros,
+            parametros_hash=parametros_hash,
+            empresa_id=empresa_id,
+            usuario=usuario,
+        )
+        from core.tasks import ejecutar_exportacion
+        transaction.on_commit(lambda: ejecutar_exportacion.delay(job.pk))
+        return job, False
+
+    @classmethod
+    def buscar_vigente(cls, parametros_hash):
+        """
+        Job en curso o artefacto completado que aún no expira. Los jobs en curso
+        más viejos que el TTL se ignoran (worker caído).
+        """
+        ahora = timezone.now()
+        return (
+            ExportJob.objects.filter(parametros_hash=parametros_hash)
+            .filter(
+                Q(estado__in=('PENDIENTE', 'PROCESANDO'), created_at__gt=ahora - timedelta(seconds=cls.ttl()))
+                | Q(estado='COMPLETADO', expira_en__gt=ahora)
+            )
+            .order_by('-created_at')
+            .first()
+        )
+
+    @staticmethod
+    def resumen(job, reutilizado=False) -> dict:
+        return {
+            'id': job.pk,
+            'estado': job.estado,
+            'progreso': job.progreso,
+            'filas_procesadas': job.filas_procesadas,
+            'reutilizado': reutilizado,
+            'url_estado': reverse('export-job-detail', args=[job.pk]),
+            'url_descarga': (
+                reverse('export-job-descargar', args=[job.pk]) if job.estado == 'COMPLETADO' else None
+            ),
+        }
+
+    # ------------------------------------------------------------------
+    # Ejecución (worker)
+    # ------------------------------------------------------------------
+    @classmethod
+    def ejecutar(cls, job_id):
+        actualizados = ExportJob.objects.filter(pk=job_id, estado='PENDIENTE').update(
+            estado='PROCESANDO', iniciado_en=timezone.now(), progreso=5
+        )
+        if not actualizados:
+            return None  # Ya lo tomó otro worker o fue cancelado
+        job = ExportJob.objects.select_related('usuario', 'empresa').get(pk=job_id)
+
+        empresa_anterior = get_current_company_id()
+        set_current_company_id(job.empresa_id)
+        try:
+            resultado = cls._ejecutar_accion(job)
+            cls._guardar_respuesta(job, resultado)
+        except Exception as e:
+            logger.exception("Error en exportación %s", job_id)
+            ExportJob.objects.filter(pk=job_id).update(
+                estado='ERROR', error=str(e)[:2000], terminado_en=timezone.now()
+            )
+            job.refresh_from_db()
+        finally:
+            set_current_company_id(empresa_anterior)
+        return job
+
+    @staticmethod
+    def _construir_request(job) -> Request:
+        parametros = job.parametros
+        http = HttpRequest()
+        http.method = parametros.get('metodo', 'GET')
+        http.GET = QueryDict(mutable=True)
+        for clave, valores in parametros.get('query', {}).items():
+            http.GET.setlist(clave, valores)
+        http.empresa = job.empresa
+
+        request = Request(http)
+        request.user = job.usuario or AnonymousUser()
+        request._full_data = parametros.get('data', {})
+        return request
+
+    @classmethod
+    def _ejecutar_accion(cls, job):
+        modulo, clase = job.vista.rsplit('.', 1)
+        view_cls = getattr(import_module(modulo), clase)
+        accion = getattr(view_cls, job.accion)
+        accion = getattr(accion, '__wrapped__', accion)
+
+        request = cls._construir_request(job)
+        view = view_cls()
+        view.action = job.accion
+        view.request = request
+        view.args = ()
+        view.kwargs = job.parametros.get('kwargs', {})
+        view.format_kwarg = None
+        view.headers = {}
+
+        def progreso(filas, total):
+            porcentaje = 5 + int(90 * filas / total) if total else 5
+            ExportJob.objects.filter(pk=job.pk).update(filas_procesadas=filas, progreso=min(porcentaje, 95))
+
+        with ExportService.reportar_progreso(progreso, cada=cls.ACTUALIZAR_PROGRESO_CADA):
+            response = accion(view, request, **view.kwargs)
+            if isinstance(response, Response) and response.status_code >= 400:
+                raise ValueError(json.dumps(response.data, default=str, ensure_ascii=False))
+            # Las respuestas en streaming se consumen aquí, todavía dentro del contexto
+            return cls._volcar(response)
+
+    @staticmethod
+    def _volcar(response):
+        """Copia el cuerpo de la respuesta a un archivo temporal."""
+        archivo = tempfile.TemporaryFile()
+        try:
+            if response.streaming:
+                for bloque in response.streaming_content:
+                    archivo.write(bloque)
+            else:
+                archivo.write(response.content)
+        finally:
+            response.close()
+        archivo.seek(0)
+        disposicion = response.get('Content-Disposition', '')
+        coincidencia = _FILENAME_RE.search(disposicion)
+        return {
+            'archivo': archivo,
+            'nombre': coincidencia.group(1) if coincidencia else 'exportacion',
+            'content_type': response.get('Content-Type', 'application/octet-stream'),
+        }
+
+    @classmethod
+    def _guardar_respuesta(cls, job, resultado):
+        with resultado['archivo'] as archivo:
+            job.archivo.save(resultado['nombre'], File(archivo, name=resultado['nombre']), save=False)
+        ahora = timezone.now()
+        job.refresh_from_db(fields=['filas_procesadas'])
+        job.nombre_archivo = resultado['nombre']
+        job.content_type = resultado['content_type']
+        job.estado = 'COMPLETADO'
+        job.progreso = 100
+        job.terminado_en = ahora
+        job.expira_en = ahora + timedelta(seconds=cls.ttl())
+        job.save(update_fields=[
+            'archivo', 'nombre_archivo', 'content_type', 'estado', 'progreso',
+            'terminado_en', 'expira_en', 'updated_at',
+        ])
+
+    @staticmethod
+    def limpiar_expirados() -> int:
+        """Borra del storage los artefactos vencidos y sus jobs."""
+        expirados = ExportJob.objects.filter(expira_en__lt=timezone.now())
+        total = 0
+        for job in expirados.iterator():
+            if job.archivo:
+                job.archivo.delete(save=False)
+            job.delete()
+            total += 1
+        return total
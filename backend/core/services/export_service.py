@@ -0,0 +1,302 @@
+"""
+Exportación de QuerySets a Excel/CSV en streaming.
+
+Las columnas se traducen a lookups del ORM (`cliente__nombre`, o el `source`
+del serializador como `cliente.nombre` / `get_estado_display`) y se leen con
+`values_list(...).iterator(chunk_size=...)`, así que no se instancia el
+modelo ni se ejecuta el serializador por fila. Solo las columnas que no
+corresponden a un campo (propiedades, métodos, `SerializerMethodField`)
+recorren instancias, y en ese caso las relaciones involucradas se traen con
+`select_related`.
+
+- CSV: se genera fila por fila directamente en la respuesta.
+- XLSX: openpyxl en modo write-only sobre un archivo temporal, que después
+  se envía en bloques con FileResponse. La memoria queda acotada en ambos.
+"""
+import csv
+import datetime
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional
+
+import openpyxl
+from django.core.exceptions import FieldDoesNotExist
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+
+_progreso = threading.local()
+
+
+@dataclass(frozen=True)
+class ColumnaExport:
+    """Cómo obtener una columna: por lookup ORM o recorriendo atributos."""
+    id: str
+    encabezado: str
+    atributo: List[str]                 # Ruta getattr sobre la instancia
+    lookup: Optional[str] = None        # Para values_list(); None si no es campo
+    choices: Optional[dict] = None      # Traduce el valor crudo (get_X_display)
+    campo: Any = None                   # Campo del serializador con source='*'
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: regresa la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+class ExportService:
+    CHUNK_SIZE = 2000
+    FORMATOS = ('xlsx', 'csv')
+
+    # ------------------------------------------------------------------
+    # Columnas
+    # ------------------------------------------------------------------
+    @classmethod
+    def resolver_columnas(cls, model, columns, serializer=None) -> List[ColumnaExport]:
+        """
+        Traduce los IDs de columna del frontend a ColumnaExport.
+
+        Si se pasa el serializador, los campos declarados con `source` se
+        resuelven a partir de él (p. ej. `estado_display` -> `get_estado_display`).
+        Los que reciben la instancia completa (`source='*'`, como
+        SerializerMethodField) se calculan con el propio campo del serializador.
+        """
+        campos_serializer = getattr(serializer, 'fields', {}) if serializer is not None else {}
+        columnas = []
+        for col_id in columns:
+            ruta = col_id.split('__')
+            campo_ser = campos_serializer.get(col_id)
+            source = getattr(campo_ser, 'source', None)
+            if source == '*':
+                columnas.append(ColumnaExport(
+                    id=col_id,
+                    encabezado=cls._encabezado(model, col_id),
+                    atributo=[],
+                    campo=campo_ser,
+                ))
+                continue
+            if source and '__' not in col_id:
+                ruta = source.split('.')
+
+            lookup, atributo, choices = cls._lookup_orm(model, ruta)
+            columnas.append(ColumnaExport(
+                id=col_id,
+                encabezado=cls._encabezado(model, col_id),
+                atributo=atributo or ruta,
+                lookup=lookup,
+                choices=choices,
+            ))
+        return columnas
+
+    @staticmethod
+    def _encabezado(model, col_id) -> str:
+        try:
+            field = model._meta.get_field(col_id.split('__')[0])
+            return str(getattr(field, 'verbose_name', col_id)).upper()
+        except FieldDoesNotExist:
+            return col_id.replace('_', ' ').upper()
+
+    @staticmethod
+    def _lookup_orm(model, ruta):
+        """
+        Returns:
+            (lookup, ruta_atributo, choices) o (None, None, None) si la ruta no
+            es un campo concreto alcanzable por FKs (propiedad, método,
+            relación múltiple). La ruta de atributo termina en `attname`
+            para que una FK final no cargue el objeto relacionado.
+        """
+        recorrido = []
+        atributo = []
+        for i, parte in enumerate(ruta):
+            ultimo = i == len(ruta) - 1
+            if ultimo and parte.startswith('get_') and parte.endswith('_display'):
+                try:
+                    field = model._meta.get_field(parte[4:-8])
+                except FieldDoesNotExist:
+                    return None, None, None
+                if not field.choices:
+                    return None, None, None
+                recorrido.append(field.name)
+                atributo.append(field.attname)
+                return '__'.join(recorrido), atributo, {k: str(v) for k, v in field.flatchoices}
+            try:
+                field = model._meta.get_field(parte)
+            except FieldDoesNotExist:
+                return None, None, None
+            if field.many_to_many or field.one_to_many:
+                return None, None, None
+            recorrido.append(field.name)
+            if ultimo:
+                atributo.append(field.attname)
+            elif field.is_relation:
+                atributo.append(field.name)
+                model = field.related_model
+            else:
+                return None, None, None
+        return '__'.join(recorrido), atributo, None
+
+    @staticmethod
+    def _relaciones(model, ruta) -> Optional[str]:
+        """Prefijo de FKs de una ruta de atributos, para select_related."""
+        recorrido = []
+        for parte in ruta[:-1]:
+            try:
+                field = model._meta.get_field(parte)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation or field.many_to_many or field.one_to_many:
+                break
+            recorrido.append(parte)
+            model = field.related_model
+        return '__'.join(recorrido) or None
+
+    # ------------------------------------------------------------------
+    # Filas
+    # ------------------------------------------------------------------
+    @staticmethod
+    @contextmanager
+    def reportar_progreso(callback, cada=CHUNK_SIZE):
+        """
+        Mientras esté activo, `filas()` llama callback(filas, total) cada
+        `cada` filas y al terminar. Lo usan las exportaciones en segundo plano.
+        """
+        anterior = getattr(_progreso, 'actual', None)
+        _progreso.actual = (callback, cada)
+        try:
+            yield
+        finally:
+            _progreso.actual = anterior
+
+    @classmethod
+    def filas(cls, queryset, columnas: List[ColumnaExport], chunk_size=None) -> Iterable[list]:
+        """Genera los valores crudos de cada fila (sin formatear)."""
+        reporte = getattr(_progreso, 'actual', None)
+        if reporte is None:
+            yield from cls._filas(queryset, columnas, chunk_size)
+            return
+
+        callback, cada = reporte
+        total = queryset.count()
+        n = 0
+        for n, fila in enumerate(cls._filas(queryset, columnas, chunk_size), 1):
+            if n % cada == 0:
+                callback(n, total)
+            yield fila
+        callback(n, total)
+
+    @classmethod
+    def _filas(cls, queryset, columnas, chunk_size=None):
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+
+        if all(c.lookup for c in columnas):
+            lookups = list(dict.fromkeys(c.lookup for c in columnas))
+            posicion = [lookups.index(c.lookup) for c in columnas]
+            for tupla in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+                yield [
+                    c.choices.get(tupla[p], tupla[p]) if c.choices else tupla[p]
+                    for c, p in zip(columnas, posicion)
+                ]
+            return
+
+        # Hay columnas que solo existen como atributo: recorrer instancias.
+        model = queryset.model
+        relaciones = {
+            r for c in columnas
+            if (r := cls._relaciones(model, c.atributo))
+        }
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield [cls._valor_atributo(obj, c) for c in columnas]
+
+    @staticmethod
+    def _valor_atributo(obj, columna: ColumnaExport):
+        if columna.campo is not None:
+            return columna.campo.to_representation(columna.campo.get_attribute(obj))
+        valor = obj
+        for parte in columna.atributo:
+            if valor is None:
+                return None
+            try:
+                valor = getattr(valor, parte)
+            except AttributeError:
+                return None
+            if callable(valor):
+                valor = valor()
+        if columna.choices:
+            return columna.choices.get(valor, valor)
+        return valor
+
+    @staticmethod
+    def formatear(valor) -> str:
+        """Mismo formato que el exportador basado en serializador."""
+        if isinstance(valor, bool):
+            return 'SÍ' if valor else 'NO'
+        if valor is None:
+            return ''
+        if isinstance(valor, datetime.datetime):
+            if timezone.is_aware(valor):
+                valor = timezone.localtime(valor)
+            return valor.isoformat()
+        if isinstance(valor, datetime.date):
+            return valor.isoformat()
+        return str(valor)
+
+    # ------------------------------------------------------------------
+    # Respuestas
+    # ------------------------------------------------------------------
+    @classmethod
+    def respuesta(cls, filas: Iterable[list], encabezados: List[str], titulo: str,
+                  formato='xlsx', nombre_archivo=None, formatear=True):
+        """
+        Args:
+            filas: Iterable de listas de valores (p. ej. ExportService.filas()).
+            formatear: Convierte cada valor con `formatear()`; con False se
+                escriben los tipos nativos (números en Excel).
+        """
+        nombre = nombre_archivo or f"Export_{titulo}_{timezone.now().strftime('%Y%m%d_%H%M')}"
+        if formatear:
+            filas = ([cls.formatear(v) for v in fila] for fila in filas)
+
+        if formato == 'csv':
+            return cls._respuesta_csv(filas, encabezados, f"{nombre}.csv")
+        return cls._respuesta_xlsx(filas, encabezados, titulo, f"{nombre}.xlsx")
+
+    @staticmethod
+    def _respuesta_csv(filas, encabezados, filename):
+        writer = csv.writer(_Eco())
+
+        def generar():
+            yield '\ufeff'  # BOM para que Excel detecte UTF-8
+            yield writer.writerow(encabezados)
+            for fila in filas:
+                yield writer.writerow(fila)
+
+        response = StreamingHttpResponse(generar(), content_type=CSV_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @classmethod
+    def _respuesta_xlsx(cls, filas, encabezados, titulo, filename):
+        archivo = tempfile.TemporaryFile()
+        cls.escribir_xlsx(archivo, filas, encabezados, titulo)
+        archivo.seek(0)
+        return FileResponse(
+            archivo, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE
+        )
+
+    @staticmethod
+    def escribir_xlsx(destino: Any, filas: Iterable[list], encabezados: List[str], titulo: str):
+        """Escribe un libro write-only en `destino` (ruta o archivo binario)."""
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(title=titulo[:31] or 'Datos')
+        ws.append(encabezados)
+        for fila in filas:
+            ws.append(fila)
+        wb.save(destino)
@@ -7,7 +7,21 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Any
 
-from core.services.cache_service import cache_report, cache_kpis
+from core.services.cache_service import CacheService, cache_report, cache_kpis
+
+# Modelos de los que dependen los reportes. Sus escrituras invalidan solo la
+# empresa afectada, por eso los TTL pueden ser de horas.
+FACTURA = 'contabilidad.Factura'
+CLIENTE = 'contabilidad.Cliente'
+EGRESO = 'tesoreria.Egreso'
+CUENTA_BANCARIA = 'tesoreria.CuentaBancaria'
+OBRA = 'obras.Obra'
+
+CacheService.registrar_dependencia(FACTURA)
+CacheService.registrar_dependencia(CLIENTE, empresa=None)  # Catálogo compartido
+CacheService.registrar_dependencia(EGRESO, empresa='cuenta_bancaria.empresa_id')
+CacheService.registrar_dependencia(CUENTA_BANCARIA)
+CacheService.registrar_dependencia(OBRA)
 
 
 class ReportesService:
@@ -16,7 +30,7 @@ class ReportesService:
     """
     
     @staticmethod
-    @cache_report(timeout=900)  # 15 minutos
+    @cache_report(timeout=6 * 3600, depende_de=[FACTURA, EGRESO])
     def get_financial_summary(fecha_inicio: datetime, fecha_fin: datetime, empresa_id: int = None) -> Dict[str, Any]:
         """
         Resumen financiero con ingresos, egresos y utilidad
@@ -45,7 +59,7 @@ class ReportesService:
         
         if empresa_id:
             facturas_filter &= Q(empresa_id=empresa_id)
-            egresos_filter &= Q(empresa_id=empresa_id)
+            egresos_filter &= Q(cuenta_bancaria__empresa_id=empresa_id)
         
         # Calcular ingresos
         ingresos_data = Factura.objects.filter(facturas_filter).aggregate(
@@ -77,7 +91,7 @@ class ReportesService:
         }
     
     @staticmethod
-    @cache_report(timeout=900)  # 15 minutos
+    @cache_report(timeout=6 * 3600, depende_de=[FACTURA])
     def get_ventas_por_periodo(
         fecha_inicio: datetime,
         fecha_fin: datetime,
@@ -132,7 +146,7 @@ class ReportesService:
         ]
     
     @staticmethod
-    @cache_report(timeout=1800)  # 30 minutos
+    @cache_report(timeout=6 * 3600, depende_de=[FACTURA, CLIENTE])
     def get_top_clientes(
         fecha_inicio: datetime,
         fecha_fin: datetime,
@@ -184,7 +198,7 @@ class ReportesService:
         ]
     
     @staticmethod
-    @cache_report(timeout=1800)  # 30 minutos
+    @cache_report(timeout=6 * 3600, depende_de=[OBRA, EGRESO])
     def get_obras_rentabilidad(empresa_id: int = None) -> List[Dict[str, Any]]:
         """
         Rentabilidad por obra
@@ -201,21 +215,19 @@ class ReportesService:
             }]
         """
         from obras.models import Obra
-        from tesoreria.models import Egreso
+        from obras.services.finanzas_service import ObraFinanzasService
         
         filters = Q()
         if empresa_id:
             filters &= Q(empresa_id=empresa_id)
         
-        obras = Obra.objects.filter(filters).select_related('empresa')
+        obras = list(Obra.objects.filter(filters).select_related('empresa'))
+        finanzas = ObraFinanzasService.calcular([obra.id for obra in obras])
         
         resultados = []
         for obra in obras:
             # Calcular costos reales
-            costos = Egreso.objects.filter(obra=obra).aggregate(
-                total=Sum('monto')
-            )
-            costo_real = float(costos['total'] or 0)
+            costo_real = float(finanzas[obra.id]['egresos'])
             presupuesto = float(obra.presupuesto_total or 0)
             
             utilidad = presupuesto - costo_real
@@ -236,7 +248,7 @@ class ReportesService:
         return sorted(resultados, key=lambda x: x['margen'], reverse=True)
     
     @staticmethod
-    @cache_kpis(timeout=300)  # 5 minutos
+    @cache_kpis(timeout=3600, depende_de=[FACTURA, OBRA, CUENTA_BANCARIA])  # Acotado por el cambio de mes
     def get_kpis_principales(empresa_id: int = None) -> Dict[str, Any]:
         """
         KPIs principales del sistema
@@ -0,0 +1,115 @@
+"""
+Resolución de la empresa activa por request (multi-empresa).
+
+Las empresas a las que tiene acceso un usuario se cachean por usuario y
+`token_version`: rotar la versión (logout global, cambio de roles) deja de
+leer la entrada anterior. Las altas/bajas de membresía y las escrituras de
+Empresa invalidan el namespace completo, así que en estado estable el
+middleware resuelve la empresa sin consultas a la BD.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+
+from core.services.cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+
+class TenantService:
+    PREFIX = 'tenant:'
+    CACHE_TIMEOUT = 3600  # 1 hora
+    # Ventana mínima entre escrituras de ultima_empresa_activa por usuario
+    ULTIMA_EMPRESA_DEBOUNCE = 300
+
+    @classmethod
+    def _cache_key(cls, user) -> str:
+        ns = CacheService.namespace(cls.PREFIX, depende_de=['core.Empresa'])
+        return f"{ns}acceso:{user.pk}:{user.token_version}:{int(user.is_superuser)}"
+
+    @classmethod
+    def accesos(cls, user) -> dict:
+        """
+        Empresas (activas) a las que el usuario tiene acceso.
+
+        Returns:
+            {'empresas': {id: Empresa}, 'orden': [ids en el orden de Empresa.Meta]}
+        """
+        key = cls._cache_key(user)
+        accesos = cache.get(key)
+        if accesos is None:
+            if user.is_superuser:
+                from core.models import Empresa
+                empresas = list(Empresa.objects.all())
+            else:
+                empresas = list(user.empresas.all())
+            accesos = {
+                'empresas': {empresa.id: empresa for empresa in empresas},
+                'orden': [empresa.id for empresa in empresas],
+            }
+            cache.set(key, accesos, cls.CACHE_TIMEOUT)
+        return accesos
+
+    @classmethod
+    def resolver_empresa(cls, user, empresa_id=None):
+        """
+        Empresa activa del usuario o None si no tiene acceso.
+
+        Prioridad: empresa solicitada (header X-Company-ID), última activa,
+        principal y, si no hay ninguna, la primera disponible.
+        """
+        accesos = cls.accesos(user)
+        objetivo = (
+            empresa_id
+            or user.ultima_empresa_activa_id
+            or user.empresa_principal_id
+            or next(iter(accesos['orden']), None)
+        )
+        try:
+            return accesos['empresas'].get(int(objetivo))
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def registrar_ultima_empresa(cls, user, empresa_id) -> bool:
+        """
+        Persiste ultima_empresa_activa con debounce: a lo más una escritura por
+        usuario cada ULTIMA_EMPRESA_DEBOUNCE segundos. Si se descarta, la
+        siguiente petición (con el usuario aún desactualizado) lo reintenta.
+
+        Returns:
+            True si se escribió en la BD
+        """
+        if user.ultima_empresa_activa_id == empresa_id:
+            return False
+        user.ultima_empresa_activa_id = empresa_id
+        debounce = getattr(settings, 'TENANT_ULTIMA_EMPRESA_DEBOUNCE', cls.ULTIMA_EMPRESA_DEBOUNCE)
+        if not cache.add(f"{cls.PREFIX}ultima:{user.pk}", empresa_id, debounce):
+            return False
+        # UPDATE directo: sin save() completo ni señales de auditoría por cada cambio
+        type(user)._base_manager.filter(pk=user.pk).update(ultima_empresa_activa_id=empresa_id)
+        return True
+
+    @classmethod
+    def invalidar(cls):
+        """Invalida los accesos cacheados de todos los usuarios."""
+        return CacheService.invalidate_namespace(cls.PREFIX)
+
+    @classmethod
+    def conectar_senales(cls):
+        CacheService.registrar_dependencia('core.Empresa', empresa=None)
+        m2m_changed.connect(
+            _invalidar_por_membresia,
+            sender=get_user_model().empresas.through,
+            dispatch_uid='tenant_service_membresias',
+        )
+
+
+def _invalidar_por_membresia(sender, action, **kwargs):
+    """Alta/baja de empresas de un usuario (en cualquier dirección de la M2M)."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(TenantService.invalidar)
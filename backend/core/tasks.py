@@ -44,3 +44,30 @@ def send_email_async(subject, message, from_email, recipient_list, html_message=
         # In a real scenario, we might retry:
         # raise self.retry(exc=e)
         return f"Error enviando email: {str(e)}"
+
+
+@shared_task(name='core.ejecutar_exportacion')
+def ejecutar_exportacion(job_id):
+    """Genera el archivo de un ExportJob y lo sube al storage."""
+    from core.services.export_jobs import ExportJobService
+
+    job = ExportJobService.ejecutar(job_id)
+    return job.estado if job else None
+
+
+@shared_task(name='core.limpiar_exportaciones')
+def limpiar_exportaciones():
+    """Elimina artefactos de exportación vencidos."""
+    from core.services.export_jobs import ExportJobService
+
+    return ExportJobService.limpiar_expirados()
+
+
+@shared_task(name='core.cache_janitor')
+def cache_janitor():
+    """Retira con SCAN las claves de generaciones invalidadas de CacheService."""
+    from core.services.cache_service import CacheService
+
+    eliminadas = CacheService.limpiar_huerfanas()
+    logger.info(f"Cache janitor: {eliminadas}")
+    return eliminadas
@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import cache
+from core.services.cache_service import CacheService, cache_report, invalidate_reports
+
+
+@pytest.fixture(autouse=True)
+def cache_limpio():
+    cache.clear()
+    CacheService.reset_metricas()
+    yield
+    cache.clear()
+
+
+class TestGeneraciones:
+    def test_invalidar_prefijo_es_un_incr(self):
+        llamadas = []
+
+        @cache_report(timeout=60)
+        def reporte(anio):
+            llamadas.append(anio)
+            return {'anio': anio}
+
+        reporte(2026)
+        reporte(2026)
+        assert llamadas == [2026]
+
+        antes = CacheService.generaciones(CacheService.PREFIX_REPORTS)[0]
+        assert invalidate_reports() == antes + 1
+        reporte(2026)
+        assert llamadas == [2026, 2026]
+
+    def test_invalidacion_por_empresa_no_afecta_a_otras(self):
+        prefix = CacheService.PREFIX_KPIS
+        ns_1 = CacheService.namespace(prefix, empresa_id=1)
+        ns_2 = CacheService.namespace(prefix, empresa_id=2)
+
+        CacheService.invalidate_namespace(prefix, empresa_id=1)
+
+        assert CacheService.namespace(prefix, empresa_id=1) != ns_1
+        assert CacheService.namespace(prefix, empresa_id=2) == ns_2
+
+    def test_invalidate_pattern_de_prefijo_usa_generaciones(self):
+        ns = CacheService.namespace(CacheService.PREFIX_REPORTS)
+        assert CacheService.invalidate_pattern('reports:*') == 1
+        assert CacheService.namespace(CacheService.PREFIX_REPORTS) != ns
+
+    def test_contador_perdido_no_reutiliza_generaciones(self):
+        prefix = CacheService.PREFIX_CATALOGS
+        viejo = CacheService.generaciones(prefix)[0]
+        CacheService.invalidate_namespace(prefix)
+        cache.delete(CacheService._gen_key(prefix))  # Simula expulsión del contador
+
+        assert CacheService.generaciones(prefix)[0] not in (viejo, viejo + 1)
+
+    def test_janitor_sin_redis_no_falla(self):
+        assert CacheService.limpiar_huerfanas() == {p: 0 for p in CacheService.PREFIXES}
+        assert CacheService.scan_delete('reports:*') == 0
+
+
+class TestMetricas:
+    def test_hits_y_misses_por_prefijo(self):
+        CacheService.get_or_set('reports:manual', lambda: 'valor', 60)
+        CacheService.get('reports:manual')
+        CacheService.get('reports:manual')
+        CacheService.get('kpis:inexistente')
+
+        metricas = CacheService.metricas()
+
+        assert metricas['reports:'] == {'hits': 2, 'misses': 1, 'hit_rate': 0.6667}
+        assert metricas['kpis:']['misses'] == 1
+        assert metricas['catalogs:']['hit_rate'] is None
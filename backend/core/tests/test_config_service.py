@@ -0,0 +1,68 @@
+import pytest
+from django.core.cache import cache
+from core.models import SystemSetting
+from core.services.config_service import AUSENTE, ConfigService
+
+
+@pytest.mark.django_db
+class TestConfigService:
+    @pytest.fixture(autouse=True)
+    def cache_limpio(self):
+        cache.clear()
+        ConfigService._l1.clear()
+        yield
+        cache.clear()
+        ConfigService._l1.clear()
+
+    def test_l1_evita_ir_a_redis(self, django_assert_num_queries):
+        SystemSetting.objects.create(key='POS_FAST_MODE', value=True, category='POS')
+
+        with django_assert_num_queries(1):
+            assert ConfigService.get_value('POS_FAST_MODE') is True
+        cache.delete('system_setting:POS_FAST_MODE')  # Solo L1 puede responder
+        with django_assert_num_queries(0):
+            assert ConfigService.get_value('POS_FAST_MODE') is True
+
+    def test_valores_falsy_y_claves_ausentes_se_cachean(self, django_assert_num_queries):
+        SystemSetting.objects.create(key='POS_ALLOW_NEGATIVE_STOCK', value=False, category='POS')
+
+        ConfigService.get_value('POS_ALLOW_NEGATIVE_STOCK', True)
+        ConfigService.get_value('NO_EXISTE', 'x')
+        assert cache.get('system_setting:NO_EXISTE') == AUSENTE
+
+        ConfigService._l1.clear()
+        with django_assert_num_queries(0):
+            assert ConfigService.get_value('POS_ALLOW_NEGATIVE_STOCK', True) is False
+            # El default no se guarda como valor: cada llamada recibe el suyo
+            assert ConfigService.get_value('NO_EXISTE', 'x') == 'x'
+            assert ConfigService.get_value('NO_EXISTE') is None
+
+    def test_get_many_una_sola_consulta(self, django_assert_num_queries):
+        SystemSetting.objects.create(key='A', value=1)
+        SystemSetting.objects.create(key='B', value={'limite': 5})
+
+        with django_assert_num_queries(1):
+            valores = ConfigService.get_many(['A', 'B', 'C'], {'C': 'default'})
+        assert valores == {'A': 1, 'B': {'limite': 5}, 'C': 'default'}
+
+        valores['B']['limite'] = 99  # No debe contaminar el L1
+        assert ConfigService.get_value('B') == {'limite': 5}
+
+    def test_guardar_invalida_ambos_niveles(self, django_capture_on_commit_callbacks):
+        ConfigService.set_value('OBRAS_STRICT_BUDGET', False)
+        assert ConfigService.get_value('OBRAS_STRICT_BUDGET') is False
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ConfigService.set_value('OBRAS_STRICT_BUDGET', True)
+
+        assert ConfigService.get_value('OBRAS_STRICT_BUDGET') is True
+
+    def test_invalidar_todo_sin_patrones(self):
+        SystemSetting.objects.create(key='A', value=1)
+        ConfigService.get_value('A')
+        SystemSetting.objects.filter(key='A').update(value=2)  # Sin save(): no invalida
+
+        ConfigService.invalidate_cache()
+
+        assert cache.get('system_setting:A') is None
+        assert ConfigService.get_value('A') == 2
@@ -0,0 +1,96 @@
+import io
+import pytest
+import openpyxl
+from decimal import Decimal
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.models import ExportJob
+from core.services.export_jobs import ExportJobService
+from core.views_exportaciones import ExportJobViewSet
+from rrhh.models import NominaCentralizada
+from rrhh.views_nomina import HistoricoNominaViewSet
+
+
+@pytest.mark.django_db
+class TestExportJobs:
+    @pytest.fixture(autouse=True)
+    def storage_local(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.STORAGES = {
+            **settings.STORAGES,
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        }
+
+    @pytest.fixture
+    def user(self, django_user_model):
+        return django_user_model.objects.create_user(username='reportes', password='password')
+
+    @pytest.fixture
+    def historico(self):
+        for i, empresa in enumerate(['Norte', 'Norte', 'Norte', 'Sur']):
+            NominaCentralizada.objects.create(
+                empresa=empresa, nombre=f"Empleado {i}", neto=Decimal("1000.00") + i
+            )
+
+    def _pedir(self, user, **params):
+        request = APIRequestFactory().get('/rrhh/historico-nomina/exportar-excel/', {'async': '1', **params})
+        force_authenticate(request, user=user)
+        return HistoricoNominaViewSet.as_view({'get': 'exportar_excel'})(request)
+
+    def test_encola_y_genera_el_artefacto(self, user, historico, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = self._pedir(user, empresa='Norte')
+
+        assert response.status_code == 202
+        assert len(callbacks) == 1  # ejecutar_exportacion.delay al confirmar
+        job = ExportJob.objects.get(pk=response.data['id'])
+        assert job.estado == 'PENDIENTE'
+        assert job.parametros['query'] == {'empresa': ['Norte']}
+
+        job = ExportJobService.ejecutar(job.pk)
+
+        assert job.estado == 'COMPLETADO'
+        assert job.progreso == 100
+        assert job.nombre_archivo == 'historico_nomina.xlsx'
+        with job.archivo.open('rb') as archivo:
+            ws = openpyxl.load_workbook(io.BytesIO(archivo.read())).active
+        assert ws.max_row == 4  # encabezado + 3 registros de "Norte"
+        assert ws.cell(row=1, column=6).value == 'Nombre'
+
+    def test_reutiliza_por_hash_de_parametros(self, user, historico):
+        primero = self._pedir(user, empresa='Norte').data['id']
+        segundo = self._pedir(user, empresa='Norte')
+        assert segundo.status_code == 202
+        assert (segundo.data['id'], segundo.data['reutilizado']) == (primero, True)
+
+        ExportJobService.ejecutar(primero)
+        completado = self._pedir(user, empresa='Norte')
+        assert completado.status_code == 200
+        assert completado.data['id'] == primero
+        assert completado.data['url_descarga']
+
+        assert self._pedir(user, empresa='Sur').data['id'] != primero
+        assert ExportJob.objects.count() == 2
+
+    def test_error_de_la_accion_queda_en_el_job(self, user, historico):
+        job_id = self._pedir(user, formato='pdf').data['id']
+
+        job = ExportJobService.ejecutar(job_id)
+
+        assert job.estado == 'ERROR'
+        assert 'Formato no soportado' in job.error
+
+    def test_descarga_solo_del_propietario(self, user, historico, django_user_model):
+        job_id = self._pedir(user, empresa='Sur').data['id']
+        ExportJobService.ejecutar(job_id)
+        vista = ExportJobViewSet.as_view({'get': 'descargar'})
+
+        request = APIRequestFactory().get(f'/core/exportaciones/{job_id}/descargar/')
+        force_authenticate(request, user=user)
+        response = vista(request, pk=job_id)
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content)[:2] == b'PK'
+
+        otro = django_user_model.objects.create_user(username='otro', password='password')
+        request = APIRequestFactory().get(f'/core/exportaciones/{job_id}/descargar/')
+        force_authenticate(request, user=otro)
+        assert vista(request, pk=job_id).status_code == 404
@@ -0,0 +1,110 @@
+import io
+import pytest
+import openpyxl
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from contabilidad.models import Banco
+from core.models import Empresa
+from core.services.export_service import ExportService
+from tesoreria.models import CuentaBancaria, Egreso
+from tesoreria.serializers import EgresoSerializer
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestExportService:
+    @pytest.fixture
+    def egresos(self):
+        user = User.objects.create_user(
+            username='exporta', password='password', first_name='Ana', last_name='Ruiz'
+        )
+        empresa = Empresa.objects.create(
+            codigo="EXP01", razon_social="Exporta S.A. de C.V.", nombre_comercial="Exporta",
+            rfc="EXP210101AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+            numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+        )
+        banco = Banco.objects.create(clave="012", nombre_corto="BBVA", razon_social="BBVA")
+        cuenta = CuentaBancaria.objects.create(
+            empresa=empresa, numero_cuenta="1234567890", banco=banco, moneda="MXN"
+        )
+        return [
+            Egreso.objects.create(
+                cuenta_bancaria=cuenta, fecha="2026-03-01", beneficiario=f"Proveedor {i}",
+                concepto="Material", monto=Decimal("100.50") * (i + 1), solicitado_por=user,
+                estado='PAGADO' if i % 2 else 'BORRADOR'
+            )
+            for i in range(30)
+        ]
+
+    def test_columnas_de_campo_usan_una_sola_consulta(self, egresos, django_assert_num_queries):
+        columnas = ExportService.resolver_columnas(
+            Egreso, ['beneficiario', 'estado_display', 'solicitado_por_nombre', 'cuenta_bancaria__banco__nombre_corto'],
+            serializer=EgresoSerializer(),
+        )
+        assert all(c.lookup for c in columnas)
+
+        with django_assert_num_queries(1):
+            filas = list(ExportService.filas(Egreso.objects.order_by('id'), columnas, chunk_size=7))
+
+        assert len(filas) == 30
+        assert filas[1] == ['Proveedor 1', 'Pagado', 'exporta', 'BBVA']
+
+    def test_columnas_de_atributo_no_generan_n_mas_1(self, egresos, django_assert_num_queries):
+        columnas = ExportService.resolver_columnas(
+            Egreso, ['folio', 'cuenta_bancaria', 'solicitado_por__get_full_name']
+        )
+        assert columnas[2].lookup is None
+
+        # La relación se une con select_related y la FK final se lee por attname
+        with django_assert_num_queries(1):
+            filas = list(ExportService.filas(Egreso.objects.order_by('id'), columnas))
+
+        assert filas[0] == [egresos[0].folio, egresos[0].cuenta_bancaria_id, 'Ana Ruiz']
+
+    def test_columna_serializer_method_field(self, egresos):
+        autorizador = User.objects.create_user(username='autoriza', password='password')
+        Egreso.objects.filter(pk=egresos[1].pk).update(autorizado_por=autorizador)
+
+        columnas = ExportService.resolver_columnas(
+            Egreso, ['beneficiario', 'autorizado_por_nombre'], serializer=EgresoSerializer(),
+        )
+        assert columnas[1].lookup is None
+
+        filas = list(ExportService.filas(Egreso.objects.order_by('id'), columnas))
+
+        assert filas[0] == ['Proveedor 0', None]
+        assert filas[1] == ['Proveedor 1', 'autoriza']
+
+    def test_formato_igual_al_exportador_anterior(self):
+        assert ExportService.formatear(True) == 'SÍ'
+        assert ExportService.formatear(False) == 'NO'
+        assert ExportService.formatear(None) == ''
+        assert ExportService.formatear(Decimal('10.50')) == '10.50'
+
+    def test_respuesta_xlsx(self, egresos):
+        columnas = ExportService.resolver_columnas(Egreso, ['beneficiario', 'monto'])
+        response = ExportService.respuesta(
+            ExportService.filas(Egreso.objects.order_by('id'), columnas),
+            [c.encabezado for c in columnas], 'Egresos',
+        )
+
+        assert response.streaming
+        wb = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        ws = wb['Egresos']
+        assert ws.max_row == 31
+        assert [c.value for c in ws[1]] == ['BENEFICIARIO', 'MONTO']
+        assert [c.value for c in ws[2]] == ['Proveedor 0', '100.50']
+
+    def test_respuesta_csv(self, egresos):
+        columnas = ExportService.resolver_columnas(Egreso, ['beneficiario', 'estado'])
+        response = ExportService.respuesta(
+            ExportService.filas(Egreso.objects.order_by('id'), columnas),
+            [c.encabezado for c in columnas], 'Egresos', formato='csv',
+        )
+
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        assert response['Content-Disposition'].endswith('.csv"')
+        assert contenido[0] == 'BENEFICIARIO,ESTADO'
+        assert contenido[2] == 'Proveedor 1,PAGADO'
+        assert len(contenido) == 31
@@ -0,0 +1,88 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from contabilidad.models import Banco
+from core.middleware import set_current_company_id
+from core.models import Empresa
+from core.services.reportes_service import ReportesService
+from tesoreria.models import CuentaBancaria, Egreso
+
+INICIO, FIN = date(2026, 1, 1), date(2026, 1, 31)
+
+
+@pytest.mark.django_db
+class TestReportesCache:
+    @pytest.fixture(autouse=True)
+    def cache_limpio(self):
+        cache.clear()
+        yield
+        cache.clear()
+        set_current_company_id(None)
+
+    @pytest.fixture
+    def cuentas(self, django_user_model):
+        self.user = django_user_model.objects.create_user(username='reportes', password='password')
+        banco = Banco.objects.create(clave="014", nombre_corto="SANTANDER", razon_social="SANTANDER")
+        cuentas = []
+        for n in (1, 2):
+            empresa = Empresa.objects.create(
+                codigo=f"REP0{n}", razon_social=f"Reportes {n} S.A. de C.V.", nombre_comercial=f"Reportes {n}",
+                rfc=f"REP21010{n}AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+                numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+            )
+            cuentas.append(CuentaBancaria.objects.create(
+                empresa=empresa, numero_cuenta=f"55500000{n}", banco=banco, moneda="MXN"
+            ))
+        return cuentas
+
+    def _egreso(self, cuenta, monto):
+        return Egreso.objects.create(
+            cuenta_bancaria=cuenta, fecha=date(2026, 1, 10), beneficiario="Proveedor",
+            concepto="Servicios", monto=Decimal(monto), solicitado_por=self.user
+        )
+
+    def test_escritura_invalida_solo_la_empresa_afectada(
+        self, cuentas, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        cuenta_a, cuenta_b = cuentas
+        a, b = cuenta_a.empresa_id, cuenta_b.empresa_id
+        resumen_a = ReportesService.get_financial_summary(INICIO, FIN, empresa_id=a)
+        ReportesService.get_financial_summary(INICIO, FIN, empresa_id=b)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self._egreso(cuenta_b, "500.00")
+
+        with django_assert_num_queries(0):
+            assert ReportesService.get_financial_summary(INICIO, FIN, empresa_id=a) == resumen_a
+        assert ReportesService.get_financial_summary(INICIO, FIN, empresa_id=b)['egresos_total'] == 500.0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self._egreso(cuenta_a, "125.00")
+        assert ReportesService.get_financial_summary(INICIO, FIN, empresa_id=a)['egresos_total'] == 125.0
+
+    def test_clave_incluye_la_empresa_activa(self, cuentas):
+        set_current_company_id(cuentas[0].empresa_id)
+        ReportesService.get_kpis_principales()
+
+        set_current_company_id(cuentas[1].empresa_id)
+        with CaptureQueriesContext(connection) as otra_empresa:
+            ReportesService.get_kpis_principales()
+        assert len(otra_empresa) > 0
+
+        with CaptureQueriesContext(connection) as misma_empresa:
+            ReportesService.get_kpis_principales()
+        assert len(misma_empresa) == 0
+
+    def test_catalogo_global_invalida_a_todas_las_empresas(self, cuentas):
+        from core.services.cache_service import CacheService
+
+        ns_a = CacheService.namespace('reports:', cuentas[0].empresa_id, ['contabilidad.Cliente'])
+        ns_b = CacheService.namespace('reports:', cuentas[1].empresa_id, ['contabilidad.Cliente'])
+
+        CacheService.invalidar_dependencia('contabilidad.Cliente', None)
+
+        assert CacheService.namespace('reports:', cuentas[0].empresa_id, ['contabilidad.Cliente']) != ns_a
+        assert CacheService.namespace('reports:', cuentas[1].empresa_id, ['contabilidad.Cliente']) != ns_b
@@ -0,0 +1,81 @@
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from core.middleware import EmpresaMiddleware, get_current_company_id, set_current_company_id
+from core.models import Empresa
+
+
+@pytest.mark.django_db
+class TestEmpresaMiddleware:
+    @pytest.fixture(autouse=True)
+    def cache_limpio(self):
+        cache.clear()
+        yield
+        cache.clear()
+        set_current_company_id(None)
+
+    @pytest.fixture
+    def empresas(self):
+        return [
+            Empresa.objects.create(
+                codigo=f"TEN0{n}", razon_social=f"Tenant {n} S.A. de C.V.", nombre_comercial=f"Tenant {n}",
+                rfc=f"TEN21010{n}AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+                numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+            )
+            for n in (1, 2, 3)
+        ]
+
+    @pytest.fixture
+    def user(self, django_user_model, empresas):
+        user = django_user_model.objects.create_user(username='tenant', password='password')
+        user.empresas.add(empresas[0], empresas[1])
+        return user
+
+    def _request(self, user, empresa_id=None):
+        vistas = {}
+
+        def vista(request):
+            vistas['empresa'] = request.empresa
+            vistas['company_id'] = get_current_company_id()
+            return HttpResponse()
+
+        headers = {'HTTP_X_COMPANY_ID': str(empresa_id)} if empresa_id else {}
+        request = RequestFactory().get('/core/empresas/', **headers)
+        request.user = type(user).objects.get(pk=user.pk)
+        EmpresaMiddleware(vista)(request)
+        return vistas
+
+    def test_estado_estable_sin_consultas(self, user, empresas, django_assert_num_queries):
+        self._request(user, empresas[1].id)
+        user.refresh_from_db()
+        assert user.ultima_empresa_activa_id == empresas[1].id
+
+        request_user = type(user).objects.get(pk=user.pk)
+        request = RequestFactory().get('/core/empresas/', HTTP_X_COMPANY_ID=str(empresas[1].id))
+        request.user = request_user
+        with django_assert_num_queries(0):
+            EmpresaMiddleware(lambda r: HttpResponse())(request)
+        assert request.empresa == empresas[1]
+
+    def test_empresa_sin_acceso(self, user, empresas):
+        vistas = self._request(user, empresas[2].id)
+        assert vistas['empresa'] is None
+        assert vistas['company_id'] is None
+
+    def test_cambio_de_membresia_invalida(self, user, empresas, django_capture_on_commit_callbacks):
+        assert self._request(user, empresas[2].id)['empresa'] is None
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.empresas.add(empresas[2])
+
+        assert self._request(user, empresas[2].id)['empresa'] == empresas[2]
+
+    def test_ultima_empresa_con_debounce(self, user, empresas):
+        self._request(user, empresas[0].id)
+        self._request(user, empresas[1].id)  # Dentro de la ventana: no se escribe
+
+        user.refresh_from_db()
+        assert user.ultima_empresa_activa_id == empresas[0].id
+        # Sin header usa la persistida
+        assert self._request(user)['empresa'] == empresas[0]
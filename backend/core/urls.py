@@ -19,6 +19,11 @@ from .views_config import SystemSettingViewSet, FeatureFlagViewSet, PublicConfig
 router.register(r'settings', SystemSettingViewSet, basename='system-setting')
 router.register(r'features', FeatureFlagViewSet, basename='feature-flag')
 
+# Exportaciones en segundo plano
+from .views_exportaciones import ExportJobViewSet
+
+router.register(r'exportaciones', ExportJobViewSet, basename='export-job')
+
 urlpatterns = [
     path('test-pdf/', PDFTestView.as_view(), name='test-pdf'),
     path('config/public/', PublicConfigView.as_view(), name='public-config'),
@@ -3,12 +3,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.utils import timezone
 from .models import Empresa
 from .serializers import EmpresaSerializer
 from .pagination import CustomPagination  # Importar paginación personalizada
+from .services.export_jobs import exportacion_asincrona
 
-import openpyxl
 from django.db import transaction
 from django.apps import apps
 from django.db import models
@@ -39,70 +38,41 @@ class BaseViewSet(viewsets.ModelViewSet):
         return queryset
 
     @action(detail=False, methods=['post'], url_path='exportar-excel')
+    @exportacion_asincrona
     def exportar_excel(self, request):
         """
-        Exporta los datos filtrados a Excel basándose en una lista de columnas.
-        Soporta campos dinámicos y relacionales a través del serializador.
+        Exporta los datos filtrados a Excel (o CSV con `formato=csv`) basándose
+        en una lista de columnas. Con `async: true` se genera en segundo plano.
+
+        Las columnas se resuelven contra el modelo y los `source` del serializador
+        y se leen con values_list() en bloques; la respuesta se envía en streaming
+        (ver core.services.export_service).
         """
-        import openpyxl
-        from django.http import HttpResponse
-        
+        from core.services.export_service import ExportService
+
         columns = request.data.get('columns', [])
         if not columns:
             return Response({"error": "Debe especificar las columnas a exportar."}, status=400)
-            
+
+        formato = request.data.get('formato') or request.query_params.get('formato', 'xlsx')
+        if formato not in ExportService.FORMATOS:
+            return Response({"error": f"Formato no soportado: {formato}"}, status=400)
+
         # 1. Obtener datos filtrados
         queryset = self.filter_queryset(self.get_queryset())
-        
-        # 2. Preparar el Libro de Excel
-        model = self.get_serializer_class().Meta.model
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = getattr(model._meta, 'verbose_name_plural', 'Datos').capitalize()
-        
-        # 3. Headers (Verbose names o el ID de la columna)
-        headers = []
-        for col_id in columns:
-            try:
-                field = model._meta.get_field(col_id.split('__')[0])
-                headers.append(getattr(field, 'verbose_name', col_id).upper())
-            except:
-                headers.append(col_id.replace('_', ' ').upper())
-        ws.append(headers)
-        
-        # 4. Datos (Usando el Serializador para respetar la lógica de negocio/propiedades)
-        serializer_class = self.get_serializer_class()
-        
-        for obj in queryset:
-            data = serializer_class(obj).data
-            row = []
-            for col_id in columns:
-                # Soporte para campos anidados (limitado a 1 nivel para este exportador genérico)
-                # p.ej: 'cliente__nombre'
-                if '__' in col_id:
-                    parts = col_id.split('__')
-                    val = data
-                    for p in parts:
-                        val = val.get(p) if isinstance(val, dict) else None
-                else:
-                    val = data.get(col_id)
-                
-                # Formateo básico de valores complejos
-                if isinstance(val, bool):
-                    val = 'SÍ' if val else 'NO'
-                elif val is None:
-                    val = ''
-                
-                row.append(str(val))
-            ws.append(row)
-            
-        # 5. Respuesta
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        filename = f"Export_{ws.title}_{timezone.now().strftime('%Y%m%d_%H%M')}.xlsx"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        wb.save(response)
-        return response
+
+        # 2. Resolver columnas (lookups ORM / atributos) y encabezados
+        model = queryset.model
+        columnas = ExportService.resolver_columnas(model, columns, serializer=self.get_serializer())
+        titulo = str(getattr(model._meta, 'verbose_name_plural', 'Datos')).capitalize()
+
+        # 3. Respuesta en streaming
+        return ExportService.respuesta(
+            ExportService.filas(queryset, columnas),
+            [c.encabezado for c in columnas],
+            titulo,
+            formato=formato,
+        )
 
     @action(detail=False, methods=['get'])
     def inactivos(self, request):
@@ -0,0 +1,43 @@
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import ExportJob
+from .serializers import ExportJobSerializer
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Exportaciones en segundo plano del usuario actual.
+
+    Endpoints:
+    - GET /core/exportaciones/ - Listar mis exportaciones
+    - GET /core/exportaciones/{id}/ - Estado y progreso (polling)
+    - GET /core/exportaciones/{id}/descargar/ - Descargar el archivo generado
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(usuario=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        job = self.get_object()
+        if job.estado != 'COMPLETADO' or not job.archivo:
+            return Response(
+                {"error": "La exportación aún no está lista.", "estado": job.estado},
+                status=status.HTTP_409_CONFLICT
+            )
+        if job.expira_en and job.expira_en < timezone.now():
+            return Response({"error": "La exportación expiró."}, status=status.HTTP_410_GONE)
+
+        return FileResponse(
+            job.archivo.open('rb'),
+            as_attachment=True,
+            filename=job.nombre_archivo,
+            content_type=job.content_type or None,
+        )
@@ -0,0 +1,101 @@
+"""
+Proveedores de embeddings para el índice RAG.
+
+El proveedor se elige con settings.EMBEDDING_PROVIDER ('openai' o 'fake').
+El cliente se construye una sola vez por proceso y acepta lotes de textos,
+de modo que indexar N documentos cuesta ceil(N / batch_size) llamadas HTTP.
+"""
+import hashlib
+import logging
+import math
+import os
+import struct
+from typing import List
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+class EmbeddingProvider:
+    """Base class for embedding providers"""
+    model = None
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    model = "text-embedding-3-small"
+
+    def __init__(self):
+        from openai import OpenAI
+
+        api_key = os.getenv("OPENAI_API_KEY") or getattr(settings, 'OPENAI_API_KEY', None)
+        self.client = OpenAI(api_key=api_key) if api_key else None
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not self.client:
+            raise ValueError("OpenAI API Key not found")
+        response = self.client.embeddings.create(input=texts, model=self.model)
+        # La API regresa los vectores con su índice original
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """
+    Proveedor local y determinista (sin red) para pruebas y desarrollo.
+    Genera un vector unitario a partir del sha256 del texto.
+    """
+    model = "fake-sha256"
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._vector(text) for text in texts]
+
+    @staticmethod
+    def _vector(text: str) -> List[float]:
+        values = []
+        seed = text.encode('utf-8')
+        counter = 0
+        while len(values) < EMBEDDING_DIMENSIONS:
+            digest = hashlib.sha256(seed + counter.to_bytes(4, 'big')).digest()
+            values.extend(v / 2**31 for v in struct.unpack('>8i', digest))
+            counter += 1
+        values = values[:EMBEDDING_DIMENSIONS]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+
+PROVIDERS = {
+    'openai': OpenAIEmbeddingProvider,
+    'fake': FakeEmbeddingProvider,
+}
+
+_provider_cache = {}
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Instancia (una vez por proceso) el proveedor configurado."""
+    name = getattr(settings, 'EMBEDDING_PROVIDER', 'openai')
+    if name not in _provider_cache:
+        provider_class = PROVIDERS.get(name)
+        if provider_class is None:
+            raise ValueError(f"Proveedor de embeddings desconocido: {name}")
+        _provider_cache[name] = provider_class()
+    return _provider_cache[name]
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Genera embeddings en lotes de settings.EMBEDDING_BATCH_SIZE."""
+    batch_size = getattr(settings, 'EMBEDDING_BATCH_SIZE', 256)
+    provider = get_embedding_provider()
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(provider.embed(texts[start:start + batch_size]))
+    return vectors
@@ -5,6 +5,7 @@ Genera embeddings de los modelos del sistema para búsqueda semántica.
 import logging
 from django.apps import apps
 from django.db import transaction
+from users.services.permission_set_service import PermissionSetService
 from .models import KnowledgeBase
 from .services.ai_service import AIService
 
@@ -219,17 +220,17 @@ class ModelIndexer:
                 
                 # Guardar o actualizar en KnowledgeBase
                 with transaction.atomic():
-                        kb, created = KnowledgeBase.objects.update_or_create(
-                            source_app=app_label,
-                            source_model=model_name,
-                            source_id=str(obj.pk),
-                            empresa=getattr(obj, 'empresa', None),
-                            defaults={
-                                'content': content,
-                                'required_permissions': ','.join(config['permissions']),
-                                'embedding': embedding
-                            }
-                        )
+                    kb, created = KnowledgeBase.objects.update_or_create(
+                        source_app=app_label,
+                        source_model=model_name,
+                        source_id=str(obj.pk),
+                        empresa=getattr(obj, 'empresa', None),
+                        defaults={
+                            'content': content,
+                            'required_permissions': ','.join(config['permissions']),
+                            'embedding': embedding
+                        }
+                    )
                     indexed_count += 1
                     
                     if created:
@@ -269,8 +270,8 @@ class ModelIndexer:
         if not query_embedding:
             return []
         
-        # Obtener permisos del usuario
-        user_permissions = set(user.get_all_permissions())
+        # Obtener permisos del usuario (set precompilado y cacheado)
+        user_permissions = PermissionSetService.permisos(user)
         
         # Buscar en la base de conocimientos
         from core.middleware import get_current_company_id
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.apps import apps
-from ia.rag import index_instance
+from ia.rag import enqueue_index, process_index_queue
 from ia.models import KnowledgeBase
 
 class Command(BaseCommand):
@@ -31,14 +31,21 @@ class Command(BaseCommand):
                 app_label, model_name = model_path.split('.')
                 model = apps.get_model(app_label, model_name)
                 
-                self.stdout.write(f"Indexando {model_name}...")
-                qs = model.objects.all()
-                for obj in qs:
-                    index_instance(obj)
-                    count += 1
-                    if count % 50 == 0:
-                        self.stdout.write(f"  ... {count} objetos procesados")
+                self.stdout.write(f"Encolando {model_name}...")
+                pks = model.objects.values_list('pk', flat=True)
+                count += enqueue_index(
+                    (model._meta.app_label, model._meta.model_name, pk, 'UPSERT') for pk in pks
+                )
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Error procesando {model_path}: {e}"))
+
+        # Drenar la cola en este proceso (embeddings en lote)
+        indexed = 0
+        while True:
+            stats = process_index_queue()
+            if not stats['procesados']:
+                break
+            indexed += stats['indexados']
+            self.stdout.write(f"  ... {indexed} documentos indexados")
                 
-        self.stdout.write(self.style.SUCCESS(f"Re-indexado finalizado. Total: {count} documentos."))
+        self.stdout.write(self.style.SUCCESS(f"Re-indexado finalizado. Encolados: {count}, indexados: {indexed}."))
@@ -3,11 +3,24 @@ from ia.services.auditor_service import AuditorService
 from ia.services.briefing_service import BriefingService
 from notifications.services import WebhookService
 from core.models import Empresa
+from ia.tasks import auditoria_nocturna
 
 class Command(BaseCommand):
-    help = "Ejecuta el Auditor Nocturno y genera briefings de IA."
+    help = "Ejecuta el Auditor Nocturno y genera briefings de IA (en los workers de Celery, o en línea con --en-linea)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--en-linea', action='store_true',
+            help="Ejecuta todo en este proceso, una empresa tras otra (sin workers de Celery)."
+        )
 
     def handle(self, *args, **options):
+        if not options['en_linea']:
+            # Una tarea por empresa en los workers (chord) y después los briefings
+            tarea = auditoria_nocturna.delay()
+            self.stdout.write(self.style.SUCCESS(f"🌙 Auditor Nocturno encolado (tarea {tarea.id})."))
+            return
+
         self.stdout.write(self.style.SUCCESS("🌙 Iniciando Auditor Nocturno..."))
         
         # 1. Ejecutar escaneo de anomalías
@@ -0,0 +1,33 @@
+# Generated by Django
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia', '0004_auditalert_dailybriefing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledgebase',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text='sha256 del contenido indexado', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='IndexQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_app', models.CharField(max_length=100)),
+                ('source_model', models.CharField(max_length=100)),
+                ('source_id', models.CharField(max_length=100)),
+                ('operacion', models.CharField(choices=[('UPSERT', 'Indexar'), ('DELETE', 'Eliminar')], default='UPSERT', max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['updated_at'],
+                'unique_together': {('source_app', 'source_model', 'source_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia', '0005_indexqueue_knowledgebase_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditalert',
+            name='clave',
+            field=models.CharField(blank=True, default='', help_text='Objeto que origina la alerta (ej: insumo:15); una sola alerta abierta por clave', max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='auditalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('resuelta', False), models.Q(('clave', ''), _negated=True)), fields=('empresa', 'tipo', 'clave'), name='ia_alerta_abierta_unica'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_exportjob'),
+        ('ia', '0006_auditalert_clave'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionAuditor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('segundos_auditoria', models.FloatField(blank=True, null=True)),
+                ('alertas_nuevas', models.IntegerField(default=0)),
+                ('segundos_briefing', models.FloatField(blank=True, null=True)),
+                ('intentos_briefing', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ejecuciones_auditor', to='core.empresa')),
+            ],
+            options={
+                'ordering': ['-fecha'],
+                'unique_together': {('empresa', 'fecha')},
+            },
+        ),
+    ]
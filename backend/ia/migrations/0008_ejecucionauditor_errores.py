@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia', '0007_ejecucionauditor'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='ejecucionauditor',
+            old_name='error',
+            new_name='error_auditoria',
+        ),
+        migrations.AddField(
+            model_name='ejecucionauditor',
+            name='error_briefing',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -27,6 +27,7 @@ class KnowledgeBase(BaseModel):
     required_permissions = models.TextField(blank=True, default="") 
     
     embedding = VectorField(dimensions=1536) # Ada-002 / Text-3-Small dimension
+    content_hash = models.CharField(max_length=64, blank=True, default="", help_text="sha256 del contenido indexado")
 
     class Meta:
         indexes = [
@@ -41,6 +42,30 @@ class KnowledgeBase(BaseModel):
     def __str__(self):
         return f"{self.source_app}.{self.source_model} #{self.source_id}"
 
+class IndexQueue(models.Model):
+    """
+    Cola de cambios pendientes de indexar en la KnowledgeBase.
+    Los signals solo registran (modelo, pk); el worker de Celery la drena en lotes.
+    La restricción única colapsa cambios repetidos del mismo registro.
+    """
+    OPERACION_CHOICES = [
+        ('UPSERT', 'Indexar'),
+        ('DELETE', 'Eliminar'),
+    ]
+
+    source_app = models.CharField(max_length=100)
+    source_model = models.CharField(max_length=100)
+    source_id = models.CharField(max_length=100)
+    operacion = models.CharField(max_length=10, choices=OPERACION_CHOICES, default='UPSERT')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('source_app', 'source_model', 'source_id')
+        ordering = ['updated_at']
+
+    def __str__(self):
+        return f"{self.operacion} {self.source_app}.{self.source_model} #{self.source_id}"
+
 class AuditAlert(BaseModel):
     """Alertas generadas por el Auditor Nocturno."""
     TIPO_CHOICES = [
@@ -62,9 +87,17 @@ class AuditAlert(BaseModel):
     data = models.JSONField(null=True, blank=True, help_text="Datos crudos detectados (ej: {ejecutado: 95%})")
     resuelta = models.BooleanField(default=False)
     fecha_resolucion = models.DateTimeField(null=True, blank=True)
+    clave = models.CharField(max_length=100, blank=True, default="", help_text="Objeto que origina la alerta (ej: insumo:15); una sola alerta abierta por clave")
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa', 'tipo', 'clave'],
+                condition=models.Q(resuelta=False) & ~models.Q(clave=''),
+                name='ia_alerta_abierta_unica',
+            ),
+        ]
 
     def __str__(self):
         return f"[{self.nivel}] {self.tipo}: {self.mensaje[:50]}"
@@ -82,3 +115,26 @@ class DailyBriefing(BaseModel):
 
     def __str__(self):
         return f"Briefing {self.empresa} - {self.fecha}"
+
+class EjecucionAuditor(models.Model):
+    """
+    Tiempos por empresa de la corrida nocturna (auditoría + briefing), para
+    planear la capacidad de los workers. Una fila por empresa y día.
+    """
+    empresa = models.ForeignKey('core.Empresa', on_delete=models.CASCADE, related_name='ejecuciones_auditor')
+    fecha = models.DateField()
+    segundos_auditoria = models.FloatField(null=True, blank=True)
+    alertas_nuevas = models.IntegerField(default=0)
+    segundos_briefing = models.FloatField(null=True, blank=True)
+    intentos_briefing = models.IntegerField(default=0)
+    # Cada etapa limpia su error al terminar bien: la fila refleja la última corrida
+    error_auditoria = models.TextField(blank=True, default="")
+    error_briefing = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-fecha']
+        unique_together = ('empresa', 'fecha')
+
+    def __str__(self):
+        return f"Auditor {self.empresa_id} - {self.fecha}"
@@ -1,13 +1,17 @@
-import os
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-from django.db import models
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from django.apps import apps
+from django.db import models, transaction
 from django.forms.models import model_to_dict
 from django.conf import settings
-from openai import OpenAI
+from django.utils import timezone
 from pgvector.django import CosineDistance
 
-from .models import KnowledgeBase
+from users.services.permission_set_service import PermissionSetService
+from .embeddings import embed_texts
+from .models import KnowledgeBase, IndexQueue
 
 logger = logging.getLogger(__name__)
 
@@ -15,27 +19,29 @@ logger = logging.getLogger(__name__)
 IGNORED_APPS = {'auth', 'contenttypes', 'sessions', 'admin', 'axes', 'auditlog', 'ia', 'core'}
 IGNORED_MODELS = {'historical', 'logentry', 'permission', 'group', 'contenttype', 'session'}
 
-def _get_openai_client() -> Optional[OpenAI]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
-
 def _get_embedding(text: str) -> List[float]:
-    """Genera embedding usando OpenAI."""
+    """Genera embedding con el proveedor configurado (ver ia/embeddings.py)."""
     if not text:
         return []
     try:
-        client = _get_openai_client()
-        if not client:
-             return []
-        # Usamos text-embedding-3-small por costo/beneficio y performance actual
-        response = client.embeddings.create(input=text, model="text-embedding-3-small")
-        return response.data[0].embedding
+        return embed_texts([text])[0]
     except Exception as e:
         logger.error(f"Error generando embedding: {e}")
         return []
 
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def is_indexable(model) -> bool:
+    """Indica si los registros de `model` deben vivir en la KnowledgeBase."""
+    opts = model._meta
+    if opts.app_label in IGNORED_APPS or opts.model_name in IGNORED_MODELS:
+        return False
+    # Si es un modelo "Historical" (django-simple-history o auditlog), ignorar
+    if 'historical' in opts.model_name or 'audit' in opts.model_name:
+        return False
+    return True
+
 def _fields_to_text(instance: models.Model) -> str:
     """Convierte un objeto Django a representación de texto."""
     try:
@@ -61,17 +67,14 @@ def _get_required_permissions(instance: models.Model) -> str:
 
 def index_instance(instance: models.Model):
     """
-    Indexa (crea o actualiza) un objeto individual en la KnowledgeBase.
+    Indexa (crea o actualiza) un objeto individual en la KnowledgeBase de forma síncrona.
+    Para cambios disparados por signals usar enqueue_index (asíncrono y en lote).
     """
     opts = instance._meta
     app_label = opts.app_label
     model_name = opts.model_name
 
-    if app_label in IGNORED_APPS or model_name in IGNORED_MODELS:
-        return
-
-    # Si es un modelo "Historical" (django-simple-history o auditlog), ignorar
-    if 'historical' in model_name or 'audit' in model_name:
+    if not is_indexable(type(instance)):
         return
 
     try:
@@ -91,6 +94,7 @@ def index_instance(instance: models.Model):
             empresa=getattr(instance, 'empresa', None), # Inyectar empresa si existe
             defaults={
                 'content': content,
+                'content_hash': _content_hash(content),
                 'embedding': embedding,
                 'required_permissions': permissions
             }
@@ -100,6 +104,151 @@ def index_instance(instance: models.Model):
     except Exception as e:
         logger.error(f"Error indexando instancia {instance}: {e}")
 
+def enqueue_index(entries: Iterable[Tuple[str, str, str, str]]) -> int:
+    """
+    Registra cambios (app_label, model_name, pk, operacion) en la IndexQueue.
+    Cambios repetidos del mismo registro se colapsan en una sola fila y la
+    última operación gana.
+    """
+    rows = {}
+    for app_label, model_name, pk, operacion in entries:
+        rows[(app_label, model_name, str(pk))] = operacion
+
+    if not rows:
+        return 0
+
+    IndexQueue.objects.bulk_create(
+        [
+            IndexQueue(source_app=app, source_model=model, source_id=pk, operacion=operacion)
+            for (app, model, pk), operacion in rows.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['source_app', 'source_model', 'source_id'],
+        update_fields=['operacion', 'updated_at'],
+    )
+    return len(rows)
+
+def process_index_queue(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Drena un lote de la IndexQueue:
+    - carga las instancias con un in_bulk por modelo
+    - omite las que no cambiaron (mismo sha256 de contenido)
+    - genera embeddings en lotes (ver embeddings.embed_texts)
+    - hace bulk_create / bulk_update sobre KnowledgeBase
+
+    Varias instancias del worker pueden correr en paralelo: las filas se toman
+    con SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    batch_size = batch_size or getattr(settings, 'INDEX_QUEUE_BATCH_SIZE', 500)
+    stats = {'procesados': 0, 'indexados': 0, 'sin_cambios': 0, 'eliminados': 0}
+
+    with transaction.atomic():
+        pending = list(
+            IndexQueue.objects.select_for_update(skip_locked=True).order_by('updated_at')[:batch_size]
+        )
+        if not pending:
+            return stats
+        IndexQueue.objects.filter(pk__in=[p.pk for p in pending]).delete()
+        stats['procesados'] = len(pending)
+
+        upserts = defaultdict(set)
+        deletes = defaultdict(set)
+        for item in pending:
+            target = deletes if item.operacion == 'DELETE' else upserts
+            target[(item.source_app, item.source_model)].add(item.source_id)
+
+        for (app_label, model_name), ids in deletes.items():
+            deleted, _ = KnowledgeBase.objects.filter(
+                source_app=app_label, source_model=model_name, source_id__in=ids
+            ).delete()
+            stats['eliminados'] += deleted
+
+        documents = []
+        for (app_label, model_name), ids in upserts.items():
+            try:
+                model = apps.get_model(app_label, model_name)
+            except LookupError:
+                logger.warning(f"Modelo no encontrado para indexar: {app_label}.{model_name}")
+                continue
+            if not is_indexable(model):
+                continue
+
+            m2m_fields = [f.name for f in model._meta.many_to_many]
+            instances = model._base_manager.prefetch_related(*m2m_fields).in_bulk(list(ids))
+            existing = {
+                kb.source_id: kb
+                for kb in KnowledgeBase.objects.filter(
+                    source_app=app_label, source_model=model_name, source_id__in=ids
+                ).defer('embedding')
+            }
+
+            missing = set(ids) - {str(pk) for pk in instances}
+            if missing:
+                deleted, _ = KnowledgeBase.objects.filter(
+                    source_app=app_label, source_model=model_name, source_id__in=missing
+                ).delete()
+                stats['eliminados'] += deleted
+
+            for pk, instance in instances.items():
+                content = _fields_to_text(instance)
+                content_hash = _content_hash(content)
+                current = existing.get(str(pk))
+                empresa_id = getattr(instance, 'empresa_id', None)
+                if current and current.content_hash == content_hash and current.empresa_id == empresa_id:
+                    stats['sin_cambios'] += 1
+                    continue
+                documents.append({
+                    'current': current,
+                    'source_app': app_label,
+                    'source_model': model_name,
+                    'source_id': str(pk),
+                    'empresa_id': empresa_id,
+                    'content': content,
+                    'content_hash': content_hash,
+                    'required_permissions': _get_required_permissions(instance),
+                })
+
+    if not documents:
+        return stats
+
+    try:
+        vectors = embed_texts([doc['content'] for doc in documents])
+    except Exception as e:
+        logger.error(f"Error generando embeddings en lote: {e}")
+        # Devolver los cambios a la cola para reintentar en la siguiente corrida
+        enqueue_index((d['source_app'], d['source_model'], d['source_id'], 'UPSERT') for d in documents)
+        raise
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for doc, vector in zip(documents, vectors):
+        kb = doc.pop('current') or KnowledgeBase(
+            source_app=doc['source_app'],
+            source_model=doc['source_model'],
+            source_id=doc['source_id'],
+        )
+        kb.empresa_id = doc['empresa_id']
+        kb.content = doc['content']
+        kb.content_hash = doc['content_hash']
+        kb.required_permissions = doc['required_permissions']
+        kb.embedding = vector
+        kb.updated_at = now
+        (to_update if kb.pk else to_create).append(kb)
+
+    with transaction.atomic():
+        if to_create:
+            KnowledgeBase.objects.bulk_create(to_create, batch_size=500)
+        if to_update:
+            KnowledgeBase.objects.bulk_update(
+                to_update,
+                ['empresa', 'content', 'content_hash', 'required_permissions', 'embedding', 'updated_at'],
+                batch_size=500,
+            )
+
+    stats['indexados'] = len(to_create) + len(to_update)
+    logger.info(f"Cola IA procesada: {stats}")
+    return stats
+
 def delete_instance_index(instance: models.Model):
     """Elimina un objeto del índice."""
     opts = instance._meta
@@ -142,10 +291,11 @@ def retrieve_relevant_context(query: str, user, k: int = 5) -> List[str]:
         if count >= k:
             break
             
-        # El campo required_permissions es un string "app.view_model".
-        # Verificamos si el usuario tiene ese permiso.
-        perm = doc.required_permissions
-        has_perm = user.has_perm(perm) if perm else True # Si no hay permiso definido, es público (o error, asumimos público interno)
+        # El campo required_permissions es "app.view_model" (o varios separados por coma).
+        # Basta con uno; sin permiso definido es público interno.
+        # El set de permisos del usuario se compila una vez (PermissionSetService).
+        perms = (doc.required_permissions or '').split(',')
+        has_perm = PermissionSetService.has_any_perm(user, perms)
         
         if has_perm:
             valid_context.append(doc.content)
@@ -1,104 +1,152 @@
 import logging
+import time
+from collections import defaultdict
 from datetime import date, timedelta
+from decimal import Decimal
 from django.utils import timezone
 from core.models import Empresa
-from core.middleware import set_current_company_id
-from ia.models import AuditAlert
+from ia.models import AuditAlert, EjecucionAuditor
 from obras.models import PartidaPresupuestal
-from inventarios.models import Existencia
+from inventarios.models import StockEmpresa
 from compras.models.productos import Insumo
 from contabilidad.models.cfdi import CertificadoDigital
-from django.db.models import Sum
+from django.db.models import DecimalField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 
 logger = logging.getLogger(__name__)
 
 class AuditorService:
     @classmethod
     def run_full_audit(cls):
-        """Ejecuta todas las reglas de auditoría para cada empresa."""
-        empresas = Empresa.objects.filter(activo=True)
+        """
+        Ejecuta todas las reglas de auditoría para cada empresa, en serie.
+        La corrida nocturna usa la tarea ia.auditoria_nocturna, que reparte
+        una empresa por worker.
+        """
         all_alerts = []
-        
-        for empresa in empresas:
-            logger.info(f"Auditor Nocturno: Iniciando escaneo para {empresa.nombre_comercial}")
-            # Importante: Inyectar el contexto de la empresa para que los MultiTenantManagers funcionen si se usan
-            set_current_company_id(empresa.id)
-            
-            alerts = []
-            alerts.extend(cls.check_obras_budget(empresa))
-            alerts.extend(cls.check_stock_levels(empresa))
-            alerts.extend(cls.check_fiscal_certs(empresa))
-            
-            all_alerts.extend(alerts)
-            
-        # Limpiar contexto al finalizar
-        set_current_company_id(None)
+        for empresa in Empresa.objects.filter(activo=True):
+            all_alerts.extend(cls.auditar_empresa(empresa))
         return all_alerts
 
+    @classmethod
+    def auditar_empresa(cls, empresa):
+        """
+        Ejecuta las reglas para una empresa y registra cuánto tardó
+        (EjecucionAuditor). La empresa se pasa explícita a cada regla, sin
+        el thread-local de core.middleware, así varias empresas pueden
+        auditarse en paralelo en el mismo worker.
+        
+        Returns:
+            Lista de AuditAlert creadas
+        """
+        logger.info(f"Auditor Nocturno: Iniciando escaneo para {empresa.nombre_comercial}")
+        inicio = time.perf_counter()
+        
+        alerts = []
+        alerts.extend(cls.check_obras_budget(empresa))
+        alerts.extend(cls.check_stock_levels(empresa))
+        alerts.extend(cls.check_fiscal_certs(empresa))
+        
+        cls.registrar_ejecucion(
+            empresa.id,
+            segundos_auditoria=round(time.perf_counter() - inicio, 3),
+            alertas_nuevas=len(alerts),
+            error_auditoria=""
+        )
+        return alerts
+
+    @staticmethod
+    def registrar_ejecucion(empresa_id, **tiempos):
+        """Actualiza la fila de tiempos del día de la empresa (EjecucionAuditor)."""
+        EjecucionAuditor.objects.update_or_create(
+            empresa_id=empresa_id,
+            fecha=timezone.localdate(),
+            defaults=tiempos
+        )
+
     @classmethod
     def check_obras_budget(cls, empresa):
         """Regla: Detectar partidas con ejecución > 90%."""
-        alerts = []
-        # Buscamos partidas de las obras de esta empresa
+        # El umbral se filtra en la consulta: solo llegan las partidas en riesgo
         partidas = PartidaPresupuestal.objects.filter(
             centro_costo__obra__empresa=empresa,
-            monto_estimado__gt=0
-        )
+            monto_estimado__gt=0,
+            monto_ejecutado__gt=F('monto_estimado') * Decimal('0.9')
+        ).select_related('centro_costo__obra')
         
+        alertas = {}
         for p in partidas:
             porcentaje = (p.monto_ejecutado / p.monto_estimado) * 100
-            if porcentaje > 90:
-                nivel = 'CRITICAL' if porcentaje > 98 else 'WARNING'
-                mensaje = (f"Obra {p.centro_costo.obra.nombre}: Partida {p.categoria} "
-                          f"al {porcentaje:.1f}% de su presupuesto.")
-                
-                alert, created = AuditAlert.objects.get_or_create(
-                    empresa=empresa,
-                    tipo='OBRA',
-                    mensaje=mensaje,
-                    resuelta=False,
-                    defaults={
-                        'nivel': nivel,
-                        'data': {'ejecutado': float(p.monto_ejecutado), 'estimado': float(p.monto_estimado), 'obra_id': p.centro_costo.obra_id}
-                    }
-                )
-                if created: alerts.append(alert)
-        return alerts
+            alertas[f"partida:{p.pk}"] = {
+                'nivel': 'CRITICAL' if porcentaje > 98 else 'WARNING',
+                'mensaje': (f"Obra {p.centro_costo.obra.nombre}: Partida {p.categoria} "
+                            f"al {porcentaje:.1f}% de su presupuesto."),
+                'data': {'ejecutado': float(p.monto_ejecutado), 'estimado': float(p.monto_estimado), 'obra_id': p.centro_costo.obra_id}
+            }
+        return cls._sincronizar_alertas(empresa.id, 'OBRA', alertas, resolver_ausentes=True)
 
     @classmethod
     def check_stock_levels(cls, empresa):
-        """Regla: Stock < stock_minimo global por insumo."""
-        alerts = []
-        # Esta regla es compleja porque el stock minimo es global por insumo pero existencias son por almacen
-        # Auditaremos insumos que tengan stock_minimo definido
-        insumos = Insumo.objects.filter(stock_minimo__gt=0)
+        """
+        Regla: Stock < stock_minimo global por insumo.
+        Una sola consulta contra StockEmpresa (resumen mantenido por el
+        Kárdex); los insumos sin existencias en la empresa cuentan como 0.
+        """
+        stock = StockEmpresa.objects.filter(empresa=empresa, insumo=OuterRef('pk')).values('cantidad')
+        insumos = Insumo.objects.filter(stock_minimo__gt=0).annotate(
+            actual=Coalesce(
+                Subquery(stock), Value(Decimal(0)),
+                output_field=DecimalField(max_digits=14, decimal_places=4)
+            )
+        ).filter(actual__lt=F('stock_minimo')).values_list('id', 'descripcion', 'actual', 'stock_minimo')
         
-        for insumo in insumos:
-            # Sumar existencia en todos los almacenes de la empresa
-            total_stock = Existencia.objects.filter(
-                insumo=insumo,
-                almacen__empresa=empresa
-            ).aggregate(total=Sum('cantidad'))['total'] or 0
-            
-            if total_stock < insumo.stock_minimo:
-                mensaje = f"Stock Crítico: {insumo.descripcion} (Tiene {total_stock}, Mínimo {insumo.stock_minimo})"
-                alert, created = AuditAlert.objects.get_or_create(
-                    empresa=empresa,
-                    tipo='STOCK',
-                    mensaje=mensaje,
-                    resuelta=False,
-                    defaults={
-                        'nivel': 'CRITICAL',
-                        'data': {'actual': float(total_stock), 'minimo': float(insumo.stock_minimo), 'insumo_id': insumo.id}
-                    }
+        alertas = {
+            f"insumo:{insumo_id}": cls._alerta_stock(insumo_id, descripcion, actual, minimo)
+            for insumo_id, descripcion, actual, minimo in insumos
+        }
+        return cls._sincronizar_alertas(empresa.id, 'STOCK', alertas, resolver_ausentes=True)
+
+    @classmethod
+    def registrar_cruces_stock(cls, cruces):
+        """
+        Alertas de stock en tiempo real (señal inventarios.stock_minimo_cruzado):
+        abre la alerta cuando un movimiento deja el insumo bajo su mínimo y la
+        resuelve cuando se recupera.
+        """
+        descripciones = dict(
+            Insumo.objects.filter(pk__in={c['insumo_id'] for c in cruces}).values_list('id', 'descripcion')
+        )
+        por_empresa = defaultdict(lambda: ({}, []))
+        for cruce in cruces:
+            alertas, recuperados = por_empresa[cruce['empresa_id']]
+            clave = f"insumo:{cruce['insumo_id']}"
+            if cruce['bajo']:
+                alertas[clave] = cls._alerta_stock(
+                    cruce['insumo_id'], descripciones.get(cruce['insumo_id'], ''), cruce['cantidad'], cruce['minimo']
                 )
-                if created: alerts.append(alert)
-        return alerts
+            else:
+                recuperados.append(clave)
+        
+        creadas = []
+        for empresa_id, (alertas, recuperados) in por_empresa.items():
+            creadas.extend(cls._sincronizar_alertas(empresa_id, 'STOCK', alertas))
+            if recuperados:
+                AuditAlert.objects.filter(
+                    empresa_id=empresa_id, tipo='STOCK', resuelta=False, clave__in=recuperados
+                ).update(resuelta=True, fecha_resolucion=timezone.now())
+        return creadas
+
+    @staticmethod
+    def _alerta_stock(insumo_id, descripcion, actual, minimo):
+        return {
+            'nivel': 'CRITICAL',
+            'mensaje': f"Stock Crítico: {descripcion} (Tiene {actual}, Mínimo {minimo})",
+            'data': {'actual': float(actual), 'minimo': float(minimo), 'insumo_id': insumo_id}
+        }
 
     @classmethod
     def check_fiscal_certs(cls, empresa):
         """Regla: Certificados próximos a vencer (< 30 días)."""
-        alerts = []
         limite = timezone.now() + timedelta(days=30)
         
         # Certificados vinculados a la configuracion fiscal de la empresa
@@ -108,19 +156,55 @@ class AuditorService:
             activo=True
         )
         
+        alertas = {}
         for cert in certs:
             dias_restantes = (cert.fecha_fin_validez - timezone.now()).days
-            mensaje = f"Certificado {cert.tipo} ({cert.rfc}) vence en {max(0, dias_restantes)} días."
+            alertas[f"certificado:{cert.pk}"] = {
+                'nivel': 'CRITICAL' if dias_restantes < 7 else 'WARNING',
+                'mensaje': f"Certificado {cert.tipo} ({cert.rfc}) vence en {max(0, dias_restantes)} días.",
+                'data': {'vence': cert.fecha_fin_validez.isoformat(), 'rfc': cert.rfc}
+            }
+        return cls._sincronizar_alertas(empresa.id, 'FISCAL', alertas, resolver_ausentes=True)
+
+    @staticmethod
+    def _sincronizar_alertas(empresa_id, tipo, alertas, resolver_ausentes=False):
+        """
+        Upsert en lote de las alertas abiertas de un tipo.
+        
+        Args:
+            alertas: {clave: {'nivel', 'mensaje', 'data'}}; una alerta abierta por clave
+            resolver_ausentes: Marca resueltas las alertas abiertas del tipo que
+                ya no aparecen (la regla se evaluó completa)
+        
+        Returns:
+            Lista de AuditAlert creadas
+        """
+        abiertas = AuditAlert.objects.filter(empresa_id=empresa_id, tipo=tipo, resuelta=False)
+        ahora = timezone.now()
+        
+        creadas = []
+        if alertas:
+            existentes = {a.clave: a for a in abiertas.filter(clave__in=list(alertas))}
+            cambiadas = []
+            for clave, alerta in existentes.items():
+                datos = alertas[clave]
+                if (alerta.nivel, alerta.mensaje, alerta.data) != (datos['nivel'], datos['mensaje'], datos['data']):
+                    alerta.nivel, alerta.mensaje, alerta.data = datos['nivel'], datos['mensaje'], datos['data']
+                    alerta.updated_at = ahora
+                    cambiadas.append(alerta)
+            if cambiadas:
+                AuditAlert.objects.bulk_update(cambiadas, ['nivel', 'mensaje', 'data', 'updated_at'])
             
-            alert, created = AuditAlert.objects.get_or_create(
-                empresa=empresa,
-                tipo='FISCAL',
-                mensaje=mensaje,
-                resuelta=False,
-                defaults={
-                    'nivel': 'CRITICAL' if dias_restantes < 7 else 'WARNING',
-                    'data': {'vence': cert.fecha_fin_validez.isoformat(), 'rfc': cert.rfc}
-                }
-            )
-            if created: alerts.append(alert)
-        return alerts
+            nuevas = [clave for clave in alertas if clave not in existentes]
+            if nuevas:
+                # Si un movimiento del Kárdex abrió la misma alerta en paralelo,
+                # la restricción ia_alerta_abierta_unica descarta el duplicado
+                AuditAlert.objects.bulk_create(
+                    [AuditAlert(empresa_id=empresa_id, tipo=tipo, clave=clave, **alertas[clave]) for clave in nuevas],
+                    ignore_conflicts=True
+                )
+                creadas = list(abiertas.filter(clave__in=nuevas))
+        
+        if resolver_ausentes:
+            abiertas.exclude(clave__in=list(alertas)).update(resuelta=True, fecha_resolucion=ahora)
+        return creadas
@@ -10,6 +10,18 @@ class BriefingService:
     @classmethod
     def generate_daily_briefing(cls, empresa):
         """Genera un resumen narrativo usando IA basado en las alertas activas."""
+        try:
+            return cls.generar(empresa)
+        except Exception as e:
+            logger.error(f"Error generando AI Briefing para {empresa}: {e}")
+            return None
+
+    @classmethod
+    def generar(cls, empresa):
+        """
+        Igual que generate_daily_briefing, pero los errores del proveedor de IA
+        se propagan para que la tarea ia.generar_briefing pueda reintentar.
+        """
         # 1. Obtener alertas no resueltas de las últimas 24h o críticas
         alertas = AuditAlert.objects.filter(empresa=empresa, resuelta=False)[:10]
         
@@ -35,19 +47,15 @@ class BriefingService:
         - Idioma: Español.
         """
         
-        try:
-            ai = AIService()
-            # AIService espera una lista de mensajes
-            messages = [{"role": "user", "content": prompt}]
-            narrativa = ai.generate_response(messages)
-            
-            # 3. Guardar en DB
-            briefing, created = DailyBriefing.objects.update_or_create(
-                empresa=empresa,
-                fecha=timezone.now().date(),
-                defaults={'contenido': narrativa}
-            )
-            return briefing
-        except Exception as e:
-            logger.error(f"Error generando AI Briefing para {empresa}: {e}")
-            return None
+        ai = AIService()
+        # AIService espera una lista de mensajes
+        messages = [{"role": "user", "content": prompt}]
+        narrativa = ai.generate_response(messages)
+        
+        # 3. Guardar en DB
+        briefing, created = DailyBriefing.objects.update_or_create(
+            empresa=empresa,
+            fecha=timezone.now().date(),
+            defaults={'contenido': narrativa}
+        )
+        return briefing
@@ -1,21 +1,81 @@
+import logging
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db import models
-from django.apps import apps
-from .rag import index_instance, delete_instance_index
+from inventarios.signals import stock_minimo_cruzado
+from .rag import enqueue_index, is_indexable
+
+logger = logging.getLogger(__name__)
 
 # Lista de apps que queremos indexar automáticamente
 WATCHED_APPS = {'contabilidad', 'rrhh', 'juridico', 'sistemas'}
 
+# Segundos que se agrupan los cambios antes de despertar al worker
+DRAIN_DEBOUNCE_SECONDS = 5
+
+# Cambios pendientes de la transacción actual: {(app, model, pk): operacion}
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, 'changes'):
+        _local.changes = {}
+    return _local.changes
+
+
+def _flush_pending():
+    changes = _pending()
+    if not changes:
+        return
+    batch = [(app, model, pk, op) for (app, model, pk), op in changes.items()]
+    changes.clear()
+    try:
+        enqueue_index(batch)
+        _schedule_drain()
+    except Exception as e:
+        # El índice nunca debe romper la operación de negocio
+        logger.error(f"Error encolando cambios para índice IA: {e}")
+
+
+def _schedule_drain():
+    """Despierta al worker una sola vez por ventana de debounce."""
+    if not cache.add('ia:index_queue:drain_scheduled', 1, DRAIN_DEBOUNCE_SECONDS):
+        return
+    from .tasks import drain_index_queue
+    try:
+        drain_index_queue.apply_async(countdown=DRAIN_DEBOUNCE_SECONDS)
+    except Exception as e:
+        # Sin broker los cambios quedan en la cola para la corrida periódica
+        logger.warning(f"No se pudo programar el drenado de la cola IA: {e}")
+
+
+def _register(sender, instance, operacion):
+    if sender._meta.app_label not in WATCHED_APPS or not is_indexable(sender):
+        return
+    opts = sender._meta
+    _pending()[(opts.app_label, opts.model_name, str(instance.pk))] = operacion
+    transaction.on_commit(_flush_pending)
+
+
 @receiver(post_save)
 def handle_post_save(sender, instance, **kwargs):
-    """Signal para indexar cambios en modelos monitoreados."""
-    if sender._meta.app_label in WATCHED_APPS:
-        # Evitar indexar modelos de auditoría o históricos if any
-        index_instance(instance)
+    """Signal para encolar la indexación de modelos monitoreados."""
+    _register(sender, instance, 'UPSERT')
 
 @receiver(post_delete)
 def handle_post_delete(sender, instance, **kwargs):
-    """Signal para eliminar del índice lo borrado."""
-    if sender._meta.app_label in WATCHED_APPS:
-        delete_instance_index(instance)
+    """Signal para encolar la eliminación del índice de lo borrado."""
+    _register(sender, instance, 'DELETE')
+
+@receiver(stock_minimo_cruzado)
+def handle_stock_minimo_cruzado(sender, cruces, **kwargs):
+    """Alertas de stock en tiempo real: el Kárdex avisa al cruzar stock_minimo."""
+    from .services.auditor_service import AuditorService
+    try:
+        AuditorService.registrar_cruces_stock(cruces)
+    except Exception as e:
+        # La alerta nunca debe romper el movimiento (ya confirmado); el auditor nocturno la repone
+        logger.error(f"Error registrando alertas de stock mínimo: {e}")
@@ -0,0 +1,184 @@
+from celery import chord, shared_task
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Briefings: llamadas simultáneas al proveedor de IA, reintentos, segundos de espera
+# y vida máxima de un turno tomado
+BRIEFING_CONCURRENCIA = 3
+BRIEFING_REINTENTOS = 3
+BRIEFING_ESPERA = 15
+BRIEFING_TIMEOUT = 300
+
+
+@shared_task(name='ia.drain_index_queue', bind=True, max_retries=3, default_retry_delay=30)
+def drain_index_queue(self, batch_size=None, max_batches=20):
+    """
+    Drena la IndexQueue en lotes y genera embeddings por bloques.
+    Si quedan pendientes tras `max_batches`, se re-programa a sí misma.
+    """
+    from .rag import process_index_queue
+
+    totales = {}
+    try:
+        for _ in range(max_batches):
+            stats = process_index_queue(batch_size=batch_size)
+            for k, v in stats.items():
+                totales[k] = totales.get(k, 0) + v
+            if not stats['procesados']:
+                break
+        else:
+            drain_index_queue.apply_async(kwargs={'batch_size': batch_size, 'max_batches': max_batches})
+    except Exception as e:
+        logger.error(f"Error drenando cola de indexación IA: {e}")
+        raise self.retry(exc=e)
+
+    return totales
+
+
+@shared_task(name='ia.auditoria_nocturna')
+def auditoria_nocturna():
+    """
+    Auditor Nocturno: una tarea de auditoría por empresa en paralelo (chord);
+    al terminar todas, despachar_briefings genera los briefings.
+
+    El límite de briefings simultáneos vive en el cache: sin CACHE_REDIS_URL
+    el cache es local a cada proceso y el límite aplica por worker, no global.
+    """
+    from core.models import Empresa
+
+    if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+        logger.warning(
+            "Auditor Nocturno: cache en memoria local; IA_BRIEFING_CONCURRENCIA se aplicará "
+            "por proceso. Configure CACHE_REDIS_URL para un límite global."
+        )
+    empresa_ids = list(Empresa.objects.filter(activo=True).order_by('id').values_list('id', flat=True))
+    if empresa_ids:
+        chord(auditar_empresa.s(empresa_id) for empresa_id in empresa_ids)(despachar_briefings.s())
+    return len(empresa_ids)
+
+
+@shared_task(name='ia.auditar_empresa', bind=True, max_retries=2, default_retry_delay=60)
+def auditar_empresa(self, empresa_id):
+    """
+    Reglas del auditor para una empresa. La empresa viaja en los argumentos
+    (nada de thread-locals). Si falla tras los reintentos devuelve el error
+    en lugar de lanzarlo, para no cancelar el chord de las demás empresas.
+    """
+    from core.models import Empresa
+    from notifications.services import WebhookService
+    from .services.auditor_service import AuditorService
+
+    try:
+        empresa = Empresa.objects.get(pk=empresa_id)
+        alertas = AuditorService.auditar_empresa(empresa)
+    except Exception as e:
+        logger.error(f"Auditor Nocturno: error auditando la empresa {empresa_id}: {e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        AuditorService.registrar_ejecucion(empresa_id, error_auditoria=str(e))
+        return {'empresa_id': empresa_id, 'alertas': 0, 'error': str(e)}
+
+    # Notificar alertas críticas de inmediato vía Webhook
+    for alerta in alertas:
+        if alerta.nivel == 'CRITICAL':
+            WebhookService.notify_critical_alert(alerta)
+    return {'empresa_id': empresa_id, 'alertas': len(alertas)}
+
+
+@shared_task(name='ia.despachar_briefings')
+def despachar_briefings(resultados):
+    """Callback del chord: resume la corrida y encola un briefing por empresa."""
+    from .models import EjecucionAuditor
+
+    fallidas = [r['empresa_id'] for r in resultados if r.get('error')]
+    lentas = (
+        EjecucionAuditor.objects.filter(fecha=timezone.localdate(), empresa_id__in=[r['empresa_id'] for r in resultados])
+        .exclude(segundos_auditoria=None)
+        .order_by('-segundos_auditoria')
+        .values_list('empresa_id', 'segundos_auditoria')[:5]
+    )
+    logger.info(
+        f"Auditor Nocturno: {len(resultados)} empresas, {sum(r['alertas'] for r in resultados)} alertas nuevas, "
+        f"fallidas {fallidas}; más lentas (empresa, s): {list(lentas)}"
+    )
+    for resultado in resultados:
+        generar_briefing.delay(resultado['empresa_id'])
+    return len(resultados)
+
+
+@shared_task(name='ia.generar_briefing')
+def generar_briefing(empresa_id, intento=1):
+    """
+    Briefing de IA de una empresa. A lo más IA_BRIEFING_CONCURRENCIA llamadas
+    al proveedor a la vez (turnos en cache); sin turno libre la tarea se
+    re-programa. Los errores del proveedor se reintentan con espera
+    exponencial hasta IA_BRIEFING_REINTENTOS veces.
+    """
+    from core.models import Empresa
+    from notifications.services import WebhookService
+    from .services.auditor_service import AuditorService
+    from .services.briefing_service import BriefingService
+
+    espera = getattr(settings, 'IA_BRIEFING_ESPERA', BRIEFING_ESPERA)
+    turno = _tomar_turno_briefing()
+    if turno is None:
+        generar_briefing.apply_async(args=[empresa_id], kwargs={'intento': intento}, countdown=espera)
+        return None
+
+    inicio = time.perf_counter()
+    try:
+        briefing = BriefingService.generar(Empresa.objects.get(pk=empresa_id))
+    except Exception as e:
+        reintentos = getattr(settings, 'IA_BRIEFING_REINTENTOS', BRIEFING_REINTENTOS)
+        logger.warning(f"Briefing de la empresa {empresa_id}, intento {intento}: {e}")
+        if intento <= reintentos:
+            generar_briefing.apply_async(
+                args=[empresa_id], kwargs={'intento': intento + 1},
+                countdown=espera * 2 ** (intento - 1)
+            )
+        else:
+            AuditorService.registrar_ejecucion(empresa_id, intentos_briefing=intento, error_briefing=str(e))
+        return None
+    finally:
+        _liberar_turno_briefing(*turno)
+
+    AuditorService.registrar_ejecucion(
+        empresa_id,
+        segundos_briefing=round(time.perf_counter() - inicio, 3),
+        intentos_briefing=intento,
+        error_briefing=""
+    )
+    WebhookService.notify_daily_briefing(briefing)
+    return briefing.pk
+
+
+def _tomar_turno_briefing():
+    """
+    Semáforo en cache: devuelve (llave, token) del turno tomado o None si
+    están todos ocupados. El token identifica al dueño del turno.
+    """
+    concurrencia = getattr(settings, 'IA_BRIEFING_CONCURRENCIA', BRIEFING_CONCURRENCIA)
+    timeout = getattr(settings, 'IA_BRIEFING_TIMEOUT', BRIEFING_TIMEOUT)
+    token = uuid.uuid4().hex
+    for i in range(concurrencia):
+        llave = f"ia:briefing:turno:{i}"
+        # El timeout libera el turno si el worker muere a media llamada
+        if cache.add(llave, token, timeout):
+            return llave, token
+    return None
+
+
+def _liberar_turno_briefing(llave, token):
+    """
+    Libera el turno solo si sigue siendo nuestro: si la llamada tardó más que
+    IA_BRIEFING_TIMEOUT, el turno ya expiró y puede tenerlo otra tarea.
+    """
+    if cache.get(llave) == token:
+        cache.delete(llave)
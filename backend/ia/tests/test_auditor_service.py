@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from compras.models.productos import Insumo
+from core.models import Empresa
+from ia.models import AuditAlert
+from ia.services.auditor_service import AuditorService
+from inventarios.models import Almacen
+from inventarios.services.kardex_service import KardexService
+from obras.models import CentroCosto, Obra, PartidaPresupuestal
+
+
+def _empresa(n):
+    return Empresa.objects.create(
+        codigo=f"AUD{n:03d}", razon_social=f"Auditor {n} S.A. de C.V.", nombre_comercial=f"Auditor {n}",
+        rfc=f"AUD2101{n:02d}AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+        numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+    )
+
+
+@pytest.mark.django_db
+class TestAuditorStock:
+    def setup_method(self):
+        self.empresa = _empresa(1)
+        self.almacen = Almacen.objects.create(nombre="Bodega Auditor", codigo="AUD-01", empresa=self.empresa)
+        self.insumos = [
+            Insumo.objects.create(codigo=f"AUD-{i}", descripcion=f"Material {i}", tipo="PRODUCTO", stock_minimo=10)
+            for i in range(30)
+        ]
+        KardexService.registrar_movimientos_bulk([
+            {'insumo_id': insumo.id, 'almacen_id': self.almacen.id, 'cantidad': 5 if i % 2 else 50,
+             'tipo_movimiento': 'ENTRADA', 'costo_unitario': 1}
+            for i, insumo in enumerate(self.insumos)
+        ])
+
+    def test_una_consulta_de_diferencias_y_upsert_idempotente(self):
+        with CaptureQueriesContext(connection) as consultas:
+            creadas = AuditorService.check_stock_levels(self.empresa)
+
+        assert len(creadas) == 15
+        assert {a.data['insumo_id'] for a in creadas} == {i.id for i in self.insumos[1::2]}
+        assert sum('inventarios_stockempresa' in q['sql'] for q in consultas.captured_queries) == 1
+        assert len(consultas.captured_queries) <= 5
+
+        # Segunda corrida: ninguna alerta nueva ni duplicada
+        assert AuditorService.check_stock_levels(self.empresa) == []
+        assert AuditAlert.objects.filter(empresa=self.empresa, tipo='STOCK', resuelta=False).count() == 15
+
+    def test_recuperar_stock_resuelve_la_alerta(self):
+        AuditorService.check_stock_levels(self.empresa)
+        KardexService.registrar_movimiento(self.insumos[1].id, self.almacen.id, 20, 'ENTRADA', 1)
+
+        AuditorService.check_stock_levels(self.empresa)
+
+        alerta = AuditAlert.objects.get(empresa=self.empresa, clave=f"insumo:{self.insumos[1].id}")
+        assert alerta.resuelta and alerta.fecha_resolucion is not None
+
+    def test_alerta_en_tiempo_real_al_cruzar_el_minimo(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            KardexService.registrar_salidas(self.almacen.id, {self.insumos[0].id: 45})  # 50 -> 5
+
+        alerta = AuditAlert.objects.get(empresa=self.empresa, tipo='STOCK', resuelta=False)
+        assert alerta.clave == f"insumo:{self.insumos[0].id}"
+        assert alerta.data['actual'] == 5.0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            KardexService.registrar_movimiento(self.insumos[0].id, self.almacen.id, 10, 'ENTRADA', 1)  # 15
+
+        assert not AuditAlert.objects.filter(empresa=self.empresa, tipo='STOCK', resuelta=False).exists()
+
+
+@pytest.mark.django_db
+def test_presupuesto_de_obras_actualiza_sin_duplicar():
+    empresa = _empresa(2)
+    obra = Obra.objects.create(nombre="Torre Auditor", codigo="AUD-OB", fecha_inicio="2026-01-01", empresa=empresa)
+    cc = CentroCosto.objects.create(obra=obra, nombre="Estructura", codigo="EST")
+    partida = PartidaPresupuestal.objects.create(
+        centro_costo=cc, categoria='MATERIALES', monto_estimado=1000, monto_ejecutado=950
+    )
+
+    creadas = AuditorService.check_obras_budget(empresa)
+    assert [a.nivel for a in creadas] == ['WARNING']
+
+    partida.monto_ejecutado = Decimal('990')
+    partida.save()
+    assert AuditorService.check_obras_budget(empresa) == []
+
+    alerta = AuditAlert.objects.get(empresa=empresa, tipo='OBRA', resuelta=False)
+    assert alerta.nivel == 'CRITICAL'
+    assert "99.0%" in alerta.mensaje
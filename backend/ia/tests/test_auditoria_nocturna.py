@@ -0,0 +1,131 @@
+import pytest
+from django.core.cache import cache
+
+from core.middleware import get_current_company_id
+from core.models import Empresa
+from ia import tasks
+from ia.models import DailyBriefing, EjecucionAuditor
+from ia.services.auditor_service import AuditorService
+from ia.services.briefing_service import BriefingService
+
+
+def _empresa(n, activo=True):
+    return Empresa.objects.create(
+        codigo=f"NOC{n:03d}", razon_social=f"Nocturna {n} S.A. de C.V.", nombre_comercial=f"Nocturna {n}",
+        rfc=f"NOC2101{n:02d}AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+        numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo", activo=activo
+    )
+
+
+@pytest.fixture
+def reprogramadas(monkeypatch):
+    """Captura las re-programaciones de ia.generar_briefing (sin broker en pruebas)."""
+    llamadas = []
+    monkeypatch.setattr(tasks.generar_briefing, 'apply_async', lambda args, kwargs, countdown: llamadas.append((args, kwargs, countdown)))
+    return llamadas
+
+
+@pytest.fixture
+def sin_turnos_tomados():
+    for i in range(10):
+        cache.delete(f"ia:briefing:turno:{i}")
+    yield
+    for i in range(10):
+        cache.delete(f"ia:briefing:turno:{i}")
+
+
+@pytest.mark.django_db
+class TestAuditoriaNocturna:
+    def test_chord_con_una_tarea_por_empresa_activa(self, monkeypatch):
+        empresas = [_empresa(1), _empresa(2)]
+        _empresa(3, activo=False)
+        capturado = {}
+
+        def chord_falso(header):
+            capturado['header'] = list(header)
+            return lambda callback: capturado.setdefault('callback', callback)
+
+        monkeypatch.setattr(tasks, 'chord', chord_falso)
+
+        assert tasks.auditoria_nocturna() == 2
+        assert [firma.args for firma in capturado['header']] == [(e.id,) for e in empresas]
+        assert capturado['callback'].task == 'ia.despachar_briefings'
+
+    def test_auditar_empresa_sin_thread_locals_y_con_tiempos(self):
+        empresa = _empresa(1)
+
+        resultado = tasks.auditar_empresa.apply(args=[empresa.id]).get()
+
+        assert resultado == {'empresa_id': empresa.id, 'alertas': 0}
+        assert get_current_company_id() is None
+        ejecucion = EjecucionAuditor.objects.get(empresa=empresa)
+        assert ejecucion.segundos_auditoria is not None and ejecucion.error_auditoria == ""
+
+    def test_error_de_una_empresa_no_cancela_el_chord(self, monkeypatch):
+        empresa = _empresa(1)
+
+        def falla(cls, empresa):
+            raise RuntimeError("sin conexión")
+
+        monkeypatch.setattr(AuditorService, 'auditar_empresa', classmethod(falla))
+        monkeypatch.setattr(tasks.auditar_empresa, 'max_retries', 0)  # ya agotó los reintentos
+
+        resultado = tasks.auditar_empresa.apply(args=[empresa.id]).get()
+
+        assert resultado['error'] == "sin conexión"
+        assert EjecucionAuditor.objects.get(empresa=empresa).error_auditoria == "sin conexión"
+
+    def test_briefing_reintenta_errores_del_proveedor(self, monkeypatch, reprogramadas, sin_turnos_tomados):
+        empresa = _empresa(1)
+
+        def falla(cls, empresa):
+            raise RuntimeError("All AI providers failed")
+
+        monkeypatch.setattr(BriefingService, 'generar', classmethod(falla))
+        tasks.generar_briefing(empresa.id)
+
+        assert reprogramadas == [([empresa.id], {'intento': 2}, 15)]
+        # El turno se libera aunque falle el proveedor
+        assert cache.get("ia:briefing:turno:0") is None
+
+    def test_briefing_registra_tiempo_e_intentos(self, monkeypatch, reprogramadas, sin_turnos_tomados):
+        empresa = _empresa(1)
+        # Error de un intento anterior del mismo día: el éxito lo limpia
+        AuditorService.registrar_ejecucion(empresa.id, error_briefing="All AI providers failed")
+        monkeypatch.setattr(
+            BriefingService, 'generar',
+            classmethod(lambda cls, e: DailyBriefing.objects.create(empresa=e, contenido="Todo en orden"))
+        )
+        monkeypatch.setattr('notifications.services.WebhookService.notify_daily_briefing', lambda briefing: None)
+
+        tasks.generar_briefing(empresa.id, intento=2)
+
+        ejecucion = EjecucionAuditor.objects.get(empresa=empresa)
+        assert ejecucion.intentos_briefing == 2
+        assert ejecucion.segundos_briefing is not None
+        assert ejecucion.error_briefing == ""
+        assert reprogramadas == []
+
+    def test_turno_expirado_no_libera_el_de_otra_tarea(self, settings, sin_turnos_tomados):
+        settings.IA_BRIEFING_CONCURRENCIA = 1
+        llave, token = tasks._tomar_turno_briefing()
+        # El turno expiró a media llamada y otra tarea lo tomó
+        cache.delete(llave)
+        otra = tasks._tomar_turno_briefing()
+
+        tasks._liberar_turno_briefing(llave, token)
+
+        assert cache.get(llave) == otra[1]
+        assert tasks._tomar_turno_briefing() is None
+
+    def test_briefing_espera_turno_libre(self, settings, monkeypatch, reprogramadas, sin_turnos_tomados):
+        settings.IA_BRIEFING_CONCURRENCIA = 1
+        empresa = _empresa(1)
+        llamadas = []
+        monkeypatch.setattr(BriefingService, 'generar', classmethod(lambda cls, e: llamadas.append(e)))
+        cache.add("ia:briefing:turno:0", 1, 60)
+
+        tasks.generar_briefing(empresa.id)
+
+        assert llamadas == []
+        assert reprogramadas == [([empresa.id], {'intento': 1}, settings.IA_BRIEFING_ESPERA)]
@@ -0,0 +1,82 @@
+import pytest
+from contabilidad.models import CuentaContable
+from ia import embeddings
+from ia.models import IndexQueue, KnowledgeBase
+from ia.rag import enqueue_index, process_index_queue
+
+
+@pytest.fixture
+def fake_provider(settings, monkeypatch):
+    settings.EMBEDDING_PROVIDER = 'fake'
+    settings.EMBEDDING_BATCH_SIZE = 2
+    monkeypatch.setattr(embeddings, '_provider_cache', {})
+    # Sin broker en pruebas: el drenado se invoca manualmente
+    monkeypatch.setattr('ia.signals._schedule_drain', lambda: None)
+    return embeddings.get_embedding_provider()
+
+
+def _crear_cuentas(n):
+    return [
+        CuentaContable.objects.create(
+            codigo=f'100-{i:03d}', nombre=f'Cuenta {i}', tipo='ACTIVO', naturaleza='DEUDORA'
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.django_db
+class TestIndexQueue:
+    def test_signal_solo_encola_y_colapsa_duplicados(self, fake_provider, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            cuentas = _crear_cuentas(3)
+            cuentas[0].nombre = 'Caja General'
+            cuentas[0].save()
+            cuentas[0].save()
+
+        assert IndexQueue.objects.count() == 3
+        assert KnowledgeBase.objects.count() == 0
+        assert fake_provider.calls == 0
+
+    def test_drenado_en_lotes_y_omite_sin_cambios(self, fake_provider, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            cuentas = _crear_cuentas(3)
+
+        stats = process_index_queue()
+
+        assert stats['indexados'] == 3
+        assert fake_provider.calls == 2  # 3 documentos en lotes de 2
+        assert KnowledgeBase.objects.count() == 3
+        assert IndexQueue.objects.count() == 0
+
+        # Re-encolar sin cambios en el contenido no genera embeddings
+        enqueue_index(('contabilidad', 'cuentacontable', c.pk, 'UPSERT') for c in cuentas)
+        stats = process_index_queue()
+
+        assert stats['sin_cambios'] == 3
+        assert fake_provider.calls == 2
+
+    def test_cambio_de_contenido_actualiza_documento(self, fake_provider, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            cuenta = _crear_cuentas(1)[0]
+        process_index_queue()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            cuenta.nombre = 'Bancos'
+            cuenta.save()
+        stats = process_index_queue()
+
+        assert stats['indexados'] == 1
+        kb = KnowledgeBase.objects.get(source_model='cuentacontable', source_id=str(cuenta.pk))
+        assert 'Bancos' in kb.content
+
+    def test_borrado_elimina_del_indice(self, fake_provider, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            cuenta = _crear_cuentas(1)[0]
+        process_index_queue()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            cuenta.hard_delete()
+        stats = process_index_queue()
+
+        assert stats['eliminados'] == 1
+        assert KnowledgeBase.objects.count() == 0
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+from django.db.models import Sum
+
+import django.db.models.deletion
+
+
+def calcular_stock(apps, schema_editor):
+    """Mismo criterio que StockEmpresaService.recalcular."""
+    Existencia = apps.get_model('inventarios', 'Existencia')
+    StockEmpresa = apps.get_model('inventarios', 'StockEmpresa')
+
+    filas = (
+        Existencia.objects.filter(activo=True, almacen__empresa__isnull=False)
+        .values('almacen__empresa_id', 'insumo_id')
+        .annotate(total=Sum('cantidad'))
+    )
+    StockEmpresa.objects.bulk_create(
+        [
+            StockEmpresa(empresa_id=fila['almacen__empresa_id'], insumo_id=fila['insumo_id'], cantidad=fila['total'])
+            for fila in filas.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0009_alter_detallerecepcion_almacen_destino_and_more'),
+        ('core', '0003_exportjob'),
+        ('inventarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockEmpresa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_insumos', to='core.empresa')),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_empresas', to='compras.insumo')),
+            ],
+            options={
+                'verbose_name': 'Stock por Empresa',
+                'verbose_name_plural': 'Stock por Empresa',
+                'unique_together': {('empresa', 'insumo')},
+            },
+        ),
+        migrations.RunPython(calcular_stock, migrations.RunPython.noop),
+    ]
@@ -25,6 +25,26 @@ class Existencia(SoftDeleteModel):
     def __str__(self):
         return f"{self.insumo} en {self.almacen}: {self.cantidad}"
 
+class StockEmpresa(models.Model):
+    """
+    Existencia total de un insumo en los almacenes de una empresa, mantenida
+    por KardexService en cada movimiento (StockEmpresaService). El auditor
+    nocturno compara esta tabla contra Insumo.stock_minimo sin agregar
+    Existencia.
+    """
+    empresa = models.ForeignKey('core.Empresa', on_delete=models.CASCADE, related_name='stock_insumos')
+    insumo = models.ForeignKey('compras.Insumo', on_delete=models.CASCADE, related_name='stock_empresas')
+    cantidad = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('empresa', 'insumo')
+        verbose_name = "Stock por Empresa"
+        verbose_name_plural = "Stock por Empresa"
+
+    def __str__(self):
+        return f"{self.insumo_id} en empresa {self.empresa_id}: {self.cantidad}"
+
 class MovimientoInventario(SoftDeleteModel):
     TIPO_MOVIMIENTO_CHOICES = [
         ('ENTRADA', 'Entrada'),
@@ -1,9 +1,15 @@
+from collections import defaultdict
 from decimal import Decimal
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Sum, Case, When, F, DecimalField
+from django.utils import timezone
+from auditoria.services.audit_service import AuditService
 from inventarios.models import MovimientoInventario, Existencia, Almacen
+from inventarios.services.stock_service import StockEmpresaService
 from compras.models import Insumo
 
+CUATRO_DECIMALES = Decimal('0.0001')
+
 class KardexService:
     """
     Servicio encargado de orquestar los movimientos de inventario y 
@@ -48,6 +54,7 @@ class KardexService:
 
             existencia.cantidad += cantidad_dec
             existencia.save()
+            StockEmpresaService.aplicar({(almacen.pk, insumo.pk): cantidad_dec})
 
             # 3. Lógica de Costeo Promedio
             # El costo promedio se actualiza típicamente solo en ENTRADAS (Compras, devoluciones, etc.)
@@ -61,6 +68,249 @@ class KardexService:
 
             return movimiento
 
+    @staticmethod
+    def registrar_movimientos_bulk(items, referencia="", usuario=None):
+        """
+        Registra varios movimientos en el Kárdex en pocas consultas, con el
+        mismo efecto que llamar registrar_movimiento por cada uno en orden
+        (recepciones de compra de cientos de renglones).
+        
+        - Los insumos se bloquean en una sola consulta en orden de id, y sus
+          existencias en orden (insumo_id, almacen_id), igual que
+          registrar_salidas, para no provocar deadlocks entre procesos.
+        - Las existencias que falten se crean con un bulk_create y todas se
+          ajustan con un solo UPDATE ... CASE.
+        - El costo promedio ponderado se calcula en memoria recorriendo los
+          movimientos de cada insumo y se guarda una vez por insumo
+          (bulk_update), en lugar de re-sumar el stock por cada entrada.
+        
+        Args:
+            items: Lista de dicts {'insumo_id', 'almacen_id', 'cantidad',
+                   'tipo_movimiento', 'costo_unitario' (opcional), 'referencia' (opcional)}
+            referencia: Referencia de los movimientos que no traen la suya
+            usuario: Usuario que registra
+        
+        Returns:
+            Lista de MovimientoInventario creados, en el orden de `items`
+        """
+        movimientos = [
+            MovimientoInventario(
+                insumo_id=item['insumo_id'],
+                almacen_id=item['almacen_id'],
+                cantidad=Decimal(str(item['cantidad'])),
+                costo_unitario=Decimal(str(item.get('costo_unitario') or 0)),
+                tipo_movimiento=item['tipo_movimiento'],
+                referencia=item.get('referencia') or referencia,
+                usuario=usuario
+            )
+            for item in items
+        ]
+        if not movimientos:
+            return []
+        insumo_ids = sorted({m.insumo_id for m in movimientos})
+        
+        with transaction.atomic():
+            insumos = Insumo.objects.select_for_update().filter(pk__in=insumo_ids).order_by('id').in_bulk()
+            faltantes = [insumo_id for insumo_id in insumo_ids if insumo_id not in insumos]
+            if faltantes:
+                raise Insumo.DoesNotExist(f"No existe el insumo {faltantes[0]}")
+            existencias = KardexService._bloquear_existencias_insumos(
+                insumo_ids, {(m.insumo_id, m.almacen_id) for m in movimientos}
+            )
+            
+            # Stock global de cada insumo antes del lote (existencias activas)
+            stock = defaultdict(Decimal)
+            for existencia in existencias.values():
+                if existencia.activo:
+                    stock[existencia.insumo_id] += existencia.cantidad
+            cantidades = {clave: existencia.cantidad for clave, existencia in existencias.items()}
+            antes = {insumo_id: AuditService.snapshot(insumo) for insumo_id, insumo in insumos.items()}
+            costeados = set()
+            
+            for movimiento in movimientos:
+                clave = (movimiento.insumo_id, movimiento.almacen_id)
+                insumo = insumos[movimiento.insumo_id]
+                cantidad = movimiento.cantidad
+                
+                if (movimiento.tipo_movimiento == 'SALIDA' or cantidad < 0) and (cantidades[clave] + cantidad < 0):
+                    raise ValueError(
+                        f"Stock insuficiente: se intentó retirar {-cantidad} del insumo {insumo.pk} "
+                        f"pero solo hay {cantidades[clave]} en el almacén."
+                    )
+                cantidades[clave] += cantidad
+                stock_anterior = stock[insumo.pk]
+                stock[insumo.pk] += cantidad
+                
+                # Misma regla (y mismo redondeo tras cada entrada) que
+                # registrar_movimiento/_recalcular_costo_promedio
+                if movimiento.tipo_movimiento == 'ENTRADA' or (movimiento.tipo_movimiento == 'AJUSTE' and cantidad > 0):
+                    if stock[insumo.pk] > 0:
+                        insumo.costo_promedio = (
+                            (stock_anterior * insumo.costo_promedio + cantidad * movimiento.costo_unitario)
+                            / stock[insumo.pk]
+                        ).quantize(CUATRO_DECIMALES)
+                    if stock[insumo.pk] >= 0:
+                        insumo.ultimo_costo = movimiento.costo_unitario
+                        costeados.add(insumo.pk)
+                elif movimiento.tipo_movimiento == 'SALIDA':
+                    movimiento.costo_unitario = insumo.costo_promedio.quantize(CUATRO_DECIMALES)
+            
+            MovimientoInventario.objects.bulk_create(movimientos)
+            
+            cambios = {
+                clave: cantidad - existencias[clave].cantidad
+                for clave, cantidad in cantidades.items()
+                if cantidad != existencias[clave].cantidad
+            }
+            if cambios:
+                Existencia.all_objects.filter(
+                    pk__in=[existencias[clave].pk for clave in cambios]
+                ).update(
+                    cantidad=Case(
+                        *[When(pk=existencias[clave].pk, then=F('cantidad') + delta) for clave, delta in cambios.items()],
+                        default=F('cantidad'),
+                        output_field=DecimalField(max_digits=12, decimal_places=4)
+                    ),
+                    updated_at=timezone.now()
+                )
+                StockEmpresaService.aplicar({
+                    (almacen_id, insumo_id): delta for (insumo_id, almacen_id), delta in cambios.items()
+                })
+            
+            if costeados:
+                actualizados = [insumos[insumo_id] for insumo_id in sorted(costeados)]
+                for insumo in actualizados:
+                    insumo.updated_at = timezone.now()
+                Insumo.objects.bulk_update(actualizados, ['costo_promedio', 'ultimo_costo', 'updated_at'])
+                # bulk_update no dispara post_save: se audita igual que un save()
+                for insumo in actualizados:
+                    diff = AuditService.calculate_diff(antes[insumo.pk], insumo)
+                    if diff:
+                        AuditService.log_diferido(obj=insumo, accion='UPDATE', cambios=diff, usuario=usuario)
+        return movimientos
+
+    @staticmethod
+    def _bloquear_existencias_insumos(insumo_ids, claves):
+        """
+        Bloquea las existencias de `insumo_ids` en todos los almacenes
+        (orden insumo_id, almacen_id), creando en cero las de `claves`
+        ({(insumo_id, almacen_id)}) que aún no existan.
+        
+        Returns:
+            {(insumo_id, almacen_id): Existencia}
+        """
+        def bloquear():
+            return {
+                (e.insumo_id, e.almacen_id): e
+                for e in Existencia.all_objects.select_for_update()
+                .filter(insumo_id__in=insumo_ids)
+                .order_by('insumo_id', 'almacen_id')
+            }
+        
+        existencias = bloquear()
+        nuevas = sorted(claves - existencias.keys())
+        if nuevas:
+            Existencia.all_objects.bulk_create(
+                [Existencia(insumo_id=insumo_id, almacen_id=almacen_id, cantidad=0) for insumo_id, almacen_id in nuevas],
+                ignore_conflicts=True
+            )
+            existencias = bloquear()
+        return existencias
+
+    @staticmethod
+    def registrar_salidas(almacen_id, salidas, referencia="", usuario=None, permitir_negativo=False, insumos=None):
+        """
+        Registra varias salidas de un almacén en pocas consultas (ventas del POS).
+        
+        - Las existencias se bloquean con select_for_update en orden de insumo_id,
+          así dos procesos que descuentan los mismos insumos no se bloquean
+          mutuamente (deadlock).
+        - Un MovimientoInventario SALIDA por insumo (bulk_create), al costo promedio.
+        - Las existencias se descuentan con un solo UPDATE ... CASE.
+        
+        Args:
+            almacen_id: Almacén del que salen
+            salidas: {insumo_id: cantidad positiva}
+            permitir_negativo: Si False, lanza ValueError cuando no alcanza el stock
+            insumos: {insumo_id: Insumo} ya cargados (opcional, para el costo)
+        
+        Returns:
+            Lista de MovimientoInventario creados
+        """
+        salidas = {insumo_id: Decimal(str(qty)) for insumo_id, qty in salidas.items() if qty}
+        if not salidas:
+            return []
+        if insumos is None:
+            insumos = Insumo.objects.in_bulk(salidas.keys())
+        
+        with transaction.atomic():
+            existencias = KardexService._bloquear_existencias(almacen_id, salidas, permitir_negativo)
+            
+            movimientos = MovimientoInventario.objects.bulk_create([
+                MovimientoInventario(
+                    insumo_id=insumo_id,
+                    almacen_id=almacen_id,
+                    cantidad=-qty,
+                    costo_unitario=insumos[insumo_id].costo_promedio,
+                    tipo_movimiento='SALIDA',
+                    referencia=referencia,
+                    usuario=usuario
+                )
+                for insumo_id, qty in sorted(salidas.items())
+            ])
+            
+            casos = [
+                When(pk=existencias[insumo_id].pk, then=F('cantidad') - qty)
+                for insumo_id, qty in salidas.items()
+            ]
+            Existencia.all_objects.filter(
+                pk__in=[existencias[insumo_id].pk for insumo_id in salidas]
+            ).update(
+                cantidad=Case(*casos, default=F('cantidad'), output_field=DecimalField(max_digits=12, decimal_places=4))
+            )
+            StockEmpresaService.aplicar({(almacen_id, insumo_id): -qty for insumo_id, qty in salidas.items()})
+        return movimientos
+
+    @staticmethod
+    def _bloquear_existencias(almacen_id, salidas, permitir_negativo=False):
+        """
+        Bloquea (SELECT ... FOR UPDATE) las existencias de los insumos en
+        `salidas` ordenadas por insumo_id y valida que alcancen.
+        
+        Returns:
+            {insumo_id: Existencia}
+        """
+        def bloquear():
+            return {
+                e.insumo_id: e
+                for e in Existencia.all_objects.select_for_update()
+                .filter(almacen_id=almacen_id, insumo_id__in=salidas.keys())
+                .order_by('insumo_id')
+            }
+        
+        existencias = bloquear()
+        faltantes = sorted(insumo_id for insumo_id in salidas if insumo_id not in existencias)
+        if faltantes:
+            if not permitir_negativo:
+                raise ValueError(
+                    f"Stock insuficiente: no hay existencias del insumo {faltantes[0]} en el almacén."
+                )
+            Existencia.objects.bulk_create(
+                [Existencia(insumo_id=insumo_id, almacen_id=almacen_id, cantidad=0) for insumo_id in faltantes],
+                ignore_conflicts=True
+            )
+            existencias = bloquear()
+        
+        if not permitir_negativo:
+            for insumo_id, qty in sorted(salidas.items()):
+                disponible = existencias[insumo_id].cantidad
+                if disponible < qty:
+                    raise ValueError(
+                        f"Stock insuficiente para el insumo {insumo_id}. "
+                        f"Disponible: {disponible}, Solicitado: {qty}"
+                    )
+        return existencias
+
     @staticmethod
     def _recalcular_costo_promedio(insumo, cant_entrada, costo_entrada):
         """
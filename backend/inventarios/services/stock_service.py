@@ -0,0 +1,116 @@
+"""
+Stock por empresa e insumo (StockEmpresa) mantenido al escribir.
+
+KardexService llama a aplicar() dentro de su transacción con el cambio de
+cada existencia; aquí se agrupa por empresa (la del almacén) y se ajusta
+el resumen con un bulk_update sobre filas bloqueadas. Si el nuevo total
+cruza Insumo.stock_minimo en cualquier sentido, se envía la señal
+stock_minimo_cruzado al confirmar (ia la convierte en AuditAlert).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from inventarios.models import Almacen, Existencia, StockEmpresa
+from inventarios.signals import stock_minimo_cruzado
+
+
+class StockEmpresaService:
+
+    @staticmethod
+    def aplicar(cambios):
+        """
+        Suma al stock por empresa los cambios de existencias.
+        
+        Args:
+            cambios: {(almacen_id, insumo_id): delta}
+        
+        Returns:
+            Lista de cruces de stock_minimo (ver inventarios.signals)
+        """
+        cambios = {clave: delta for clave, delta in cambios.items() if delta}
+        if not cambios:
+            return []
+        empresas = dict(
+            Almacen.all_objects.filter(pk__in={almacen_id for almacen_id, _ in cambios}, empresa__isnull=False)
+            .values_list('id', 'empresa_id')
+        )
+        deltas = defaultdict(Decimal)
+        for (almacen_id, insumo_id), delta in cambios.items():
+            if almacen_id in empresas:
+                deltas[(empresas[almacen_id], insumo_id)] += delta
+        if not deltas:
+            return []
+        
+        # Filas faltantes en cero y bloqueo en orden (empresa, insumo): dos
+        # cajas de la misma empresa no se bloquean mutuamente (deadlock)
+        StockEmpresa.objects.bulk_create(
+            [StockEmpresa(empresa_id=empresa_id, insumo_id=insumo_id) for empresa_id, insumo_id in sorted(deltas)],
+            ignore_conflicts=True
+        )
+        filas = list(
+            StockEmpresa.objects.select_for_update(of=('self',)).select_related('insumo')
+            .filter(empresa_id__in={e for e, _ in deltas}, insumo_id__in={i for _, i in deltas})
+            .order_by('empresa_id', 'insumo_id')
+        )
+        
+        ahora = timezone.now()
+        actualizadas = []
+        cruces = []
+        for fila in filas:
+            delta = deltas.get((fila.empresa_id, fila.insumo_id))
+            if not delta:
+                continue
+            anterior = fila.cantidad
+            fila.cantidad += delta
+            fila.updated_at = ahora
+            actualizadas.append(fila)
+            minimo = fila.insumo.stock_minimo
+            if minimo > 0 and (anterior < minimo) != (fila.cantidad < minimo):
+                cruces.append({
+                    'empresa_id': fila.empresa_id,
+                    'insumo_id': fila.insumo_id,
+                    'cantidad': fila.cantidad,
+                    'minimo': minimo,
+                    'bajo': fila.cantidad < minimo,
+                })
+        StockEmpresa.objects.bulk_update(actualizadas, ['cantidad', 'updated_at'])
+        
+        if cruces:
+            transaction.on_commit(lambda: stock_minimo_cruzado.send(sender=StockEmpresa, cruces=cruces))
+        return cruces
+
+    @staticmethod
+    def recalcular(empresa_ids=None):
+        """
+        Reconstruye el stock por empresa desde Existencia (respaldo y
+        migración inicial). Devuelve el número de filas escritas.
+        """
+        existencias = Existencia.objects.filter(almacen__empresa__isnull=False)
+        if empresa_ids is not None:
+            existencias = existencias.filter(almacen__empresa_id__in=empresa_ids)
+        totales = {
+            (fila['almacen__empresa_id'], fila['insumo_id']): fila['total']
+            for fila in existencias.values('almacen__empresa_id', 'insumo_id').annotate(total=Sum('cantidad'))
+        }
+        
+        with transaction.atomic():
+            actuales = StockEmpresa.objects.all()
+            if empresa_ids is not None:
+                actuales = actuales.filter(empresa_id__in=empresa_ids)
+            # Las que ya no tienen existencias quedan en cero
+            actuales.update(cantidad=0)
+            StockEmpresa.objects.bulk_create(
+                [
+                    StockEmpresa(empresa_id=empresa_id, insumo_id=insumo_id, cantidad=total)
+                    for (empresa_id, insumo_id), total in totales.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['empresa', 'insumo'],
+                update_fields=['cantidad'],
+                batch_size=1000,
+            )
+        return len(totales)
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Se envía al confirmar la transacción cuando un movimiento del Kárdex hace
+# que el stock de un insumo en una empresa cruce su stock_minimo.
+# kwargs: cruces = [{'empresa_id', 'insumo_id', 'cantidad', 'minimo', 'bajo'}]
+#   bajo=True: quedó por debajo del mínimo; False: se recuperó
+stock_minimo_cruzado = Signal()
@@ -1,5 +1,7 @@
 import pytest
 from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from compras.models.productos import Insumo
 from inventarios.models import Almacen, Existencia, MovimientoInventario
 from inventarios.services.kardex_service import KardexService
@@ -63,3 +65,106 @@ class TestKardexMovimientos:
              KardexService.registrar_movimiento(
                  self.insumo.id, self.almacen.id, -20, 'SALIDA'
              )
+
+
+@pytest.mark.django_db
+class TestKardexMovimientosBulk:
+    def setup_method(self):
+        self.almacenes = [
+            Almacen.objects.create(nombre=f"Almacen Bulk {i}", codigo=f"ALM-B{i}") for i in range(2)
+        ]
+        self.insumos = [
+            Insumo.objects.create(codigo=f"BULK-{i}", descripcion=f"Material {i}", tipo="PRODUCTO", costo_promedio=0)
+            for i in range(3)
+        ]
+
+    def _movimientos(self):
+        a, b = self.almacenes
+        return [
+            {'insumo_id': self.insumos[0].id, 'almacen_id': a.id, 'cantidad': 10, 'tipo_movimiento': 'ENTRADA', 'costo_unitario': 10},
+            {'insumo_id': self.insumos[0].id, 'almacen_id': b.id, 'cantidad': 10, 'tipo_movimiento': 'ENTRADA', 'costo_unitario': 20},
+            {'insumo_id': self.insumos[1].id, 'almacen_id': a.id, 'cantidad': 4, 'tipo_movimiento': 'ENTRADA', 'costo_unitario': 7},
+            {'insumo_id': self.insumos[0].id, 'almacen_id': a.id, 'cantidad': -5, 'tipo_movimiento': 'SALIDA'},
+            {'insumo_id': self.insumos[0].id, 'almacen_id': a.id, 'cantidad': 5, 'tipo_movimiento': 'ENTRADA', 'costo_unitario': 30},
+        ]
+
+    def test_mismo_resultado_que_uno_por_uno(self):
+        KardexService.registrar_movimientos_bulk(self._movimientos(), referencia="Lote")
+        bulk = {
+            'existencias': sorted(Existencia.objects.values_list('insumo_id', 'almacen_id', 'cantidad')),
+            'costos': {i.id: (i.costo_promedio, i.ultimo_costo) for i in Insumo.objects.all()},
+            'salida': MovimientoInventario.objects.get(tipo_movimiento='SALIDA').costo_unitario,
+        }
+
+        # Reinicio y mismo flujo con registrar_movimiento
+        MovimientoInventario.all_objects.all().delete()
+        Existencia.all_objects.all().delete()
+        Insumo.objects.update(costo_promedio=0, ultimo_costo=0)
+        for item in self._movimientos():
+            KardexService.registrar_movimiento(**item)
+
+        for insumo in Insumo.objects.all():
+            assert (insumo.costo_promedio, insumo.ultimo_costo) == bulk['costos'][insumo.id]
+        assert MovimientoInventario.objects.get(tipo_movimiento='SALIDA').costo_unitario == bulk['salida']
+        assert sorted(Existencia.objects.values_list('insumo_id', 'almacen_id', 'cantidad')) == bulk['existencias']
+        # ((10 x 10) + (10 x 20)) / 20 = 15; salida de 5; ((15 x 15) + (5 x 30)) / 20 = 18.75
+        assert bulk['costos'][self.insumos[0].id] == (Decimal('18.7500'), Decimal('30.0000'))
+        assert bulk['salida'] == Decimal('15.0000')
+
+    def test_redondeo_del_promedio_igual_que_uno_por_uno(self):
+        insumo, almacen = self.insumos[2], self.almacenes[0]
+        movimientos = [
+            {'insumo_id': insumo.id, 'almacen_id': almacen.id, 'cantidad': cantidad,
+             'tipo_movimiento': 'ENTRADA', 'costo_unitario': costo}
+            for cantidad, costo in ((3, 10), (1, 11), (2, 13), (6, 17))
+        ] + [{'insumo_id': insumo.id, 'almacen_id': almacen.id, 'cantidad': -1, 'tipo_movimiento': 'SALIDA'}]
+
+        KardexService.registrar_movimientos_bulk(movimientos)
+        bulk = (
+            Insumo.objects.get(pk=insumo.id).costo_promedio,
+            MovimientoInventario.objects.get(tipo_movimiento='SALIDA').costo_unitario,
+        )
+
+        MovimientoInventario.all_objects.all().delete()
+        Existencia.all_objects.all().delete()
+        Insumo.objects.update(costo_promedio=0, ultimo_costo=0)
+        for item in movimientos:
+            KardexService.registrar_movimiento(**item)
+        uno_por_uno = (
+            Insumo.objects.get(pk=insumo.id).costo_promedio,
+            MovimientoInventario.objects.get(tipo_movimiento='SALIDA').costo_unitario,
+        )
+
+        # Redondeando solo al final saldría 14.0833: 67/6 = 11.1667 tras la tercera entrada
+        assert bulk == uno_por_uno == (Decimal('14.0834'), Decimal('14.0834'))
+
+    def test_stock_insuficiente_revierte_el_lote(self):
+        movimientos = self._movimientos() + [
+            {'insumo_id': self.insumos[1].id, 'almacen_id': self.almacenes[0].id, 'cantidad': -5, 'tipo_movimiento': 'SALIDA'},
+        ]
+
+        with pytest.raises(ValueError, match="Stock insuficiente"):
+            KardexService.registrar_movimientos_bulk(movimientos)
+
+        assert not MovimientoInventario.objects.exists()
+        assert not Existencia.objects.exclude(cantidad=0).exists()
+        assert Insumo.objects.get(pk=self.insumos[0].id).costo_promedio == 0
+
+    def test_consultas_no_crecen_con_los_renglones(self):
+        def entradas(n):
+            return [
+                {
+                    'insumo_id': self.insumos[i % 3].id, 'almacen_id': self.almacenes[i % 2].id,
+                    'cantidad': 1, 'tipo_movimiento': 'ENTRADA', 'costo_unitario': i + 1,
+                }
+                for i in range(n)
+            ]
+
+        KardexService.registrar_movimientos_bulk(entradas(6))  # crea las existencias
+        with CaptureQueriesContext(connection) as pocas:
+            KardexService.registrar_movimientos_bulk(entradas(6))
+        with CaptureQueriesContext(connection) as muchas:
+            KardexService.registrar_movimientos_bulk(entradas(500))
+
+        assert len(muchas.captured_queries) == len(pocas.captured_queries)
+        assert MovimientoInventario.objects.count() == 512
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+import pytest
+
+from compras.models.productos import Insumo
+from core.models import Empresa
+from inventarios.models import Almacen, StockEmpresa
+from inventarios.services.kardex_service import KardexService
+from inventarios.services.stock_service import StockEmpresaService
+from inventarios.signals import stock_minimo_cruzado
+
+
+def _empresa(n):
+    return Empresa.objects.create(
+        codigo=f"STK{n:03d}", razon_social=f"Stock {n} S.A. de C.V.", nombre_comercial=f"Stock {n}",
+        rfc=f"STK2101{n:02d}AA1", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+        numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+    )
+
+
+@pytest.mark.django_db
+class TestStockEmpresa:
+    def setup_method(self):
+        self.empresa = _empresa(1)
+        self.otra = _empresa(2)
+        self.almacenes = [
+            Almacen.objects.create(nombre=f"Bodega {i}", codigo=f"STK-{i}", empresa=self.empresa) for i in range(2)
+        ]
+        self.almacen_otra = Almacen.objects.create(nombre="Bodega Otra", codigo="STK-OTRA", empresa=self.otra)
+        self.insumo = Insumo.objects.create(codigo="STK-VAR", descripcion="Varilla", tipo="PRODUCTO", stock_minimo=10)
+
+    def _stock(self, empresa):
+        return StockEmpresa.objects.get(empresa=empresa, insumo=self.insumo).cantidad
+
+    def test_todos_los_caminos_del_kardex_mantienen_el_resumen(self):
+        KardexService.registrar_movimiento(self.insumo.id, self.almacenes[0].id, 20, 'ENTRADA', 5)
+        KardexService.registrar_movimientos_bulk([
+            {'insumo_id': self.insumo.id, 'almacen_id': self.almacenes[1].id, 'cantidad': 7, 'tipo_movimiento': 'ENTRADA', 'costo_unitario': 5},
+            {'insumo_id': self.insumo.id, 'almacen_id': self.almacen_otra.id, 'cantidad': 3, 'tipo_movimiento': 'ENTRADA', 'costo_unitario': 5},
+        ])
+        KardexService.registrar_salidas(self.almacenes[0].id, {self.insumo.id: 4})
+
+        assert self._stock(self.empresa) == Decimal('23')
+        assert self._stock(self.otra) == Decimal('3')
+
+        # El resumen incremental coincide con el recálculo desde Existencia
+        StockEmpresaService.recalcular()
+        assert self._stock(self.empresa) == Decimal('23')
+        assert self._stock(self.otra) == Decimal('3')
+
+    def test_cruce_de_stock_minimo_se_avisa_al_confirmar(self, django_capture_on_commit_callbacks):
+        recibidos = []
+
+        def receptor(sender, cruces, **kwargs):
+            recibidos.extend(cruces)
+
+        stock_minimo_cruzado.connect(receptor, dispatch_uid="test_stock_minimo")
+        try:
+            with django_capture_on_commit_callbacks(execute=True):
+                KardexService.registrar_movimiento(self.insumo.id, self.almacenes[0].id, 15, 'ENTRADA', 5)
+                KardexService.registrar_salidas(self.almacenes[0].id, {self.insumo.id: 2})  # 13: sigue arriba
+                KardexService.registrar_salidas(self.almacenes[0].id, {self.insumo.id: 6})  # 7: cruza hacia abajo
+        finally:
+            stock_minimo_cruzado.disconnect(dispatch_uid="test_stock_minimo")
+
+        assert [(c['bajo'], c['cantidad']) for c in recibidos] == [(False, Decimal('15')), (True, Decimal('7'))]
+        assert recibidos[1]['empresa_id'] == self.empresa.id
@@ -5,6 +5,7 @@ from .change_service import ChangeManagementService
 from .closure_service import ClosureService
 from .estimacion_service import EstimacionService
 from .resource_service import ResourceService
+from .finanzas_service import ObraFinanzasService
 
 __all__ = [
     'ObrasService',
@@ -13,5 +14,6 @@ __all__ = [
     'ChangeManagementService',
     'ClosureService',
     'EstimacionService',
-    'ResourceService'
+    'ResourceService',
+    'ObraFinanzasService'
 ]
@@ -1,9 +1,8 @@
 from django.db.models import Sum
-from decimal import Decimal
 from django.utils import timezone
 from ..models import Obra, Estimacion
 from tesoreria.models import Egreso
-from rrhh.models.asistencia import DistribucionCosto
+from .finanzas_service import ObraFinanzasService
 
 class ClosureService:
     @staticmethod
@@ -13,27 +12,17 @@ class ClosureService:
         """
         obra = Obra.objects.get(id=obra_id)
         
+        finanzas = ObraFinanzasService.de_obra(obra.id)
+        
         # 1. Ingresos Reales (Avance cobrado/por cobrar al cliente)
-        total_ingresos = Estimacion.objects.filter(
-            obra_id=obra_id, 
-            estado__in=['AUTORIZADA', 'FACTURADA', 'PAGADA']
-        ).aggregate(Sum('monto_avance'))['monto_avance__sum'] or 0
+        total_ingresos = finanzas['ingresos_avance']
         
         # 2. Gastos Financieros (Pagos realizados a proveedores, indirectos, etc)
-        total_gastos = Egreso.objects.filter(
-            obra_id=obra_id,
-            estado='PAGADO'
-        ).aggregate(Sum('monto'))['monto__sum'] or 0
+        total_gastos = finanzas['egresos_pagados']
         
         # 3. Costos de Nómina (Distribución de asistencia)
-        # Se calcula multiplicando el porcentaje de distribución por el salario diario del empleado en esa fecha.
-        total_nomina = 0
-        distribuciones = DistribucionCosto.objects.filter(obra_id=obra_id).select_related('asistencia__empleado__datos_laborales')
-        
-        for dist in distribuciones:
-            salario_diario = dist.asistencia.empleado.datos_laborales.salario_diario or 0
-            costo_dia = (Decimal(str(dist.porcentaje)) / Decimal('100')) * salario_diario
-            total_nomina += costo_dia
+        # Porcentaje de distribución por el salario diario del empleado, sumado en BD.
+        total_nomina = finanzas['nomina']
         
         utilidad = total_ingresos - total_gastos - total_nomina
         margen = (utilidad / total_ingresos * 100) if total_ingresos > 0 else 0
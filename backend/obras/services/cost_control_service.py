@@ -1,8 +1,8 @@
-from django.db.models import Sum, F
+from decimal import Decimal
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum, Value
 from django.utils import timezone
 from ..models import Obra, ActividadProyecto, AsignacionRecurso
-from tesoreria.models.movimientos import Egreso
-from rrhh.models.asistencia import DistribucionCosto
+from .finanzas_service import ObraFinanzasService
 
 class CostControlService:
     @staticmethod
@@ -11,47 +11,54 @@ class CostControlService:
             fecha_corte = timezone.now().date()
             
         obra = Obra.objects.get(pk=obra_id)
-        actividades = ActividadProyecto.objects.filter(obra_id=obra_id)
+        bac = obra.presupuesto_total or Decimal('0') # Budget at Completion
         
-        # 1. Planned Value (PV)
-        # Sum of budgeted costs for activities scheduled to be completed by fecha_corte
-        pv = actividades.filter(fecha_fin_planeada__lte=fecha_corte).aggregate(total=Sum(presupuesto_total))[total] or 0
-        
-        # 2. Actual Cost (AC)
-        # Sum of actual costs (expenses and payroll) linked to this project until fecha_corte
-        egresos = Egreso.objects.filter(obra_id=obra_id, fecha__lte=fecha_corte, estado=PAGADO).aggregate(total=Sum(monto))[total] or 0
-        
-        # Nomina costs (simplified: using daily rate or distribution)
-        # This part requires a more complex calculation based on DistribucionCosto
-        # For now, we take the sum of distributed percentages of daily costs
-        # (This is a simplified version for the walkthrough)
-        nomina = DistribucionCosto.objects.filter(obra_id=obra_id, asistencia__fecha__lte=fecha_corte).aggregate(
-            total=Sum(F(asistencia__empleado__sueldo_diario) * F(porcentaje) / 100.0)
-        )[total] or 0
-        
-        ac = egresos + nomina
+        # Las actividades no tienen presupuesto propio: el BAC se reparte
+        # proporcionalmente a su duración. PV y EV en una sola consulta.
+        avance = ActividadProyecto.objects.filter(obra_id=obra_id).aggregate(
+            duracion_total=Sum('duracion_dias'),
+            duracion_planeada=Sum('duracion_dias', filter=Q(fecha_fin_planeada__lte=fecha_corte)),
+            duracion_ganada=Sum(
+                ExpressionWrapper(
+                    F('duracion_dias') * F('porcentaje_avance') / Value(Decimal('100')),
+                    output_field=DecimalField(max_digits=14, decimal_places=4),
+                )
+            ),
+        )
+        duracion_total = avance['duracion_total'] or 0
         
+        # 1. Planned Value (PV)
+        # Presupuesto de las actividades programadas para terminar a fecha_corte
         # 3. Earned Value (EV)
         # Sum of (% Progress * Budget) for all activities
-        ev = sum([float(a.porcentaje_avance) / 100.0 * float(a.presupuesto_total or 0) for a in actividades])
+        if duracion_total:
+            pv = float(bac) * (avance['duracion_planeada'] or 0) / duracion_total
+            ev = float(bac) * float(avance['duracion_ganada'] or 0) / duracion_total
+        else:
+            pv = ev = 0.0
+        
+        # 2. Actual Cost (AC)
+        # Egresos pagados + nómina distribuida a la obra hasta fecha_corte
+        finanzas = ObraFinanzasService.de_obra(obra.pk, fecha_corte=fecha_corte)
+        ac = float(finanzas['egresos_pagados'] + finanzas['nomina'])
         
         # 4. Variances and Indices
-        cv = float(ev) - float(ac)
-        sv = float(ev) - float(pv)
+        cv = ev - ac
+        sv = ev - pv
         
-        cpi = float(ev) / float(ac) if ac > 0 else 1.0
-        spi = float(ev) / float(pv) if pv > 0 else 1.0
+        cpi = ev / ac if ac > 0 else 1.0
+        spi = ev / pv if pv > 0 else 1.0
         
         return {
-            pv: pv,
-            ac: ac,
-            ev: ev,
-            cv: cv,
-            sv: sv,
-            cpi: cpi,
-            spi: spi,
-            bac: float(obra.presupuesto_total or 0), # Budget at Completion
-            status: HEALTHY if cpi >= 1.0 and spi >= 1.0 else WARNING if cpi >= 0.8 else CRITICAL
+            'pv': pv,
+            'ac': ac,
+            'ev': ev,
+            'cv': cv,
+            'sv': sv,
+            'cpi': cpi,
+            'spi': spi,
+            'bac': float(bac),
+            'status': 'HEALTHY' if cpi >= 1.0 and spi >= 1.0 else 'WARNING' if cpi >= 0.8 else 'CRITICAL'
         }
 
     @staticmethod
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, QuerySet, Sum, Value
+from ..models import Estimacion
+from compras.models.compras import OrdenCompra
+from tesoreria.models import Egreso
+from rrhh.models.asistencia import DistribucionCosto
+
+CERO = Decimal('0')
+
+
+class ObraFinanzasService:
+    """
+    Capa de agregación de ingresos y costos por obra.
+
+    Calcula todas las métricas para N obras con una consulta agrupada por
+    fuente (estimaciones, órdenes de compra, egresos y nómina distribuida),
+    así que el número de consultas no crece con el número de obras.
+    Lo usan DashboardService, ReportesService, ClosureService y
+    CostControlService.
+    """
+
+    ESTIMACIONES_COBRABLES = ('AUTORIZADA', 'FACTURADA', 'PAGADA')
+    OC_COMPROMETIDAS = ('AUTORIZADA', 'COMPLETADA')
+
+    METRICAS = (
+        'ingresos_estimado',   # Subtotal de todas las estimaciones
+        'ingresos_avance',     # Monto de avance de estimaciones cobrables
+        'fondo_garantia',      # Retenido en estimaciones pagadas
+        'compras',             # Subtotal de ODCs comprometidas (vía requisición de la obra)
+        'egresos',             # Todos los egresos ligados a la obra
+        'egresos_pagados',     # Egresos en estado PAGADO
+        'nomina',              # Salario diario * % de distribución de asistencia
+    )
+
+    @classmethod
+    def calcular(cls, obras, fecha_corte=None) -> dict:
+        """
+        Args:
+            obras: QuerySet de Obra (se usa como subconsulta) o lista de IDs.
+            fecha_corte: Si se indica, egresos y nómina solo hasta esa fecha.
+
+        Returns:
+            dict: {obra_id: {metrica: Decimal}}. Con una lista de IDs todas las
+            obras vienen en el resultado (en ceros si no tienen movimientos);
+            con un QuerySet solo aparecen las que tienen algún movimiento, y las
+            métricas que no tienen quedan en cero.
+        """
+        if isinstance(obras, QuerySet):
+            obra_ids = obras.values('pk')
+            resultado = defaultdict(cls._vacio)
+        else:
+            obra_ids = list(obras)
+            resultado = {obra_id: cls._vacio() for obra_id in obra_ids}
+
+        estimaciones = (
+            Estimacion.objects.filter(obra_id__in=obra_ids)
+            .values('obra_id')
+            .annotate(
+                ingresos_estimado=Sum('subtotal'),
+                ingresos_avance=Sum('monto_avance', filter=Q(estado__in=cls.ESTIMACIONES_COBRABLES)),
+                fondo_garantia=Sum('fondo_garantia', filter=Q(estado='PAGADA')),
+            )
+            .order_by()
+        )
+
+        compras = (
+            OrdenCompra.objects.filter(
+                requisicion__obra_id__in=obra_ids, estado__in=cls.OC_COMPROMETIDAS
+            )
+            .values(obra_id=F('requisicion__obra_id'))
+            .annotate(compras=Sum('subtotal'))
+            .order_by()
+        )
+
+        egresos_qs = Egreso.objects.filter(obra_id__in=obra_ids)
+        nomina_qs = DistribucionCosto.objects.filter(obra_id__in=obra_ids)
+        if fecha_corte:
+            egresos_qs = egresos_qs.filter(fecha__lte=fecha_corte)
+            nomina_qs = nomina_qs.filter(asistencia__fecha__lte=fecha_corte)
+
+        egresos = (
+            egresos_qs.values('obra_id')
+            .annotate(
+                egresos=Sum('monto'),
+                egresos_pagados=Sum('monto', filter=Q(estado='PAGADO')),
+            )
+            .order_by()
+        )
+
+        costo_dia = ExpressionWrapper(
+            F('asistencia__empleado__datos_laborales__salario_diario') * F('porcentaje') / Value(Decimal('100')),
+            output_field=DecimalField(max_digits=18, decimal_places=4),
+        )
+        nomina = nomina_qs.values('obra_id').annotate(nomina=Sum(costo_dia)).order_by()
+
+        for filas in (estimaciones, compras, egresos, nomina):
+            for fila in filas:
+                obra_id = fila.pop('obra_id')
+                if obra_id is None:
+                    continue
+                metricas = resultado[obra_id]
+                for metrica, valor in fila.items():
+                    metricas[metrica] = valor or CERO
+
+        return dict(resultado)
+
+    @classmethod
+    def de_obra(cls, obra_id, fecha_corte=None) -> dict:
+        return cls.calcular([obra_id], fecha_corte=fecha_corte)[obra_id]
+
+    @classmethod
+    def _vacio(cls):
+        return {metrica: CERO for metrica in cls.METRICAS}
@@ -1,118 +1,156 @@
+from collections import deque
 from django.db import transaction
 from obras.models import ActividadProyecto, DependenciaActividad
 
+
+class CicloDependenciasError(ValueError):
+    """Las dependencias forman un ciclo; `actividades` son los IDs involucrados."""
+
+    def __init__(self, actividades):
+        self.actividades = actividades
+        super().__init__(f"Dependencias circulares entre {len(actividades)} actividades")
+
+
+class MotorCPM:
+    """
+    Motor CPM en memoria sobre un grafo de actividades.
+
+    duraciones: {actividad_id: dias}
+    dependencias: [(predecesora_id, sucesora_id, tipo, lag_dias)] con tipo FS/SS/FF/SF
+
+    Ordena topológicamente una vez (Kahn) y hace las pasadas hacia adelante y
+    hacia atrás en O(V+E). Los inicios tempranos no bajan del día 0 y los
+    finales tardíos no pasan de la duración del proyecto.
+    """
+
+    def __init__(self, duraciones, dependencias):
+        self.duraciones = duraciones
+        self.sucesoras = {a: [] for a in duraciones}
+        self.predecesoras = {a: [] for a in duraciones}
+        for pred, suc, tipo, lag in dependencias:
+            if pred not in duraciones or suc not in duraciones:
+                continue
+            self.sucesoras[pred].append((suc, tipo, lag))
+            self.predecesoras[suc].append((pred, tipo, lag))
+
+    def orden_topologico(self):
+        grado = {a: len(preds) for a, preds in self.predecesoras.items()}
+        cola = deque(a for a, g in grado.items() if g == 0)
+        orden = []
+        while cola:
+            actual = cola.popleft()
+            orden.append(actual)
+            for suc, _, _ in self.sucesoras[actual]:
+                grado[suc] -= 1
+                if grado[suc] == 0:
+                    cola.append(suc)
+        if len(orden) < len(grado):
+            raise CicloDependenciasError(sorted(a for a, g in grado.items() if g > 0))
+        return orden
+
+    def calcular(self):
+        """
+        Returns:
+            (duracion_proyecto, {actividad_id: (ES, EF, LS, LF, holgura)})
+        """
+        orden = self.orden_topologico()
+        dur = self.duraciones
+        es, ef = {}, {}
+
+        # 1. Forward Pass
+        for act in orden:
+            inicio = 0
+            for pred, tipo, lag in self.predecesoras[act]:
+                if tipo == 'SS':
+                    inicio = max(inicio, es[pred] + lag)
+                elif tipo == 'FF':
+                    inicio = max(inicio, ef[pred] + lag - dur[act])
+                elif tipo == 'SF':
+                    inicio = max(inicio, es[pred] + lag - dur[act])
+                else:  # FS
+                    inicio = max(inicio, ef[pred] + lag)
+            es[act] = inicio
+            ef[act] = inicio + dur[act]
+
+        duracion_proyecto = max(ef.values(), default=0)
+
+        # 2. Backward Pass
+        ls, lf = {}, {}
+        for act in reversed(orden):
+            fin = duracion_proyecto
+            for suc, tipo, lag in self.sucesoras[act]:
+                if tipo == 'SS':
+                    fin = min(fin, ls[suc] - lag + dur[act])
+                elif tipo == 'FF':
+                    fin = min(fin, lf[suc] - lag)
+                elif tipo == 'SF':
+                    fin = min(fin, lf[suc] - lag + dur[act])
+                else:  # FS
+                    fin = min(fin, ls[suc] - lag)
+            lf[act] = fin
+            ls[act] = fin - dur[act]
+
+        return duracion_proyecto, {
+            act: (es[act], ef[act], ls[act], lf[act], ls[act] - es[act]) for act in orden
+        }
+
+
 class SchedulingService:
     """
     Servicio para cálculo de Ruta Crítica (Critical Path Method - CPM).
     """
-    
+
+    CAMPOS_CPM = ['early_start', 'early_finish', 'late_start', 'late_finish', 'holgura', 'es_critica']
+
     @staticmethod
     def calcular_ruta_critica(obra_id):
         """
         Implementa el algoritmo CPM para identificar la ruta crítica.
-        
+
         Pasos:
-        1. Forward Pass: Calcular Early Start y Early Finish
-        2. Backward Pass: Calcular Late Start y Late Finish
-        3. Calcular Holgura (Slack) = Late Start - Early Start
-        4. Identificar Ruta Crítica (actividades con holgura = 0)
+        1. Cargar actividades y dependencias (2 consultas) y ordenarlas topológicamente
+        2. Forward Pass: Calcular Early Start y Early Finish
+        3. Backward Pass: Calcular Late Start y Late Finish
+        4. Calcular Holgura (Slack) = Late Start - Early Start
+        5. Identificar Ruta Crítica (actividades con holgura = 0) y guardar con bulk_update
         """
-        actividades = ActividadProyecto.objects.filter(
-            obra_id=obra_id,
-            deleted_at__isnull=True
-        ).prefetch_related('predecesoras', 'sucesoras')
-        
-        if not actividades.exists():
+        actividades = list(ActividadProyecto.objects.filter(obra_id=obra_id))
+
+        if not actividades:
             return {'error': 'No hay actividades en este proyecto'}
-        
-        # Convertir a diccionario para fácil acceso
+
         act_dict = {act.id: act for act in actividades}
-        
-        # 1. FORWARD PASS (Early Start/Finish)
-        # Inicializar actividades sin predecesoras
-        for act in actividades:
-            deps = act.predecesoras.filter(deleted_at__isnull=True)
-            if not deps.exists():
-                act.early_start = 0
-                act.early_finish = act.duracion_dias
-        
-        # Iterar hasta que todas tengan ES/EF
-        max_iterations = len(actividades) * 2
-        iteration = 0
-        while iteration < max_iterations:
-            cambios = False
-            for act in actividades:
-                if act.early_start is not None:
-                    continue  # Ya calculada
-                
-                # Obtener predecesoras
-                deps = act.predecesoras.filter(deleted_at__isnull=True)
-                if all(dep.actividad_predecesora.early_finish is not None for dep in deps):
-                    # Todas las predecesoras tienen EF calculado
-                    max_ef = 0
-                    for dep in deps:
-                        pred = dep.actividad_predecesora
-                        if dep.tipo == 'FS':  # Finish-to-Start
-                            max_ef = max(max_ef, pred.early_finish + dep.lag_dias)
-                        # Otros tipos de dependencia se pueden agregar aquí
-                    
-                    act.early_start = max_ef
-                    act.early_finish = act.early_start + act.duracion_dias
-                    cambios = True
-            
-            if not cambios:
-                break
-            iteration += 1
-        
-        # 2. BACKWARD PASS (Late Start/Finish)
-        # Encontrar la duración total del proyecto
-        max_ef = max((act.early_finish for act in actividades if act.early_finish is not None), default=0)
-        
-        # Inicializar actividades sin sucesoras (finales)
-        for act in actividades:
-            deps = act.sucesoras.filter(deleted_at__isnull=True)
-            if not deps.exists():
-                act.late_finish = max_ef
-                act.late_start = act.late_finish - act.duracion_dias
-        
-        # Iterar hacia atrás
-        iteration = 0
-        while iteration < max_iterations:
-            cambios = False
-            for act in actividades:
-                if act.late_start is not None:
-                    continue
-                
-                # Obtener sucesoras
-                deps = act.sucesoras.filter(deleted_at__isnull=True)
-                if all(dep.actividad_sucesora.late_start is not None for dep in deps):
-                    min_ls = max_ef
-                    for dep in deps:
-                        suc = dep.actividad_sucesora
-                        if dep.tipo == 'FS':
-                            min_ls = min(min_ls, suc.late_start - dep.lag_dias)
-                    
-                    act.late_finish = min_ls
-                    act.late_start = act.late_finish - act.duracion_dias
-                    cambios = True
-            
-            if not cambios:
-                break
-            iteration += 1
-        
+        dependencias = DependenciaActividad.objects.filter(
+            actividad_sucesora__obra_id=obra_id
+        ).values_list('actividad_predecesora_id', 'actividad_sucesora_id', 'tipo', 'lag_dias')
+
+        motor = MotorCPM({act.id: act.duracion_dias for act in actividades}, dependencias)
+        try:
+            duracion_proyecto, resultado = motor.calcular()
+        except CicloDependenciasError as e:
+            return {
+                'error': 'Las dependencias del proyecto forman un ciclo',
+                'ciclo': [act_dict[a].codigo for a in e.actividades],
+            }
+
         # 3. Calcular Holgura y marcar Ruta Crítica
+        for act_id, (es, ef, ls, lf, holgura) in resultado.items():
+            act = act_dict[act_id]
+            act.early_start, act.early_finish = es, ef
+            act.late_start, act.late_finish = ls, lf
+            act.holgura = holgura
+            act.es_critica = (holgura == 0)
+
         with transaction.atomic():
-            for act in actividades:
-                if act.early_start is not None and act.late_start is not None:
-                    act.holgura = act.late_start - act.early_start
-                    act.es_critica = (act.holgura == 0)
-                    act.save()
-        
+            ActividadProyecto.objects.bulk_update(
+                actividades, SchedulingService.CAMPOS_CPM, batch_size=1000
+            )
+
         # Retornar resumen
         criticas = [act for act in actividades if act.es_critica]
         return {
             'total_actividades': len(actividades),
-            'duracion_proyecto': max_ef,
+            'duracion_proyecto': duracion_proyecto,
             'actividades_criticas': len(criticas),
             'ruta_critica': [act.codigo for act in criticas]
         }
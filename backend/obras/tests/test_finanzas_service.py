@@ -0,0 +1,111 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from decimal import Decimal
+from obras.models import Obra, Estimacion
+from obras.services.closure_service import ClosureService
+from obras.services.finanzas_service import ObraFinanzasService
+from compras.models.compras import OrdenCompra
+from compras.models.proveedores import Proveedor
+from compras.models.requisiciones import Requisicion
+from contabilidad.models import Banco, Moneda
+from core.models.empresa import Empresa
+from rrhh.models import Empleado, EmpleadoDatosLaborales, RazonSocial, Departamento, Puesto
+from rrhh.models.asistencia import Asistencia, DistribucionCosto
+from tesoreria.models import CuentaBancaria, Egreso
+
+User = get_user_model()
+
+
+class ObraFinanzasServiceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='finanzas', password='password')
+        self.empresa = Empresa.objects.create(
+            codigo="LUX02", razon_social="Luximia Finanzas S.A. de C.V.", nombre_comercial="Luximia",
+            rfc="LUX210101AA2", regimen_fiscal="601", codigo_postal="77500", calle="Av. Tulum",
+            numero_exterior="1", colonia="Centro", municipio="Cancún", estado="Quintana Roo"
+        )
+        banco = Banco.objects.create(clave="002", nombre_corto="BANAMEX", razon_social="BANAMEX")
+        self.cuenta = CuentaBancaria.objects.create(
+            empresa=self.empresa, numero_cuenta="0987654321", banco=banco, moneda="MXN"
+        )
+        self.moneda = Moneda.objects.create(codigo="MXN", nombre="Peso")
+        self.proveedor = Proveedor.objects.create(razon_social="Cementos SA", rfc="CEM010101AAA")
+
+        rs = RazonSocial.objects.create(nombre_o_razon_social="Constructora", rfc="CON010101AAA")
+        dep = Departamento.objects.create(nombre="Obra")
+        puesto = Puesto.objects.create(nombre="Albañil", departamento=dep)
+        self.empleado = Empleado.objects.create(
+            user=self.user, nombres="Pedro", apellido_paterno="Lopez",
+            razon_social=rs, puesto=puesto, departamento=dep
+        )
+        EmpleadoDatosLaborales.objects.create(empleado=self.empleado, salario_diario=Decimal("500.00"))
+
+    def _crear_obra(self, n):
+        obra = Obra.objects.create(
+            empresa=self.empresa, nombre=f"Obra {n}", codigo=f"PRJ-{n:03d}",
+            fecha_inicio="2026-01-01", presupuesto_total=Decimal("1000000.00"), estado='EJECUCION'
+        )
+        for estado in ('PAGADA', 'BORRADOR'):
+            Estimacion.objects.create(
+                obra=obra, fecha_corte="2026-01-15", monto_avance=Decimal("100000.00"),
+                fondo_garantia=Decimal("5000.00"), subtotal=Decimal("95000.00"),
+                iva=Decimal("15200.00"), total=Decimal("110200.00"), estado=estado
+            )
+        requisicion = Requisicion.objects.create(usuario_solicitante=self.user, obra=obra)
+        for estado in ('AUTORIZADA', 'BORRADOR'):
+            OrdenCompra.objects.create(
+                proveedor=self.proveedor, solicitante=self.user, requisicion=requisicion,
+                motivo_compra="Material", subtotal=Decimal("20000.00"), moneda=self.moneda, estado=estado
+            )
+        for estado in ('PAGADO', 'BORRADOR'):
+            Egreso.objects.create(
+                obra=obra, cuenta_bancaria=self.cuenta, fecha="2026-01-20", beneficiario="Proveedor",
+                concepto="Material", monto=Decimal("30000.00"), solicitado_por=self.user, estado=estado
+            )
+        asistencia = Asistencia.objects.create(empleado=self.empleado, fecha=f"2026-01-{n % 28 + 1:02d}")
+        DistribucionCosto.objects.create(asistencia=asistencia, obra=obra, porcentaje=50)
+        return obra
+
+    def test_metricas_por_obra(self):
+        obra = self._crear_obra(1)
+        otra = Obra.objects.create(
+            empresa=self.empresa, nombre="Sin movimientos", codigo="PRJ-999",
+            fecha_inicio="2026-01-01", estado='EJECUCION'
+        )
+
+        finanzas = ObraFinanzasService.calcular([obra.id, otra.id])
+
+        self.assertEqual(finanzas[obra.id]['ingresos_estimado'], Decimal("190000.00"))
+        self.assertEqual(finanzas[obra.id]['ingresos_avance'], Decimal("100000.00"))
+        self.assertEqual(finanzas[obra.id]['fondo_garantia'], Decimal("5000.00"))
+        self.assertEqual(finanzas[obra.id]['compras'], Decimal("20000.00"))
+        self.assertEqual(finanzas[obra.id]['egresos'], Decimal("60000.00"))
+        self.assertEqual(finanzas[obra.id]['egresos_pagados'], Decimal("30000.00"))
+        self.assertEqual(finanzas[obra.id]['nomina'], Decimal("250.00"))
+        self.assertEqual(finanzas[otra.id], ObraFinanzasService._vacio())
+
+    def test_cierre_usa_la_capa_agregada(self):
+        obra = self._crear_obra(1)
+
+        resultado = ClosureService.get_final_profitability(obra.id)
+
+        self.assertEqual(resultado['ingresos_totales'], 100000.0)
+        self.assertEqual(resultado['gastos_totales'], 30000.0)
+        self.assertEqual(resultado['nomina_total'], 250.0)
+        self.assertEqual(resultado['utilidad_neta'], 69750.0)
+
+    def test_consultas_constantes_al_crecer_las_obras(self):
+        obras = [self._crear_obra(n) for n in range(2)]
+        with CaptureQueriesContext(connection) as pocas:
+            ObraFinanzasService.calcular([o.id for o in obras])
+
+        obras += [self._crear_obra(n) for n in range(2, 12)]
+        with CaptureQueriesContext(connection) as muchas:
+            ObraFinanzasService.calcular([o.id for o in obras])
+        with self.assertNumQueries(len(pocas)):
+            ObraFinanzasService.calcular(Obra.objects.all())
+
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertLessEqual(len(muchas), 4)
@@ -0,0 +1,113 @@
+import random
+import time
+import pytest
+from datetime import date, timedelta
+from obras.models import Obra, ActividadProyecto, DependenciaActividad
+from obras.services.scheduling_service import CicloDependenciasError, MotorCPM, SchedulingService
+
+
+class TestMotorCPM:
+    def test_cadena_fs_con_rama_holgura(self):
+        # A(3) -> B(2) -> D(1); A -> C(1) -> D
+        motor = MotorCPM(
+            {'A': 3, 'B': 2, 'C': 1, 'D': 1},
+            [('A', 'B', 'FS', 0), ('B', 'D', 'FS', 0), ('A', 'C', 'FS', 0), ('C', 'D', 'FS', 0)],
+        )
+        duracion, r = motor.calcular()
+
+        assert duracion == 6
+        assert r['B'] == (3, 5, 3, 5, 0)
+        assert r['C'] == (3, 4, 4, 5, 1)
+        assert r['D'] == (5, 6, 5, 6, 0)
+
+    def test_tipos_de_dependencia_y_lag(self):
+        motor = MotorCPM(
+            {'A': 4, 'SS': 2, 'FF': 2, 'SF': 3, 'FS': 1},
+            [
+                ('A', 'SS', 'SS', 1),   # SS empieza 1 día después de que empieza A
+                ('A', 'FF', 'FF', 2),   # FF termina 2 días después de que termina A
+                ('A', 'SF', 'SF', 5),   # SF termina 5 días después de que empieza A
+                ('A', 'FS', 'FS', -1),  # Adelanto de 1 día
+            ],
+        )
+        duracion, r = motor.calcular()
+
+        assert r['SS'][:2] == (1, 3)
+        assert r['FF'][:2] == (4, 6)
+        assert r['SF'][:2] == (2, 5)
+        assert r['FS'][:2] == (3, 4)
+        assert duracion == 6
+        # A es crítica por la restricción FF
+        assert r['A'][4] == 0
+
+    def test_detecta_ciclos(self):
+        motor = MotorCPM(
+            {'A': 1, 'B': 1, 'C': 1, 'D': 1},
+            [('A', 'B', 'FS', 0), ('B', 'C', 'FS', 0), ('C', 'B', 'FS', 0), ('C', 'D', 'FS', 0)],
+        )
+        with pytest.raises(CicloDependenciasError) as exc:
+            motor.calcular()
+        assert set(exc.value.actividades) >= {'B', 'C'}
+        assert 'A' not in exc.value.actividades
+
+    @pytest.mark.slow
+    def test_benchmark_10k_actividades(self):
+        rnd = random.Random(42)
+        n = 10_000
+        duraciones = {i: rnd.randint(1, 20) for i in range(n)}
+        dependencias = []
+        for suc in range(1, n):
+            for pred in rnd.sample(range(max(0, suc - 50), suc), min(3, suc)):
+                dependencias.append((pred, suc, rnd.choice(['FS', 'FS', 'SS', 'FF', 'SF']), rnd.randint(-2, 5)))
+
+        inicio = time.perf_counter()
+        duracion, resultado = MotorCPM(duraciones, dependencias).calcular()
+        transcurrido = time.perf_counter() - inicio
+
+        print(f"\nCPM: {n} actividades, {len(dependencias)} dependencias en {transcurrido:.3f}s")
+        assert len(resultado) == n
+        assert all(h >= 0 for *_, h in resultado.values())
+        assert transcurrido < 2
+
+
+@pytest.mark.django_db
+class TestSchedulingService:
+    def _obra(self):
+        return Obra.objects.create(nombre="Torre CPM", codigo="CPM-001", fecha_inicio=date(2026, 1, 1))
+
+    def _actividades(self, obra, n):
+        inicio = date(2026, 1, 1)
+        return ActividadProyecto.objects.bulk_create([
+            ActividadProyecto(
+                obra=obra, codigo=f"A{i:04d}", nombre=f"Actividad {i}",
+                fecha_inicio_planeada=inicio, fecha_fin_planeada=inicio + timedelta(days=2),
+                duracion_dias=2,
+            )
+            for i in range(n)
+        ])
+
+    def test_persiste_ruta_critica_con_consultas_constantes(self, django_assert_max_num_queries):
+        obra = self._obra()
+        acts = self._actividades(obra, 200)
+        DependenciaActividad.objects.bulk_create([
+            DependenciaActividad(actividad_predecesora=acts[i - 1], actividad_sucesora=acts[i])
+            for i in range(1, len(acts))
+        ])
+
+        with django_assert_max_num_queries(6):
+            resumen = SchedulingService.calcular_ruta_critica(obra.id)
+
+        assert resumen['duracion_proyecto'] == 400
+        assert resumen['actividades_criticas'] == 200
+        ultima = ActividadProyecto.objects.get(pk=acts[-1].pk)
+        assert (ultima.early_start, ultima.late_finish, ultima.holgura) == (398, 400, 0)
+
+    def test_ciclo_regresa_error(self):
+        obra = self._obra()
+        a, b = self._actividades(obra, 2)
+        DependenciaActividad.objects.create(actividad_predecesora=a, actividad_sucesora=b)
+        DependenciaActividad.objects.create(actividad_predecesora=b, actividad_sucesora=a)
+
+        resumen = SchedulingService.calcular_ruta_critica(obra.id)
+
+        assert resumen['ciclo'] == ['A0000', 'A0001']
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class PosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pos'
+
+    def ready(self):
+        # Mantiene TotalesTurno al guardar/borrar ventas y movimientos de caja
+        from pos.services.totales_turno_service import TotalesTurnoService
+        TotalesTurnoService.conectar_senales()
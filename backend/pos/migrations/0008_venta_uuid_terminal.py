@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0007_producto_sync_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='uuid_terminal',
+            field=models.UUIDField(blank=True, editable=False, help_text='ID generado por la terminal (idempotencia de ventas offline)', null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,70 @@
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CAMPO_POR_METODO = {
+    'EFECTIVO': 'ventas_efectivo',
+    'TARJETA': 'ventas_tarjeta',
+    'TRANSFERENCIA': 'ventas_transferencia',
+    'CREDITO': 'ventas_credito',
+    'ANTICIPO': 'ventas_anticipo',
+}
+
+
+def calcular_totales(apps, schema_editor):
+    """Mismo criterio que TotalesTurnoService.aporte_venta / aporte_movimiento."""
+    Venta = apps.get_model('pos', 'Venta')
+    MovimientoCaja = apps.get_model('pos', 'MovimientoCaja')
+    TotalesTurno = apps.get_model('pos', 'TotalesTurno')
+
+    totales = defaultdict(lambda: defaultdict(Decimal))
+    ventas = Venta.objects.filter(estado='PAGADA', activo=True).values_list(
+        'turno_id', 'total', 'metodo_pago', 'metodo_pago_secundario', 'monto_metodo_secundario'
+    )
+    for turno_id, total, metodo, metodo_sec, monto_sec in ventas.iterator():
+        secundario = monto_sec if metodo_sec else Decimal(0)
+        totales[turno_id]['num_ventas'] += 1
+        for m, monto in ((metodo, total - secundario), (metodo_sec, secundario)):
+            if m in CAMPO_POR_METODO and monto:
+                totales[turno_id][CAMPO_POR_METODO[m]] += monto
+    for turno_id, tipo, monto in MovimientoCaja.objects.values_list('turno_id', 'tipo', 'monto').iterator():
+        if tipo == 'INGRESO':
+            totales[turno_id]['ingresos'] += monto
+        elif tipo == 'RETIRO':
+            totales[turno_id]['retiros'] += monto
+
+    TotalesTurno.objects.bulk_create(
+        [TotalesTurno(turno_id=turno_id, **valores) for turno_id, valores in totales.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0008_venta_uuid_terminal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TotalesTurno',
+            fields=[
+                ('turno', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='totales', serialize=False, to='pos.turno')),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('ventas_efectivo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ventas_tarjeta', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ventas_transferencia', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ventas_credito', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ventas_anticipo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('retiros', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Totales de Turno',
+                'verbose_name_plural': 'Totales de Turnos',
+            },
+        ),
+        migrations.RunPython(calcular_totales, migrations.RunPython.noop),
+    ]
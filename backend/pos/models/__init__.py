@@ -1,5 +1,5 @@
 # Importar modelos para retrocompatibilidad
-from .sesiones import Caja, Turno
+from .sesiones import Caja, Turno, TotalesTurno
 from .productos import Producto
 from .ventas import Venta, DetalleVenta
 from .auxiliares import (
@@ -12,6 +12,7 @@ from .auxiliares import (
 __all__ = [
     'Caja',
     'Turno',
+    'TotalesTurno',
     'Producto',
     'Venta',
     'DetalleVenta',
@@ -42,6 +42,12 @@ class Producto(SoftDeleteModel):
         help_text="Color para el botón en POS"
     )
 
+    class Meta:
+        indexes = [
+            # Cursor del feed de sincronización offline (CatalogoSyncService)
+            models.Index(fields=['updated_at', 'id'], name='pos_producto_sync_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre} (${self.precio_lista})"
 
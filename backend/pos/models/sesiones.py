@@ -59,5 +59,32 @@ class Turno(SoftDeleteModel):
         return f"Turno {self.id} - {self.usuario} ({self.fecha_inicio.date()})"
 
 
+class TotalesTurno(models.Model):
+    """
+    Acumulados del turno mantenidos al escribir (TotalesTurnoService): el
+    corte de caja lee esta fila en lugar de agregar ventas y movimientos.
+    Solo cuentan ventas PAGADAS y activas, por método de pago.
+    """
+    turno = models.OneToOneField(Turno, on_delete=models.CASCADE, primary_key=True, related_name='totales')
+    
+    num_ventas = models.IntegerField(default=0)
+    ventas_efectivo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ventas_tarjeta = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ventas_transferencia = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ventas_credito = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ventas_anticipo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    # MovimientoCaja
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    retiros = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Totales de Turno"
+        verbose_name_plural = "Totales de Turnos"
+
+    def __str__(self):
+        return f"Totales turno {self.turno_id}"
+
+
 register_audit(Caja)
 register_audit(Turno)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connections, models, router
 from django.conf import settings
 from core.models import SoftDeleteModel, register_audit, EmpresaOwnedModel, MultiTenantManager
 from .sesiones import Turno
@@ -25,6 +25,13 @@ class Venta(SoftDeleteModel, EmpresaOwnedModel):
     ]
 
     folio = models.CharField(max_length=20, unique=True, blank=True)
+    uuid_terminal = models.UUIDField(
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="ID generado por la terminal (idempotencia de ventas offline)"
+    )
     turno = models.ForeignKey(Turno, on_delete=models.PROTECT, related_name='ventas')
     cliente = models.ForeignKey(
         'contabilidad.Cliente', 
@@ -72,12 +79,21 @@ class Venta(SoftDeleteModel, EmpresaOwnedModel):
 
     def save(self, *args, **kwargs):
         if not self.folio:
-            # Generador simple de folio
-            from pos.models import Venta as VentaModel
-            last_id = VentaModel.objects.count() + 1
-            self.folio = f"T-{last_id:06d}"
+            # El folio sale del id: count()+1 choca cuando varias cajas cobran a la vez.
+            # El id se reserva de la secuencia antes del INSERT, así la fila (y su
+            # registro de auditoría) nacen con el folio definitivo.
+            if self.pk is None:
+                self.pk = self._reservar_id(kwargs.get('using'))
+                kwargs['force_insert'] = True
+            self.folio = f"T-{self.pk:06d}"
         super().save(*args, **kwargs)
 
+    def _reservar_id(self, using=None):
+        using = using or router.db_for_write(type(self), instance=self)
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [self._meta.db_table])
+            return cursor.fetchone()[0]
+
     def __str__(self):
         return f"{self.folio} - ${self.total}"
 
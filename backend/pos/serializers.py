@@ -56,6 +56,16 @@ class CobroVentaSerializer(serializers.Serializer):
             raise serializers.ValidationError("Debe incluir al menos un item en la venta")
         return value
 
+class VentaOfflineSerializer(CobroVentaSerializer):
+    """Venta capturada sin conexión (cola de la terminal)."""
+    uuid_terminal = serializers.UUIDField(help_text="ID generado en la terminal; reintentos no duplican la venta")
+    turno_id = serializers.IntegerField()
+    fecha = serializers.DateTimeField(required=False, help_text="Momento de la venta en la terminal")
+
+class SincronizacionVentasSerializer(serializers.Serializer):
+    """Lote de ventas offline; cada una se valida por separado con VentaOfflineSerializer."""
+    ventas = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=1000)
+
 class CuentaClienteSerializer(serializers.ModelSerializer):
     credito_disponible = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     nombre_cliente = serializers.ReadOnlyField(source='cliente.nombre_completo')
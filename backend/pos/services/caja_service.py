@@ -1,4 +1,4 @@
-from django.db import transaction, models
+from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal
 from ..models import Caja, Turno
@@ -43,35 +43,12 @@ class CajaService:
         if turno.estado != 'ABIERTA':
             raise ValueError(f"El turno {turno_id} no está abierto")
         
-        # Calcular saldo final basado en movimientos
-        # Saldo Inicial + Ventas en Efectivo - Retiros + Ingresos
-        from ..models import Venta, MovimientoCaja
+        # Saldo Inicial + Ventas en Efectivo + Ingresos - Retiros, desde los
+        # acumulados que se mantienen al escribir (TotalesTurnoService)
+        from .totales_turno_service import TotalesTurnoService
         
-        ventas_efectivo = Venta.objects.filter(
-            turno=turno,
-            estado='PAGADA'
-        ).filter(
-            metodo_pago='EFECTIVO'
-        ).aggregate(
-            total=models.Sum('total')
-        )['total'] or Decimal(0)
-        
-        # Movimientos de caja (ingresos y retiros)
-        ingresos = MovimientoCaja.objects.filter(
-            turno=turno,
-            tipo='INGRESO'
-        ).aggregate(
-            total=models.Sum('monto')
-        )['total'] or Decimal(0)
-        
-        retiros = MovimientoCaja.objects.filter(
-            turno=turno,
-            tipo='RETIRO'
-        ).aggregate(
-            total=models.Sum('monto')
-        )['total'] or Decimal(0)
-        
-        saldo_final_calculado = turno.saldo_inicial + ventas_efectivo + ingresos - retiros
+        totales = TotalesTurnoService.obtener(turno)
+        saldo_final_calculado = turno.saldo_inicial + totales.ventas_efectivo + totales.ingresos - totales.retiros
         saldo_declarado_dec = Decimal(str(saldo_declarado))
         diferencia = saldo_declarado_dec - saldo_final_calculado
         
@@ -0,0 +1,134 @@
+"""
+Sincronización incremental del catálogo offline del POS (IndexedDB).
+
+Cada terminal guarda un cursor opaco (updated_at, id) del último cambio que
+recibió y pide solo lo posterior con `since=`:
+- Sin cursor se envía el catálogo activo completo (`completo: True`).
+- Con cursor se envían los productos modificados y, como lápidas
+  (`eliminados`), los ids dados de baja con soft delete.
+Las filas viajan como listas (values_list) con los nombres en `campos`.
+"""
+import gzip
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from ..models import Producto
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson está en requirements
+    orjson = None
+
+CAMPOS = ('id', 'nombre', 'barcode', 'precio', 'impuesto', 'unidad', 'search_terms')
+_COLUMNAS = ('id', 'nombre', 'codigo', 'precio_lista', 'impuestos_porcentaje', 'unidad_medida', 'activo', 'updated_at')
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICRO = timedelta(microseconds=1)
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class CatalogoSyncService:
+    # Filas por respuesta; el cliente repite con since=<version> mientras hay_mas
+    LOTE = 2000
+    # Segundos que se excluyen del final del feed para que las transacciones
+    # en curso (updated_at ya asignado, aún sin COMMIT) no queden detrás del cursor
+    MARGEN = 5
+    GZIP_MINIMO = 1024
+
+    @staticmethod
+    def cursor(updated_at, pk) -> str:
+        # Aritmética entera: timestamp() en float puede perder el microsegundo
+        return f"{(updated_at - _EPOCH) // _MICRO}.{pk}"
+
+    @staticmethod
+    def parse_cursor(valor):
+        """'<microsegundos>.<id>' -> (datetime, id). Lanza CursorInvalido."""
+        try:
+            micros, pk = valor.split('.', 1)
+            return _EPOCH + int(micros) * _MICRO, int(pk)
+        except (AttributeError, ValueError, OverflowError, OSError):
+            raise CursorInvalido(f"Cursor inválido: {valor!r}")
+
+    @classmethod
+    def _visibles(cls):
+        margen = getattr(settings, 'POS_CATALOGO_MARGEN', cls.MARGEN)
+        return Producto.all_objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=margen))
+
+    @classmethod
+    def estado(cls) -> dict:
+        """
+        Último cambio y número de filas (incluye bajas) de lo que el feed ya
+        puede entregar; es lo que determina el ETag.
+        """
+        return cls._visibles().aggregate(ultimo=Max('updated_at'), total=Count('id'))
+
+    @classmethod
+    def etag(cls, since=None, estado=None) -> str:
+        estado = estado if estado is not None else cls.estado()
+        ultimo = estado['ultimo'].timestamp() if estado['ultimo'] else 0
+        clave = f"{since or ''}|{ultimo}|{estado['total']}"
+        return f'"{hashlib.md5(clave.encode()).hexdigest()}"'
+
+    @staticmethod
+    def _fila(pk, nombre, codigo, precio_lista, impuestos, unidad):
+        precio = precio_lista * (1 + impuestos / Decimal(100))
+        return [pk, nombre, codigo, float(precio), float(impuestos), unidad, f"{nombre} {codigo}".lower()]
+
+    @classmethod
+    def cambios(cls, since=None, lote=None) -> dict:
+        """
+        Página del feed de cambios posterior a `since` (cursor de una respuesta
+        previa). Lanza CursorInvalido si `since` no se puede interpretar.
+        """
+        lote = lote or getattr(settings, 'POS_CATALOGO_LOTE', cls.LOTE)
+        queryset = cls._visibles()
+        if since:
+            fecha, pk = cls.parse_cursor(since)
+            queryset = queryset.filter(Q(updated_at__gt=fecha) | Q(updated_at=fecha, id__gt=pk))
+        else:
+            queryset = queryset.filter(activo=True)
+
+        filas = list(queryset.order_by('updated_at', 'id').values_list(*_COLUMNAS)[:lote + 1])
+        hay_mas = len(filas) > lote
+        filas = filas[:lote]
+
+        productos, eliminados = [], []
+        for pk, nombre, codigo, precio_lista, impuestos, unidad, activo, _ in filas:
+            if activo:
+                productos.append(cls._fila(pk, nombre, codigo, precio_lista, impuestos, unidad))
+            else:
+                eliminados.append(pk)
+
+        if filas:
+            version = cls.cursor(filas[-1][-1], filas[-1][0])
+        else:
+            version = since
+        return {
+            'version': version,
+            'completo': not since,
+            'hay_mas': hay_mas,
+            'campos': CAMPOS,
+            'productos': productos,
+            'eliminados': eliminados,
+        }
+
+    @staticmethod
+    def serializar(datos) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(datos)
+        return json.dumps(datos, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    @classmethod
+    def comprimir(cls, contenido: bytes, accept_encoding: str = ''):
+        """(contenido, content_encoding) con gzip si el cliente lo acepta y vale la pena."""
+        if 'gzip' in (accept_encoding or '') and len(contenido) >= cls.GZIP_MINIMO:
+            return gzip.compress(contenido, compresslevel=6), 'gzip'
+        return contenido, None
@@ -0,0 +1,244 @@
+"""
+Ingesta en lote de las ventas que las terminales registraron sin conexión.
+
+Cada venta trae un UUID generado en la terminal (Venta.uuid_terminal): si
+ya existe, se responde como 'duplicada' con la venta original, así la
+terminal puede reintentar el lote completo sin duplicar nada.
+
+Las ventas se validan juntas (catálogo, turnos y cuentas en pocas
+consultas) y se aplican en transacciones de hasta LOTE ventas con
+bulk_create de Venta/DetalleVenta y una salida de kárdex por insumo y
+almacén (KardexService.registrar_salidas).
+"""
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from auditoria.services.audit_service import AuditService
+from inventarios.services.kardex_service import KardexService
+from ..models import CuentaCliente, DetalleVenta, MovimientoSaldoCliente, Turno, Venta
+from .totales_turno_service import TotalesTurnoService
+from .venta_service import VentaService
+
+logger = logging.getLogger(__name__)
+
+CREADA = 'creada'
+DUPLICADA = 'duplicada'
+ERROR = 'error'
+
+
+class SincronizacionVentasService:
+    # Ventas por transacción
+    LOTE = 200
+
+    @classmethod
+    def sincronizar(cls, ventas, usuario):
+        """
+        Aplica un lote de ventas offline.
+
+        Args:
+            ventas: Lista de dicts validados por VentaOfflineSerializer
+                    ({'uuid_terminal', 'turno_id', 'items', 'metodo_pago',
+                    'almacen_id', 'cliente_id', 'fecha'})
+            usuario: Usuario que sincroniza
+
+        Returns:
+            Lista de resultados en el orden de entrada:
+            {'uuid_terminal', 'estado': creada|duplicada|error, 'venta_id', 'folio', 'detalle'}
+        """
+        resultados = {}
+        pendientes = []
+        vistos = set()
+        for venta in ventas:
+            if venta['uuid_terminal'] not in vistos:
+                vistos.add(venta['uuid_terminal'])
+                pendientes.append(venta)
+
+        pendientes = cls._descartar_existentes(pendientes, resultados)
+        pendientes, insumos = cls._validar(pendientes, usuario, resultados)
+
+        lote = getattr(settings, 'POS_SYNC_LOTE', cls.LOTE)
+        for inicio in range(0, len(pendientes), lote):
+            parte = pendientes[inicio:inicio + lote]
+            try:
+                cls._aplicar(parte, usuario, resultados, insumos)
+            except IntegrityError:
+                # Otra petición subió alguna de estas ventas al mismo tiempo: se
+                # vuelven a separar las existentes y se reintenta una vez
+                logger.warning("Conflicto de uuid_terminal al sincronizar ventas; reintentando el lote")
+                parte = cls._descartar_existentes(parte, resultados)
+                if parte:
+                    cls._aplicar(parte, usuario, resultados, insumos)
+
+        return [dict(resultados[venta['uuid_terminal']], uuid_terminal=str(venta['uuid_terminal'])) for venta in ventas]
+
+    @staticmethod
+    def _descartar_existentes(ventas, resultados):
+        existentes = {
+            uuid_terminal: (pk, folio)
+            for uuid_terminal, pk, folio in Venta.all_objects.filter(
+                uuid_terminal__in=[v['uuid_terminal'] for v in ventas]
+            ).values_list('uuid_terminal', 'id', 'folio')
+        }
+        restantes = []
+        for venta in ventas:
+            if venta['uuid_terminal'] in existentes:
+                pk, folio = existentes[venta['uuid_terminal']]
+                resultados[venta['uuid_terminal']] = {'estado': DUPLICADA, 'venta_id': pk, 'folio': folio}
+            else:
+                restantes.append(venta)
+        return restantes
+
+    @staticmethod
+    def _validar(ventas, usuario, resultados):
+        """
+        Valida turnos (abiertos y del usuario que sincroniza, como en el cobro
+        en línea) y renglones de todas las ventas con una consulta por modelo. Deja en cada venta '_armado' = (detalles, salidas, subtotal, impuestos, total).
+
+        Returns:
+            (ventas válidas, {insumo_id: Insumo})
+        """
+        turnos = Turno.objects.in_bulk({v['turno_id'] for v in ventas})
+        insumos, productos = VentaService._cargar_catalogo([item for v in ventas for item in v['items']])
+
+        validas = []
+        for venta in ventas:
+            turno = turnos.get(venta['turno_id'])
+            try:
+                if turno is None or turno.estado != 'ABIERTA':
+                    raise ValueError("No existe un turno con ese ID o no está abierto")
+                if turno.usuario_id != usuario.pk:
+                    raise ValueError("El turno pertenece a otro usuario")
+                if venta['metodo_pago'] in ('CREDITO', 'ANTICIPO') and not venta.get('cliente_id'):
+                    raise ValueError("Cliente requerido para crédito/anticipo")
+                venta['_armado'] = VentaService._armar_detalles(venta['items'], insumos, productos)
+            except ValueError as e:
+                resultados[venta['uuid_terminal']] = {'estado': ERROR, 'detalle': str(e)}
+                continue
+            validas.append(venta)
+        return validas, insumos
+
+    @classmethod
+    @transaction.atomic
+    def _aplicar(cls, ventas, usuario, resultados, insumos):
+        ventas = cls._validar_cuentas(ventas, resultados)
+        if not ventas:
+            return
+
+        # 1. Ventas: folio temporal único, luego T-<id> y fecha original en un bulk_update
+        objetos = []
+        for venta in ventas:
+            _, _, subtotal, impuestos, total = venta['_armado']
+            objetos.append(Venta(
+                folio=f"TMP-{venta['uuid_terminal'].hex[:16]}",
+                uuid_terminal=venta['uuid_terminal'],
+                turno_id=venta['turno_id'],
+                cliente_id=venta.get('cliente_id'),
+                subtotal=subtotal,
+                impuestos=impuestos,
+                total=total,
+                metodo_pago=venta['metodo_pago'],
+                monto_metodo_principal=total,
+                estado='PAGADA',
+                created_by=usuario,
+                updated_by=usuario,
+            ))
+        objetos = Venta.all_objects.bulk_create(objetos)
+        for objeto, venta in zip(objetos, ventas):
+            objeto.folio = f"T-{objeto.pk:06d}"
+            if venta.get('fecha'):
+                objeto.fecha = venta['fecha']
+        Venta.all_objects.bulk_update(objetos, ['folio', 'fecha'])
+        TotalesTurnoService.acumular_ventas(objetos)
+
+        # 2. Detalles y salidas agregadas por almacén e insumo
+        detalles = []
+        salidas = {}
+        for objeto, venta in zip(objetos, ventas):
+            renglones, salidas_venta, *_ = venta['_armado']
+            for detalle in renglones:
+                detalle.venta = objeto
+                detalles.append(detalle)
+            por_insumo = salidas.setdefault(venta['almacen_id'], {})
+            for insumo_id, qty in salidas_venta.items():
+                por_insumo[insumo_id] = por_insumo.get(insumo_id, Decimal(0)) + qty
+        DetalleVenta.objects.bulk_create(detalles)
+
+        referencia = f"Ventas POS offline {objetos[0].folio} a {objetos[-1].folio} ({len(objetos)})"
+        for almacen_id in sorted(salidas):
+            # Las ventas ya ocurrieron en la tienda: se registran aunque dejen stock negativo
+            KardexService.registrar_salidas(
+                almacen_id, salidas[almacen_id],
+                referencia=referencia, usuario=usuario, permitir_negativo=True, insumos=insumos
+            )
+
+        # 3. Cuentas de cliente (crédito/anticipo)
+        movimientos = []
+        cuentas = {}
+        for objeto, venta in zip(objetos, ventas):
+            cuenta = venta.get('_cuenta')
+            if cuenta is None:
+                continue
+            saldo_anterior = cuenta.saldo
+            cuenta.saldo -= objeto.total
+            cuentas[cuenta.pk] = cuenta
+            movimientos.append(MovimientoSaldoCliente(
+                cuenta=cuenta,
+                tipo='CARGO_VENTA' if venta['metodo_pago'] == 'CREDITO' else 'CARGO_USO_ANTICIPO',
+                monto=objeto.total,
+                referencia_venta=objeto,
+                saldo_anterior=saldo_anterior,
+                saldo_nuevo=cuenta.saldo,
+                comentarios=f"Pago {venta['metodo_pago']} - Venta {objeto.folio} (offline)"
+            ))
+        if movimientos:
+            CuentaCliente.objects.bulk_update(cuentas.values(), ['saldo'])
+            MovimientoSaldoCliente.objects.bulk_create(movimientos)
+
+        # 4. Auditoría (bulk_create no dispara post_save) y resultados
+        for objeto in objetos:
+            AuditService.log_diferido(
+                obj=objeto, accion='CREATE', cambios=None, usuario=usuario,
+                descripcion="Venta offline sincronizada"
+            )
+            resultados[objeto.uuid_terminal] = {'estado': CREADA, 'venta_id': objeto.pk, 'folio': objeto.folio}
+
+    @staticmethod
+    def _validar_cuentas(ventas, resultados):
+        """
+        Bloquea las cuentas de los clientes que pagan con crédito/anticipo
+        (orden por id) y valida los fondos venta por venta, en el orden de
+        captura.
+        """
+        clientes = sorted({v['cliente_id'] for v in ventas if v['metodo_pago'] in ('CREDITO', 'ANTICIPO')})
+        if not clientes:
+            return ventas
+        for cliente_id in clientes:
+            CuentaCliente.objects.get_or_create(cliente_id=cliente_id)
+        cuentas = {
+            cuenta.cliente_id: cuenta
+            for cuenta in CuentaCliente.objects.select_for_update().filter(cliente_id__in=clientes).order_by('id')
+        }
+
+        disponibles = {}
+        validas = []
+        for venta in ventas:
+            if venta['metodo_pago'] not in ('CREDITO', 'ANTICIPO'):
+                validas.append(venta)
+                continue
+            cuenta = cuentas[venta['cliente_id']]
+            total = venta['_armado'][4]
+            # Fondos comprometidos por las ventas anteriores del mismo lote
+            comprometido = disponibles.get(cuenta.pk, Decimal(0))
+            prueba = CuentaCliente(limite_credito=cuenta.limite_credito, saldo=cuenta.saldo - comprometido)
+            try:
+                VentaService._validar_metodo_pago(venta['metodo_pago'], total, prueba)
+            except ValueError as e:
+                resultados[venta['uuid_terminal']] = {'estado': ERROR, 'detalle': str(e)}
+                continue
+            disponibles[cuenta.pk] = comprometido + total
+            venta['_cuenta'] = cuenta
+            validas.append(venta)
+        return validas
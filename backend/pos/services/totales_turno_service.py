@@ -0,0 +1,182 @@
+"""
+Acumulados por turno (TotalesTurno) mantenidos al escribir.
+
+Cada alta, cambio o baja de Venta y MovimientoCaja suma su diferencia con
+un UPDATE ... SET campo = campo + delta sobre la fila del turno, así el
+corte de caja (CajaService.cerrar_turno) es una lectura por llave.
+
+Las señales cubren save()/delete(); los caminos con bulk_create (ventas
+offline) llaman a acumular_ventas explícitamente.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F, Q, Sum
+from django.db.models.signals import post_init, post_save, post_delete
+
+from ..models import MovimientoCaja, TotalesTurno, Venta
+
+CAMPO_POR_METODO = {
+    'EFECTIVO': 'ventas_efectivo',
+    'TARJETA': 'ventas_tarjeta',
+    'TRANSFERENCIA': 'ventas_transferencia',
+    'CREDITO': 'ventas_credito',
+    'ANTICIPO': 'ventas_anticipo',
+}
+CAMPOS = ('num_ventas', *CAMPO_POR_METODO.values(), 'ingresos', 'retiros')
+
+# Aporte del objeto tal como se cargó/guardó la última vez: (turno_id, deltas)
+APORTE_ATTR = '_totales_aporte'
+# Campos que determinan el aporte; si se cargaron diferidos no se calcula en post_init
+CAMPOS_APORTE = {
+    Venta: {'turno_id', 'estado', 'activo', 'total', 'metodo_pago', 'metodo_pago_secundario', 'monto_metodo_secundario'},
+    MovimientoCaja: {'turno_id', 'tipo', 'monto'},
+}
+DESCONOCIDO = object()
+
+
+class TotalesTurnoService:
+
+    @staticmethod
+    def aporte_venta(venta) -> dict:
+        """Lo que una venta suma a los totales de su turno (vacío si no cuenta)."""
+        if venta.estado != 'PAGADA' or not venta.activo:
+            return {}
+        secundario = venta.monto_metodo_secundario if venta.metodo_pago_secundario else Decimal(0)
+        deltas = {'num_ventas': 1}
+        for metodo, monto in ((venta.metodo_pago, venta.total - secundario),
+                              (venta.metodo_pago_secundario, secundario)):
+            campo = CAMPO_POR_METODO.get(metodo)
+            if campo and monto:
+                deltas[campo] = deltas.get(campo, Decimal(0)) + monto
+        return deltas
+
+    @staticmethod
+    def aporte_movimiento(movimiento) -> dict:
+        if movimiento.tipo == 'INGRESO':
+            return {'ingresos': movimiento.monto}
+        if movimiento.tipo == 'RETIRO':
+            return {'retiros': movimiento.monto}
+        return {}
+
+    @staticmethod
+    def acumular(turno_id, deltas):
+        """Suma `deltas` ({campo: valor}) a la fila del turno con un solo UPDATE."""
+        deltas = {campo: valor for campo, valor in deltas.items() if valor}
+        if not turno_id or not deltas:
+            return
+        cambios = {campo: F(campo) + valor for campo, valor in deltas.items()}
+        if not TotalesTurno.objects.filter(turno_id=turno_id).update(**cambios):
+            TotalesTurno.objects.get_or_create(turno_id=turno_id)
+            TotalesTurno.objects.filter(turno_id=turno_id).update(**cambios)
+
+    @classmethod
+    def acumular_ventas(cls, ventas):
+        """Para ventas creadas con bulk_create: un UPDATE por turno."""
+        por_turno = defaultdict(lambda: defaultdict(Decimal))
+        for venta in ventas:
+            for campo, valor in cls.aporte_venta(venta).items():
+                por_turno[venta.turno_id][campo] += valor
+            setattr(venta, APORTE_ATTR, (venta.turno_id, cls.aporte_venta(venta)))
+        for turno_id in sorted(por_turno):
+            cls.acumular(turno_id, por_turno[turno_id])
+
+    @classmethod
+    def _aplicar_diferencia(cls, instance, nuevo_aporte):
+        turno_anterior, anterior = getattr(instance, APORTE_ATTR, (None, {}))
+        if turno_anterior == instance.turno_id:
+            diferencia = {
+                campo: nuevo_aporte.get(campo, 0) - anterior.get(campo, 0)
+                for campo in set(anterior) | set(nuevo_aporte)
+            }
+            cls.acumular(instance.turno_id, diferencia)
+        else:
+            cls.acumular(turno_anterior, {campo: -valor for campo, valor in anterior.items()})
+            cls.acumular(instance.turno_id, nuevo_aporte)
+        setattr(instance, APORTE_ATTR, (instance.turno_id, nuevo_aporte))
+
+    @classmethod
+    def obtener(cls, turno) -> TotalesTurno:
+        """Fila de totales del turno (sin guardar, en ceros, si aún no existe)."""
+        return TotalesTurno.objects.filter(turno=turno).first() or TotalesTurno(turno=turno)
+
+    @staticmethod
+    def recalcular(turno_ids=None):
+        """
+        Reconstruye los totales desde Venta y MovimientoCaja (respaldo y
+        migración inicial). Devuelve el número de turnos recalculados.
+        """
+        ventas = Venta.all_objects.filter(estado='PAGADA', activo=True)
+        movimientos = MovimientoCaja.objects.all()
+        if turno_ids is not None:
+            ventas = ventas.filter(turno_id__in=turno_ids)
+            movimientos = movimientos.filter(turno_id__in=turno_ids)
+
+        totales = defaultdict(lambda: {campo: 0 for campo in CAMPOS})
+        for venta in ventas.only(
+            'turno_id', 'estado', 'activo', 'total', 'metodo_pago',
+            'metodo_pago_secundario', 'monto_metodo_secundario'
+        ).iterator():
+            for campo, valor in TotalesTurnoService.aporte_venta(venta).items():
+                totales[venta.turno_id][campo] += valor
+        for fila in movimientos.values('turno_id').annotate(
+            ingresos=Sum('monto', filter=Q(tipo='INGRESO')),
+            retiros=Sum('monto', filter=Q(tipo='RETIRO')),
+        ):
+            totales[fila['turno_id']]['ingresos'] = fila['ingresos'] or 0
+            totales[fila['turno_id']]['retiros'] = fila['retiros'] or 0
+
+        if turno_ids is not None:
+            # Los turnos sin ventas ni movimientos también quedan en ceros
+            for turno_id in turno_ids:
+                totales.setdefault(turno_id, {campo: 0 for campo in CAMPOS})
+        TotalesTurno.objects.bulk_create(
+            [TotalesTurno(turno_id=turno_id, **valores) for turno_id, valores in totales.items()],
+            update_conflicts=True,
+            unique_fields=['turno'],
+            update_fields=list(CAMPOS),
+        )
+        return len(totales)
+
+    @classmethod
+    def conectar_senales(cls):
+        for model in (Venta, MovimientoCaja):
+            post_init.connect(_al_cargar, sender=model, dispatch_uid=f"pos:totales:init:{model.__name__}")
+            post_save.connect(_al_guardar, sender=model, dispatch_uid=f"pos:totales:save:{model.__name__}")
+            post_delete.connect(_al_borrar, sender=model, dispatch_uid=f"pos:totales:delete:{model.__name__}")
+
+
+def _aporte(instance):
+    if isinstance(instance, Venta):
+        return TotalesTurnoService.aporte_venta(instance)
+    return TotalesTurnoService.aporte_movimiento(instance)
+
+
+def _al_cargar(sender, instance, **kwargs):
+    # Solo las filas leídas de la BD ya están sumadas; las nuevas aportan al crearse
+    if instance.pk is None:
+        return
+    if CAMPOS_APORTE[type(instance)] & instance.get_deferred_fields():
+        # .only()/.defer(): calcularlo aquí dispararía una consulta por fila
+        setattr(instance, APORTE_ATTR, DESCONOCIDO)
+    else:
+        setattr(instance, APORTE_ATTR, (instance.turno_id, _aporte(instance)))
+
+
+def _al_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        setattr(instance, APORTE_ATTR, (None, {}))
+    elif getattr(instance, APORTE_ATTR, None) is DESCONOCIDO:
+        TotalesTurnoService.recalcular([instance.turno_id])
+        setattr(instance, APORTE_ATTR, (instance.turno_id, _aporte(instance)))
+        return
+    TotalesTurnoService._aplicar_diferencia(instance, _aporte(instance))
+
+
+def _al_borrar(sender, instance, **kwargs):
+    if getattr(instance, APORTE_ATTR, None) is DESCONOCIDO:
+        TotalesTurnoService.recalcular([instance.turno_id])
+        return
+    TotalesTurnoService._aplicar_diferencia(instance, {})
@@ -1,5 +1,5 @@
 from django.db import transaction
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from decimal import Decimal
 from ..models import (
     Turno, Venta, DetalleVenta, Producto,
@@ -9,6 +9,9 @@ from compras.models import Insumo
 from inventarios.services.kardex_service import KardexService
 from core.services.config_service import ConfigService
 
+TASA_IVA = Decimal('0.16')
+CENTAVOS = Decimal('0.01')
+
 
 class VentaService:
     """
@@ -47,30 +50,20 @@ class VentaService:
         if not items:
             raise ValueError("La venta no tiene productos")
         
-        # 1. Calcular total de la venta
+        # 1. Calcular total de la venta (todos los productos en una consulta)
         total_venta = Decimal(0)
-        productos_map = {}
+        lineas = []
+        productos = Producto.objects.in_bulk({item['producto_id'] for item in items})
         
         for item in items:
-            prod = get_object_or_404(Producto, pk=item['producto_id'])
+            prod = productos.get(item['producto_id'])
+            if prod is None:
+                raise Http404(f"No existe el producto {item['producto_id']}")
             qty = Decimal(str(item['cantidad']))
             
-            # V2.0: Validar stock negativo según configuración
-            allow_negative = ConfigService.get_value('POS_ALLOW_NEGATIVE_STOCK', False)
-            if not allow_negative and hasattr(prod, 'stock_actual'):
-                if prod.stock_actual < qty:
-                    raise ValueError(
-                        f"Stock insuficiente para {prod.nombre}. "
-                        f"Disponible: {prod.stock_actual}, Solicitado: {qty}"
-                    )
-            
             line_total = prod.precio_final * qty
             total_venta += line_total
-            productos_map[prod.id] = {
-                'prod': prod,
-                'qty': qty,
-                'price': prod.precio_final
-            }
+            lineas.append((prod, qty, prod.precio_final))
         
         # 2. Validar montos de pago
         if metodo_secundario:
@@ -103,22 +96,25 @@ class VentaService:
             subtotal=total_venta / Decimal('1.16'),
             impuestos=total_venta - (total_venta / Decimal('1.16')),
             total=total_venta,
-            metodo_pago_principal=metodo_principal,
+            metodo_pago=metodo_principal,
             monto_metodo_principal=monto_principal,
             metodo_pago_secundario=metodo_secundario,
             monto_metodo_secundario=monto_secundario,
             estado='PAGADA'
         )
         
-        # 6. Crear detalles de venta
-        for pid, info in productos_map.items():
-            DetalleVenta.objects.create(
+        # 6. Crear detalles de venta (bulk_create no llama a save(): subtotal y descripción explícitos)
+        DetalleVenta.objects.bulk_create([
+            DetalleVenta(
                 venta=venta,
-                producto=info['prod'],
-                cantidad=info['qty'],
-                precio_unitario=info['price'],
-                subtotal=info['price'] * info['qty']
+                producto=prod,
+                descripcion=prod.nombre[:200],
+                cantidad=qty,
+                precio_unitario=price,
+                subtotal=price * qty
             )
+            for prod, qty, price in lineas
+        ])
         
         # 7. Aplicar movimientos de cuenta
         VentaService._aplicar_movimiento_cuenta(
@@ -131,6 +127,131 @@ class VentaService:
         
         return venta
 
+    @staticmethod
+    @transaction.atomic
+    def crear_venta(turno_id, items, metodo_pago, almacen_id, usuario, cliente_id=None):
+        """
+        Checkout del POS: crea la venta y descuenta las existencias del almacén.
+        
+        El número de consultas no depende del número de renglones:
+        - Insumos y productos se cargan con in_bulk; la configuración se lee una vez.
+        - Detalles con bulk_create; el stock se descuenta con
+          KardexService.registrar_salidas (bloqueo ordenado + UPDATE ... CASE).
+        
+        Args:
+            turno_id: ID del turno abierto
+            items: Lista de dicts {'tipo': 'insumo'|'producto', 'insumo_id'|'producto_id',
+                   'cantidad', 'precio_unitario'} (precio antes de IVA)
+            metodo_pago: Método de pago de la venta
+            almacen_id: Almacén desde donde se descuenta el stock
+            usuario: Usuario que registra la venta
+            cliente_id: Cliente (opcional, requerido para CREDITO/ANTICIPO)
+        
+        Returns:
+            Venta creada
+        
+        Raises:
+            ValueError: Si las validaciones de negocio fallan
+        """
+        if not items:
+            raise ValueError("La venta no tiene productos")
+        
+        turno = Turno.objects.filter(pk=turno_id, estado='ABIERTA').first()
+        if turno is None:
+            raise ValueError("No existe un turno con ese ID o no está abierto")
+        
+        allow_negative = ConfigService.get_value('POS_ALLOW_NEGATIVE_STOCK', False)
+        
+        # 1. Cargar catálogo de una sola vez y armar renglones
+        insumos, productos = VentaService._cargar_catalogo(items)
+        detalles, salidas, subtotal, impuestos, total = VentaService._armar_detalles(items, insumos, productos)
+        
+        # 2. Validar método de pago contra la cuenta del cliente
+        cuenta = None
+        if cliente_id:
+            cuenta, _ = CuentaCliente.objects.get_or_create(cliente_id=cliente_id)
+        VentaService._validar_metodo_pago(metodo_pago, total, cuenta)
+        
+        # 3. Crear venta y detalles
+        venta = Venta.objects.create(
+            turno=turno,
+            cliente_id=cliente_id,
+            subtotal=subtotal,
+            impuestos=impuestos,
+            total=total,
+            metodo_pago=metodo_pago,
+            monto_metodo_principal=total,
+            estado='PAGADA'
+        )
+        for detalle in detalles:
+            detalle.venta = venta
+        DetalleVenta.objects.bulk_create(detalles)
+        
+        # 4. Kárdex y existencias (si no alcanza, ValueError revierte todo)
+        KardexService.registrar_salidas(
+            almacen_id,
+            salidas,
+            referencia=f"Venta POS {venta.folio}",
+            usuario=usuario,
+            permitir_negativo=allow_negative,
+            insumos=insumos
+        )
+        
+        # 5. Aplicar movimientos de cuenta
+        VentaService._aplicar_movimiento_cuenta(metodo_pago, total, cuenta, venta)
+        
+        return venta
+
+    @staticmethod
+    def _cargar_catalogo(items):
+        """Insumos y productos referenciados por `items`: {id: instancia}, una consulta por modelo."""
+        ids_insumo = {item['insumo_id'] for item in items if item.get('tipo', 'insumo') == 'insumo'}
+        ids_producto = {item['producto_id'] for item in items if item.get('tipo') == 'producto'}
+        insumos = Insumo.objects.in_bulk(ids_insumo) if ids_insumo else {}
+        productos = Producto.objects.in_bulk(ids_producto) if ids_producto else {}
+        return insumos, productos
+
+    @staticmethod
+    def _armar_detalles(items, insumos, productos):
+        """
+        DetalleVenta (sin guardar) y totales de una venta.
+        
+        Returns:
+            (detalles, salidas {insumo_id: cantidad}, subtotal, impuestos, total)
+        
+        Raises:
+            ValueError: Cantidad inválida o artículo inexistente
+        """
+        detalles = []
+        salidas = {}
+        subtotal = Decimal(0)
+        for item in items:
+            qty = Decimal(str(item['cantidad']))
+            precio = Decimal(str(item['precio_unitario']))
+            if qty <= 0:
+                raise ValueError("La cantidad debe ser mayor a cero")
+            if item.get('tipo', 'insumo') == 'insumo':
+                insumo = insumos.get(item['insumo_id'])
+                if insumo is None:
+                    raise ValueError(f"No existe el insumo {item['insumo_id']}")
+                salidas[insumo.id] = salidas.get(insumo.id, Decimal(0)) + qty
+                detalle = DetalleVenta(insumo=insumo, descripcion=insumo.descripcion[:200])
+            else:
+                producto = productos.get(item['producto_id'])
+                if producto is None:
+                    raise ValueError(f"No existe el producto {item['producto_id']}")
+                detalle = DetalleVenta(producto=producto, descripcion=producto.nombre[:200])
+            # bulk_create no llama a DetalleVenta.save(): subtotal explícito
+            detalle.cantidad = qty
+            detalle.precio_unitario = precio
+            detalle.subtotal = qty * precio
+            detalles.append(detalle)
+            subtotal += detalle.subtotal
+        
+        subtotal = subtotal.quantize(CENTAVOS)
+        impuestos = (subtotal * TASA_IVA).quantize(CENTAVOS)
+        return detalles, salidas, subtotal, impuestos, subtotal + impuestos
+
     @staticmethod
     def _validar_metodo_pago(metodo, monto, cuenta):
         """
@@ -204,7 +325,7 @@ class VentaService:
         venta.save()
         
         # Revertir movimientos de saldo si aplica
-        if venta.metodo_pago_principal in ['CREDITO', 'ANTICIPO'] and venta.cliente:
+        if venta.metodo_pago in ['CREDITO', 'ANTICIPO'] and venta.cliente:
             cuenta = CuentaCliente.objects.get(cliente=venta.cliente)
             saldo_anterior = cuenta.saldo
             cuenta.saldo += venta.total
@@ -239,7 +360,7 @@ class VentaService:
         venta = solicitud.venta
         
         # Revertir movimientos de saldo si aplica
-        if venta.metodo_pago_principal in ['CREDITO', 'ANTICIPO'] and venta.cliente:
+        if venta.metodo_pago in ['CREDITO', 'ANTICIPO'] and venta.cliente:
             try:
                 cuenta = CuentaCliente.objects.get(cliente=venta.cliente)
                 saldo_anterior = cuenta.saldo
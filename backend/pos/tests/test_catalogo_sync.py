@@ -0,0 +1,106 @@
+import gzip
+import json
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pos.models import Producto
+from pos.services.catalogo_sync_service import CatalogoSyncService
+from pos.views import ProductoViewSet
+
+
+@pytest.mark.django_db
+class TestCatalogoSync:
+    @pytest.fixture(autouse=True)
+    def sin_margen(self, settings):
+        settings.POS_CATALOGO_MARGEN = 0
+
+    @pytest.fixture
+    def user(self, django_user_model):
+        return django_user_model.objects.create_user(username='terminal', password='password')
+
+    @pytest.fixture
+    def productos(self):
+        return [
+            Producto.objects.create(codigo=f"SKU-{i}", nombre=f"Grava {i}", precio_lista=Decimal('100'))
+            for i in range(3)
+        ]
+
+    def _pedir(self, user, headers=None, **params):
+        request = APIRequestFactory().get('/pos/productos/productos-fast/', params, headers=headers or {})
+        force_authenticate(request, user=user)
+        return ProductoViewSet.as_view({'get': 'productos_fast'})(request)
+
+    @staticmethod
+    def _json(response):
+        contenido = response.content
+        if response.get('Content-Encoding') == 'gzip':
+            contenido = gzip.decompress(contenido)
+        return json.loads(contenido)
+
+    def test_sincronizacion_completa_compacta(self, user, productos):
+        response = self._pedir(user)
+
+        assert response.status_code == 200
+        datos = self._json(response)
+        assert datos['completo'] is True
+        assert datos['campos'][:3] == ['id', 'nombre', 'barcode']
+        assert [fila[0] for fila in datos['productos']] == [p.id for p in productos]
+        assert datos['productos'][0][3] == pytest.approx(116.0)
+        assert datos['eliminados'] == []
+
+    def test_delta_con_lapidas(self, user, productos):
+        version = self._json(self._pedir(user))['version']
+
+        productos[0].nombre = "Grava lavada"
+        productos[0].save()
+        productos[1].delete()  # soft delete
+
+        datos = self._json(self._pedir(user, since=version))
+        assert datos['completo'] is False
+        assert [fila[1] for fila in datos['productos']] == ["Grava lavada"]
+        assert datos['eliminados'] == [productos[1].id]
+
+        # Nada nuevo después del último cursor
+        vacio = self._json(self._pedir(user, since=datos['version']))
+        assert vacio['productos'] == [] and vacio['eliminados'] == []
+        assert vacio['version'] == datos['version']
+
+    def test_paginado_por_cursor(self, user, productos, settings):
+        settings.POS_CATALOGO_LOTE = 2
+
+        primera = self._json(self._pedir(user))
+        assert primera['hay_mas'] is True
+        segunda = self._json(self._pedir(user, since=primera['version']))
+        assert segunda['hay_mas'] is False
+        assert [f[0] for f in primera['productos'] + segunda['productos']] == [p.id for p in productos]
+
+    def test_etag_304_hasta_que_hay_cambios(self, user, productos):
+        response = self._pedir(user)
+        etag = response['ETag']
+
+        assert self._pedir(user, headers={'If-None-Match': etag}).status_code == 304
+
+        productos[2].precio_lista = Decimal('120')
+        productos[2].save()
+        assert self._pedir(user, headers={'If-None-Match': etag}).status_code == 200
+
+    def test_gzip_si_el_cliente_lo_acepta(self, user):
+        Producto.objects.bulk_create([
+            Producto(codigo=f"BULK-{i}", nombre=f"Material {i}", precio_lista=Decimal('10'))
+            for i in range(100)
+        ])
+
+        response = self._pedir(user, headers={'Accept-Encoding': 'gzip, deflate'})
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert len(self._json(response)['productos']) == 100
+
+    def test_cursor_invalido(self, user):
+        assert self._pedir(user, since='no-es-cursor').status_code == 400
+
+    def test_cursor_ida_y_vuelta(self, productos):
+        p = Producto.all_objects.get(pk=productos[0].pk)
+        assert CatalogoSyncService.parse_cursor(CatalogoSyncService.cursor(p.updated_at, p.pk)) == (p.updated_at, p.pk)
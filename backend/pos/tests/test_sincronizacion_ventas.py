@@ -0,0 +1,178 @@
+import time
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from compras.models import Insumo
+from inventarios.models import Almacen, Existencia, MovimientoInventario
+from pos.models import Caja, DetalleVenta, Venta
+from pos.services.caja_service import CajaService
+from pos.services.sincronizacion_service import SincronizacionVentasService
+from pos.services.venta_service import VentaService
+from pos.views_api import VentaPOSViewSet
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestSincronizacionVentas:
+    def setup_method(self):
+        self.usuario = User.objects.create_user(username="terminal_offline", password="password")
+        self.caja = Caja.objects.create(nombre="Caja Offline", saldo_inicial_default=0)
+        self.almacen = Almacen.objects.create(nombre="Almacén Offline", codigo="ALM-OFF")
+        self.turno = CajaService.abrir_turno(self.caja.id, self.usuario, 0)
+        self.insumos = []
+        for i in range(3):
+            insumo = Insumo.objects.create(
+                codigo=f"OFF-{i}", descripcion=f"Artículo offline {i}", tipo="PRODUCTO", costo_promedio=Decimal('5')
+            )
+            Existencia.objects.create(insumo=insumo, almacen=self.almacen, cantidad=1000)
+            self.insumos.append(insumo)
+
+    def _venta(self, cantidad=1, **extra):
+        datos = {
+            'uuid_terminal': uuid.uuid4(),
+            'turno_id': self.turno.id,
+            'items': [
+                {'tipo': 'insumo', 'insumo_id': i.id, 'cantidad': Decimal(cantidad), 'precio_unitario': Decimal('10')}
+                for i in self.insumos
+            ],
+            'metodo_pago': 'EFECTIVO',
+            'almacen_id': self.almacen.id,
+            'cliente_id': None,
+        }
+        datos.update(extra)
+        return datos
+
+    def test_crea_ventas_con_salida_agregada(self):
+        ventas = [self._venta() for _ in range(5)]
+
+        resultados = SincronizacionVentasService.sincronizar(ventas, self.usuario)
+
+        assert [r['estado'] for r in resultados] == ['creada'] * 5
+        assert Venta.objects.filter(turno=self.turno).count() == 5
+        assert DetalleVenta.objects.filter(venta__turno=self.turno).count() == 15
+        assert all(r['folio'] == f"T-{r['venta_id']:06d}" for r in resultados)
+        # Una salida por insumo para todo el lote
+        salidas = MovimientoInventario.objects.filter(tipo_movimiento='SALIDA')
+        assert salidas.count() == 3
+        assert set(salidas.values_list('cantidad', flat=True)) == {Decimal('-5')}
+        assert Existencia.objects.get(insumo=self.insumos[0], almacen=self.almacen).cantidad == 995
+
+    def test_reintento_es_idempotente(self):
+        ventas = [self._venta() for _ in range(3)]
+        primera = SincronizacionVentasService.sincronizar(ventas, self.usuario)
+
+        segunda = SincronizacionVentasService.sincronizar(ventas + [ventas[0]], self.usuario)
+
+        assert [r['estado'] for r in segunda] == ['duplicada'] * 4
+        assert [r['venta_id'] for r in segunda[:3]] == [r['venta_id'] for r in primera]
+        assert Venta.objects.filter(turno=self.turno).count() == 3
+        assert Existencia.objects.get(insumo=self.insumos[0], almacen=self.almacen).cantidad == 997
+
+    def test_errores_por_venta_no_bloquean_el_lote(self):
+        otra_caja = Caja.objects.create(nombre="Caja Cerrada", saldo_inicial_default=0)
+        turno_cerrado = CajaService.abrir_turno(otra_caja.id, self.usuario, 0)
+        CajaService.cerrar_turno(turno_cerrado.id, 0)
+        ventas = [
+            self._venta(),
+            self._venta(turno_id=turno_cerrado.id),
+            self._venta(items=[{'tipo': 'insumo', 'insumo_id': 999999, 'cantidad': 1, 'precio_unitario': 1}]),
+            self._venta(metodo_pago='CREDITO'),
+        ]
+
+        resultados = SincronizacionVentasService.sincronizar(ventas, self.usuario)
+
+        assert [r['estado'] for r in resultados] == ['creada', 'error', 'error', 'error']
+        assert "turno" in resultados[1]['detalle']
+        assert "999999" in resultados[2]['detalle']
+        assert Venta.objects.filter(uuid_terminal=ventas[0]['uuid_terminal']).exists()
+
+    def test_rechaza_turno_de_otro_usuario(self):
+        otro = User.objects.create_user(username="otro_cajero", password="password")
+        turno_ajeno = CajaService.abrir_turno(
+            Caja.objects.create(nombre="Caja Ajena", saldo_inicial_default=0).id, otro, 0
+        )
+
+        resultados = SincronizacionVentasService.sincronizar([self._venta(turno_id=turno_ajeno.id)], self.usuario)
+
+        assert resultados[0]['estado'] == 'error'
+        assert "otro usuario" in resultados[0]['detalle']
+        assert not Venta.objects.filter(turno=turno_ajeno).exists()
+
+    def test_ventas_offline_se_registran_aunque_dejen_stock_negativo(self):
+        SincronizacionVentasService.sincronizar([self._venta(cantidad=1500)], self.usuario)
+
+        assert Existencia.objects.get(insumo=self.insumos[0], almacen=self.almacen).cantidad == -500
+
+    def test_consultas_no_crecen_con_el_numero_de_ventas(self):
+        with CaptureQueriesContext(connection) as pocas:
+            SincronizacionVentasService.sincronizar([self._venta() for _ in range(2)], self.usuario)
+        with CaptureQueriesContext(connection) as muchas:
+            SincronizacionVentasService.sincronizar([self._venta() for _ in range(40)], self.usuario)
+
+        assert len(muchas.captured_queries) == len(pocas.captured_queries)
+
+    def test_endpoint_resultados_por_venta(self):
+        valida = self._venta()
+        payload = {'ventas': [
+            {**valida, 'uuid_terminal': str(valida['uuid_terminal']), 'items': [
+                {**item, 'cantidad': str(item['cantidad']), 'precio_unitario': str(item['precio_unitario'])}
+                for item in valida['items']
+            ]},
+            {'uuid_terminal': str(uuid.uuid4()), 'items': []},
+        ]}
+        request = APIRequestFactory().post('/pos/ventas-pos/sincronizar/', payload, format='json')
+        force_authenticate(request, user=self.usuario)
+
+        response = VentaPOSViewSet.as_view({'post': 'sincronizar'})(request)
+
+        assert response.status_code == 200
+        assert [r['estado'] for r in response.data['resultados']] == ['creada', 'error']
+        assert response.data['resultados'][0]['uuid_terminal'] == str(valida['uuid_terminal'])
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_benchmark_reconexion_tras_corte():
+    """
+    500 ventas acumuladas en un corte de conexión: lote idempotente contra
+    reenviarlas una por una con VentaService.crear_venta.
+    """
+    usuario = User.objects.create_user(username="terminal_bench", password="password")
+    almacen = Almacen.objects.create(nombre="Almacén Bench", codigo="ALM-BENCH")
+    turno = CajaService.abrir_turno(Caja.objects.create(nombre="Caja Bench").id, usuario, 0)
+    insumos = []
+    for i in range(5):
+        insumo = Insumo.objects.create(codigo=f"BENCH-{i}", descripcion=f"Bench {i}", tipo="PRODUCTO")
+        Existencia.objects.create(insumo=insumo, almacen=almacen, cantidad=100_000)
+        insumos.append(insumo)
+
+    def venta():
+        return {
+            'uuid_terminal': uuid.uuid4(),
+            'turno_id': turno.id,
+            'items': [{'tipo': 'insumo', 'insumo_id': i.id, 'cantidad': 1, 'precio_unitario': 10} for i in insumos],
+            'metodo_pago': 'EFECTIVO',
+            'almacen_id': almacen.id,
+            'cliente_id': None,
+        }
+
+    n = 500
+    t0 = time.perf_counter()
+    for datos in (venta() for _ in range(n)):
+        VentaService.crear_venta(datos['turno_id'], datos['items'], 'EFECTIVO', almacen.id, usuario)
+    una_por_una = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    resultados = SincronizacionVentasService.sincronizar([venta() for _ in range(n)], usuario)
+    en_lote = time.perf_counter() - t0
+
+    assert all(r['estado'] == 'creada' for r in resultados)
+    print(f"\n{n} ventas offline: una por una {una_por_una:.2f}s, en lote {en_lote:.2f}s "
+          f"({una_por_una / en_lote:.1f}x)")
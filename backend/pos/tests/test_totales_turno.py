@@ -0,0 +1,133 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from compras.models import Insumo
+from inventarios.models import Almacen, Existencia
+from pos.models import Caja, MovimientoCaja, TotalesTurno, Venta
+from pos.services.caja_service import CajaService
+from pos.services.sincronizacion_service import SincronizacionVentasService
+from pos.services.totales_turno_service import TotalesTurnoService
+from pos.services.venta_service import VentaService
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestTotalesTurno:
+    def setup_method(self):
+        self.usuario = User.objects.create_user(username="cajero_totales", password="password")
+        self.caja = Caja.objects.create(nombre="Caja Totales")
+        self.almacen = Almacen.objects.create(nombre="Almacén Totales", codigo="ALM-TOT")
+        self.insumo = Insumo.objects.create(codigo="TOT-1", descripcion="Cemento", tipo="PRODUCTO")
+        Existencia.objects.create(insumo=self.insumo, almacen=self.almacen, cantidad=1000)
+        self.turno = CajaService.abrir_turno(self.caja.id, self.usuario, 500)
+
+    def _vender(self, metodo='EFECTIVO', precio=100):
+        return VentaService.crear_venta(
+            turno_id=self.turno.id,
+            items=[{'tipo': 'insumo', 'insumo_id': self.insumo.id, 'cantidad': 1, 'precio_unitario': precio}],
+            metodo_pago=metodo,
+            almacen_id=self.almacen.id,
+            usuario=self.usuario,
+        )
+
+    def _totales(self):
+        return TotalesTurno.objects.get(turno=self.turno)
+
+    def test_acumula_ventas_por_metodo_y_movimientos(self):
+        self._vender()                     # 116.00
+        self._vender(metodo='TARJETA')     # 116.00
+        MovimientoCaja.objects.create(turno=self.turno, tipo='INGRESO', monto=50, concepto="Abono")
+        MovimientoCaja.objects.create(turno=self.turno, tipo='RETIRO', monto=20, concepto="Retiro")
+
+        totales = self._totales()
+        assert totales.num_ventas == 2
+        assert totales.ventas_efectivo == Decimal('116.00')
+        assert totales.ventas_tarjeta == Decimal('116.00')
+        assert totales.ingresos == 50
+        assert totales.retiros == 20
+
+    def test_cancelar_y_borrar_revierte(self):
+        venta = self._vender()
+        movimiento = MovimientoCaja.objects.create(turno=self.turno, tipo='RETIRO', monto=30, concepto="Retiro")
+
+        VentaService.cancelar_venta(venta, self.usuario, "Error de captura")
+        movimiento.delete()
+
+        totales = self._totales()
+        assert totales.num_ventas == 0
+        assert totales.ventas_efectivo == 0
+        assert totales.retiros == 0
+
+    def test_cancelacion_sobre_instancia_recargada(self):
+        self._vender()
+        venta = Venta.objects.get(turno=self.turno)
+
+        venta.estado = 'CANCELADA'
+        venta.save()
+
+        assert self._totales().ventas_efectivo == 0
+
+    def test_ventas_offline_en_lote(self):
+        SincronizacionVentasService.sincronizar([
+            {
+                'uuid_terminal': uuid.uuid4(),
+                'turno_id': self.turno.id,
+                'items': [{'tipo': 'insumo', 'insumo_id': self.insumo.id, 'cantidad': 1, 'precio_unitario': 10}],
+                'metodo_pago': 'EFECTIVO',
+                'almacen_id': self.almacen.id,
+                'cliente_id': None,
+            }
+            for _ in range(3)
+        ], self.usuario)
+
+        assert self._totales().num_ventas == 3
+        assert self._totales().ventas_efectivo == Decimal('34.80')
+
+    def test_cierre_lee_totales_sin_agregar(self):
+        for _ in range(5):
+            self._vender()
+        MovimientoCaja.objects.create(turno=self.turno, tipo='INGRESO', monto=100, concepto="Abono")
+
+        with CaptureQueriesContext(connection) as consultas:
+            turno = CajaService.cerrar_turno(self.turno.id, Decimal('1180.00'))
+
+        assert turno.saldo_final_calculado == Decimal('1180.00')  # 500 + 5 x 116 + 100
+        assert turno.diferencia == 0
+        sql = " ".join(q['sql'] for q in consultas.captured_queries)
+        assert 'SUM(' not in sql.upper()
+
+    def test_pago_mixto_solo_cuenta_la_parte_en_efectivo(self):
+        # Antes el corte sumaba el total completo si metodo_pago era EFECTIVO
+        Venta.objects.create(
+            turno=self.turno, subtotal=Decimal('100.00'), impuestos=Decimal('16.00'), total=Decimal('116.00'),
+            metodo_pago='EFECTIVO', monto_metodo_principal=Decimal('76.00'),
+            metodo_pago_secundario='TARJETA', monto_metodo_secundario=Decimal('40.00'),
+            estado='PAGADA',
+        )
+
+        totales = self._totales()
+        assert totales.ventas_efectivo == Decimal('76.00')
+        assert totales.ventas_tarjeta == Decimal('40.00')
+
+        turno = CajaService.cerrar_turno(self.turno.id, Decimal('576.00'))
+        assert turno.saldo_final_calculado == Decimal('576.00')  # 500 + 76 en efectivo
+        assert turno.diferencia == 0
+
+    def test_recalcular_coincide_con_incremental(self):
+        venta = self._vender()
+        self._vender(metodo='TARJETA')
+        VentaService.cancelar_venta(venta, self.usuario, "Prueba")
+        MovimientoCaja.objects.create(turno=self.turno, tipo='INGRESO', monto=10, concepto="Abono")
+        incremental = self._totales()
+
+        TotalesTurnoService.recalcular([self.turno.id])
+
+        recalculado = self._totales()
+        for campo in ('num_ventas', 'ventas_efectivo', 'ventas_tarjeta', 'ingresos', 'retiros'):
+            assert getattr(recalculado, campo) == getattr(incremental, campo)
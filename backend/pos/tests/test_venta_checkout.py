@@ -0,0 +1,177 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from auditoria.models import AuditLog
+from compras.models import Insumo
+from inventarios.models import Almacen, Existencia, MovimientoInventario
+from pos.models import Caja, DetalleVenta, Venta
+from pos.services.caja_service import CajaService
+from pos.services.venta_service import VentaService
+
+User = get_user_model()
+
+
+def _crear_insumos(almacen, n, stock=100):
+    insumos = []
+    for i in range(n):
+        insumo = Insumo.objects.create(
+            codigo=f"CHK-{i:04d}",
+            descripcion=f"Artículo {i}",
+            tipo="PRODUCTO",
+            costo_promedio=Decimal('10'),
+        )
+        Existencia.objects.create(insumo=insumo, almacen=almacen, cantidad=stock)
+        insumos.append(insumo)
+    return insumos
+
+
+def _items(insumos, cantidad=1):
+    return [
+        {'tipo': 'insumo', 'insumo_id': i.id, 'cantidad': cantidad, 'precio_unitario': 20}
+        for i in insumos
+    ]
+
+
+@pytest.mark.django_db
+class TestCheckoutPorLotes:
+    def setup_method(self):
+        self.usuario = User.objects.create_user(username="cajero_lote", password="password")
+        self.caja = Caja.objects.create(nombre="Caja Lote", saldo_inicial_default=0)
+        self.almacen = Almacen.objects.create(nombre="Almacén Lote", codigo="ALM-LOTE")
+        self.turno = CajaService.abrir_turno(self.caja.id, self.usuario, 0)
+        self.insumos = _crear_insumos(self.almacen, 10)
+
+    def _vender(self, items):
+        return VentaService.crear_venta(
+            turno_id=self.turno.id,
+            items=items,
+            metodo_pago='EFECTIVO',
+            almacen_id=self.almacen.id,
+            usuario=self.usuario,
+        )
+
+    def test_consultas_no_dependen_del_numero_de_renglones(self):
+        with CaptureQueriesContext(connection) as una:
+            self._vender(_items(self.insumos[:1]))
+        with CaptureQueriesContext(connection) as diez:
+            self._vender(_items(self.insumos))
+
+        assert len(diez.captured_queries) == len(una.captured_queries)
+
+    def test_descuenta_existencias_y_registra_kardex(self):
+        items = _items(self.insumos[:3], cantidad=2)
+        # El mismo insumo dos veces se descuenta acumulado
+        items.append({'tipo': 'insumo', 'insumo_id': self.insumos[0].id, 'cantidad': 1, 'precio_unitario': 20})
+
+        venta = self._vender(items)
+
+        cantidades = dict(
+            Existencia.objects.filter(insumo__in=self.insumos[:3]).values_list('insumo_id', 'cantidad')
+        )
+        assert cantidades == {
+            self.insumos[0].id: 97,
+            self.insumos[1].id: 98,
+            self.insumos[2].id: 98,
+        }
+        assert DetalleVenta.objects.filter(venta=venta).count() == 4
+        assert venta.subtotal == Decimal('140.00')
+        assert venta.total == Decimal('162.40')
+
+        salida = MovimientoInventario.objects.get(insumo=self.insumos[0], tipo_movimiento='SALIDA')
+        assert salida.cantidad == -3
+        assert salida.costo_unitario == Decimal('10')
+
+    def test_stock_insuficiente_no_escribe_nada(self):
+        items = _items(self.insumos[:2])
+        items[1]['cantidad'] = 1000
+
+        with pytest.raises(ValueError, match="Stock insuficiente"):
+            self._vender(items)
+
+        assert not Venta.objects.filter(turno=self.turno).exists()
+        assert Existencia.objects.get(insumo=self.insumos[0], almacen=self.almacen).cantidad == 100
+        assert not MovimientoInventario.objects.filter(tipo_movimiento='SALIDA').exists()
+
+    def test_auditoria_registra_el_folio_definitivo(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            venta = self._vender(_items(self.insumos[:1]))
+            venta.save()
+
+        assert venta.folio == f"T-{venta.pk:06d}"
+        logs = AuditLog.objects.filter(
+            content_type=ContentType.objects.get_for_model(Venta), object_id=str(venta.pk)
+        )
+        creacion = logs.get(accion='CREATE')
+        assert creacion.object_repr.startswith(venta.folio)
+        assert not any('folio' in (log.cambios or {}) for log in logs.filter(accion='UPDATE'))
+
+
+@pytest.mark.slow
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_cajeros_concurrentes():
+    """
+    Carga: varias cajas venden al mismo tiempo los mismos artículos en órdenes
+    distintos. Con el bloqueo ordenado no debe haber deadlocks y el stock
+    final debe cuadrar con lo vendido.
+    """
+    cajeros, ventas_por_cajero, renglones = 8, 15, 10
+    almacen = Almacen.objects.create(nombre="Almacén Carga", codigo="ALM-CARGA")
+    insumos = _crear_insumos(almacen, renglones, stock=10_000)
+    turnos = []
+    for n in range(cajeros):
+        usuario = User.objects.create_user(username=f"cajero_carga_{n}", password="password")
+        caja = Caja.objects.create(nombre=f"Caja Carga {n}", saldo_inicial_default=0)
+        turnos.append((CajaService.abrir_turno(caja.id, usuario, 0), usuario))
+
+    errores = []
+    tiempos = []
+    inicio = threading.Barrier(cajeros)
+
+    def cajero(n):
+        turno, usuario = turnos[n]
+        # Cada caja recorre los artículos en un orden distinto
+        orden = insumos[n % renglones:] + insumos[:n % renglones]
+        if n % 2:
+            orden.reverse()
+        try:
+            inicio.wait()
+            for _ in range(ventas_por_cajero):
+                t0 = time.perf_counter()
+                VentaService.crear_venta(
+                    turno_id=turno.id,
+                    items=_items(orden),
+                    metodo_pago='EFECTIVO',
+                    almacen_id=almacen.id,
+                    usuario=usuario,
+                )
+                tiempos.append(time.perf_counter() - t0)
+        except Exception as e:  # pragma: no cover - se reporta en el assert
+            errores.append(e)
+        finally:
+            connections.close_all()
+
+    hilos = [threading.Thread(target=cajero, args=(n,)) for n in range(cajeros)]
+    t0 = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    total = time.perf_counter() - t0
+
+    assert not errores, errores
+    vendidas = cajeros * ventas_por_cajero
+    assert Existencia.objects.filter(insumo__in=insumos, cantidad=10_000 - vendidas).count() == renglones
+
+    tiempos.sort()
+    print(
+        f"\n{cajeros} cajeros x {ventas_por_cajero} ventas x {renglones} renglones: "
+        f"{vendidas / total:.1f} ventas/s, p50={tiempos[len(tiempos) // 2] * 1000:.1f}ms, "
+        f"p95={tiempos[int(len(tiempos) * 0.95)] * 1000:.1f}ms"
+    )
@@ -1,14 +1,15 @@
 from rest_framework import viewsets, status, permissions, decorators
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
 from django.contrib.auth import get_user_model
 import pyotp
-from decimal import Decimal
 
 from core.permissions import HasPermissionForAction
 from .models import (
     Producto, Caja, Turno, Venta, DetalleVenta, 
-    CuentaCliente, MovimientoSaldoCliente, MovimientoCaja
+    CuentaCliente, MovimientoSaldoCliente
 )
 from .serializers import (
     ProductoSerializer, CajaSerializer, TurnoSerializer, 
@@ -28,25 +29,38 @@ class ProductoViewSet(viewsets.ModelViewSet):
     @decorators.action(detail=False, methods=['get'], url_path='productos-fast')
     def productos_fast(self, request):
         """
-        Retorna listado optimizado para caché offline (IndexDB).
+        Feed de cambios del catálogo para la caché offline (IndexedDB).
+        
+        - Sin `since`: catálogo activo completo.
+        - `since=<version>`: solo lo modificado desde esa versión, más los ids
+          dados de baja en `eliminados`. Se repite mientras `hay_mas`.
+        Responde 304 si el ETag coincide con If-None-Match.
         """
-        productos = self.get_queryset().filter(deleted_at__isnull=True)
-        data = []
-        for p in productos:
-            item = {
-                'id': p.id,
-                'nombre': p.nombre,
-                'barcode': p.codigo,
-                'precio': float(p.precio_final),
-                'impuesto': float(p.impuestos_porcentaje),
-                'unidad': p.unidad_medida,
-                'search_terms': f"{p.nombre} {p.codigo}".lower()
-            }
-            if hasattr(p, 'stock_actual'):
-                item['stock'] = float(p.stock_actual)
-            
-            data.append(item)
-        return Response(data)
+        from .services.catalogo_sync_service import CatalogoSyncService, CursorInvalido
+        
+        since = request.query_params.get('since') or None
+        etag = CatalogoSyncService.etag(since)
+        if etag in request.headers.get('If-None-Match', ''):
+            respuesta = HttpResponseNotModified()
+            respuesta['ETag'] = etag
+            return respuesta
+        
+        try:
+            datos = CatalogoSyncService.cambios(since)
+        except CursorInvalido as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        contenido, encoding = CatalogoSyncService.comprimir(
+            CatalogoSyncService.serializar(datos),
+            request.headers.get('Accept-Encoding', '')
+        )
+        respuesta = HttpResponse(contenido, content_type='application/json')
+        respuesta['ETag'] = etag
+        respuesta['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(respuesta, ('Accept-Encoding',))
+        if encoding:
+            respuesta['Content-Encoding'] = encoding
+        return respuesta
 
 class CajaViewSet(viewsets.ModelViewSet):
     queryset = Caja.objects.all()
@@ -78,32 +92,14 @@ class TurnoViewSet(viewsets.ModelViewSet):
 
     @decorators.action(detail=True, methods=['post'])
     def cerrar(self, request, pk=None):
-        turno = self.get_object()
-        if turno.cerrado:
-            return Response({"detail": "El turno ya está cerrado."}, status=400)
-            
-        declarado = Decimal(str(request.data.get('saldo_declarado', 0)))
-        
-        # Calcular saldo final teórico
-        # Saldo Inicial + Ventas Efectivo + Ingresos Caja - Retiros Caja
-        ventas_efectivo = Venta.objects.filter(
-            turno=turno, 
-            estado='PAGADA', 
-            metodo_pago_principal='EFECTIVO'
-        ).aggregate(total=models.Sum('total'))['total'] or 0
-
-        # Ingresos/Retiros por MovimientoCaja (ej. Abonos)
-        ingresos = MovimientoCaja.objects.filter(turno=turno, tipo='INGRESO').aggregate(total=models.Sum('monto'))['total'] or 0
-        retiros = MovimientoCaja.objects.filter(turno=turno, tipo='RETIRO').aggregate(total=models.Sum('monto'))['total'] or 0
-
-        calculado = turno.saldo_inicial + ventas_efectivo + ingresos - retiros
+        """Corte de caja: delega a CajaService (lee los totales acumulados del turno)."""
+        from .services.caja_service import CajaService
         
-        turno.saldo_final_calculado = calculado
-        turno.saldo_final_declarado = declarado
-        turno.diferencia = declarado - calculado
-        turno.cerrado = True
-        turno.fecha_fin = timezone.now()
-        turno.save()
+        turno = self.get_object()
+        try:
+            turno = CajaService.cerrar_turno(turno.id, request.data.get('saldo_declarado', 0))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
         
         return Response(TurnoSerializer(turno).data)
 
@@ -249,7 +245,6 @@ class CuentaClienteViewSet(viewsets.ModelViewSet):
 
 # ============= SISTEMA DE CANCELACIONES CON AUTORIZACIÓN =============
 
-from django.utils import timezone
 from rest_framework.views import APIView
 from .models import SolicitudCancelacion
 from .serializers import (
@@ -7,10 +7,12 @@ from decimal import Decimal
 from .models import Caja, Turno, Venta, Producto
 from .serializers import (
     CajaSerializer, TurnoSerializer, VentaReadSerializer,
-    CobroVentaSerializer, ProductoSerializer
+    CobroVentaSerializer, ProductoSerializer,
+    SincronizacionVentasSerializer, VentaOfflineSerializer
 )
 from .services.caja_service import CajaService
 from .services.venta_service import VentaService
+from .services.sincronizacion_service import SincronizacionVentasService, ERROR
 from compras.models import Insumo
 from inventarios.models import Existencia, Almacen
 from compras.serializers import InsumoSerializer, AlmacenSerializer
@@ -145,6 +147,38 @@ class VentaPOSViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
 
+    @decorators.action(detail=False, methods=['post'])
+    def sincronizar(self, request):
+        """
+        POST /api/pos/ventas-pos/sincronizar/
+        Sube en lote las ventas capturadas sin conexión. Es idempotente por
+        `uuid_terminal`: reintentar el mismo lote no duplica ventas.
+        Responde un resultado por venta (creada | duplicada | error).
+        """
+        serializer = SincronizacionVentasSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        resultados = {}
+        validas = []
+        for indice, datos in enumerate(serializer.validated_data['ventas']):
+            venta = VentaOfflineSerializer(data=datos)
+            if venta.is_valid():
+                validas.append(venta.validated_data)
+            else:
+                resultados[indice] = {
+                    'uuid_terminal': datos.get('uuid_terminal'),
+                    'estado': ERROR,
+                    'detalle': venta.errors,
+                }
+        
+        aplicadas = iter(SincronizacionVentasService.sincronizar(validas, request.user))
+        respuesta = [
+            resultados[indice] if indice in resultados else next(aplicadas)
+            for indice in range(len(serializer.validated_data['ventas']))
+        ]
+        return Response({'resultados': respuesta})
+
+
 class CatalogoUnificadoViewSet(viewsets.ViewSet):
     """
     Endpoint helper para el frontend del POS.
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class RrhhConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rrhh'
+
+    def ready(self):
+        import rrhh.signals  # Invalidar cache de tarifas
@@ -5,12 +5,11 @@ from datetime import date
 from django.db.models import Sum
 
 from .models import (
-    Empleado, Nomina, ReciboNomina, ConceptoNomina, 
-    TablaISR, RenglonTablaISR, ConfiguracionEconomica, 
-    EmpleadoCreditoInfonavit, SubsidioEmpleo, RenglonSubsidio,
-    DetalleReciboItem
+    Empleado, Nomina, ReciboNomina, ConceptoNomina,
+    EmpleadoCreditoInfonavit, DetalleReciboItem
 )
 from .models_nomina import TipoConcepto, ClasificacionFiscal
+from .services.tarifas import TarifaCache, TarifasNomina
 
 # ---------------------------------------------------------------------------
 # Motor de Cálculo de Nómina (Fiscal)
@@ -29,7 +28,11 @@ class PayrollCalculator:
 
     def __init__(self, anio: int = 2025):
         self.anio = anio
-        self.config_economica = ConfiguracionEconomica.objects.filter(anio=anio, activo=True).last()
+        # Snapshot de tarifas y catálogo de conceptos desde el cache de proceso:
+        # calcular un recibo no consulta TablaISR, Subsidio ni ConceptoNomina.
+        self.tarifas = TarifaCache.tarifas(anio)
+        self.conceptos = dict(TarifaCache.conceptos())
+        self.config_economica = self.tarifas.config_economica
         # No bloqueamos si falta configuración económica para permitir uso parcial (dev), 
         # pero loggearemos advertencia si fuéramos prod.
         
@@ -305,49 +308,20 @@ class PayrollCalculator:
         )
 
 
+    def _tarifas_de(self, anio: int) -> TarifasNomina:
+        return self.tarifas if anio == self.anio else TarifaCache.tarifas(anio)
+
     def _calcular_isr(self, base_gravable: Decimal, anio: int, periodo: str = 'QUINCENAL') -> Decimal:
         """
         Calcula el ISR Bruto (sin restar subsidio) según tablas.
         """
-        tabla = TablaISR.objects.filter(anio_vigencia=anio, tipo_periodo=periodo).first()
-        if not tabla:
-            return Decimal('0.0')
-
-        renglon = RenglonTablaISR.objects.filter(
-            tabla=tabla, 
-            limite_inferior__lte=base_gravable
-        ).order_by('-limite_inferior').first()
-
-        if not renglon:
-            return Decimal('0.0')
-
-        excedente = base_gravable - renglon.limite_inferior
-        impuesto_marginal = excedente * (renglon.porcentaje_excedente / 100)
-        isr_calculado = impuesto_marginal + renglon.cuota_fija
-        
-        return isr_calculado.quantize(Decimal('0.01'))
+        return self._tarifas_de(anio).calcular_isr(base_gravable, periodo)
 
     def _calcular_subsidio(self, base_gravable: Decimal, anio: int) -> Decimal:
         """
         Obtiene el subsidio para el empleo correspondiente a la base.
         """
-        tabla = SubsidioEmpleo.objects.filter(anio_vigencia=anio).first()
-        if not tabla:
-            return Decimal('0.0')
-
-        # Buscar donde el ingreso sea MENOR o IGUAL al 'ingreso_hasta'
-        # Ordenamos por ingreso_hasta ascendente y tomamos el primero que cumpla
-        # base <= ingreso_hasta
-        renglon = RenglonSubsidio.objects.filter(
-            tabla=tabla,
-            ingreso_hasta__gte=base_gravable
-        ).order_by('ingreso_hasta').first()
-
-        if not renglon:
-            # Si supera el último renglón, subsidio es 0
-            return Decimal('0.0')
-            
-        return renglon.monto_subsidio.quantize(Decimal('0.01'))
+        return self._tarifas_de(anio).calcular_subsidio(base_gravable)
 
     def _calcular_imss_obrero(self, sbc: Decimal, dias: Decimal) -> Decimal:
         """
@@ -379,9 +353,9 @@ class PayrollCalculator:
         return total_cuota.quantize(Decimal('0.01'))
 
     def _get_concepto_confiable(self, clave_fiscal: str, tipo=TipoConcepto.PERCEPCION) -> ConceptoNomina:
-        concepto = ConceptoNomina.objects.filter(clave_sat=clave_fiscal, tipo=tipo).first()
+        concepto = self.conceptos.get((clave_fiscal, tipo))
         if not concepto:
-            # Stub de emergencia
+            # Stub de emergencia (su post_save invalida el catálogo cacheado)
             nombre_stub = f"Concepto {clave_fiscal}"
             concepto = ConceptoNomina.objects.create(
                 codigo=clave_fiscal[:20], 
@@ -389,6 +363,7 @@ class PayrollCalculator:
                 clave_sat=clave_fiscal,
                 tipo=tipo
             )
+            self.conceptos[(clave_fiscal, tipo)] = concepto
         return concepto
 
     def _calcular_imss_patronal(self, sbc: Decimal, dias: Decimal) -> Dict[str, Decimal]:
@@ -26,21 +26,7 @@ class CalculoNominaService:
         
         # 3. ISR (Deducción) - Simplificado
         # Base ISR = Sueldo Bruto (Sueldo es 100% gravable)
-        base_isr = sueldo_bruto
-        
-        # Tabla ISR Quincenal 2024 (Aprox para sueldos de 5k)
-        # Limite Inf: 4910.19. Cuota: 288.33. %: 10.88%.
-        limite_inferior = Decimal('4910.19')
-        if base_isr > limite_inferior:
-            cuota_fija = Decimal('288.33')
-            porcentaje = Decimal('0.1088')
-            excedente = base_isr - limite_inferior
-            isr = (excedente * porcentaje) + cuota_fija
-        else:
-             # Fallback simple para sueldos menores en test
-             isr = base_isr * Decimal('0.06') 
-        
-        isr = isr.quantize(Decimal('0.01'))
+        isr = CalculoNominaService.calcular_isr_simplificado(sueldo_bruto)
         
         # 4. Construcción de respuesta
         # Nota: Deducciones en SAT 4.0 XML solo llevan 'Importe', pero
@@ -84,3 +70,22 @@ class CalculoNominaService:
             'total_deducciones': total_d,
             'neto': neto
         }
+
+    @staticmethod
+    def calcular_isr_simplificado(base_isr):
+        """
+        ISR aproximado cuando no hay TablaISR cargada para el periodo.
+        Tabla ISR Quincenal 2024 (Aprox para sueldos de 5k)
+        Limite Inf: 4910.19. Cuota: 288.33. %: 10.88%.
+        """
+        limite_inferior = Decimal('4910.19')
+        if base_isr > limite_inferior:
+            cuota_fija = Decimal('288.33')
+            porcentaje = Decimal('0.1088')
+            excedente = base_isr - limite_inferior
+            isr = (excedente * porcentaje) + cuota_fija
+        else:
+             # Fallback simple para sueldos menores en test
+             isr = base_isr * Decimal('0.06') 
+        
+        return isr.quantize(Decimal('0.01'))
@@ -0,0 +1,214 @@
+"""
+Motor de nómina por lotes.
+
+Calcula todos los recibos de una Nómina de forma columnar (una lista por
+rubro: sueldo, ISR, IMSS, ...) y los persiste con unos cuantos bulk_create.
+El número de consultas no depende del número de empleados.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+
+from rrhh.models import (
+    Nomina, ReciboNomina, DetalleReciboItem, Empleado, ConceptoNomina, TipoConcepto
+)
+from .calculo_nomina_service import CalculoNominaService
+from .tarifas import TarifaCache, TarifasNomina
+
+logger = logging.getLogger(__name__)
+
+CENTAVOS = Decimal('0.01')
+
+
+class NominaBatchEngine:
+    """
+    Uso:
+        NominaBatchEngine(nomina).procesar()
+    """
+
+    # Cuotas obreras IMSS simplificadas (igual que CalculoNominaService)
+    TASA_IMSS_OBRERO = Decimal('0.02375')
+    BATCH_SIZE = 2000
+
+    # (nombre, clave_sat, tipo) de las líneas que genera el motor
+    CONCEPTO_SUELDO = ('Sueldo', '001', TipoConcepto.PERCEPCION)
+    CONCEPTO_ISR = ('ISR', '002', TipoConcepto.DEDUCCION)
+    CONCEPTO_IMSS = ('IMSS', '001', TipoConcepto.DEDUCCION)
+
+    def __init__(self, nomina: Nomina, tarifas: TarifasNomina = None):
+        self.nomina = nomina
+        self.anio = nomina.fecha_inicio.year
+        self.tarifas = tarifas
+
+        dias_periodo = (nomina.fecha_fin - nomina.fecha_inicio).days + 1
+        self.dias = 15 if 13 <= dias_periodo <= 16 else dias_periodo
+        if self.dias == 15:
+            self.tipo_periodo = 'QUINCENAL'
+        elif self.dias == 7:
+            self.tipo_periodo = 'SEMANAL'
+        else:
+            self.tipo_periodo = 'MENSUAL'
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _cargar_empleados(self):
+        empleados = list(
+            Empleado.objects.filter(activo=True, razon_social_id=self.nomina.razon_social_id)
+            .select_related('datos_laborales')
+            .order_by('pk')
+        )
+        sin_datos = [e for e in empleados if not hasattr(e, 'datos_laborales')]
+        if sin_datos:
+            nombres = ', '.join(str(e) for e in sin_datos[:10])
+            raise ValueError(f"Empleados sin datos laborales: {nombres}")
+        return empleados
+
+    def _resolver_conceptos(self, specs):
+        """
+        Resuelve ConceptoNomina por nombre (case-insensitive) contra el catálogo
+        precargado y crea los faltantes en un solo bulk_create.
+        """
+        por_nombre = {}
+        codigos = set()
+        for concepto in ConceptoNomina.objects.order_by('pk'):
+            por_nombre.setdefault(concepto.nombre.lower(), concepto)
+            codigos.add(concepto.codigo)
+
+        faltantes = []
+        for nombre, clave_sat, tipo in specs:
+            if nombre.lower() in por_nombre:
+                continue
+            codigo = f"{tipo[0]}{clave_sat}"
+            sufijo = 1
+            while codigo in codigos:
+                codigo = f"{tipo[0]}{clave_sat}-{sufijo}"
+                sufijo += 1
+            codigos.add(codigo)
+            nuevo = ConceptoNomina(codigo=codigo, nombre=nombre, tipo=tipo, clave_sat=clave_sat)
+            por_nombre[nombre.lower()] = nuevo
+            faltantes.append(nuevo)
+
+        if faltantes:
+            ConceptoNomina.objects.bulk_create(faltantes)
+            # bulk_create no dispara post_save
+            TarifaCache.invalidar()
+
+        return {nombre: por_nombre[nombre.lower()] for nombre, _, _ in specs}
+
+    # ------------------------------------------------------------------
+    # Cálculo columnar
+    # ------------------------------------------------------------------
+
+    def _calcular_isr(self, bases):
+        tarifa_isr = self.tarifas.isr.get(self.tipo_periodo)
+        if tarifa_isr is None:
+            # Sin tabla cargada: misma aproximación que CalculoNominaService
+            return [CalculoNominaService.calcular_isr_simplificado(b) for b in bases]
+
+        brutos = [tarifa_isr.calcular(b) for b in bases]
+        if self.tarifas.subsidio is None:
+            return brutos
+        # Desde 2024 el subsidio solo acredita contra ISR; no se entrega excedente
+        subsidios = [self.tarifas.subsidio.calcular(b) for b in bases]
+        return [max(isr - sub, Decimal('0.00')) for isr, sub in zip(brutos, subsidios)]
+
+    def calcular(self, empleados):
+        dias = Decimal(self.dias)
+        salario_diario = [e.datos_laborales.salario_diario or Decimal(0) for e in empleados]
+        sbc = [
+            getattr(e.datos_laborales, 'salario_diario_integrado', None) or sd
+            for e, sd in zip(empleados, salario_diario)
+        ]
+
+        sueldo = [(sd * dias).quantize(CENTAVOS) for sd in salario_diario]
+        imss = [(b * dias * self.TASA_IMSS_OBRERO).quantize(CENTAVOS) for b in sbc]
+        isr = self._calcular_isr(sueldo)
+        deducciones = [i + m for i, m in zip(isr, imss)]
+        neto = [s - d for s, d in zip(sueldo, deducciones)]
+
+        return {
+            'salario_diario': salario_diario,
+            'sbc': sbc,
+            'sueldo': sueldo,
+            'isr': isr,
+            'imss': imss,
+            'deducciones': deducciones,
+            'neto': neto,
+        }
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def procesar(self):
+        if self.tarifas is None:
+            self.tarifas = TarifaCache.tarifas(self.anio)
+
+        with transaction.atomic():
+            nomina = Nomina.objects.select_for_update().get(pk=self.nomina.pk)
+
+            # Idempotencia: regenerar desde cero los recibos de esta nómina
+            DetalleReciboItem.objects.filter(recibo__nomina=nomina).delete()
+            ReciboNomina.all_objects.filter(nomina=nomina).delete()
+
+            empleados = self._cargar_empleados()
+            conceptos = self._resolver_conceptos(
+                [self.CONCEPTO_SUELDO, self.CONCEPTO_ISR, self.CONCEPTO_IMSS]
+            )
+            c = self.calcular(empleados)
+
+            recibos = ReciboNomina.objects.bulk_create(
+                [
+                    ReciboNomina(
+                        nomina=nomina,
+                        empleado=emp,
+                        salario_diario=c['salario_diario'][i],
+                        sbc=c['sbc'][i],
+                        dias_pagados=self.dias,
+                        subtotal=c['sueldo'][i],
+                        descuentos=c['deducciones'][i],
+                        neto=c['neto'][i],
+                        impuestos_retenidos=c['isr'][i],
+                        imss_retenido=c['imss'][i],
+                    )
+                    for i, emp in enumerate(empleados)
+                ],
+                batch_size=self.BATCH_SIZE,
+            )
+
+            detalles = []
+            lineas = [
+                (self.CONCEPTO_SUELDO, c['sueldo'], True),
+                (self.CONCEPTO_ISR, c['isr'], False),
+                (self.CONCEPTO_IMSS, c['imss'], False),
+            ]
+            for i, recibo in enumerate(recibos):
+                for (nombre, clave_sat, _), montos, gravado in lineas:
+                    monto = montos[i]
+                    detalles.append(DetalleReciboItem(
+                        recibo=recibo,
+                        concepto=conceptos[nombre],
+                        clave_sat=clave_sat,
+                        nombre_concepto=nombre,
+                        monto_gravado=monto if gravado else Decimal('0.00'),
+                        monto_exento=Decimal('0.00'),
+                        monto_total=monto,
+                    ))
+            DetalleReciboItem.objects.bulk_create(detalles, batch_size=self.BATCH_SIZE)
+
+            nomina.total_percepciones = sum(c['sueldo'], Decimal(0))
+            nomina.total_deducciones = sum(c['deducciones'], Decimal(0))
+            nomina.total_neto = sum(c['neto'], Decimal(0))
+            nomina.estado = 'CALCULADA'
+            nomina.save()
+
+        logger.info(f"Nómina {nomina.pk}: {len(recibos)} recibos calculados en lote")
+        return {
+            'recibos': len(recibos),
+            'total_percepciones': nomina.total_percepciones,
+            'total_deducciones': nomina.total_deducciones,
+            'total_neto': nomina.total_neto,
+        }
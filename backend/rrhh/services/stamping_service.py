@@ -1,41 +1,49 @@
-from datetime import datetime
-from django.db import transaction
+from django.conf import settings
+from django.utils import timezone
 from rrhh.models.nomina import PeriodoNomina, NominaCentralizada
 from rrhh.services.xml_generator import NominaXMLGenerator
-import uuid
+
+
+def _generar_xml_centralizada(payload):
+    row, periodo = payload
+    return NominaXMLGenerator.generar_xml_from_centralizada(row, periodo)
+
 
 class NominaStampingService:
     @staticmethod
-    def timbrar_periodo(periodo_id):
+    def timbrar_periodo(periodo_id, on_progress=None):
         """
-        Itera sobre todos los registros de NominaCentralizada de un periodo
-        y genera sus XMLs simulando timbrado.
+        Genera y timbra los XMLs de todos los registros de NominaCentralizada
+        de un periodo que aún no tienen UUID (ver TimbradoPipeline).
         """
+        from contabilidad.services.pac.factory import PACFactory
+        from contabilidad.services.pac.pipeline import TimbradoPipeline
+
         try:
             periodo = PeriodoNomina.objects.get(pk=periodo_id)
         except PeriodoNomina.DoesNotExist:
              raise ValueError("Periodo no existe")
              
         registros = NominaCentralizada.objects.filter(periodo=str(periodo.numero), uuid__isnull=True)
-        timbrados_count = 0
-        
-        for row in registros:
-            # 1. Generate XML
-            xml_content = NominaXMLGenerator.generar_xml_from_centralizada(row, periodo)
-            
-            # 2. Mock Stamping (Assign UUID)
-            fake_uuid = str(uuid.uuid4())
-            
-            # 3. Save
-            row.xml_timbrado = xml_content
-            row.uuid = fake_uuid
-            row.fecha_timbrado = datetime.now()
-            row.save()
-            
-            timbrados_count += 1
-            
-        return {
-            'status': 'OK',
-            'timbrados': timbrados_count,
-            'total': registros.count() + timbrados_count
-        }
+
+        def guardar(row_id, resultado):
+            row = NominaCentralizada.objects.select_for_update().get(pk=row_id)
+            row.xml_timbrado = resultado['xml_timbrado']
+            row.uuid = resultado['uuid']
+            row.fecha_timbrado = timezone.now()
+            row.save(update_fields=['xml_timbrado', 'uuid', 'fecha_timbrado'])
+
+        pipeline = TimbradoPipeline(
+            PACFactory.get_provider,
+            proveedor=getattr(settings, 'PAC_PROVIDER', 'MOCK'),
+            on_progress=on_progress,
+        )
+        stats = pipeline.ejecutar(
+            ((row.pk, (row, periodo)) for row in registros),
+            preparar=_generar_xml_centralizada,
+            guardar=guardar,
+        )
+
+        stats['status'] = 'OK' if not stats['fallidos'] else 'PARCIAL'
+        stats['total'] = stats['timbrados'] + registros.count()
+        return stats
@@ -0,0 +1,170 @@
+"""
+Tarifas fiscales de nómina (ISR, Subsidio al Empleo, parámetros IMSS) cargadas en memoria.
+
+Una vez cargadas, la búsqueda del renglón aplicable es una búsqueda binaria
+sobre los límites ordenados, sin consultas a la base de datos.
+
+TarifaCache mantiene un snapshot inmutable por año en memoria del proceso.
+El snapshot se versiona con un contador compartido en el cache de Django
+(Redis): los signals de rrhh/signals.py lo incrementan cuando cambian las
+tablas y cada proceso recarga en su siguiente lectura.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.core.cache import cache
+
+from rrhh.models import TablaISR, SubsidioEmpleo, ConfiguracionEconomica, ConceptoNomina
+
+CENTAVOS = Decimal('0.01')
+
+
+class TarifaISR:
+    """Renglones de una TablaISR ordenados por limite_inferior."""
+
+    __slots__ = ('limites', 'cuotas', 'porcentajes')
+
+    def __init__(self, renglones):
+        renglones = sorted(renglones, key=lambda r: r.limite_inferior)
+        self.limites = tuple(r.limite_inferior for r in renglones)
+        self.cuotas = tuple(r.cuota_fija for r in renglones)
+        self.porcentajes = tuple(r.porcentaje_excedente / 100 for r in renglones)
+
+    def calcular(self, base_gravable: Decimal) -> Decimal:
+        """ISR bruto (sin restar subsidio). Equivale a limite_inferior <= base, el mayor."""
+        idx = bisect_right(self.limites, base_gravable) - 1
+        if idx < 0:
+            return Decimal('0.0')
+        excedente = base_gravable - self.limites[idx]
+        return (excedente * self.porcentajes[idx] + self.cuotas[idx]).quantize(CENTAVOS)
+
+
+class TarifaSubsidio:
+    """Renglones de SubsidioEmpleo ordenados por ingreso_hasta."""
+
+    __slots__ = ('limites', 'montos')
+
+    def __init__(self, renglones):
+        renglones = sorted(renglones, key=lambda r: r.ingreso_hasta)
+        self.limites = tuple(r.ingreso_hasta for r in renglones)
+        self.montos = tuple(r.monto_subsidio for r in renglones)
+
+    def calcular(self, base_gravable: Decimal) -> Decimal:
+        """Subsidio del primer renglón con ingreso_hasta >= base; 0 si la supera."""
+        idx = bisect_left(self.limites, base_gravable)
+        if idx >= len(self.limites):
+            return Decimal('0.0')
+        return self.montos[idx].quantize(CENTAVOS)
+
+
+class TarifasNomina:
+    """
+    Tablas de ISR (por tipo de periodo), Subsidio y ConfiguracionEconomica de un año.
+    Tratar como solo lectura: la misma instancia se comparte entre cálculos.
+    """
+
+    def __init__(self, anio, isr=None, subsidio=None, config_economica=None):
+        self.anio = anio
+        self.isr = MappingProxyType(dict(isr or {}))
+        self.subsidio = subsidio
+        self.config_economica = config_economica
+
+    @classmethod
+    def cargar(cls, anio: int) -> 'TarifasNomina':
+        """Carga todas las tablas del año con un número fijo de consultas."""
+        isr = {}
+        tablas = TablaISR.objects.filter(anio_vigencia=anio).order_by('pk').prefetch_related('renglones')
+        for tabla in tablas:
+            # Igual que .first(): la primera tabla por tipo de periodo gana
+            if tabla.tipo_periodo not in isr:
+                isr[tabla.tipo_periodo] = TarifaISR(tabla.renglones.all())
+
+        subsidio = None
+        tabla_subsidio = (
+            SubsidioEmpleo.objects.filter(anio_vigencia=anio).order_by('pk')
+            .prefetch_related('renglones').first()
+        )
+        if tabla_subsidio:
+            subsidio = TarifaSubsidio(tabla_subsidio.renglones.all())
+
+        config_economica = ConfiguracionEconomica.objects.filter(anio=anio, activo=True).last()
+
+        return cls(anio, isr=isr, subsidio=subsidio, config_economica=config_economica)
+
+    def calcular_isr(self, base_gravable: Decimal, periodo: str = 'QUINCENAL') -> Decimal:
+        tarifa = self.isr.get(periodo)
+        if tarifa is None:
+            return Decimal('0.0')
+        return tarifa.calcular(base_gravable)
+
+    def calcular_subsidio(self, base_gravable: Decimal) -> Decimal:
+        if self.subsidio is None:
+            return Decimal('0.0')
+        return self.subsidio.calcular(base_gravable)
+
+
+class TarifaCache:
+    """
+    Cache de proceso para TarifasNomina (por año) y el catálogo de ConceptoNomina
+    (por empresa activa), invalidado por versión.
+    """
+
+    VERSION_KEY = 'rrhh:tarifas:version'
+
+    _lock = threading.Lock()
+    _tarifas = {}    # anio -> (version, TarifasNomina)
+    _conceptos = {}  # company_id -> (version, MappingProxyType {(clave_sat, tipo): ConceptoNomina})
+
+    @classmethod
+    def version(cls) -> int:
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            cache.add(cls.VERSION_KEY, 1, None)
+            version = cache.get(cls.VERSION_KEY) or 1
+        return version
+
+    @classmethod
+    def invalidar(cls):
+        """Incrementa la versión compartida y limpia el cache local."""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.add(cls.VERSION_KEY, 2, None)
+        with cls._lock:
+            cls._tarifas.clear()
+            cls._conceptos.clear()
+
+    @classmethod
+    def tarifas(cls, anio: int) -> TarifasNomina:
+        version = cls.version()
+        entrada = cls._tarifas.get(anio)
+        if entrada and entrada[0] == version:
+            return entrada[1]
+        with cls._lock:
+            entrada = cls._tarifas.get(anio)
+            if entrada and entrada[0] == version:
+                return entrada[1]
+            snapshot = TarifasNomina.cargar(anio)
+            cls._tarifas[anio] = (version, snapshot)
+            return snapshot
+
+    @classmethod
+    def conceptos(cls):
+        """Catálogo {(clave_sat, tipo): ConceptoNomina} de la empresa activa."""
+        from core.middleware import get_current_company_id
+
+        company_id = get_current_company_id()
+        version = cls.version()
+        entrada = cls._conceptos.get(company_id)
+        if entrada and entrada[0] == version:
+            return entrada[1]
+        with cls._lock:
+            catalogo = {}
+            # Igual que .first(): el de menor pk gana
+            for concepto in ConceptoNomina.objects.order_by('pk'):
+                catalogo.setdefault((concepto.clave_sat, concepto.tipo), concepto)
+            snapshot = MappingProxyType(catalogo)
+            cls._conceptos[company_id] = (version, snapshot)
+            return snapshot
@@ -91,7 +91,11 @@ class NominaXMLGenerator:
         nomina_node.set("NumDiasPagados", f"{recibo.dias_pagados:.3f}")
         
         # Totales Nomina 
-        detalles = list(recibo.detalles.all().select_related('concepto'))
+        if 'detalles' in getattr(recibo, '_prefetched_objects_cache', {}):
+            # Precargados por el timbrado masivo (el XML se genera sin consultas)
+            detalles = list(recibo.detalles.all())
+        else:
+            detalles = list(recibo.detalles.all().select_related('concepto'))
         
         total_p = sum(d.monto_total for d in detalles if d.concepto.tipo == 'PERCEPCION')
         total_d = sum(d.monto_total for d in detalles if d.concepto.tipo == 'DEDUCCION')
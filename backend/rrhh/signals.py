@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from rrhh.models import (
+    TablaISR, RenglonTablaISR, SubsidioEmpleo, RenglonSubsidio,
+    ConfiguracionEconomica, ConceptoNomina
+)
+from rrhh.services.tarifas import TarifaCache
+
+TARIFA_MODELS = (
+    TablaISR, RenglonTablaISR, SubsidioEmpleo, RenglonSubsidio,
+    ConfiguracionEconomica, ConceptoNomina,
+)
+
+
+def _invalidar_tarifas(sender, **kwargs):
+    """Cualquier cambio en tablas fiscales o conceptos invalida el snapshot."""
+    TarifaCache.invalidar()
+    # Tras el commit, para que otros procesos no recarguen datos sin confirmar
+    transaction.on_commit(TarifaCache.invalidar)
+
+
+for _model in TARIFA_MODELS:
+    post_save.connect(_invalidar_tarifas, sender=_model, dispatch_uid=f'tarifas_save_{_model.__name__}')
+    post_delete.connect(_invalidar_tarifas, sender=_model, dispatch_uid=f'tarifas_delete_{_model.__name__}')
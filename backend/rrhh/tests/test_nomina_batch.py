@@ -0,0 +1,119 @@
+import time
+import pytest
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from rrhh.models import (
+    Nomina, ReciboNomina, DetalleReciboItem, Empleado, RazonSocial, Departamento, Puesto,
+    EmpleadoDatosLaborales, ConceptoNomina, TablaISR, RenglonTablaISR, SubsidioEmpleo, RenglonSubsidio
+)
+from rrhh.services.calculo_nomina_service import CalculoNominaService
+from rrhh.services.nomina_batch import NominaBatchEngine
+from rrhh.services.nomina_orchestrator import NominaOrchestrator
+
+
+def _crear_plantilla(n, rs, puesto, mensual=Decimal('10000')):
+    """Crea n empleados con datos laborales usando bulk_create."""
+    User = get_user_model()
+    users = User.objects.bulk_create([
+        User(username=f"bench.{i}", email=f"bench.{i}@test.com") for i in range(n)
+    ])
+    empleados = Empleado.objects.bulk_create([
+        Empleado(
+            user=u, nombres=f"Emp {i}", apellido_paterno="Bench", nombre_completo=f"Emp {i} Bench",
+            razon_social=rs, puesto=puesto, departamento=puesto.departamento
+        )
+        for i, u in enumerate(users)
+    ])
+    EmpleadoDatosLaborales.objects.bulk_create([
+        EmpleadoDatosLaborales(
+            empleado=e,
+            ingresos_mensuales_brutos=mensual + i,
+            salario_diario=((mensual + i) / 30).quantize(Decimal('0.01')),
+            salario_diario_integrado=((mensual + i) / 30 * Decimal('1.0452')).quantize(Decimal('0.01')),
+            periodicidad_pago="Quincenal"
+        )
+        for i, e in enumerate(empleados)
+    ])
+    return empleados
+
+
+@pytest.mark.django_db
+class TestNominaBatchEngine:
+    @pytest.fixture
+    def escenario(self):
+        rs = RazonSocial.objects.create(nombre_o_razon_social="Empresa Batch", rfc="BBB010101BBB")
+        dep = Departamento.objects.create(nombre="Operaciones")
+        puesto = Puesto.objects.create(nombre="Operador", departamento=dep)
+        nomina = Nomina.objects.create(
+            descripcion="Nomina Ene Q1 2025",
+            fecha_inicio="2025-01-01",
+            fecha_fin="2025-01-15",
+            fecha_pago="2025-01-15",
+            razon_social=rs
+        )
+        nomina.refresh_from_db()
+        return rs, puesto, nomina
+
+    def test_resultado_igual_a_calculo_individual(self, escenario):
+        rs, puesto, nomina = escenario
+        empleados = _crear_plantilla(3, rs, puesto)
+
+        NominaOrchestrator.procesar_nomina(nomina.id)
+
+        for emp in Empleado.objects.filter(pk__in=[e.pk for e in empleados]).select_related('datos_laborales'):
+            esperado = CalculoNominaService.calcular_proyeccion(emp, dias=15, anio=2025)
+            recibo = ReciboNomina.objects.get(nomina=nomina, empleado=emp)
+            assert recibo.subtotal == esperado['total_percepciones']
+            assert recibo.descuentos == esperado['total_deducciones']
+            assert recibo.neto == esperado['neto']
+            assert recibo.detalles.count() == 3
+
+        # Catálogo creado una sola vez, sin duplicados
+        assert ConceptoNomina.objects.filter(nombre__iexact='Sueldo').count() == 1
+
+    def test_recalculo_es_idempotente(self, escenario):
+        rs, puesto, nomina = escenario
+        _crear_plantilla(2, rs, puesto)
+
+        NominaOrchestrator.procesar_nomina(nomina.id)
+        NominaOrchestrator.procesar_nomina(nomina.id)
+
+        assert ReciboNomina.all_objects.filter(nomina=nomina).count() == 2
+        assert DetalleReciboItem.objects.filter(recibo__nomina=nomina).count() == 6
+
+    def test_usa_tablas_isr_y_subsidio_cuando_existen(self, escenario):
+        rs, puesto, nomina = escenario
+        _crear_plantilla(1, rs, puesto, mensual=Decimal('3000'))
+
+        tabla = TablaISR.objects.create(anio_vigencia=2025, tipo_periodo='QUINCENAL', descripcion='ISR Q 2025')
+        RenglonTablaISR.objects.create(tabla=tabla, limite_inferior=Decimal('0.01'), cuota_fija=Decimal('0'), porcentaje_excedente=Decimal('1.92'))
+        RenglonTablaISR.objects.create(tabla=tabla, limite_inferior=Decimal('368.11'), cuota_fija=Decimal('7.05'), porcentaje_excedente=Decimal('6.40'))
+        subsidio = SubsidioEmpleo.objects.create(anio_vigencia=2025)
+        RenglonSubsidio.objects.create(tabla=subsidio, ingreso_hasta=Decimal('5000'), monto_subsidio=Decimal('50.00'))
+
+        NominaOrchestrator.procesar_nomina(nomina.id)
+
+        recibo = ReciboNomina.objects.get(nomina=nomina)
+        base = recibo.subtotal
+        isr_bruto = ((base - Decimal('368.11')) * Decimal('0.064') + Decimal('7.05')).quantize(Decimal('0.01'))
+        assert recibo.impuestos_retenidos == isr_bruto - Decimal('50.00')
+
+    def test_consultas_constantes(self, escenario, django_assert_max_num_queries):
+        rs, puesto, nomina = escenario
+        _crear_plantilla(50, rs, puesto)
+
+        with django_assert_max_num_queries(20):
+            NominaBatchEngine(nomina).procesar()
+
+    @pytest.mark.slow
+    def test_benchmark_quincena_5000_empleados(self, escenario):
+        rs, puesto, nomina = escenario
+        _crear_plantilla(5000, rs, puesto)
+
+        inicio = time.perf_counter()
+        resultado = NominaBatchEngine(nomina).procesar()
+        duracion = time.perf_counter() - inicio
+
+        print(f"\nNómina por lotes: {resultado['recibos']} recibos en {duracion:.2f}s")
+        assert resultado['recibos'] == 5000
+        assert duracion < 15
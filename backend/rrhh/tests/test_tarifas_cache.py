@@ -0,0 +1,60 @@
+import pytest
+from decimal import Decimal
+from rrhh.engine import PayrollCalculator
+from rrhh.models import (
+    ConceptoNomina, TablaISR, RenglonTablaISR, SubsidioEmpleo, RenglonSubsidio
+)
+from rrhh.models_nomina import TipoConcepto, ClasificacionFiscal
+from rrhh.services.tarifas import TarifaCache
+
+
+@pytest.fixture
+def tablas_2025():
+    TarifaCache.invalidar()
+    tabla = TablaISR.objects.create(anio_vigencia=2025, tipo_periodo='QUINCENAL', descripcion='ISR Q 2025')
+    RenglonTablaISR.objects.create(tabla=tabla, limite_inferior=Decimal('0.01'), cuota_fija=Decimal('0'), porcentaje_excedente=Decimal('1.92'))
+    renglon = RenglonTablaISR.objects.create(tabla=tabla, limite_inferior=Decimal('368.11'), cuota_fija=Decimal('7.05'), porcentaje_excedente=Decimal('6.40'))
+    subsidio = SubsidioEmpleo.objects.create(anio_vigencia=2025)
+    RenglonSubsidio.objects.create(tabla=subsidio, ingreso_hasta=Decimal('5000'), monto_subsidio=Decimal('50.00'))
+    ConceptoNomina.objects.create(codigo='P001', nombre='Sueldo', clave_sat=ClasificacionFiscal.SUELDO, tipo=TipoConcepto.PERCEPCION)
+    return renglon
+
+
+@pytest.mark.django_db
+class TestTarifaCache:
+    def test_busquedas_sin_consultas(self, tablas_2025, django_assert_num_queries):
+        calc = PayrollCalculator(anio=2025)
+
+        with django_assert_num_queries(0):
+            isr = calc._calcular_isr(Decimal('1000'), 2025, periodo='QUINCENAL')
+            subsidio = calc._calcular_subsidio(Decimal('1000'), 2025)
+            concepto = calc._get_concepto_confiable(ClasificacionFiscal.SUELDO)
+            # Un segundo calculador reutiliza el snapshot del proceso
+            PayrollCalculator(anio=2025)
+
+        assert isr == ((Decimal('1000') - Decimal('368.11')) * Decimal('0.064') + Decimal('7.05')).quantize(Decimal('0.01'))
+        assert subsidio == Decimal('50.00')
+        assert concepto.codigo == 'P001'
+
+    def test_editar_renglon_invalida_snapshot(self, tablas_2025, django_capture_on_commit_callbacks):
+        antes = TarifaCache.tarifas(2025)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            tablas_2025.porcentaje_excedente = Decimal('10.88')
+            tablas_2025.save()
+
+        despues = TarifaCache.tarifas(2025)
+        assert despues is not antes
+        assert despues.calcular_isr(Decimal('1000')) == (
+            (Decimal('1000') - Decimal('368.11')) * Decimal('0.1088') + Decimal('7.05')
+        ).quantize(Decimal('0.01'))
+
+    def test_concepto_faltante_se_crea_una_vez(self, tablas_2025, django_assert_num_queries):
+        calc = PayrollCalculator(anio=2025)
+
+        primero = calc._get_concepto_confiable(ClasificacionFiscal.ISR, TipoConcepto.DEDUCCION)
+        with django_assert_num_queries(0):
+            segundo = calc._get_concepto_confiable(ClasificacionFiscal.ISR, TipoConcepto.DEDUCCION)
+
+        assert primero.pk == segundo.pk
+        assert ConceptoNomina.objects.filter(clave_sat=ClasificacionFiscal.ISR, tipo=TipoConcepto.DEDUCCION).count() == 1
@@ -7,6 +7,7 @@ from django.db.models import Sum
 from django.http import HttpResponse
 
 from core.permissions import HasPermissionForAction
+from core.services.export_jobs import exportacion_asincrona
 from .models import Nomina, ReciboNomina, Empleado, BuzonIMSS
 from .serializers_nomina import (
     NominaSerializer, NominaDetailSerializer, 
@@ -238,43 +239,41 @@ class HistoricoNominaViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['empresa', 'periodo', 'nombre', 'codigo']
 
+    COLUMNAS_EXPORT = [
+        ('Esquema', 'esquema'), ('Tipo', 'tipo'), ('Periodo', 'periodo'), ('Empresa', 'empresa'),
+        ('Código', 'codigo'), ('Nombre', 'nombre'), ('Depto', 'departamento'), ('Puesto', 'puesto'),
+        ('Neto Mensual', 'neto_mensual'), ('SDO', 'sueldo_diario'), ('Días', 'dias_trabajados'),
+        ('Sueldo', 'sueldo'), ('Vacaciones', 'vacaciones'), ('Prima Vacacional', 'prima_vacacional'),
+        ('Aguinaldo', 'aguinaldo'), ('Retroactivo', 'retroactivo'), ('Subsidio', 'subsidio'),
+        ('Total Percepciones', 'total_percepciones'), ('ISR', 'isr'), ('IMSS', 'imss'),
+        ('Préstamo', 'prestamo'), ('Infonavit', 'infonavit'), ('Total Deducciones', 'total_deducciones'),
+        ('Neto', 'neto'), ('ISN', 'isn'), ('Previo Costo Social', 'previo_costo_social'),
+        ('Total Carga Social', 'total_carga_social'), ('Total Nómina', 'total_nomina'),
+        ('Nóminas y Costos Tributario', 'nominas_y_costos'), ('Comisión', 'comision'),
+        ('Sub-Total', 'sub_total'), ('IVA', 'iva'), ('Total Facturación', 'total_facturacion'),
+    ]
+
     @decorators.action(detail=False, methods=['get'], url_path='exportar-excel')
+    @exportacion_asincrona
     def exportar_excel(self, request):
-        """Exporta el histórico filtrado a Excel."""
-        import openpyxl
-        from django.http import HttpResponse
+        """Exporta el histórico filtrado a Excel (o CSV con ?formato=csv) en streaming."""
+        from core.services.export_service import ExportService
 
         # Filtrar queryset con los mismos filtros de la vista
         qs = self.filter_queryset(self.get_queryset())
-        
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Histórico Nómina"
-
-        # Headers
-        headers = [
-            'Esquema', 'Tipo', 'Periodo', 'Empresa', 'Código', 'Nombre', 'Depto', 'Puesto',
-            'Neto Mensual', 'SDO', 'Días', 'Sueldo', 'Vacaciones', 'Prima Vacacional', 'Aguinaldo',
-            'Retroactivo', 'Subsidio', 'Total Percepciones', 'ISR', 'IMSS', 'Préstamo', 'Infonavit',
-            'Total Deducciones', 'Neto', 'ISN', 'Previo Costo Social', 'Total Carga Social',
-            'Total Nómina', 'Nóminas y Costos Tributario', 'Comisión', 'Sub-Total', 'IVA', 'Total Facturación'
-        ]
-        ws.append(headers)
-
-        for item in qs:
-            ws.append([
-                item.esquema, item.tipo, item.periodo, item.empresa, item.codigo, item.nombre, item.departamento, item.puesto,
-                item.neto_mensual, item.sueldo_diario, item.dias_trabajados, item.sueldo, 
-                item.vacaciones, item.prima_vacacional, item.aguinaldo,
-                item.retroactivo, item.subsidio, item.total_percepciones, item.isr, item.imss, item.prestamo, item.infonavit,
-                item.total_deducciones, item.neto, item.isn, item.previo_costo_social, item.total_carga_social,
-                item.total_nomina, item.nominas_y_costos, item.comision, item.sub_total, item.iva, item.total_facturacion
-            ])
-            
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = 'attachment; filename="historico_nomina.xlsx"'
-        wb.save(response)
-        return response
+        formato = request.query_params.get('formato', 'xlsx')
+        if formato not in ExportService.FORMATOS:
+            return Response({"error": f"Formato no soportado: {formato}"}, status=400)
+
+        headers = [encabezado for encabezado, _ in self.COLUMNAS_EXPORT]
+        campos = [campo for _, campo in self.COLUMNAS_EXPORT]
+        filas = qs.values_list(*campos).iterator(chunk_size=ExportService.CHUNK_SIZE)
+
+        # Valores nativos: los importes quedan como números en Excel
+        return ExportService.respuesta(
+            filas, headers, "Histórico Nómina",
+            formato=formato, nombre_archivo="historico_nomina", formatear=False,
+        )
 
     @decorators.action(detail=False, methods=['delete'], url_path='borrar-todo')
     def borrar_todo(self, request):
@@ -196,3 +196,25 @@ class TestMovimientosBancarios:
         # Verificar cantidad de movimientos
         movimientos = MovimientoBancario.objects.filter(cuenta=self.cuenta)
         assert movimientos.count() == 3
+
+    def test_turnos_pendientes_excluye_depositados(self):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from tesoreria.views import TurnoPorRecolectarView
+
+        pendiente = Turno.objects.create(
+            caja=self.caja,
+            usuario=self.usuario,
+            estado='CERRADA',
+            fecha_cierre=timezone.now()
+        )
+        MovimientoBancarioService.procesar_corte_caja(
+            turno_id=self.turno.id,
+            cuenta_id=self.cuenta.id,
+            usuario=self.usuario
+        )
+
+        request = APIRequestFactory().get('/tesoreria/turnos-pendientes/')
+        force_authenticate(request, user=self.usuario)
+        response = TurnoPorRecolectarView.as_view()(request)
+
+        assert [t['id'] for t in response.data['results']] == [pendiente.id]
@@ -4,7 +4,7 @@ from rest_framework.views import APIView
 from .services.deuda_service import DeudaService
 from .services.pago_service import PaymentSchedulerService
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Q, Exists, OuterRef
 
 from .models import CuentaBancaria, MovimientoBancario, Egreso, ContraRecibo
 from .serializers import (
@@ -142,16 +142,15 @@ class TurnoPorRecolectarView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Obtener IDs de turnos que ya tienen movimiento bancario
-        turnos_depositados = MovimientoBancario.objects.filter(
-            origen_tipo='POS_TURNO'
-        ).values_list('origen_id', flat=True)
-        
-        # Obtener turnos cerrados que NO están en la lista de depositados
+        # Turnos cerrados sin movimiento bancario (anti-join NOT EXISTS,
+        # usa el índice origen_tipo/origen_id sin materializar la lista de ids)
+        depositado = MovimientoBancario.objects.filter(
+            origen_tipo='POS_TURNO',
+            origen_id=OuterRef('pk')
+        )
         turnos_pendientes = Turno.objects.filter(
+            ~Exists(depositado),
             estado='CERRADA'
-        ).exclude(
-            id__in=turnos_depositados
         ).select_related('caja', 'usuario').order_by('-fecha_cierre')
         
         # Serializar manualmente (o crear un TurnoSerializer si es necesario)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        # Invalida los permisos precompilados al editar roles y sus relaciones
+        from users.services.permission_set_service import PermissionSetService
+        PermissionSetService.conectar_senales()
@@ -1,11 +1,16 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import Permission
 from .models import CustomUser
+from .services.permission_set_service import PermissionSetService
 
 class RolePermissionBackend(ModelBackend):
     """
     Backend de autenticación que permite a Django reconocer los permisos 
     asignados a través de Roles personalizados.
+
+    get_all_permissions/has_perm leen el set precompilado de
+    PermissionSetService (permisos directos, de grupos y de roles), por lo
+    que no hace falta encadenar ModelBackend en AUTHENTICATION_BACKENDS.
     """
     def get_user_permissions(self, user_obj, obj=None):
         if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
@@ -22,8 +27,8 @@ class RolePermissionBackend(ModelBackend):
         if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
             return set()
 
-        # Combinar permisos nativos de Django con permisos de Roles
-        return super().get_all_permissions(user_obj, obj) | self.get_user_permissions(user_obj, obj)
+        # Permisos nativos de Django + permisos de Roles (cacheados por versión)
+        return set(PermissionSetService.permisos(user_obj))
 
     def has_perm(self, user_obj, perm, obj=None):
         if not user_obj.is_active or user_obj.is_anonymous:
@@ -32,5 +37,7 @@ class RolePermissionBackend(ModelBackend):
         # Superusuario tiene todo
         if user_obj.is_superuser:
             return True
-            
-        return perm in self.get_all_permissions(user_obj, obj)
+
+        if obj is not None:
+            return False
+        return PermissionSetService.has_perm(user_obj, perm)
@@ -0,0 +1,109 @@
+"""
+Permisos efectivos precompilados por usuario.
+
+Cada usuario tiene en cache un frozenset con todos sus permisos
+('app_label.codename'): directos, de grupos y de roles. La clave incluye el
+`token_version` del usuario (update_token_version la invalida) y la
+generación de roles (cualquier edición de Role o de las relaciones de
+permisos la incrementa), así que revisar un permiso es un `in` sobre el set.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed
+
+from core.services.cache_service import CacheService
+
+
+class PermissionSetService:
+    PREFIX = 'perms:'
+    CACHE_TIMEOUT = 3600 * 6  # 6 horas: la invalidación es por versión
+    MODELO_ROLES = 'users.Role'
+
+    @classmethod
+    def _cache_key(cls, user) -> str:
+        ns = CacheService.namespace(cls.PREFIX, depende_de=[cls.MODELO_ROLES])
+        return f"{ns}{user.pk}:{user.token_version}:{int(user.is_superuser)}"
+
+    @staticmethod
+    def calcular(user) -> frozenset:
+        """Permisos efectivos desde la BD en una sola consulta."""
+        permisos = Permission.objects.all()
+        if not user.is_superuser:
+            permisos = permisos.filter(
+                Q(roles__users=user) | Q(user=user) | Q(group__user=user)
+            )
+        return frozenset(
+            f"{app_label}.{codename}"
+            for app_label, codename in permisos.values_list(
+                'content_type__app_label', 'codename'
+            ).distinct()
+        )
+
+    @classmethod
+    def permisos(cls, user) -> frozenset:
+        """
+        Permisos efectivos del usuario. Se memorizan en la instancia por
+        token_version para no ir al cache en cada has_perm del mismo request.
+        """
+        if not user.is_active or user.is_anonymous:
+            return frozenset()
+        memo = getattr(user, '_permission_set', None)
+        if memo and memo[0] == user.token_version:
+            return memo[1]
+
+        key = cls._cache_key(user)
+        permisos = cache.get(key)
+        if permisos is None:
+            permisos = cls.calcular(user)
+            cache.set(key, permisos, cls.CACHE_TIMEOUT)
+        user._permission_set = (user.token_version, permisos)
+        return permisos
+
+    @classmethod
+    def has_perm(cls, user, perm: str) -> bool:
+        if not user.is_active or user.is_anonymous:
+            return False
+        if user.is_superuser:
+            return True
+        return perm in cls.permisos(user)
+
+    @classmethod
+    def has_any_perm(cls, user, perms) -> bool:
+        """True si el usuario tiene al menos uno de `perms` (o si no se exige ninguno)."""
+        perms = [p for p in perms if p]
+        if not perms or (user.is_active and user.is_superuser):
+            return True
+        return not cls.permisos(user).isdisjoint(perms)
+
+    @classmethod
+    def invalidar(cls):
+        """Incrementa la versión de roles: todos los sets se recalculan."""
+        CacheService.invalidar_dependencia(cls.MODELO_ROLES)
+
+    @classmethod
+    def conectar_senales(cls):
+        from users.models import Role
+
+        # Role.save()/delete() (incluye baja lógica)
+        CacheService.registrar_dependencia(cls.MODELO_ROLES, empresa=None)
+        User = get_user_model()
+        relaciones = (
+            Role.permissions.through,
+            User.roles.through,
+            User.user_permissions.through,
+            User.groups.through,
+            Group.permissions.through,
+        )
+        for through in relaciones:
+            m2m_changed.connect(
+                _invalidar_por_relacion, sender=through,
+                dispatch_uid=f"permission_set:{through._meta.label}",
+            )
+
+
+def _invalidar_por_relacion(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(PermissionSetService.invalidar)
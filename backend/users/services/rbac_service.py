@@ -1,5 +1,6 @@
 from django.shortcuts import get_object_or_404
 from users.models import CustomUser, Role
+from users.services.permission_set_service import PermissionSetService
 
 class RBACService:
     """
@@ -36,7 +37,8 @@ class RBACService:
         if user.is_superuser:
             return True
             
-        return user.has_perm(perm_string)
+        # Set precompilado (roles + permisos directos/grupos), cacheado por versión
+        return PermissionSetService.has_perm(user, perm_string)
 
     @staticmethod
     def get_user_roles(user):
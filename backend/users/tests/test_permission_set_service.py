@@ -0,0 +1,62 @@
+import pytest
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from users.models import CustomUser, Role
+from users.services.permission_set_service import PermissionSetService
+
+
+@pytest.mark.django_db
+class TestPermissionSetService:
+    def setup_method(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username="permisos", is_active=True)
+        self.role = Role.objects.create(nombre="Tesorero", descripcion="Manejo de bancos")
+        content_type = ContentType.objects.get_for_model(CustomUser)
+        self.permission = Permission.objects.create(
+            codename="can_pay", name="Can Pay", content_type=content_type,
+        )
+        self.directo = Permission.objects.get(codename="view_customuser")
+        self.role.permissions.add(self.permission)
+        self.user.roles.add(self.role)
+        self.user.user_permissions.add(self.directo)
+
+    def _fresco(self):
+        return CustomUser.objects.get(pk=self.user.pk)
+
+    def test_roles_y_directos_en_un_set(self):
+        assert PermissionSetService.permisos(self._fresco()) >= {"users.can_pay", "users.view_customuser"}
+
+    def test_has_perm_sin_consultas_en_estado_estable(self, django_assert_num_queries):
+        PermissionSetService.permisos(self._fresco())
+        user = self._fresco()
+
+        with django_assert_num_queries(0):
+            assert user.has_perm("users.can_pay")
+            assert user.has_perm("users.view_customuser")
+            assert not user.has_perm("users.delete_customuser")
+
+    def test_editar_rol_invalida(self, django_capture_on_commit_callbacks):
+        assert self._fresco().has_perm("users.can_pay")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self.role.permissions.remove(self.permission)
+
+        assert not self._fresco().has_perm("users.can_pay")
+
+    def test_update_token_version_invalida(self):
+        assert self._fresco().has_perm("users.can_pay")
+        # Sin señales (UPDATE directo): solo la nueva versión obliga a recalcular
+        Role.permissions.through.objects.filter(role=self.role).delete()
+        user = self._fresco()
+        assert user.has_perm("users.can_pay")
+
+        user.update_token_version()
+
+        assert not self._fresco().has_perm("users.can_pay")
+
+    def test_has_any_perm(self):
+        user = self._fresco()
+        assert PermissionSetService.has_any_perm(user, ["ia.view_x", "users.can_pay"])
+        assert not PermissionSetService.has_any_perm(user, ["ia.view_x"])
+        assert PermissionSetService.has_any_perm(user, [""])
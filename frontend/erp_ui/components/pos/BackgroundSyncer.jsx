@@ -2,7 +2,9 @@
 import { useEffect, useRef } from 'react';
 import { usePOS } from '@/hooks/usePOS';
 import { posDB, SALES_STATUS } from '@/db/posDB';
-import { createVenta } from '@/services/pos';
+import { sincronizarVentas } from '@/services/pos';
+
+const LOTE = 200;
 import { toast } from 'sonner';
 
 export default function BackgroundSyncer() {
@@ -28,13 +30,29 @@ export default function BackgroundSyncer() {
             toast.info(`📡 Sincronizando ${pending.length} ventas pendientes...`, { duration: 3000 });
 
             let synced = 0;
-            for (const sale of pending) {
+            for (let i = 0; i < pending.length; i += LOTE) {
+                const lote = pending.slice(i, i + LOTE);
                 try {
-                    await createVenta(sale.payload);
-                    await posDB.salesQueue.delete(sale.id);
-                    synced++;
+                    const { data } = await sincronizarVentas(lote.map((sale) => ({
+                        ...sale.payload,
+                        uuid_terminal: sale.uuid,
+                        turno_id: sale.payload.turno_id ?? sale.payload.turno,
+                        fecha: new Date(sale.timestamp).toISOString(),
+                    })));
+
+                    // creada o duplicada: ya está en el servidor
+                    const aplicadas = lote
+                        .filter((_, idx) => data.resultados[idx]?.estado !== 'error')
+                        .map((sale) => sale.id);
+                    lote.forEach((sale, idx) => {
+                        if (data.resultados[idx]?.estado === 'error') {
+                            console.error("Sync rejected sale", sale.id, data.resultados[idx].detalle);
+                        }
+                    });
+                    await posDB.salesQueue.bulkDelete(aplicadas);
+                    synced += aplicadas.length;
                 } catch (error) {
-                    console.error("Sync retry failed for sale", sale.id, error);
+                    console.error("Sync retry failed for batch", error);
                 }
             }
 
@@ -20,8 +20,8 @@ export function useCatalogSync() {
         const stored = localStorage.getItem('pos_last_sync');
         const now = Date.now();
 
-        // Sync if never synced or > 1 hour old
-        if (!stored || (now - parseInt(stored) > 3600000)) {
+        // Sync if never synced or > 5 min old (solo baja cambios, es barato)
+        if (!stored || (now - parseInt(stored) > 300000)) {
             await syncCatalog();
         }
     };
@@ -31,33 +31,36 @@ export function useCatalogSync() {
             setIsSyncing(true);
             setSyncError(null);
 
-            // Get from optimized endpoint
-            const res = await apiClient.get('/pos/productos/productos-fast/');
-            // Correct URL path? in views.py I added 'productos-fast' action to ProductoViewSet
-            // ProductoViewSet is mapped to 'router.register(r'productos', ProductoViewSet)'
-            // So URL is /pos/productos/productos-fast/
+            // Feed incremental: sin versión baja el catálogo completo; con versión solo los cambios
+            let version = localStorage.getItem('pos_catalog_version');
+            let hayMas = true;
 
-            // Let me re-verify URL.
-            // In backend/pos/urls.py: router.register(r'productos', ProductoViewSet)
-            // In ProductoViewSet: @action(url_path='productos-fast')
-            // So url is /pos/productos/productos-fast/
-
-            // Wait, previous step I implemented it in ProductoViewSet.
-            // Let's correct the URL in the code below.
-
-            const products = res.data;
+            while (hayMas) {
+                const res = await apiClient.get('/pos/productos/productos-fast/', {
+                    params: version ? { since: version } : {},
+                });
+                const { campos, productos, eliminados, completo } = res.data;
+                const filas = productos.map((fila) =>
+                    Object.fromEntries(campos.map((campo, i) => [campo, fila[i]]))
+                );
 
-            if (Array.isArray(products)) {
                 await posDB.transaction('rw', posDB.products, async () => {
-                    await posDB.products.clear();
-                    await posDB.products.bulkPut(products);
+                    if (completo) await posDB.products.clear();
+                    if (eliminados.length) await posDB.products.bulkDelete(eliminados);
+                    if (filas.length) await posDB.products.bulkPut(filas);
                 });
 
-                const now = Date.now();
-                localStorage.setItem('pos_last_sync', now.toString());
-                setLastSync(new Date(now));
+                if (res.data.version) {
+                    version = res.data.version;
+                    localStorage.setItem('pos_catalog_version', version);
+                }
+                hayMas = res.data.hay_mas;
             }
 
+            const now = Date.now();
+            localStorage.setItem('pos_last_sync', now.toString());
+            setLastSync(new Date(now));
+
         } catch (err) {
             console.error("Catalog Sync Error", err);
             setSyncError("No se pudo actualizar el catálogo. Se usará la copia local.");
@@ -38,6 +38,7 @@ export function usePOS() {
     const processSale = async (payload) => {
         // 1. Save to Local Queue (Always save first for resilience)
         const saleId = await posDB.salesQueue.add({
+            uuid: crypto.randomUUID(), // idempotencia al sincronizar en lote
             payload,
             status: SALES_STATUS.PENDING,
             timestamp: Date.now()
@@ -34,6 +34,11 @@ export const cobrarVenta = async (payload) => {
     return await api.post('/pos/ventas-pos/cobrar/', payload);
 };
 
+// Ventas capturadas sin conexión: idempotente por uuid_terminal
+export const sincronizarVentas = async (ventas) => {
+    return await api.post('/pos/ventas-pos/sincronizar/', { ventas });
+};
+
 export const getVentas = async (params) => {
     return await api.get('/pos/ventas-pos/', { params });
 };